@@ -1,3 +1,4 @@
+import click
 from flask import Flask
 from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
@@ -124,6 +125,7 @@ def create_app():
         AlertEvent,
         UserAlert,
         AlertDetectorCheckpoint,
+        RankingSnapshot,
     )
 
     ALLOWED_ORIGINS = [
@@ -156,20 +158,126 @@ def create_app():
 
     # ---- CLI: refresh the metrics materialized view after a daily scrape ----
     @app.cli.command("refresh-mv")
-    def refresh_mv():
-        """Refresh page_posts_metrics_mv, posts_history_mv, and posts_mv so API reads reflect the latest scrape.
+    @click.option(
+        "--full",
+        is_flag=True,
+        help="Rebuild incrementally maintained metrics tables from scratch "
+             "(picks up entity/category renames) instead of folding in new snapshots.",
+    )
+    def refresh_mv(full):
+        """Refresh page_posts_metrics_mv, posts_history_mv, and posts_mv so API reads reflect the latest scrape,
+        then rebuild the precomputed ranking snapshots from the fresh views.
+
+        Once api/database/incremental_mv_tables.sql has been applied, only the
+        pages_history rows added since the last run are folded in; run with
+        --full periodically (e.g. weekly) to resync denormalized entity data
+        (names, to_scrape) and drop rows of deleted pages_history snapshots,
+        which incremental runs never remove.
 
         Run this from the same cron as the daily scrape, e.g.:
             flask refresh-mv
         """
+        from datetime import datetime, timedelta
+
         from api.repositories.page_history_repository import PageHistoryRepository
+        from api.repositories.page_history_stats_repository import (
+            PAGES_HISTORY_STATS_RECOUNT_DAYS,
+            PageHistoryStatsRepository,
+        )
         from api.services.alert_engine_service import AlertEngineService
+        from api.services.influence_history_service import InfluenceHistoryService
 
-        PageHistoryRepository.refresh_metrics_mv()
+        view_stats = PageHistoryRepository.refresh_metrics_mv(full=full)
         AlertEngineService.mark_mv_refreshed()
+        for entry in view_stats:
+            rows = "?" if entry["rows"] is None else entry["rows"]
+            if entry["mode"] == "refresh":
+                rows = f"~{rows}"
+            app.logger.info(
+                "%s %s: %s rows in %.3fs", entry["view"], entry["mode"], rows, entry["elapsed_s"],
+            )
+            print(f"{entry['view']}: {entry['mode']}, {rows} rows, {entry['elapsed_s']:.3f}s")
         app.logger.info("Materialized views (page_posts_metrics_mv, posts_history_mv, posts_mv) refreshed successfully")
         print("Materialized views refreshed successfully")
 
+        # Snapshots from the bulk loader bypass PageHistoryRepository.create;
+        # recount the days they can land on (everything with --full).
+        since = None if full else datetime.now().date() - timedelta(days=PAGES_HISTORY_STATS_RECOUNT_DAYS)
+        stats_rows = PageHistoryStatsRepository.rebuild(since=since)
+        app.logger.info("pages_history_stats recounted since %s: %s rows", since or "the start", stats_rows)
+        print(f"pages_history_stats recounted ({stats_rows} rows)")
+
+        snapshots = InfluenceHistoryService.rebuild_ranking_snapshots()
+        app.logger.info(
+            "Ranking snapshots rebuilt for %s: %s rankings, %s rows",
+            snapshots["snapshot_date"], snapshots["rankings"], snapshots["rows"],
+        )
+        print(f"Ranking snapshots rebuilt ({snapshots['rankings']} rankings, {snapshots['rows']} rows)")
+
+    @app.cli.command("rebuild-sentiment-daily")
+    def rebuild_sentiment_daily():
+        """Recompute comment_sentiment_daily from the labels stored on comments.
+
+        Label writes through the API keep the rollup current on their own; run
+        this after changing labels directly in SQL, e.g.:
+            flask rebuild-sentiment-daily
+        """
+        from api.repositories.comment_sentiment_daily_repository import CommentSentimentDailyRepository
+
+        rows = CommentSentimentDailyRepository.rebuild()
+        app.logger.info("comment_sentiment_daily rebuilt: %s rows", rows)
+        print(f"comment_sentiment_daily rebuilt ({rows} rows)")
+
+    @app.cli.command("rebuild-pages-history-stats")
+    def rebuild_pages_history_stats():
+        """Recompute pages_history_stats from pages_history.
+
+        New snapshots keep it current on their own (see `flask refresh-mv`);
+        run this after deleting or editing history rows directly in SQL, e.g.:
+            flask rebuild-pages-history-stats
+        """
+        from api.repositories.page_history_stats_repository import PageHistoryStatsRepository
+
+        rows = PageHistoryStatsRepository.rebuild()
+        app.logger.info("pages_history_stats rebuilt: %s rows", rows)
+        print(f"pages_history_stats rebuilt ({rows} rows)")
+
+    @app.cli.command("expire-subscriptions")
+    def expire_subscriptions():
+        """Expire subscriptions past ends_at, activate pending ones whose
+        starts_at has come, and re-sync the affected users' roles.
+
+        Requests no longer do this themselves; run it from cron every few
+        minutes, e.g.:
+            */5 * * * * flask expire-subscriptions
+        """
+        from api.services.subscription_service import SubscriptionService
+
+        result = SubscriptionService.expire_due_subscriptions()
+        app.logger.info("subscription sweep: %s", result)
+        print(
+            f"subscriptions expired: {result['expired']}, activated: {result['activated']}, "
+            f"users synced: {result['users_synced']}"
+        )
+
+    @app.cli.command("warm-insights")
+    @click.option("--workers", type=int, default=None, help="Concurrent LLM calls (default 4).")
+    def warm_insights(workers):
+        """Pregenerate the standard AI insights (top brands per ranking period,
+        followers graph per tracked entity) so dashboard requests hit the cache.
+
+        Run it right after the daily refresh, e.g.:
+            flask refresh-mv && flask warm-insights
+        """
+        from api.services.ai_insight_service import PREGENERATE_WORKERS, pregenerate_standard_insights
+
+        result = pregenerate_standard_insights(workers=workers or PREGENERATE_WORKERS)
+        app.logger.info("AI insights warmed: %s", result)
+        print(
+            f"insights generated: {result['generated']}/{result['jobs']}, "
+            f"skipped: {result['skipped']}, failed: {result['failed']}"
+        )
+
     @app.errorhandler(SQLAlchemyError)
     def handle_database_error(error):
         from api.routes.main import db_error_response
@@ -43,6 +43,12 @@ CREATE INDEX IF NOT EXISTS idx_ppmm_to_scrape
     WHERE to_scrape = true;
 
 
+-- Index for posts_mv (used by the cursor-paginated entity posts timeline:
+-- an entity's pages, newest posts first, keyset on the full sort key)
+CREATE INDEX IF NOT EXISTS idx_pm_page_created
+    ON posts_mv (page_id, created_at DESC, platform DESC, post_id DESC);
+
+
 -- =============================================================================
 -- Verify Indexes
 -- =============================================================================
@@ -0,0 +1,476 @@
+-- =============================================================================
+-- incremental_mv_tables.sql
+--
+-- Switches page_posts_metrics_mv, posts_history_mv and posts_mv from
+-- materialized views to plain tables (same names, same columns, same
+-- indexes) that `flask refresh-mv` maintains incrementally.
+--
+-- Why
+-- ---
+-- REFRESH MATERIALIZED VIEW recomputes every row from all of pages_history,
+-- so refresh time grows with history length. As tables, each refresh only
+-- appends/upserts the rows derived from pages_history snapshots newer than
+-- a watermark (pages_history.id), which keeps it proportional to one scrape.
+--
+-- How it fits together
+-- --------------------
+-- page_posts_metrics_src / posts_history_src  – plain (non-materialized)
+--     views holding the exact SELECTs from mv_queries.sql and
+--     posts_mv_queries.sql, plus a history_id column on posts_history_src.
+--     A `WHERE history_id > :watermark` on them is pushed down to the
+--     pages_history primary key, so reading one scrape's rows is cheap.
+-- page_posts_metrics_mv / posts_history_mv / posts_mv  – tables. Readers are
+--     unchanged; PageHistoryRepository.refresh_metrics_mv detects the tables
+--     and switches to incremental mode automatically.
+-- alert_detector_checkpoints['mv_incremental']  – the watermark (cursor_text
+--     = last pages_history.id folded in), next to the existing 'mv_refresh'
+--     marker.
+--
+-- Rows derived from snapshots that are edited in place (admin corrections)
+-- are re-derived by the correction flow; entity/category renames are picked
+-- up by the periodic `flask refresh-mv --full`, which rebuilds the tables
+-- from the source views.
+--
+-- Run once, in a maintenance window. To go back, drop the three tables and
+-- source views and re-run mv_queries.sql and posts_mv_queries.sql.
+-- =============================================================================
+
+BEGIN;
+
+-- Seed the watermark first: everything up to it is copied below, and
+-- anything newer is re-read (idempotently) by the first incremental run.
+INSERT INTO alert_detector_checkpoints (detector_name, cursor_text, updated_at)
+VALUES ('mv_incremental', (SELECT COALESCE(MAX(id), 0)::text FROM pages_history), now())
+ON CONFLICT (detector_name)
+DO UPDATE SET cursor_text = EXCLUDED.cursor_text, updated_at = EXCLUDED.updated_at;
+
+
+-- =============================================================================
+-- 1.  Source views
+-- =============================================================================
+CREATE OR REPLACE VIEW page_posts_metrics_src AS
+SELECT 
+    ph.page_id      AS page_id,
+    ph.id           AS history_id,
+    ph.recorded_at  AS recorded_at,
+    p.platform      AS platform,
+    e.id            AS entity_id,
+    c.name          AS category,
+    e.name          AS entity_name,
+    p.name          AS page_name,
+    p.link          AS page_url,
+    e.to_scrape     AS to_scrape,
+    c2.name         AS root_category,
+
+    --  Profile image URL
+    CASE
+        WHEN p.platform = 'youtube'   THEN ph.data->>'profile_image'
+        WHEN p.platform = 'x'         THEN ph.data->>'profile_image_link'
+        WHEN p.platform = 'tiktok'    THEN ph.data->>'profile_pic_url'
+        WHEN p.platform = 'linkedin'  THEN ph.data->>'logo'
+        WHEN p.platform = 'instagram' THEN ph.data->>'profile_image_link'
+        WHEN p.platform = 'facebook'  THEN ph.data->>'page_logo'
+        ELSE NULL
+    END AS profile_url,
+
+    --  Followers / Subscribers
+    CASE
+        WHEN p.platform = 'youtube'  THEN NULLIF(ph.data->>'subscribers', '')::BIGINT
+        WHEN p.platform = 'facebook' THEN NULLIF(ph.data->>'page_followers', '')::BIGINT
+        ELSE NULLIF(ph.data->>'followers', '')::BIGINT
+    END AS raw_followers,
+
+    --  Posts metrics
+    CASE 
+        WHEN p.platform = 'instagram'
+            AND jsonb_typeof(COALESCE(ph.data->'posts', '[]'::jsonb)) = 'array'
+        THEN 
+            (
+                SELECT jsonb_agg(
+                    jsonb_build_object(
+                        'id',            post->>'id',
+                        'datetime',      post->>'datetime',
+                        'comments',      post->'comments',
+                        'likes',         post->'likes',
+                        'caption',       post->'caption',
+                        'content_type',  post->'content_type',
+                        'image_url',     post->'image_url',
+                        'video_url',     post->'video_url',
+                        'url',           post->'url',
+                        'is_pinned',     post->'is_pinned'
+                    )
+                )
+                FROM jsonb_array_elements(COALESCE(ph.data->'posts', '[]'::jsonb)) AS post
+            )
+
+        WHEN p.platform = 'linkedin'
+            AND jsonb_typeof(COALESCE(ph.data->'updates', '[]'::jsonb)) = 'array'
+        THEN 
+            (
+                SELECT jsonb_agg(
+                    jsonb_build_object(
+                        'post_id',             post->>'post_id',
+                        'date',                post->>'date',
+                        'comments_count',      post->'comments_count',
+                        'likes_count',         post->'likes_count',
+                        'post_url',            post->'post_url',
+                        'repost',              post->'repost',
+                        'tagged_companies',    post->'tagged_companies',
+                        'tagged_people',       post->'tagged_people',
+                        -- Scraper stores the LinkedIn caption under text_html
+                        -- (sometimes text); keep both so the caption renders.
+                        'text',                post->'text',
+                        'text_html',           post->'text_html'
+                    )
+                )
+                FROM jsonb_array_elements(COALESCE(ph.data->'updates', '[]'::jsonb)) AS post
+            )
+
+        WHEN p.platform = 'tiktok'
+            AND jsonb_typeof(COALESCE(ph.data->'top_videos', '[]'::jsonb)) = 'array'
+        THEN 
+            (
+                SELECT jsonb_agg(
+                    jsonb_build_object(
+                        'video_id',        post->>'video_id',
+                        'create_date',     post->>'create_date',
+                        'commentcount',    post->'commentcount',
+                        'share_count',     post->'share_count',
+                        'favorites_count', post->'favorites_count',
+                        'playcount',       post->'playcount',
+                        'video_url',       post->>'video_url',
+                        'cover_image',     post->>'cover_image'
+                    )
+                )
+                FROM jsonb_array_elements(COALESCE(ph.data->'top_videos', '[]'::jsonb)) AS post
+            )
+        -- Facebook: each pages_history row IS one post (flat, no array)
+        WHEN p.platform = 'facebook' AND ph.data->>'post_id' IS NOT NULL
+        THEN
+            jsonb_build_array(
+                jsonb_build_object(
+                    'post_id',              ph.data->>'post_id',
+                    'date_posted',          ph.data->>'date_posted',
+                    'content',              ph.data->>'content',
+                    'url',                  ph.data->>'url',
+                    'post_type',            ph.data->>'post_type',
+                    'likes',                ph.data->'likes',
+                    'num_comments',         ph.data->'num_comments',
+                    'num_shares',           ph.data->'num_shares',
+                    'video_view_count',     ph.data->'video_view_count',
+                    'play_count',           ph.data->'play_count',
+                    'post_image',           ph.data->>'post_image',
+                    'count_reactions_type', ph.data->'count_reactions_type',
+                    'attachments',          ph.data->'attachments',
+                    'hashtags',             ph.data->'hashtags',
+                    'is_sponsored',         ph.data->'is_sponsored',
+                    'delegate_page_id',     ph.data->>'delegate_page_id'
+                )
+            )
+
+        ELSE '[]'::jsonb
+    END AS posts_metrics
+
+FROM pages_history ph
+JOIN pages p    ON p.uuid = ph.page_id
+JOIN entities e ON e.id   = p.entity_id
+JOIN entity_category ec ON ec.entity_id = e.id
+JOIN categories c ON c.id   = ec.category_id
+LEFT JOIN categories c2 ON c2.id = c.parent_id;
+
+CREATE OR REPLACE VIEW posts_history_src AS
+SELECT
+    history_id,
+    page_id,
+    platform,
+    recorded_at,
+    post_id,
+    created_at,
+    url,
+    likes,
+    comments,
+    shares,
+    views,
+    caption,
+    content_type,
+    image_url,
+    video_url,
+    is_pinned,
+    extra_data
+FROM (
+    -- ── Instagram ──────────────────────────────────────────────────────────────
+    SELECT
+        ph.id                                                   AS history_id,
+        ph.page_id,
+        'instagram'::varchar(20)                                AS platform,
+        ph.recorded_at,
+        post->>'id'                                             AS post_id,
+        COALESCE((post->>'datetime')::timestamp, ph.recorded_at) AS created_at,
+        post->>'url'                                            AS url,
+        COALESCE((post->>'likes')::bigint, (post->>'likes_count')::bigint, 0) AS likes,
+        COALESCE((post->>'comments')::bigint, (post->>'comments_count')::bigint, 0) AS comments,
+        NULL::bigint                                            AS shares,
+        NULL::bigint                                            AS views,
+        post->>'caption'                                        AS caption,
+        post->>'content_type'                                   AS content_type,
+        post->>'image_url'                                      AS image_url,
+        post->>'video_url'                                      AS video_url,
+        (post->>'is_pinned')::boolean                           AS is_pinned,
+        post                                                    AS extra_data
+    FROM pages_history ph
+    JOIN pages p ON p.uuid = ph.page_id AND p.platform = 'instagram'
+    CROSS JOIN LATERAL jsonb_array_elements(
+        COALESCE(ph.data->'posts', '[]'::jsonb)
+    ) AS post
+    WHERE jsonb_typeof(ph.data->'posts') = 'array'
+      AND post->>'id' IS NOT NULL
+
+    UNION ALL
+
+    -- ── LinkedIn ──────────────────────────────────────────────────────────────
+    SELECT
+        ph.id                                                   AS history_id,
+        ph.page_id,
+        'linkedin'::varchar(20)                                 AS platform,
+        ph.recorded_at,
+        post->>'post_id'                                        AS post_id,
+        COALESCE((post->>'date')::timestamp, ph.recorded_at)    AS created_at,
+        post->>'post_url'                                       AS url,
+        COALESCE((post->>'likes_count')::bigint, (post->>'likes')::bigint, 0) AS likes,
+        COALESCE((post->>'comments_count')::bigint, (post->>'comments')::bigint, 0) AS comments,
+        NULL::bigint                                            AS shares,  -- repost is a nested object, no simple count
+        NULL::bigint                                            AS views,
+        post->>'text'                                           AS caption,
+        'text'::varchar(50)                                     AS content_type,
+        NULL::text                                              AS image_url,
+        NULL::text                                              AS video_url,
+        NULL::boolean                                           AS is_pinned,
+        post                                                    AS extra_data
+    FROM pages_history ph
+    JOIN pages p ON p.uuid = ph.page_id AND p.platform = 'linkedin'
+    CROSS JOIN LATERAL jsonb_array_elements(
+        COALESCE(ph.data->'updates', '[]'::jsonb)
+    ) AS post
+    WHERE jsonb_typeof(ph.data->'updates') = 'array'
+      AND post->>'post_id' IS NOT NULL
+
+    UNION ALL
+
+    -- ── TikTok ────────────────────────────────────────────────────────────────
+    SELECT
+        ph.id                                                   AS history_id,
+        ph.page_id,
+        'tiktok'::varchar(20)                                  AS platform,
+        ph.recorded_at,
+        post->>'video_id'                                      AS post_id,
+        COALESCE((post->>'create_date')::timestamp, ph.recorded_at) AS created_at,
+        post->>'video_url'                                     AS url,
+        COALESCE((post->>'favorites_count')::bigint, (post->>'diggcount')::bigint, (post->>'likes')::bigint, 0) AS likes,
+        COALESCE((post->>'commentcount')::bigint, (post->>'comments_count')::bigint, (post->>'comments')::bigint, 0) AS comments,
+        COALESCE((post->>'share_count')::bigint, (post->>'shares')::bigint, 0) AS shares,
+        COALESCE((post->>'playcount')::bigint, (post->>'views')::bigint, 0) AS views,
+        NULL::text                                             AS caption,
+        'video'::varchar(50)                                   AS content_type,
+        post->>'cover_image'                                   AS image_url,
+        post->>'video_url'                                     AS video_url,
+        NULL::boolean                                          AS is_pinned,
+        post                                                   AS extra_data
+    FROM pages_history ph
+    JOIN pages p ON p.uuid = ph.page_id AND p.platform = 'tiktok'
+    CROSS JOIN LATERAL jsonb_array_elements(
+        COALESCE(ph.data->'top_videos', '[]'::jsonb)
+    ) AS post
+    WHERE jsonb_typeof(ph.data->'top_videos') = 'array'
+      AND post->>'video_id' IS NOT NULL
+
+    UNION ALL
+
+    -- ── YouTube ───────────────────────────────────────────────────────────────
+    SELECT
+        ph.id                                                   AS history_id,
+        ph.page_id,
+        'youtube'::varchar(20)                                 AS platform,
+        ph.recorded_at,
+        post->>'video_id'                                      AS post_id,
+        COALESCE((post->>'published_at')::timestamp, ph.recorded_at) AS created_at,
+        post->>'video_url'                                     AS url,
+        COALESCE((post->>'like_count')::bigint, (post->>'likes')::bigint, 0) AS likes,
+        COALESCE((post->>'comment_count')::bigint, (post->>'comments_count')::bigint, (post->>'comments')::bigint, 0) AS comments,
+        NULL::bigint                                           AS shares,
+        COALESCE((post->>'view_count')::bigint, (post->>'views')::bigint, 0) AS views,
+        post->>'title'                                         AS caption,
+        'video'::varchar(50)                                   AS content_type,
+        post->>'thumbnail_url'                                 AS image_url,
+        post->>'video_url'                                     AS video_url,
+        NULL::boolean                                          AS is_pinned,
+        post                                                   AS extra_data
+    FROM pages_history ph
+    JOIN pages p ON p.uuid = ph.page_id AND p.platform = 'youtube'
+    CROSS JOIN LATERAL jsonb_array_elements(
+        COALESCE(ph.data->'top_videos', '[]'::jsonb)
+    ) AS post
+    WHERE jsonb_typeof(ph.data->'top_videos') = 'array'
+      AND post->>'video_id' IS NOT NULL
+
+    UNION ALL
+
+    -- ── X / Twitter ───────────────────────────────────────────────────────────
+    SELECT
+        ph.id                                                   AS history_id,
+        ph.page_id,
+        'x'::varchar(20)                                       AS platform,
+        ph.recorded_at,
+        COALESCE(post->>'post_id', post->>'id')                AS post_id,
+        COALESCE((post->>'date_posted')::timestamp, (post->>'created_at')::timestamp, ph.recorded_at) AS created_at,
+        post->>'url'                                           AS url,
+        COALESCE((post->>'likes')::bigint, (post->>'like_count')::bigint, 0) AS likes,
+        COALESCE((post->>'replies')::bigint, (post->>'comments')::bigint, 0) AS comments,
+        COALESCE((post->>'reposts')::bigint, (post->>'shares')::bigint, 0) AS shares,
+        COALESCE((post->>'views')::bigint, 0)                  AS views,
+        post->>'content'                                       AS caption,
+        'post'::varchar(50)                                    AS content_type,
+        NULL::text                                             AS image_url,
+        NULL::text                                             AS video_url,
+        NULL::boolean                                          AS is_pinned,
+        post                                                   AS extra_data
+    FROM pages_history ph
+    JOIN pages p ON p.uuid = ph.page_id AND p.platform = 'x'
+    CROSS JOIN LATERAL jsonb_array_elements(
+        COALESCE(ph.data->'posts', '[]'::jsonb)
+    ) AS post
+    WHERE jsonb_typeof(ph.data->'posts') = 'array'
+      AND COALESCE(post->>'post_id', post->>'id') IS NOT NULL
+
+    UNION ALL
+
+    -- ── Facebook ──────────────────────────────────────────────────────────────
+    -- Each pages_history row is one Facebook post (flat, not an array).
+    SELECT
+        ph.id                                                   AS history_id,
+        ph.page_id,
+        'facebook'::varchar(20)                                AS platform,
+        ph.recorded_at,
+        COALESCE(ph.data->>'post_id', ph.data->>'postId')       AS post_id,
+        CASE
+            WHEN ph.data->>'date_posted' IS NOT NULL AND ph.data->>'date_posted' != '' THEN (ph.data->>'date_posted')::timestamp
+            WHEN ph.data->>'time' IS NOT NULL AND ph.data->>'time' != '' THEN (ph.data->>'time')::timestamp
+            WHEN ph.data->>'timestamp' ~ '^[0-9]+$' THEN (to_timestamp((ph.data->>'timestamp')::bigint) AT TIME ZONE 'UTC')::timestamp
+            ELSE ph.recorded_at
+        END                                                    AS created_at,
+        ph.data->>'url'                                        AS url,
+        COALESCE(
+            (ph.data->>'likes')::bigint,
+            (ph.data->>'topReactionsCount')::bigint,
+            (ph.data->>'reactionLikeCount')::bigint,
+            0
+        )                                                      AS likes,
+        COALESCE(
+            (ph.data->>'num_comments')::bigint,
+            (ph.data->>'comments')::bigint,
+            0
+        )                                                      AS comments,
+        COALESCE(
+            (ph.data->>'num_shares')::bigint,
+            (ph.data->>'shares')::bigint,
+            0
+        )                                                      AS shares,
+        COALESCE(
+            (ph.data->>'video_view_count')::bigint,
+            (ph.data->>'play_count')::bigint,
+            (ph.data->>'videoPostViewCount')::bigint,
+            (ph.data->>'viewsCount')::bigint,
+            0
+        )                                                      AS views,
+        COALESCE(ph.data->>'content', ph.data->>'text')        AS caption,
+        ph.data->>'post_type'                                  AS content_type,
+        ph.data->>'post_image'                                 AS image_url,
+        NULL::text                                             AS video_url,
+        NULL::boolean                                          AS is_pinned,
+        ph.data                                                AS extra_data
+    FROM pages_history ph
+    JOIN pages p ON p.uuid = ph.page_id AND p.platform = 'facebook'
+    WHERE COALESCE(ph.data->>'post_id', ph.data->>'postId') IS NOT NULL
+) raw_posts;
+
+
+-- =============================================================================
+-- 2.  Replace the materialized views with tables
+-- =============================================================================
+DROP MATERIALIZED VIEW IF EXISTS posts_mv CASCADE;
+DROP MATERIALIZED VIEW IF EXISTS posts_history_mv CASCADE;
+DROP MATERIALIZED VIEW IF EXISTS page_posts_metrics_mv CASCADE;
+
+-- ── page_posts_metrics_mv ───────────────────────────────────────────────────
+CREATE TABLE page_posts_metrics_mv AS
+SELECT * FROM page_posts_metrics_src;
+
+CREATE UNIQUE INDEX idx_ppmm_unique ON page_posts_metrics_mv (history_id);
+CREATE INDEX idx_ppmm_page_id ON page_posts_metrics_mv (page_id);
+CREATE INDEX idx_ppmm_platform ON page_posts_metrics_mv (platform);
+CREATE INDEX idx_ppmm_recorded_at ON page_posts_metrics_mv (recorded_at DESC);
+CREATE INDEX idx_ppmm_page_time ON page_posts_metrics_mv (page_id, recorded_at DESC);
+CREATE INDEX idx_ppmm_entity_id ON page_posts_metrics_mv (entity_id);
+CREATE INDEX idx_ppmm_entity_date ON page_posts_metrics_mv (entity_id, recorded_at DESC);
+CREATE INDEX idx_ppmm_platform_date_scrape
+    ON page_posts_metrics_mv (platform, recorded_at DESC)
+    WHERE to_scrape = true;
+CREATE INDEX idx_ppmm_to_scrape
+    ON page_posts_metrics_mv (to_scrape)
+    WHERE to_scrape = true;
+
+-- ── posts_history_mv ────────────────────────────────────────────────────────
+CREATE TABLE posts_history_mv AS
+SELECT DISTINCT ON (page_id, platform, post_id, recorded_at) *
+FROM posts_history_src
+ORDER BY page_id, platform, post_id, recorded_at DESC;
+
+CREATE UNIQUE INDEX idx_phm_unique
+    ON posts_history_mv (page_id, platform, post_id, recorded_at);
+CREATE INDEX idx_phm_page_platform
+    ON posts_history_mv (page_id, platform);
+CREATE INDEX idx_phm_recorded_at
+    ON posts_history_mv (recorded_at DESC);
+CREATE INDEX idx_phm_created_at
+    ON posts_history_mv (created_at DESC);
+-- Drives the posts_mv upsert and the per-snapshot re-derive.
+CREATE INDEX idx_phm_history_id
+    ON posts_history_mv (history_id);
+
+-- ── posts_mv ────────────────────────────────────────────────────────────────
+CREATE TABLE posts_mv AS
+SELECT DISTINCT ON (page_id, platform, post_id)
+    page_id,
+    platform,
+    post_id,
+    created_at,
+    url,
+    likes,
+    comments,
+    shares,
+    views,
+    caption,
+    content_type,
+    image_url,
+    video_url,
+    is_pinned,
+    extra_data,
+    recorded_at
+FROM posts_history_mv
+ORDER BY page_id, platform, post_id, recorded_at DESC;
+
+CREATE UNIQUE INDEX idx_pm_unique
+    ON posts_mv (page_id, platform, post_id);
+CREATE INDEX idx_pm_page_platform
+    ON posts_mv (page_id, platform);
+CREATE INDEX idx_pm_created_at
+    ON posts_mv (created_at DESC);
+CREATE INDEX idx_pm_page_created
+    ON posts_mv (page_id, created_at DESC, platform DESC, post_id DESC);
+CREATE INDEX idx_pm_recorded_at_key
+    ON posts_mv (recorded_at, page_id, platform, post_id);
+
+COMMIT;
+
+ANALYZE page_posts_metrics_mv;
+ANALYZE posts_history_mv;
+ANALYZE posts_mv;
@@ -283,6 +283,14 @@ CREATE INDEX idx_pm_page_platform
 CREATE INDEX idx_pm_created_at
     ON posts_mv (created_at DESC);
 
+-- Keyset order of the cursor-paginated entity posts timeline, per page.
+CREATE INDEX idx_pm_page_created
+    ON posts_mv (page_id, created_at DESC, platform DESC, post_id DESC);
+
+-- Keyset order of the keyword_post alert detector's chunked scan.
+CREATE INDEX idx_pm_recorded_at_key
+    ON posts_mv (recorded_at, page_id, platform, post_id);
+
 
 -- =============================================================================
 -- 3.  Refresh
@@ -17,6 +17,10 @@ from .alert_rule_keyword_model import AlertRuleKeyword
 from .alert_event_model import AlertEvent
 from .user_alert_model import UserAlert
 from .alert_detector_checkpoint_model import AlertDetectorCheckpoint
+from .ranking_snapshot_model import RankingSnapshot
+from .scrape_queue_model import ScrapeQueueItem
+from .comment_sentiment_daily_model import CommentSentimentDaily
+from .page_history_stats_model import PageHistoryStats
 
 # optional: put all models in __all__ to make imports cleaner
 __all__ = [
@@ -38,6 +42,10 @@ __all__ = [
     "AlertEvent",
     "UserAlert",
     "AlertDetectorCheckpoint",
+    "RankingSnapshot",
+    "ScrapeQueueItem",
+    "CommentSentimentDaily",
+    "PageHistoryStats",
 ]
 
 
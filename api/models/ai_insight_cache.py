@@ -11,3 +11,6 @@ class AiInsightCache(db.Model):
     model_used = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     expires_at = db.Column(db.DateTime, nullable=False)
+    # Generation lease: while set and in the future, one worker is calling the
+    # LLM for this key and others wait for its result (see try_claim).
+    generating_until = db.Column(db.DateTime, nullable=True)
@@ -1,6 +1,7 @@
 # Database model definitions for comment model.
 from datetime import datetime
 from sqlalchemy import inspect
+from sqlalchemy.dialects.postgresql import UUID
 from api import db
 
 
@@ -14,8 +15,10 @@ class Comment(db.Model):
     # Primary Key
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     
-    # Composite Foreign Key to Post (page_id, platform, post_id)
-    page_id = db.Column(db.String(36), nullable=False)
+    # Composite Foreign Key to Post (page_id, platform, post_id). Native uuid,
+    # like pages.uuid, so joins to pages and posts_mv compare without casts;
+    # as_uuid=False keeps it a plain string on the Python side.
+    page_id = db.Column(UUID(as_uuid=False), nullable=False)
     platform = db.Column(db.String(20), nullable=False)
     post_id = db.Column(db.String(100), nullable=False)
     
@@ -68,7 +71,11 @@ class Comment(db.Model):
         db.UniqueConstraint('page_id', 'platform', 'post_id', 'comment_id', 
                            name='uq_comment_composite'),
         db.Index('ix_comment_post_lookup', 'page_id', 'platform', 'post_id'),
+        db.Index('ix_comment_page_timestamp', 'page_id', 'comment_timestamp'),
         db.Index('ix_comment_session', 'scraping_session_id'),
+        # Keyset orders of the alert detectors' chunked scans.
+        db.Index('ix_comment_recorded_at_id', 'recorded_at', 'id'),
+        db.Index('ix_comment_label_event_ts', db.func.coalesce(label_updated_at, recorded_at), 'id'),
     )
     
     def to_dict(self):
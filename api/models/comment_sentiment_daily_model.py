@@ -0,0 +1,41 @@
+# Database model definitions for comment sentiment daily model.
+from sqlalchemy import inspect
+from sqlalchemy.dialects.postgresql import UUID
+from api import db
+
+
+class CommentSentimentDaily(db.Model):
+    """
+    Labeled-comment counts per (entity, page, platform, day, label), where
+    `day` is the date of the comment's `comment_timestamp`.
+
+    Kept in step with `comments` by `CommentRepository.update_label` and
+    `bulk_update_labels`, which apply the difference each label write makes
+    (old label out, new label in). The sentiment endpoints read this table
+    instead of aggregating `comments` on every request. `flask
+    rebuild-sentiment-daily` recomputes it from `comments` if it ever drifts
+    (e.g. after labels were written directly in SQL).
+
+    `confidence_sum` / `confidence_count` give the average confidence;
+    `confidence_count` excludes comments labeled without a confidence, as
+    `AVG(confidence)` would.
+    """
+    __tablename__ = "comment_sentiment_daily"
+
+    entity_id = db.Column(db.Integer, primary_key=True)
+    page_id = db.Column(UUID(as_uuid=False), primary_key=True)
+    platform = db.Column(db.String(20), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    label = db.Column(db.Integer, primary_key=True)
+
+    comment_count = db.Column(db.BigInteger, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+    confidence_count = db.Column(db.BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        # Ranking: every entity over a day window.
+        db.Index("ix_comment_sentiment_daily_day", "day", "entity_id"),
+    )
+
+    def to_dict(self):
+        return {c.key: getattr(self, c.key) for c in inspect(self).mapper.column_attrs}
@@ -0,0 +1,41 @@
+# Database model definitions for page history stats model.
+from sqlalchemy import inspect
+from sqlalchemy.dialects.postgresql import UUID
+from api import db
+
+
+class PageHistoryStats(db.Model):
+    """
+    pages_history snapshot counts per (page, day), where `day` is the date of
+    the snapshot's `recorded_at`.
+
+    `PageHistoryRepository.create` adds each snapshot it writes. Snapshots
+    written by the out-of-band bulk loader are picked up by `flask refresh-mv`,
+    which recomputes the last days from `pages_history`. `flask
+    rebuild-pages-history-stats` recomputes everything. The pages history
+    summary and options endpoints read this table instead of scanning
+    `pages_history` on every request.
+
+    Snapshots without a page are not counted; the history browser drops
+    them in its pages join too.
+    """
+    __tablename__ = "pages_history_stats"
+
+    page_id = db.Column(
+        UUID(as_uuid=True),
+        db.ForeignKey("pages.uuid", ondelete="CASCADE", onupdate="CASCADE"),
+        primary_key=True,
+    )
+    day = db.Column(db.Date, primary_key=True)
+
+    snapshot_count = db.Column(db.BigInteger, nullable=False, default=0)
+    first_recorded_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    last_recorded_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Summary windows: every page over the last N days.
+        db.Index("ix_pages_history_stats_day", "day"),
+    )
+
+    def to_dict(self):
+        return {c.key: getattr(self, c.key) for c in inspect(self).mapper.column_attrs}
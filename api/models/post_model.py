@@ -1,5 +1,6 @@
 # Database model definitions for post model.
 from sqlalchemy import inspect
+from sqlalchemy.dialects.postgresql import UUID
 from api import db
 
 
@@ -11,8 +12,9 @@ class PostMV(db.Model):
     __tablename__ = "posts_mv"
 
     # Composite PK mirrors the unique index on the MV.
-    # Using String(36) for UUID — compatible with both PostgreSQL and SQLite.
-    page_id     = db.Column(db.String(36), primary_key=True)
+    # The view's page_id is pages_history.page_id, a native uuid; as_uuid=False
+    # hands it to Python as a string.
+    page_id     = db.Column(UUID(as_uuid=False), primary_key=True)
     platform    = db.Column(db.String(20), primary_key=True)
     post_id     = db.Column(db.String(100), primary_key=True)
 
@@ -63,7 +65,7 @@ class PostHistoryMV(db.Model):
     __tablename__ = "posts_history_mv"
 
     # Composite PK mirrors the unique index on the MV.
-    page_id     = db.Column(db.String(36), primary_key=True)
+    page_id     = db.Column(UUID(as_uuid=False), primary_key=True)
     platform    = db.Column(db.String(20), primary_key=True)
     post_id     = db.Column(db.String(100), primary_key=True)
     recorded_at = db.Column(db.DateTime, primary_key=True)
@@ -0,0 +1,58 @@
+# Database model definitions for ranking snapshot model.
+from datetime import datetime
+from sqlalchemy import inspect
+from api import db
+
+
+class RankingSnapshot(db.Model):
+    """
+    One precomputed ranking row per (ranking_kind, period, entity_type,
+    snapshot_date, entity). Written by `flask refresh-mv` right after the
+    materialized views are refreshed, so the ranking endpoints can serve the
+    standard periods with an index lookup instead of re-aggregating
+    `posts_mv` / `page_posts_metrics_mv` and re-scoring every row in Python.
+
+    `payload` is the exact entity dict the live ranking builds (platforms
+    breakdown included, `rank` excluded). The sort keys are copied into real
+    columns so the read path can ORDER BY them and assign rank in one pass.
+    """
+    __tablename__ = "ranking_snapshots"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+
+    # "interactions" (drives interactions/likes/comments rankings) or
+    # "followers_progress" (drives the progress and current-followers sorts).
+    ranking_kind = db.Column(db.String(40), nullable=False)
+    # Canonical period key, e.g. "30d", "7d", or "default" for no params.
+    period = db.Column(db.String(20), nullable=False)
+    # Entity kind the ranking was restricted to; "all" when unrestricted.
+    entity_type = db.Column(db.String(20), nullable=False)
+    snapshot_date = db.Column(db.Date, nullable=False)
+
+    entity_id = db.Column(db.Integer, nullable=False)
+    # Position in the live ranking's build order — the tie-breaker that keeps
+    # equal scores in the same order the live computation would return.
+    position = db.Column(db.Integer, nullable=False, default=0)
+
+    total_score = db.Column(db.Float, nullable=False, default=0.0)
+    total_likes = db.Column(db.BigInteger, nullable=False, default=0)
+    total_comments = db.Column(db.BigInteger, nullable=False, default=0)
+    total_followers = db.Column(db.BigInteger, nullable=False, default=0)
+    followers_progress = db.Column(db.BigInteger, nullable=False, default=0)
+
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "ranking_kind", "period", "entity_type", "snapshot_date", "entity_id",
+            name="uq_ranking_snapshot_entity",
+        ),
+        db.Index(
+            "ix_ranking_snapshot_lookup",
+            "ranking_kind", "period", "entity_type", "snapshot_date",
+        ),
+    )
+
+    def to_dict(self):
+        return {c.key: getattr(self, c.key) for c in inspect(self).mapper.column_attrs}
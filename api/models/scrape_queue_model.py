@@ -0,0 +1,53 @@
+# Database model definitions for scrape queue model.
+from datetime import datetime
+from sqlalchemy import inspect
+from sqlalchemy.dialects.postgresql import UUID
+from api import db
+
+
+class ScrapeQueueItem(db.Model):
+    """
+    One post queued for comment scraping on `queue_date`.
+
+    `POST /api/scraping/queue` fills the day's queue once from the same
+    candidate query as `GET /api/scraping/posts`; scraper workers then pull
+    disjoint batches with `POST /api/scraping/queue/lease`. A leased item is
+    invisible to other workers until `lease_expires_at`, after which it is
+    handed out again (a worker that died mid-batch loses nothing). Posting
+    the post's comments or `post_results` to `/api/scraping/comments`
+    acknowledges it (`status = 'done'`).
+    """
+    __tablename__ = "scrape_queue_items"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    queue_date = db.Column(db.Date, nullable=False)
+
+    page_id = db.Column(UUID(as_uuid=False), nullable=False)
+    platform = db.Column(db.String(20), nullable=False)
+    post_id = db.Column(db.String(100), nullable=False)
+    # The post as the scraper receives it (PostMV.to_scraping_dict()).
+    payload = db.Column(db.JSON, nullable=False)
+
+    # pending -> leased -> done; an expired lease counts as pending again.
+    status = db.Column(db.String(20), nullable=False, default="pending")
+    lease_owner = db.Column(db.String(36), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "queue_date", "page_id", "platform", "post_id",
+            name="uq_scrape_queue_post",
+        ),
+        db.Index("ix_scrape_queue_lease", "queue_date", "status", "id"),
+        db.CheckConstraint(
+            "status IN ('pending', 'leased', 'done')",
+            name="ck_scrape_queue_status",
+        ),
+    )
+
+    def to_dict(self):
+        return {c.key: getattr(self, c.key) for c in inspect(self).mapper.column_attrs}
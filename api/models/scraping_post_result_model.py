@@ -1,6 +1,7 @@
 # Database model definitions for scraping post result model.
 from datetime import datetime
 from sqlalchemy import inspect
+from sqlalchemy.dialects.postgresql import UUID
 from api import db
 
 
@@ -18,7 +19,7 @@ class ScrapingPostResult(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
 
     # Post identification
-    page_id  = db.Column(db.String(36), nullable=False)
+    page_id  = db.Column(UUID(as_uuid=False), nullable=False)
     platform = db.Column(db.String(20), nullable=False)
     post_id  = db.Column(db.String(100), nullable=False)
 
@@ -27,9 +27,76 @@ def _log_repository_error(method_name: str, error: Exception, context: dict | No
     repository_logger.critical(json.dumps(payload, ensure_ascii=True, default=str))
 
 
-def find_by_key(cache_key: str) -> AiInsightCache | None:
-    """Return the row for this cache_key, or None."""
-    return AiInsightCache.query.filter_by(cache_key=cache_key).first()
+# Placeholder expiry of a row created only to hold a generation lease: long
+# past, so the row never reads as a fresh summary.
+_NEVER_FRESH = datetime(1970, 1, 1)
+
+
+def find_by_key(cache_key: str, reload: bool = False) -> AiInsightCache | None:
+    """Return the row for this cache_key, or None. `reload` re-reads it from
+    the database even if this session already holds it (used after taking the
+    generation lease, in case the previous holder stored a summary since the
+    first read)."""
+    query = AiInsightCache.query.filter_by(cache_key=cache_key)
+    if reload:
+        query = query.execution_options(populate_existing=True)
+    return query.first()
+
+
+def try_claim(cache_key: str, view_type: str, lease_until: datetime, now: datetime) -> bool:
+    """
+    Take the generation lease for cache_key until `lease_until`, unless
+    another worker holds a live one. The row is created (as an expired
+    placeholder) when the key has never been generated.
+
+    Returns:
+        bool: True if this caller now holds the lease
+    """
+    try:
+        if db.engine.dialect.name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+        db.session.execute(
+            dialect_insert(AiInsightCache)
+            .values(
+                cache_key=cache_key,
+                view_type=view_type,
+                summary_text="",
+                expires_at=_NEVER_FRESH,
+            )
+            .on_conflict_do_nothing(index_elements=["cache_key"])
+        )
+        claimed = (
+            AiInsightCache.query.filter(
+                AiInsightCache.cache_key == cache_key,
+                db.or_(
+                    AiInsightCache.generating_until.is_(None),
+                    AiInsightCache.generating_until <= now,
+                ),
+            )
+            .update({"generating_until": lease_until}, synchronize_session=False)
+        )
+        db.session.commit()
+        return claimed == 1
+    except Exception as error:
+        db.session.rollback()
+        _log_repository_error("try_claim", error, context={"cache_key": cache_key, "view_type": view_type})
+        raise
+
+
+def release_claim(cache_key: str) -> None:
+    """Drop the generation lease for cache_key (generation failed)."""
+    try:
+        AiInsightCache.query.filter_by(cache_key=cache_key).update(
+            {"generating_until": None}, synchronize_session=False
+        )
+        db.session.commit()
+    except Exception as error:
+        db.session.rollback()
+        _log_repository_error("release_claim", error, context={"cache_key": cache_key})
+        raise
 
 
 def upsert(
@@ -56,6 +123,7 @@ def upsert(
             row.summary_text = summary_text
             row.model_used = model_used
             row.expires_at = expires_at
+        row.generating_until = None
 
         db.session.commit()
         return row
@@ -6,6 +6,31 @@ from api.models.alert_event_model import AlertEvent
 from api.models.user_alert_model import UserAlert
 from api.utils.logging_utils import instrument_repository_class
 
+ALERT_INSERT_CHUNK_SIZE = 500
+
+_EVENT_COLUMNS = (
+    "event_type",
+    "dedupe_key",
+    "severity",
+    "entity_id",
+    "page_id",
+    "platform",
+    "post_id",
+    "comment_pk",
+    "label",
+    "matched_keyword",
+    "payload",
+    "event_at",
+)
+
+
+def _dialect_insert():
+    if db.engine.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    return dialect_insert
+
 
 @instrument_repository_class
 class AlertEventRepository:
@@ -31,26 +56,116 @@ class AlertEventRepository:
             raise
 
     @staticmethod
-    def fanout_to_users(event_id: int, rule_ids_by_user: dict[int, int], commit: bool = True) -> int:
+    def bulk_create_or_get(
+        events: list[dict],
+        commit: bool = True,
+        chunk_size: int = ALERT_INSERT_CHUNK_SIZE,
+    ) -> tuple[dict[str, int], set[str]]:
+        """
+        Insert many events at once, keeping whatever already exists.
+
+        Events are deduped by `dedupe_key` in memory (the first occurrence
+        wins), then written with one `INSERT ... ON CONFLICT (dedupe_key) DO
+        NOTHING RETURNING id, dedupe_key` per `chunk_size` events. Keys that
+        were already stored are resolved to their ids with one IN query per
+        chunk.
+
+        Returns:
+            tuple: ({dedupe_key: event_id} for every event, set of dedupe_keys
+            that were newly created)
+        """
+        unique: dict[str, dict] = {}
+        for event in events:
+            unique.setdefault(event["dedupe_key"], event)
+        if not unique:
+            return {}, set()
+
+        now = datetime.utcnow()
+        rows = []
+        for event in unique.values():
+            row = {column: event.get(column) for column in _EVENT_COLUMNS}
+            row["event_at"] = row["event_at"] or now
+            row["created_at"] = now
+            rows.append(row)
+
+        stmt = (
+            _dialect_insert()(AlertEvent)
+            .on_conflict_do_nothing(index_elements=[AlertEvent.dedupe_key])
+            .returning(AlertEvent.id, AlertEvent.dedupe_key)
+        )
+        chunk_size = max(1, int(chunk_size))
+        ids: dict[str, int] = {}
+        for start in range(0, len(rows), chunk_size):
+            for event_id, dedupe_key in db.session.execute(stmt, rows[start:start + chunk_size]):
+                ids[dedupe_key] = event_id
+        created = set(ids)
+
+        existing_keys = [key for key in unique if key not in ids]
+        for start in range(0, len(existing_keys), chunk_size):
+            found = (
+                db.session.query(AlertEvent.id, AlertEvent.dedupe_key)
+                .filter(AlertEvent.dedupe_key.in_(existing_keys[start:start + chunk_size]))
+                .all()
+            )
+            for event_id, dedupe_key in found:
+                ids[dedupe_key] = event_id
+
+        if commit:
+            db.session.commit()
+        return ids, created
+
+    @staticmethod
+    def bulk_fanout(
+        recipients: list[tuple[int, int, int | None]],
+        commit: bool = True,
+        chunk_size: int = ALERT_INSERT_CHUNK_SIZE,
+    ) -> int:
+        """
+        Create unread user alerts for (event_id, user_id, rule_id) triples with
+        one `INSERT ... ON CONFLICT DO NOTHING` per `chunk_size` rows; pairs a
+        user already has are skipped.
+
+        Returns:
+            int: Number of user alerts created
+        """
+        unique = list(dict.fromkeys(recipients))
+        if not unique:
+            return 0
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "event_id": event_id,
+                "user_id": user_id,
+                "rule_id": rule_id,
+                "status": "unread",
+                "created_at": now,
+            }
+            for event_id, user_id, rule_id in unique
+        ]
+        stmt = (
+            _dialect_insert()(UserAlert)
+            .on_conflict_do_nothing(
+                index_elements=[UserAlert.user_id, UserAlert.event_id, UserAlert.rule_id]
+            )
+            .returning(UserAlert.id)
+        )
+        chunk_size = max(1, int(chunk_size))
         inserted = 0
-        for user_id, rule_id in rule_ids_by_user.items():
-            existing = UserAlert.query.filter_by(
-                user_id=user_id, event_id=event_id, rule_id=rule_id
-            ).first()
-            if existing:
-                continue
-            row = UserAlert()
-            row.user_id = user_id
-            row.event_id = event_id
-            row.rule_id = rule_id
-            row.status = "unread"
-            db.session.add(row)
-            inserted += 1
+        for start in range(0, len(rows), chunk_size):
+            inserted += len(db.session.execute(stmt, rows[start:start + chunk_size]).all())
 
         if commit:
             db.session.commit()
         return inserted
 
+    @staticmethod
+    def fanout_to_users(event_id: int, rule_ids_by_user: dict[int, int], commit: bool = True) -> int:
+        return AlertEventRepository.bulk_fanout(
+            [(event_id, user_id, rule_id) for user_id, rule_id in rule_ids_by_user.items()],
+            commit=commit,
+        )
+
     @staticmethod
     def list_user_alerts(
         user_id: int,
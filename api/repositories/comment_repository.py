@@ -1,11 +1,18 @@
 # Data-access methods for comment repository.
 from datetime import timedelta, datetime
-from sqlalchemy import String, cast, func, nullslast
+from sqlalchemy import func, nullslast
 from api.models.comment_model import Comment, db
 from api.models.page_model import Page
-from api.models.entity_model import Entity
+from api.repositories.comment_sentiment_daily_repository import CommentSentimentDailyRepository
 from api.utils.logging_utils import instrument_repository_class
 
+# Comments per INSERT statement in bulk_create. 17 bound columns per row keeps
+# a full chunk well under both the Postgres and SQLite bind-parameter caps.
+COMMENT_INSERT_CHUNK_SIZE = 500
+
+# Columns of uq_comment_composite; the ON CONFLICT target of bulk_create.
+_COMMENT_CONFLICT_COLUMNS = ['page_id', 'platform', 'post_id', 'comment_id']
+
 
 def _apply_comment_window(query, start_date=None, end_date=None):
     """Restrict a comment query to the [start_date, end_date] window.
@@ -20,6 +27,21 @@ def _apply_comment_window(query, start_date=None, end_date=None):
     return query
 
 
+def _label_change(comment: Comment, label: int, confidence: float | None) -> tuple:
+    """(page, platform, timestamp, old label/confidence, new label/confidence)
+    for CommentSentimentDailyRepository.apply_label_changes. Call before the
+    comment is modified; a None `confidence` keeps the stored one."""
+    return (
+        comment.page_id,
+        comment.platform,
+        comment.comment_timestamp,
+        comment.label,
+        comment.confidence,
+        label,
+        comment.confidence if confidence is None else confidence,
+    )
+
+
 @instrument_repository_class
 class CommentRepository:
     """Repository for comment database operations."""
@@ -43,43 +65,51 @@ class CommentRepository:
         return comment
     
     @staticmethod
-    def bulk_create(comments_data: list[dict], commit: bool = True) -> tuple[int, int]:
+    def bulk_create(comments_data: list[dict], commit: bool = True,
+                    chunk_size: int = COMMENT_INSERT_CHUNK_SIZE) -> tuple[int, int]:
         """
         Insert multiple comments in a transaction.
         Skips duplicates based on composite unique constraint.
-        
+
+        Each chunk is a single `INSERT ... ON CONFLICT (uq_comment_composite
+        columns) DO NOTHING RETURNING id`, so a batch costs one round-trip per
+        `chunk_size` comments instead of an EXISTS query per comment. The
+        RETURNING rows are the comments actually written; everything else in
+        the chunk (already stored, or repeated within the batch) is skipped.
+
         Args:
             comments_data: List of dictionaries containing comment fields
             commit: Whether to commit the transaction
-            
+            chunk_size: Comments per INSERT statement
+
         Returns:
             tuple: (inserted_count, skipped_count)
         """
+        if not comments_data:
+            return 0, 0
+
+        if db.engine.dialect.name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+        stmt = (
+            dialect_insert(Comment)
+            .on_conflict_do_nothing(index_elements=_COMMENT_CONFLICT_COLUMNS)
+            .returning(Comment.id)
+        )
+
+        chunk_size = max(1, int(chunk_size))
         inserted_count = 0
-        skipped_count = 0
-        
-        for comment_dict in comments_data:
-            # Check if comment already exists
-            exists = CommentRepository.exists(
-                comment_dict['page_id'],
-                comment_dict['platform'],
-                comment_dict['post_id'],
-                comment_dict['comment_id']
-            )
-            
-            if exists:
-                skipped_count += 1
-                continue
-            
-            comment = Comment(**comment_dict)
-            db.session.add(comment)
-            inserted_count += 1
-        
+        for start in range(0, len(comments_data), chunk_size):
+            chunk = comments_data[start:start + chunk_size]
+            inserted_count += len(db.session.execute(stmt, chunk).all())
+
         if commit:
             db.session.commit()
-        
-        return inserted_count, skipped_count
-    
+
+        return inserted_count, len(comments_data) - inserted_count
+
     @staticmethod
     def exists(page_id: str, platform: str, post_id: str, comment_id: str) -> bool:
         """
@@ -206,10 +236,12 @@ class CommentRepository:
         
         comment = Comment.query.get(comment_id)
         if comment:
+            change = _label_change(comment, label, confidence)
             comment.label = label
             comment.label_updated_at = datetime.utcnow()
             if confidence is not None:
                 comment.confidence = confidence
+            CommentSentimentDailyRepository.apply_label_changes([change], commit=False)
             if commit:
                 db.session.commit()
         return comment
@@ -228,6 +260,14 @@ class CommentRepository:
             int: Number of comments updated
         """
         updated_count = 0
+        changes = []
+
+        # One IN query for the whole batch instead of a lookup per update.
+        ids = [update.get('comment_id') for update in label_updates]
+        comments = {
+            comment.id: comment
+            for comment in Comment.query.filter(Comment.id.in_([i for i in ids if i is not None]))
+        }
         
         for update in label_updates:
             comment_id = update.get('comment_id')
@@ -240,14 +280,17 @@ class CommentRepository:
             if confidence is not None and not (0.0 <= confidence <= 1.0):
                 continue  # Skip invalid confidence scores
             
-            comment = Comment.query.get(comment_id)
+            comment = comments.get(comment_id)
             if comment:
+                changes.append(_label_change(comment, label, confidence))
                 comment.label = label
                 comment.label_updated_at = datetime.utcnow()
                 if confidence is not None:
                     comment.confidence = confidence
                 comment.is_processed = True
                 updated_count += 1
+
+        CommentSentimentDailyRepository.apply_label_changes(changes, commit=False)
         
         if commit:
             db.session.commit()
@@ -372,52 +415,9 @@ class CommentRepository:
     # Sentiment is stored per comment as `label` (int 0-4) + `confidence`.
     # A comment links to a brand via page_id -> pages.uuid -> pages.entity_id.
     # All aggregations ignore unlabeled comments (label IS NULL).
-
-    @staticmethod
-    def get_sentiment_counts_by_entity(
-        entity_id: int, start_date=None, end_date=None
-    ) -> list[tuple]:
-        """
-        Count labeled comments per sentiment label for one entity/brand.
-
-        Args:
-            entity_id: The entity (brand) id
-            start_date: Optional lower bound on comment_timestamp
-            end_date: Optional (inclusive) upper bound on comment_timestamp
-
-        Returns:
-            list[tuple]: rows of (label, count, avg_confidence)
-        """
-        q = (
-            db.session.query(
-                Comment.label,
-                func.count(Comment.id),
-                func.avg(Comment.confidence),
-            )
-            .join(Page, cast(Page.uuid, String) == cast(Comment.page_id, String))
-            .filter(Page.entity_id == entity_id, Comment.label.isnot(None))
-        )
-        q = _apply_comment_window(q, start_date, end_date)
-        return q.group_by(Comment.label).order_by(Comment.label).all()
-
-    @staticmethod
-    def get_sentiment_trend_by_entity(
-        entity_id: int, start_date=None, end_date=None
-    ) -> list[tuple]:
-        """
-        Count labeled comments per (day, label) for one entity, for a trend chart.
-
-        Returns:
-            list[tuple]: rows of (day, label, count), ordered by day
-        """
-        day = func.date(Comment.comment_timestamp)
-        q = (
-            db.session.query(day, Comment.label, func.count(Comment.id))
-            .join(Page, cast(Page.uuid, String) == cast(Comment.page_id, String))
-            .filter(Page.entity_id == entity_id, Comment.label.isnot(None))
-        )
-        q = _apply_comment_window(q, start_date, end_date)
-        return q.group_by(day, Comment.label).order_by(day).all()
+    # Per-entity counts, trends and the ranking are served from the
+    # comment_sentiment_daily rollup (CommentSentimentDailyRepository), which
+    # the label writers above keep current.
 
     @staticmethod
     def get_example_comments_by_entity(
@@ -433,7 +433,7 @@ class CommentRepository:
         """
         q = (
             db.session.query(Comment)
-            .join(Page, cast(Page.uuid, String) == cast(Comment.page_id, String))
+            .join(Page, Page.uuid == Comment.page_id)
             .filter(Page.entity_id == entity_id, Comment.label.in_(labels))
         )
         q = _apply_comment_window(q, start_date, end_date)
@@ -488,41 +488,3 @@ class CommentRepository:
             .limit(limit)
             .all()
         )
-
-    @staticmethod
-    def get_sentiment_ranking(
-        start_date=None, end_date=None, platform=None
-    ) -> list[tuple]:
-        """
-        Count labeled comments per (entity, label) across all entities.
-
-        Args:
-            start_date: Optional lower bound on comment_timestamp
-            end_date: Optional (inclusive) upper bound on comment_timestamp
-            platform: Optional single platform ("instagram", "facebook", ...).
-                Filters on `Comment.platform` rather than `Page.platform`: the
-                two always agree (a page's uuid is derived from its platform),
-                but filtering the comment side lets Postgres cut rows before the
-                join instead of after it.
-
-        Returns:
-            list[tuple]: rows of (entity_id, entity_name, entity_type, label, count)
-        """
-        q = (
-            db.session.query(
-                Entity.id,
-                Entity.name,
-                Entity.type,
-                Comment.label,
-                func.count(Comment.id),
-            )
-            .join(Page, cast(Page.uuid, String) == cast(Comment.page_id, String))
-            .join(Entity, Entity.id == Page.entity_id)
-            .filter(Comment.label.isnot(None))
-        )
-        if platform:
-            q = q.filter(Comment.platform == platform)
-        q = _apply_comment_window(q, start_date, end_date)
-        return q.group_by(
-            Entity.id, Entity.name, Entity.type, Comment.label
-        ).all()
@@ -0,0 +1,214 @@
+# Data-access methods for comment sentiment daily repository.
+from datetime import date
+from uuid import UUID
+from sqlalchemy import func, insert, select
+from api import db
+from api.models.comment_model import Comment
+from api.models.comment_sentiment_daily_model import CommentSentimentDaily
+from api.models.entity_model import Entity
+from api.models.page_model import Page
+from api.utils.logging_utils import instrument_repository_class
+
+_ROLLUP_KEY = ["entity_id", "page_id", "platform", "day", "label"]
+
+
+def _apply_day_window(query, start_date=None, end_date=None):
+    """Same [start_date, end_date] window as the raw comment queries, on days."""
+    if start_date:
+        query = query.filter(CommentSentimentDaily.day >= start_date)
+    if end_date:
+        query = query.filter(CommentSentimentDaily.day <= end_date)
+    return query
+
+
+def _avg_confidence():
+    confidence_n = func.sum(CommentSentimentDaily.confidence_count)
+    return func.sum(CommentSentimentDaily.confidence_sum) / func.nullif(confidence_n, 0)
+
+
+@instrument_repository_class
+class CommentSentimentDailyRepository:
+    """Repository for the daily comment sentiment rollup."""
+
+    @staticmethod
+    def apply_label_changes(changes: list[tuple], commit: bool = True) -> int:
+        """
+        Fold label writes into the rollup.
+
+        Args:
+            changes: (page_id, platform, comment_timestamp, old_label,
+                old_confidence, new_label, new_confidence) per label write, in
+                the order they were applied. A None label means unlabeled.
+            commit: Whether to commit the transaction
+
+        Returns:
+            int: Number of rollup rows touched
+        """
+        deltas: dict[tuple, list] = {}
+
+        def _add(page_id, platform, day, label, confidence, sign):
+            if label is None:
+                return
+            delta = deltas.setdefault((str(page_id), platform, day, label), [0, 0.0, 0])
+            delta[0] += sign
+            if confidence is not None:
+                delta[1] += sign * confidence
+                delta[2] += sign
+
+        for page_id, platform, ts, old_label, old_conf, new_label, new_conf in changes:
+            day = ts.date()
+            _add(page_id, platform, day, old_label, old_conf, -1)
+            _add(page_id, platform, day, new_label, new_conf, +1)
+
+        deltas = {k: v for k, v in deltas.items() if v[0] or v[2] or v[1]}
+        if not deltas:
+            return 0
+
+        page_ids = {k[0] for k in deltas}
+        entity_by_page = {
+            str(uuid): entity_id
+            for uuid, entity_id in db.session.query(Page.uuid, Page.entity_id)
+            .filter(Page.uuid.in_([UUID(p) for p in page_ids]))
+            .all()
+        }
+
+        rows = [
+            {
+                "entity_id": entity_by_page[page_id],
+                "page_id": page_id,
+                "platform": platform,
+                "day": day,
+                "label": label,
+                "comment_count": count,
+                "confidence_sum": conf_sum,
+                "confidence_count": conf_n,
+            }
+            for (page_id, platform, day, label), (count, conf_sum, conf_n) in deltas.items()
+            # Comments of a page that no longer exists have no entity to count
+            # towards; the raw queries drop them in the pages join too.
+            if page_id in entity_by_page
+        ]
+        if rows:
+            if db.engine.dialect.name == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+            stmt = dialect_insert(CommentSentimentDaily).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=_ROLLUP_KEY,
+                set_={
+                    "comment_count": CommentSentimentDaily.comment_count + stmt.excluded.comment_count,
+                    "confidence_sum": CommentSentimentDaily.confidence_sum + stmt.excluded.confidence_sum,
+                    "confidence_count": CommentSentimentDaily.confidence_count + stmt.excluded.confidence_count,
+                },
+            )
+            db.session.execute(stmt)
+
+        if commit:
+            db.session.commit()
+        return len(rows)
+
+    @staticmethod
+    def rebuild(commit: bool = True) -> int:
+        """
+        Recompute the whole rollup from `comments`.
+
+        Returns:
+            int: Number of rollup rows written
+        """
+        day = func.date(Comment.comment_timestamp)
+        source = (
+            select(
+                Page.entity_id,
+                Comment.page_id,
+                Comment.platform,
+                day,
+                Comment.label,
+                func.count(Comment.id),
+                func.coalesce(func.sum(Comment.confidence), 0.0),
+                func.count(Comment.confidence),
+            )
+            .join(Page, Page.uuid == Comment.page_id)
+            .where(Comment.label.isnot(None))
+            .group_by(Page.entity_id, Comment.page_id, Comment.platform, day, Comment.label)
+        )
+
+        db.session.query(CommentSentimentDaily).delete(synchronize_session=False)
+        result = db.session.execute(
+            insert(CommentSentimentDaily).from_select(
+                _ROLLUP_KEY + ["comment_count", "confidence_sum", "confidence_count"],
+                source,
+            )
+        )
+        if commit:
+            db.session.commit()
+        return result.rowcount or 0
+
+    @staticmethod
+    def get_counts_by_entity(entity_id: int, start_date: date = None, end_date: date = None) -> list[tuple]:
+        """
+        Labeled comment counts per sentiment label for one entity.
+
+        Returns:
+            list[tuple]: rows of (label, count, avg_confidence)
+        """
+        q = (
+            db.session.query(
+                CommentSentimentDaily.label,
+                func.sum(CommentSentimentDaily.comment_count),
+                _avg_confidence(),
+            )
+            .filter(CommentSentimentDaily.entity_id == entity_id)
+        )
+        q = _apply_day_window(q, start_date, end_date)
+        rows = q.group_by(CommentSentimentDaily.label).order_by(CommentSentimentDaily.label).all()
+        return [row for row in rows if row[1]]
+
+    @staticmethod
+    def get_trend_by_entity(entity_id: int, start_date: date = None, end_date: date = None) -> list[tuple]:
+        """
+        Labeled comment counts per (day, label) for one entity.
+
+        Returns:
+            list[tuple]: rows of (day, label, count), ordered by day
+        """
+        q = (
+            db.session.query(
+                CommentSentimentDaily.day,
+                CommentSentimentDaily.label,
+                func.sum(CommentSentimentDaily.comment_count),
+            )
+            .filter(CommentSentimentDaily.entity_id == entity_id)
+        )
+        q = _apply_day_window(q, start_date, end_date)
+        rows = (
+            q.group_by(CommentSentimentDaily.day, CommentSentimentDaily.label)
+            .order_by(CommentSentimentDaily.day, CommentSentimentDaily.label)
+            .all()
+        )
+        return [row for row in rows if row[2]]
+
+    @staticmethod
+    def get_ranking(start_date: date = None, end_date: date = None, platform: str = None) -> list[tuple]:
+        """
+        Labeled comment counts per (entity, label) across all entities.
+
+        Returns:
+            list[tuple]: rows of (entity_id, entity_name, entity_type, label, count)
+        """
+        q = (
+            db.session.query(
+                Entity.id,
+                Entity.name,
+                Entity.type,
+                CommentSentimentDaily.label,
+                func.sum(CommentSentimentDaily.comment_count),
+            )
+            .join(Entity, Entity.id == CommentSentimentDaily.entity_id)
+        )
+        if platform:
+            q = q.filter(CommentSentimentDaily.platform == platform)
+        q = _apply_day_window(q, start_date, end_date)
+        rows = q.group_by(Entity.id, Entity.name, Entity.type, CommentSentimentDaily.label).all()
+        return [row for row in rows if row[4]]
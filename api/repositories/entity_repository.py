@@ -1,10 +1,12 @@
 # Data-access methods for entity repository.
+from datetime import date, datetime, time, timedelta
 from api import db
 from api.models import Entity
 from api.models.page_history_model import PageHistory
 from api.models.page_model import Page
+from api.utils.data_keys import platform_metrics
 from api.utils.logging_utils import instrument_repository_class
-from sqlalchemy import func, text
+from sqlalchemy import bindparam, func, text
 
 
 @instrument_repository_class
@@ -93,6 +95,11 @@ class EntityRepository:
         )
         return {row[0]: row[1] for row in rows}
 
+    @staticmethod
+    def get_active() -> list[Entity]:
+        """Entities flagged for scraping (to_scrape=True), by id."""
+        return Entity.query.filter(Entity.to_scrape.is_(True)).order_by(Entity.id).all()
+
     @staticmethod
     def count_active() -> int:
         return Entity.query.filter(Entity.to_scrape.is_(True)).count()
@@ -109,12 +116,66 @@ class EntityRepository:
         return EntityRepository._active_without_pages_query().count()
 
     @staticmethod
-    def get_entity_posts_metrics(entity_id: int, date_limit: str=None):
+    def get_entity_post_day_gains(entity_id: int, target_date: date, date_limit: date):
+        """
+        Each post's day-over-day metric gains on the entity's latest scraped
+        day on or before `target_date`, straight from posts_history_mv.
+
+        Only posts created on/after `date_limit` are considered, and only their
+        snapshots from `date_limit` to `target_date`. A post's last snapshot of
+        each day stands for that day; LAG() pairs it with the post's previous
+        day, and on a post's first day the previous values are NULL (the whole
+        count is the gain).
+
+        Returns:
+            Result: rows of page_id, platform, post_id, day, created_at, url,
+            caption, content_type, image_url, video_url, likes, comments,
+            shares, views and prev_likes / prev_comments / prev_shares /
+            prev_views
+        """
         query = text("""
-            SELECT * from page_posts_metrics_mv
-            where platform in ('instagram','linkedin','tiktok','youtube','x')
-            and entity_id = :entity_id
-            and to_scrape
-                    """)
-        results = db.session.execute(query, {'entity_id': entity_id}).all()
-        return results
+            WITH daily AS (
+                SELECT
+                    ph.page_id, ph.platform, ph.post_id,
+                    DATE(ph.recorded_at) AS day,
+                    ph.created_at, ph.url, ph.caption, ph.content_type, ph.image_url, ph.video_url,
+                    ph.likes, ph.comments, ph.shares, ph.views,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY ph.page_id, ph.platform, ph.post_id, DATE(ph.recorded_at)
+                        ORDER BY ph.recorded_at DESC
+                    ) AS day_rank
+                FROM posts_history_mv ph
+                JOIN pages p ON p.uuid = ph.page_id
+                JOIN entities e ON e.id = p.entity_id
+                WHERE p.entity_id = :entity_id
+                  AND e.to_scrape
+                  AND ph.platform IN :platforms
+                  AND ph.recorded_at >= :window_start
+                  AND ph.recorded_at < :window_end
+                  AND ph.created_at >= :window_start
+            ),
+            snapshots AS (
+                SELECT
+                    daily.*,
+                    LAG(likes) OVER post_days AS prev_likes,
+                    LAG(comments) OVER post_days AS prev_comments,
+                    LAG(shares) OVER post_days AS prev_shares,
+                    LAG(views) OVER post_days AS prev_views
+                FROM daily
+                WHERE day_rank = 1
+                WINDOW post_days AS (PARTITION BY page_id, platform, post_id ORDER BY day)
+            )
+            SELECT
+                page_id, platform, post_id, day, created_at, url, caption, content_type,
+                image_url, video_url, likes, comments, shares, views,
+                prev_likes, prev_comments, prev_shares, prev_views
+            FROM snapshots
+            WHERE day = (SELECT MAX(day) FROM snapshots)
+        """).bindparams(bindparam("platforms", expanding=True))
+        params = {
+            "entity_id": entity_id,
+            "platforms": list(platform_metrics),
+            "window_start": datetime.combine(date_limit, time.min),
+            "window_end": datetime.combine(target_date + timedelta(days=1), time.min),
+        }
+        return db.session.execute(query, params)
@@ -5,18 +5,63 @@ from api.models.category_model import Category
 from api.models.entity_category_model import EntityCategory
 from api.models.entity_model import Entity
 from api.models.page_model import Page
-from sqlalchemy import case, select, and_, cast, text, bindparam
+from api.repositories.page_history_stats_repository import PageHistoryStatsRepository
+from sqlalchemy import case, select, and_, cast, text, bindparam, literal_column, tuple_
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import aliased
+from api.utils.data_keys import platform_metrics
 from api.utils.logging_utils import instrument_repository_class
+from api.utils.shared_file_cache import SharedFileCache
 from datetime import date, datetime, time, timedelta
 import json
 import os
+from time import perf_counter
 from uuid import UUID
 
 RootCategory = aliased(Category, name="root_category")
 
+# Most posts returned per entity by get_competitors_scored_posts (the per-entity
+# cap the competitor comparison has always used).
+COMPETITOR_MAX_POSTS_PER_ENTITY = 10000
+
+
+def _post_score_sql(alias: str) -> str:
+    """platform_metrics' weighted post score over posts_mv columns, as SQL."""
+    branches = []
+    for platform, spec in platform_metrics.items():
+        terms = " + ".join(
+            f"{float(m['score'])!r} * COALESCE({alias}.{m['column']}, 0)"
+            for m in spec["metrics"]
+        )
+        branches.append(f"WHEN '{platform}' THEN {terms}")
+    return f"CASE {alias}.platform {' '.join(branches)} END"
+
+# Views refreshed by refresh_metrics_mv, in dependency order (posts_mv is
+# derived from posts_history_mv).
+METRICS_VIEWS = ("page_posts_metrics_mv", "posts_history_mv", "posts_mv")
+
+# alert_detector_checkpoints row holding the last pages_history.id folded into
+# the incrementally maintained metrics tables (incremental_mv_tables.sql).
+MV_INCREMENTAL_CHECKPOINT = "mv_incremental"
+
+# Each incremental refresh also re-folds this many pages_history ids below the
+# watermark. An id is allocated when a row is inserted but only visible once
+# its transaction commits, so a row still in flight when MAX(id) was read can
+# commit below the new watermark; the next run picks it up. Re-folding rows
+# already folded is a no-op (see _fold_history_rows).
+MV_INCREMENTAL_LOOKBACK_IDS = 10000
+
+_POSTS_HISTORY_COLUMNS = (
+    "history_id, page_id, platform, recorded_at, post_id, created_at, url, likes, comments, "
+    "shares, views, caption, content_type, image_url, video_url, is_pinned, extra_data"
+)
+_POSTS_MV_COLUMNS = (
+    "page_id, platform, post_id, created_at, url, likes, comments, shares, views, "
+    "caption, content_type, image_url, video_url, is_pinned, extra_data, recorded_at"
+)
+
 RANKING_CACHE_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'ranking_cache.json')
+_RANKING_FILE_CACHE = SharedFileCache()
 
 
 class _UUIDEncoder(json.JSONEncoder):
@@ -26,8 +71,95 @@ class _UUIDEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+def _jsonb_has_any(expr: str, keys: tuple) -> str:
+    # `key in obj and obj[key] is not None`, for any of `keys`.
+    return f"(jsonb_strip_nulls({expr}) ?| ARRAY[{', '.join(repr(k) for k in keys)}])"
+
+
+_LIKES_KEYS = ("likes", "likesCount", "likeCount", "diggCount")
+_COMMENTS_KEYS = ("comments", "commentsCount", "commentCount", "num_comments")
+_FLAT_LIKES_KEYS = ("likes", "likesCount", "likeCount")
+
+# validate_data_structure in SQL: the same verdicts, but only the first post of
+# each snapshot is ever looked at and only failing rows leave the database.
+_FAILED_PAGES_SQL = f"""
+    WITH snapshot AS (
+        SELECT
+            ph.page_id,
+            ph.recorded_at,
+            p.platform,
+            CASE p.platform
+                WHEN 'tiktok' THEN 'top_videos'
+                WHEN 'youtube' THEN 'top_videos'
+                WHEN 'linkedin' THEN 'updates'
+                ELSE 'posts'
+            END AS posts_key,
+            ph.data
+        FROM pages_history ph
+        JOIN pages p ON p.uuid = ph.page_id
+        WHERE ph.recorded_at >= :start_time
+          AND ph.recorded_at <= :end_time
+    ),
+    shaped AS (
+        SELECT
+            page_id,
+            recorded_at,
+            platform,
+            posts_key,
+            jsonb_typeof(data -> posts_key) = 'array' AS has_posts,
+            CASE WHEN jsonb_typeof(data -> posts_key) = 'array'
+                 THEN jsonb_array_length(data -> posts_key) END AS posts_len,
+            CASE WHEN jsonb_typeof(data -> posts_key -> 0) = 'object'
+                 THEN data -> posts_key -> 0 ELSE '{{}}'::jsonb END AS first_post,
+            CASE WHEN jsonb_typeof(data) = 'object' AND platform = 'facebook'
+                 THEN data - 'posts' ELSE '{{}}'::jsonb END AS flat,
+            COALESCE(data -> 'post_id' IN (
+                'null'::jsonb, '""'::jsonb, '0'::jsonb, 'false'::jsonb, '[]'::jsonb, '{{}}'::jsonb
+            ), TRUE) AS no_post_id
+        FROM snapshot
+    ),
+    checked AS (
+        SELECT
+            page_id,
+            recorded_at,
+            platform,
+            CASE
+                WHEN has_posts IS NOT TRUE AND platform <> 'facebook' THEN ARRAY[posts_key]
+                WHEN has_posts AND posts_len = 0 THEN ARRAY[posts_key || ' (empty)']
+                WHEN has_posts THEN array_remove(ARRAY[
+                    CASE WHEN NOT {_jsonb_has_any("first_post", _LIKES_KEYS)} THEN 'likes' END,
+                    CASE WHEN NOT {_jsonb_has_any("first_post", _COMMENTS_KEYS)} THEN 'comments' END
+                ], NULL)
+                WHEN no_post_id
+                     AND NOT {_jsonb_has_any("flat", _FLAT_LIKES_KEYS)}
+                     AND NOT {_jsonb_has_any("flat", _COMMENTS_KEYS)} THEN ARRAY['posts']
+                ELSE array_remove(ARRAY[
+                    CASE WHEN NOT {_jsonb_has_any("flat", _FLAT_LIKES_KEYS)} THEN 'likes' END,
+                    CASE WHEN NOT {_jsonb_has_any("flat", _COMMENTS_KEYS)} THEN 'comments' END
+                ], NULL)
+            END AS missing_keys
+        FROM shaped
+    )
+    SELECT page_id, platform, missing_keys, recorded_at
+    FROM checked
+    WHERE cardinality(missing_keys) > 0
+    ORDER BY recorded_at
+"""
+
+
 @instrument_repository_class
 class PageHistoryRepository:
+    # Sort keys get_posts_growth_ranking accepts; interpolated into ORDER BY,
+    # so anything else is rejected.
+    POSTS_GROWTH_ORDER_COLUMNS = (
+        "gained_score",
+        "gained_likes",
+        "gained_comments",
+        "gained_shares",
+        "gained_views",
+        "page_followers",
+    )
+
     @staticmethod
     def validate_data_structure(data: dict, platform: str) -> list[str]:
         """
@@ -280,9 +412,13 @@ class PageHistoryRepository:
         directly) keeps working unchanged — a row written without them just
         has source=NULL, meaning "unknown/pre-orchestration" rather than an
         error. The orchestrator (scrape_orchestrator_service.py) is the
-        first caller to actually pass them."""
+        first caller to actually pass them.
+
+        The snapshot is also counted in pages_history_stats, in the same
+        transaction."""
         history = PageHistory(page_id=page_id, data=data, source=source, source_meta=source_meta)
         db.session.add(history)
+        PageHistoryStatsRepository.record_snapshot(page_id)
         if commit:
             db.session.commit()
         else:
@@ -410,6 +546,23 @@ class PageHistoryRepository:
         # Start from yesterday at 10pm (22:00), end at current time
         start_time = datetime.combine(yesterday_utc, time(22, 0, 0))
         end_time = now_utc
+
+        if db.engine.dialect.name != 'sqlite':
+            # Snapshots carry megabytes of post arrays; validate them where
+            # they live and ship back only the failures.
+            rows = db.session.execute(
+                text(_FAILED_PAGES_SQL).columns(page_id=PageHistory.page_id.type),
+                {"start_time": start_time, "end_time": end_time},
+            ).mappings().all()
+            return [
+                {
+                    "page_id": row["page_id"],
+                    "platform": row["platform"],
+                    "missing_keys": list(row["missing_keys"]),
+                    "recorded_at": row["recorded_at"],
+                }
+                for row in rows
+            ]
         
         # Query pages_history records from yesterday 10pm until now
         stmt = (
@@ -426,6 +579,7 @@ class PageHistoryRepository:
                     PageHistory.recorded_at <= end_time
                 )
             )
+            .order_by(PageHistory.recorded_at)
         )
         
         history_records = db.session.execute(stmt).all()
@@ -609,9 +763,104 @@ class PageHistoryRepository:
         results = db.session.execute(query, {'entity_id': entity_id, 'date_limit': date_limit, 'max_posts': max_posts}).all()
         return results
 
+    @staticmethod
+    def get_competitors_scored_posts(
+        entity_ids: list[int],
+        date_limit: date,
+        start_date: datetime = None,
+        top_n: int = None,
+    ) -> list[dict]:
+        """
+        Latest snapshot of every post of the given entities, scored in SQL.
+
+        One query over posts_mv for all entities: the score is the
+        platform_metrics weighted sum of the post's normalized metrics, and
+        ROW_NUMBER() keeps the `top_n` highest-scoring posts per entity
+        (COMPETITOR_MAX_POSTS_PER_ENTITY at most).
+
+        Args:
+            entity_ids: Entities to compare
+            date_limit: Only posts whose latest snapshot was taken on or after
+                this day
+            start_date: Optional lower bound on the post's creation time
+            top_n: Optional number of posts to keep per entity
+
+        Returns:
+            list[dict]: rows of entity_id, page_id, platform, post_id,
+            created_at, likes, comments, shares, score; ordered by entity,
+            then score (highest first)
+        """
+        if not entity_ids:
+            return []
+        limit = min(top_n or COMPETITOR_MAX_POSTS_PER_ENTITY, COMPETITOR_MAX_POSTS_PER_ENTITY)
+        query = text(f"""
+            WITH scored AS (
+                SELECT
+                    p.entity_id,
+                    pm.page_id,
+                    pm.platform,
+                    pm.post_id,
+                    pm.created_at,
+                    pm.likes,
+                    pm.comments,
+                    pm.shares,
+                    {_post_score_sql("pm")} AS score
+                FROM posts_mv pm
+                JOIN pages p ON p.uuid = pm.page_id
+                JOIN entities e ON e.id = p.entity_id
+                WHERE p.entity_id IN :entity_ids
+                  AND e.to_scrape
+                  AND pm.platform IN :platforms
+                  AND pm.recorded_at >= :date_limit
+                  AND (:start_date IS NULL OR pm.created_at >= :start_date)
+            ),
+            ranked AS (
+                SELECT
+                    scored.*,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY entity_id
+                        ORDER BY score DESC, created_at DESC, post_id
+                    ) AS post_rank
+                FROM scored
+            )
+            SELECT entity_id, page_id, platform, post_id, created_at, likes, comments, shares, score
+            FROM ranked
+            WHERE post_rank <= :limit
+            ORDER BY entity_id, post_rank
+        """).bindparams(
+            bindparam("entity_ids", expanding=True),
+            bindparam("platforms", expanding=True),
+        )
+        params = {
+            "entity_ids": list(entity_ids),
+            "platforms": list(platform_metrics),
+            "date_limit": datetime.combine(date_limit, time.min),
+            "start_date": start_date,
+            "limit": limit,
+        }
+        return db.session.execute(query, params).mappings().all()
+
 
     @staticmethod
-    def refresh_metrics_mv():
+    def metrics_views_are_tables() -> bool:
+        """True once api/database/incremental_mv_tables.sql has turned the
+        three metrics views into plain, incrementally maintained tables."""
+        if db.engine.dialect.name == 'sqlite':
+            return False
+        found = db.session.execute(
+            text("""
+                SELECT COUNT(*)
+                FROM pg_class c
+                WHERE c.relname IN :names
+                  AND c.relkind = 'r'
+                  AND pg_table_is_visible(c.oid)
+            """).bindparams(bindparam("names", expanding=True)),
+            {"names": list(METRICS_VIEWS)},
+        ).scalar()
+        return found == len(METRICS_VIEWS)
+
+    @staticmethod
+    def refresh_metrics_mv(full: bool = False) -> list[dict]:
         """
         Refresh the page_posts_metrics_mv, posts_history_mv, and posts_mv materialized views
         so API reads reflect the latest scraped pages_history rows.
@@ -621,10 +870,26 @@ class PageHistoryRepository:
         + short-lived) expire and recent-window rankings return no data. Call
         this right after each daily scrape (see `flask refresh-mv`).
 
-        Tries CONCURRENTLY first (non-blocking; needs unique indexes and an
-        already-populated view). Falls back to plain REFRESH if CONCURRENTLY isn't possible.
+        When the views have been converted to tables (see
+        api/database/incremental_mv_tables.sql) only the pages_history rows
+        past the stored watermark are folded in, so the cost tracks one
+        scrape rather than the whole history; `full=True` rebuilds the tables
+        instead. Otherwise each view is refreshed as before: CONCURRENTLY
+        first (non-blocking; needs unique indexes and an already-populated
+        view), falling back to plain REFRESH if CONCURRENTLY isn't possible.
+
+        Returns:
+            list[dict]: Per view, in refresh order: view, mode ("refresh",
+            "incremental" or "rebuild"), rows (rows written; for a plain
+            refresh the planner's row estimate, None if unknown) and
+            elapsed_s.
         """
-        for mv in ["page_posts_metrics_mv", "posts_history_mv", "posts_mv"]:
+        if PageHistoryRepository.metrics_views_are_tables():
+            return PageHistoryRepository._refresh_metrics_tables(full=full)
+
+        stats = []
+        for mv in METRICS_VIEWS:
+            started = perf_counter()
             try:
                 db.session.execute(
                     text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {mv}")
@@ -636,66 +901,336 @@ class PageHistoryRepository:
                     text(f"REFRESH MATERIALIZED VIEW {mv}")
                 )
                 db.session.commit()
+            elapsed = perf_counter() - started
+
+            estimate = db.session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE relname = :mv"),
+                {"mv": mv},
+            ).scalar()
+            stats.append({
+                "view": mv,
+                "mode": "refresh",
+                "rows": estimate if estimate is not None and estimate >= 0 else None,
+                "elapsed_s": round(elapsed, 3),
+            })
+        return stats
+
+    @staticmethod
+    def _refresh_metrics_tables(full: bool = False) -> list[dict]:
+        """Fold pages_history rows in (watermark - MV_INCREMENTAL_LOOKBACK_IDS,
+        MAX(id)] into the metrics tables, or rebuild them from scratch when
+        `full`, and advance the watermark — all in one transaction, so
+        readers never see a half-applied scrape and a failed run is simply
+        retried.
+
+        Incremental runs only add: rows of deleted pages_history snapshots,
+        and rows of entities whose to_scrape flag changed, stay as they are
+        until the next `full` rebuild."""
+        from api.repositories.alert_detector_checkpoint_repository import (
+            AlertDetectorCheckpointRepository,
+        )
+
+        # One maintainer at a time; a second cron run waits, then finds
+        # nothing new to fold in.
+        db.session.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:name))"),
+            {"name": MV_INCREMENTAL_CHECKPOINT},
+        )
+        high = db.session.execute(
+            text("SELECT COALESCE(MAX(id), 0) FROM pages_history")
+        ).scalar()
+
+        if full:
+            low = 0
+        else:
+            checkpoint = AlertDetectorCheckpointRepository.get(MV_INCREMENTAL_CHECKPOINT)
+            if checkpoint and checkpoint.cursor_text:
+                low = int(checkpoint.cursor_text)
+            else:
+                low = db.session.execute(
+                    text("SELECT COALESCE(MAX(history_id), 0) FROM page_posts_metrics_mv")
+                ).scalar()
+
+        if full:
+            for table in reversed(METRICS_VIEWS):
+                # DELETE rather than TRUNCATE: readers keep seeing the old
+                # rows until the rebuild commits, like REFRESH CONCURRENTLY.
+                db.session.execute(text(f"DELETE FROM {table}"))
+
+        fold_from = low if full else max(low - MV_INCREMENTAL_LOOKBACK_IDS, 0)
+        if high > fold_from:
+            stats = PageHistoryRepository._fold_history_rows(
+                "history_id > :low AND history_id <= :high",
+                {"low": fold_from, "high": high},
+            )
+        else:
+            stats = [
+                {"view": view, "rows": 0, "elapsed_s": 0.0} for view in METRICS_VIEWS
+            ]
+
+        mode = "rebuild" if full else "incremental"
+        for entry in stats:
+            entry["mode"] = mode
+
+        AlertDetectorCheckpointRepository.upsert(
+            MV_INCREMENTAL_CHECKPOINT,
+            cursor_ts=datetime.utcnow(),
+            cursor_text=str(high),
+            meta={"mode": mode, "from_history_id": fold_from, "views": stats},
+            commit=False,
+        )
+        db.session.commit()
+        return stats
+
+    @staticmethod
+    def _fold_history_rows(where: str, params: dict, bind=None) -> list[dict]:
+        """Write the metrics-table rows derived from the pages_history rows
+        matching `where` (a condition on history_id) and return per-table
+        row counts and timings. Safe to re-run: existing rows are kept and
+        posts_mv only moves forward to a newer (or the same) snapshot."""
+        stats = []
+
+        def _run(view, sql):
+            started = perf_counter()
+            stmt = text(sql)
+            if bind is not None:
+                stmt = stmt.bindparams(bind)
+            result = db.session.execute(stmt, params)
+            stats.append({
+                "view": view,
+                "rows": max(result.rowcount or 0, 0),
+                "elapsed_s": round(perf_counter() - started, 3),
+            })
+
+        _run("page_posts_metrics_mv", f"""
+            INSERT INTO page_posts_metrics_mv
+            SELECT * FROM page_posts_metrics_src
+            WHERE {where}
+            ON CONFLICT (history_id) DO NOTHING
+        """)
+        _run("posts_history_mv", f"""
+            INSERT INTO posts_history_mv ({_POSTS_HISTORY_COLUMNS})
+            SELECT DISTINCT ON (page_id, platform, post_id, recorded_at) {_POSTS_HISTORY_COLUMNS}
+            FROM posts_history_src
+            WHERE {where}
+            ORDER BY page_id, platform, post_id, recorded_at DESC
+            ON CONFLICT (page_id, platform, post_id, recorded_at) DO NOTHING
+        """)
+        updates = ", ".join(
+            f"{col} = EXCLUDED.{col}"
+            for col in _POSTS_MV_COLUMNS.split(", ")
+            if col not in ("page_id", "platform", "post_id")
+        )
+        _run("posts_mv", f"""
+            INSERT INTO posts_mv ({_POSTS_MV_COLUMNS})
+            SELECT DISTINCT ON (page_id, platform, post_id) {_POSTS_MV_COLUMNS}
+            FROM posts_history_mv
+            WHERE {where}
+            ORDER BY page_id, platform, post_id, recorded_at DESC
+            ON CONFLICT (page_id, platform, post_id) DO UPDATE SET {updates}
+            WHERE posts_mv.recorded_at <= EXCLUDED.recorded_at
+        """)
+        return stats
 
     @staticmethod
-    def get_all_entities_posts(date_limit, entity_type=None):
-        # `entity_type` restricts the posts to one entity kind ('company' /
-        # 'influencer'), so the posts rankings can be split the same way the
-        # entity rankings already are. None keeps the original behavior of
-        # returning every entity's posts mixed together.
-        #
-        # OPTIMIZATION: This query used to scan ALL rows in page_posts_metrics_mv
-        # which contains historical snapshots and can be millions of rows.
-        # Now it uses indexed filtering and limits to the date window first.
-        params = {'date_limit': date_limit}
+    def resync_metrics_rows(history_ids: list[int], commit: bool = True) -> list[dict]:
+        """Re-derive the metrics-table rows of pages_history snapshots that
+        were edited in place (admin corrections), which the id watermark
+        would otherwise never revisit. No-op (empty list) while the metrics
+        views are still materialized views."""
+        if not history_ids or not PageHistoryRepository.metrics_views_are_tables():
+            return []
+
+        ids = bindparam("history_ids", expanding=True)
+        params = {"history_ids": list(history_ids)}
+        for table in ("page_posts_metrics_mv", "posts_history_mv"):
+            db.session.execute(
+                text(f"DELETE FROM {table} WHERE history_id IN :history_ids").bindparams(ids),
+                params,
+            )
+        stats = PageHistoryRepository._fold_history_rows(
+            "history_id IN :history_ids", params, bind=ids
+        )
+        if commit:
+            db.session.commit()
+        return stats
+
+    @staticmethod
+    def get_posts_growth_ranking(
+        date_limit,
+        end_date=None,
+        entity_type=None,
+        score_weights=None,
+        order_by="gained_score",
+        limit=None,
+        offset=0,
+    ):
+        """
+        Posts ranked by metric growth inside the window, computed in SQL.
+
+        For every (page_id, platform, post_id) the earliest and latest
+        snapshots in posts_history_mv are found with window functions and the
+        gains are their difference, so only the requested slice of the
+        ranking (LIMIT/OFFSET) leaves the database. This replaces loading
+        every page_posts_metrics_mv row in the window and unnesting the
+        posts_metrics JSON per row in Python.
+
+        `score_weights` maps platform -> {column: weight} over the
+        posts_history_mv metric columns (likes/comments/shares/views); only
+        those platforms are ranked. `order_by` must be one of
+        POSTS_GROWTH_ORDER_COLUMNS. Page-level profile image and followers
+        are the latest non-empty values in the window, looked up only for the
+        rows returned (the image URL is signed and short-lived, so it always
+        comes from the freshest scrape).
+        """
+        if order_by not in PageHistoryRepository.POSTS_GROWTH_ORDER_COLUMNS:
+            raise ValueError(f"Unsupported posts ranking order: {order_by}")
+        if not score_weights:
+            return []
+
+        params = {"date_limit": date_limit, "offset": max(0, int(offset or 0))}
+
+        platform_params = []
+        score_cases = []
+        for p_idx, (platform, weights) in enumerate(sorted(score_weights.items())):
+            params[f"platform_{p_idx}"] = platform
+            platform_params.append(f":platform_{p_idx}")
+            terms = []
+            for column, weight in sorted(weights.items()):
+                if column not in ("likes", "comments", "shares", "views"):
+                    continue
+                params[f"w_{p_idx}_{column}"] = float(weight)
+                terms.append(f"COALESCE(h.{column}, 0) * :w_{p_idx}_{column}")
+            score_cases.append(
+                f"WHEN :platform_{p_idx} THEN {' + '.join(terms) if terms else '0'}"
+            )
 
+        end_filter = ""
+        if end_date:
+            end_filter = "AND DATE(h.created_at) <= :end_date"
+            params["end_date"] = end_date
+
+        entity_filter = ""
         if entity_type:
-            query = text("""
-                SELECT 
-                    mv.entity_id,
-                    mv.entity_name,
-                    mv.page_id,
-                    mv.page_name,
-                    mv.page_url,
-                    mv.platform,
-                    mv.recorded_at,
-                    mv.profile_url,
-                    mv.raw_followers,
-                    mv.posts_metrics,
-                    mv.to_scrape
-                FROM page_posts_metrics_mv mv
-                JOIN entities e ON e.id = mv.entity_id
-                WHERE mv.platform IN ('instagram','linkedin','tiktok','youtube','x', 'facebook')
-                  AND DATE(mv.recorded_at) >= :date_limit
-                  AND mv.to_scrape
-                  AND e.to_scrape
-                  AND LOWER(COALESCE(e.type, '')) = :entity_type
-                ORDER BY mv.entity_id, mv.page_id, mv.platform, mv.recorded_at
-            """)
-            params['entity_type'] = entity_type.lower()
+            entity_filter = "AND LOWER(COALESCE(e.type, '')) = :entity_type"
+            params["entity_type"] = entity_type.lower()
+
+        # Followers are only needed before the LIMIT when they are the sort
+        # key; otherwise look them up for the returned rows only.
+        followers_sql = """COALESCE((
+                    SELECT m.raw_followers
+                    FROM page_posts_metrics_mv m
+                    WHERE m.page_id = {alias}.page_id
+                      AND m.recorded_at >= :date_limit
+                      AND m.raw_followers > 0
+                    ORDER BY m.recorded_at DESC
+                    LIMIT 1
+                ), 0) AS page_followers"""
+        if order_by == "page_followers":
+            ranked_followers = ", " + followers_sql.format(alias="g")
+            outer_followers = ""
         else:
-            query = text("""
-                SELECT 
-                    entity_id,
-                    entity_name,
+            ranked_followers = ""
+            outer_followers = followers_sql.format(alias="r") + ","
+
+        limit_clause = ""
+        if limit is not None:
+            limit_clause = "LIMIT :limit"
+            params["limit"] = max(0, int(limit))
+
+        query = text(f"""
+            WITH snapshots AS (
+                SELECT
+                    h.page_id,
+                    h.platform,
+                    h.post_id,
+                    h.recorded_at,
+                    h.created_at,
+                    h.url,
+                    h.caption,
+                    COALESCE(h.likes, 0)    AS likes,
+                    COALESCE(h.comments, 0) AS comments,
+                    COALESCE(h.shares, 0)   AS shares,
+                    COALESCE(h.views, 0)    AS views,
+                    CASE h.platform {' '.join(score_cases)} ELSE 0 END AS score
+                FROM posts_history_mv h
+                WHERE h.platform IN ({', '.join(platform_params)})
+                  AND h.recorded_at >= :date_limit
+                  AND DATE(h.created_at) >= :date_limit
+                  {end_filter}
+            ),
+            growth AS (
+                SELECT
                     page_id,
-                    page_name,
-                    page_url,
                     platform,
-                    recorded_at,
-                    profile_url,
-                    raw_followers,
-                    posts_metrics,
-                    to_scrape
-                FROM page_posts_metrics_mv
-                WHERE platform IN ('instagram','linkedin','tiktok','youtube','x', 'facebook')
-                  AND DATE(recorded_at) >= :date_limit
-                  AND to_scrape
-                ORDER BY entity_id, page_id, platform, recorded_at
-            """)
+                    post_id,
+                    created_at,
+                    url,
+                    caption,
+                    COUNT(*) OVER w                        AS snapshots_count,
+                    likes    - FIRST_VALUE(likes)    OVER w AS gained_likes,
+                    comments - FIRST_VALUE(comments) OVER w AS gained_comments,
+                    shares   - FIRST_VALUE(shares)   OVER w AS gained_shares,
+                    views    - FIRST_VALUE(views)    OVER w AS gained_views,
+                    score    - FIRST_VALUE(score)    OVER w AS gained_score,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY page_id, platform, post_id
+                        ORDER BY recorded_at DESC
+                    ) AS latest_rn
+                FROM snapshots
+                WINDOW w AS (
+                    PARTITION BY page_id, platform, post_id
+                    ORDER BY recorded_at
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+                )
+            ),
+            ranked AS (
+                SELECT
+                    g.*,
+                    e.id   AS entity_id,
+                    e.name AS entity_name,
+                    p.name AS page_name,
+                    p.link AS page_url
+                    {ranked_followers}
+                FROM growth g
+                JOIN pages p    ON p.uuid = g.page_id
+                JOIN entities e ON e.id = p.entity_id
+                WHERE g.latest_rn = 1
+                  AND e.to_scrape
+                  AND EXISTS (SELECT 1 FROM entity_category ec WHERE ec.entity_id = e.id)
+                  {entity_filter}
+                ORDER BY {order_by} DESC, g.page_id, g.platform, g.post_id
+                {limit_clause}
+                OFFSET :offset
+            )
+            SELECT
+                r.*,
+                {outer_followers}
+                cat.category,
+                cat.root_category,
+                (
+                    SELECT m.profile_url
+                    FROM page_posts_metrics_mv m
+                    WHERE m.page_id = r.page_id
+                      AND m.recorded_at >= :date_limit
+                      AND COALESCE(m.profile_url, '') <> ''
+                    ORDER BY m.recorded_at DESC
+                    LIMIT 1
+                ) AS profile_image_url
+            FROM ranked r
+            JOIN LATERAL (
+                SELECT c.name AS category, COALESCE(c2.name, c.name) AS root_category
+                FROM entity_category ec
+                JOIN categories c ON c.id = ec.category_id
+                LEFT JOIN categories c2 ON c2.id = c.parent_id
+                WHERE ec.entity_id = r.entity_id
+                ORDER BY c.id
+                LIMIT 1
+            ) cat ON TRUE
+            ORDER BY r.{order_by} DESC, r.page_id, r.platform, r.post_id
+        """)
 
-        results = db.session.execute(query, params).all()
-        return results
+        return db.session.execute(query, params).mappings().all()
 
     @staticmethod
     def get_entities_followers_snapshot(date_limit):
@@ -1378,33 +1913,83 @@ class PageHistoryRepository:
     def get_public_ranking():
         """
         Returns the cached monthly ranking from file. Recomputes only when the month changes.
+
+        The file is shared by every worker; each process keeps the parsed copy
+        in memory and only re-reads it when the file changes on disk. When the
+        month rolls over, one worker recomputes while the others wait for it.
         """
         now = datetime.now()
         current_month = f"{now.year}-{now.month:02d}"
 
-        # Try reading from cache file
-        if os.path.exists(RANKING_CACHE_FILE):
-            try:
-                with open(RANKING_CACHE_FILE, 'r') as f:
-                    cache = json.load(f)
-                cached_data = cache.get("data")
-                # Ignore caches written before the `type` field existed so the
-                # public influencer filter has something to match on.
-                cache_has_type = (
-                    isinstance(cached_data, list)
-                    and cached_data
-                    and "type" in cached_data[0]
-                )
-                if cache.get("month") == current_month and cache_has_type:
-                    return cached_data
-            except (json.JSONDecodeError, KeyError):
-                pass
+        def is_fresh(cache):
+            cached_data = cache.get("data") if isinstance(cache, dict) else None
+            # Ignore caches written before the `type` field existed so the
+            # public influencer filter has something to match on.
+            cache_has_type = (
+                isinstance(cached_data, list)
+                and cached_data
+                and "type" in cached_data[0]
+            )
+            return cache.get("month") == current_month and bool(cache_has_type)
 
-        # Recompute and save
-        data = PageHistoryRepository.get_all_entities_ranking()
-        with open(RANKING_CACHE_FILE, 'w') as f:
-            json.dump({"month": current_month, "data": data}, f, cls=_UUIDEncoder)
-        return data
+        cache = _RANKING_FILE_CACHE.get_or_compute(
+            RANKING_CACHE_FILE,
+            is_fresh,
+            lambda: {"month": current_month, "data": PageHistoryRepository.get_all_entities_ranking()},
+            encoder=_UUIDEncoder,
+        )
+        return cache["data"]
+
+    @staticmethod
+    def _estimate_pages_history_total(query, filtered: bool) -> int | None:
+        """
+        Planner estimate of how many rows `query` returns: pg_class.reltuples
+        of pages_history when nothing is filtered, otherwise the row estimate
+        of EXPLAIN on the query. None where neither exists (SQLite).
+        """
+        if db.engine.dialect.name != "postgresql":
+            return None
+        if not filtered:
+            estimate = db.session.scalar(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'pages_history'::regclass")
+            )
+            # -1 until the table has been analyzed once.
+            return int(estimate) if estimate is not None and estimate >= 0 else None
+        compiled = query.compile(dialect=db.engine.dialect)
+        plan = db.session.connection().exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @staticmethod
+    def _pages_history_data_summary_columns():
+        """
+        Columns standing in for pages_history.data when the blob itself isn't
+        requested: its top-level keys and its stored size, computed in the
+        database so the blob never leaves it. SQLite has no equivalent, so
+        there the blob is read and summarized by _summarize_history_data.
+        """
+        if db.engine.dialect.name != "postgresql":
+            return [PageHistory.data]
+        return [
+            literal_column(
+                "CASE WHEN jsonb_typeof(pages_history.data) = 'object' "
+                "THEN ARRAY(SELECT jsonb_object_keys(pages_history.data)) END"
+            ).label("data_keys"),
+            db.func.pg_column_size(PageHistory.data).label("data_size"),
+        ]
+
+    @staticmethod
+    def _summarize_history_data(row) -> dict:
+        if "data_keys" in row._fields:
+            keys, size = row.data_keys, row.data_size
+        else:
+            data = row.data
+            keys = list(data.keys()) if isinstance(data, dict) else None
+            size = len(json.dumps(data, default=str)) if data is not None else 0
+        return {"keys": sorted(keys) if keys is not None else None, "size_bytes": size}
 
     @staticmethod
     def get_pages_history_filtered(
@@ -1419,14 +2004,35 @@ class PageHistoryRepository:
         per_page: int = 20,
         sort_by: str = "recorded_at",
         sort_order: str = "desc",
-        include_data: bool = True
+        include_data: bool = False,
+        after: tuple | None = None,
+        count: str = "exact",
     ):
+        """
+        One page of pages_history rows (with their page and brand) matching
+        the filters.
+
+        Pages are read by offset (`page`) or, when `after` is given, by keyset:
+        `after` is the (sort_by value, id) of the last row already seen, and
+        the scan resumes right after it, so deep pages cost the same as the
+        first. Every page returns the `next_cursor` of its last row.
+
+        `count` picks how `total` is computed: "exact" (COUNT over the
+        filtered join), "estimate" (planner estimate, see
+        _estimate_pages_history_total; exact where there is none) or "none".
+
+        Rows carry `data_summary` (top-level keys and size of the stored
+        JSON) instead of `data` unless `include_data` is set.
+
+        Returns:
+            dict: items, total, total_estimated, page, per_page, total_pages,
+            has_next, has_prev, next_cursor ((sort value, id) or None)
+        """
         query = (
             select(
                 PageHistory.id,
                 PageHistory.page_id,
                 PageHistory.recorded_at,
-                PageHistory.data,
                 Page.name.label("page_name"),
                 Page.link.label("page_link"),
                 Page.platform,
@@ -1466,22 +2072,36 @@ class PageHistoryRepository:
         if conditions:
             query = query.where(and_(*conditions))
 
-        # Count total before pagination
-        count_stmt = select(db.func.count()).select_from(query.subquery())
-        total = db.session.scalar(count_stmt) or 0
+        total = None
+        total_estimated = False
+        if count == "estimate":
+            total = PageHistoryRepository._estimate_pages_history_total(query, bool(conditions))
+            total_estimated = total is not None
+        if count in ("exact", "estimate") and total is None:
+            count_stmt = select(db.func.count()).select_from(query.subquery())
+            total = db.session.scalar(count_stmt) or 0
 
-        # Sorting
+        # Sorting; id breaks ties so the order (and the keyset) is total.
         sort_column = getattr(PageHistory, sort_by, PageHistory.recorded_at)
-        if sort_order.lower() == "asc":
-            query = query.order_by(sort_column.asc(), PageHistory.id.asc())
-        else:
+        descending = sort_order.lower() != "asc"
+        if after is not None:
+            keyset = tuple_(sort_column, PageHistory.id)
+            query = query.where(keyset < tuple_(*after) if descending else keyset > tuple_(*after))
+        if descending:
             query = query.order_by(sort_column.desc(), PageHistory.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), PageHistory.id.asc())
 
-        # Pagination
-        offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
+        if include_data:
+            query = query.add_columns(PageHistory.data)
+        else:
+            query = query.add_columns(*PageHistoryRepository._pages_history_data_summary_columns())
 
-        results = db.session.execute(query).all()
+        # Pagination; one extra row tells whether there is a next page.
+        offset = 0 if after is not None else (page - 1) * per_page
+        results = db.session.execute(query.offset(offset).limit(per_page + 1)).all()
+        has_next = len(results) > per_page
+        results = results[:per_page]
 
         items = []
         for r in results:
@@ -1497,18 +2117,29 @@ class PageHistoryRepository:
             }
             if include_data:
                 item["data"] = r.data
+            else:
+                item["data_summary"] = PageHistoryRepository._summarize_history_data(r)
             items.append(item)
 
-        total_pages = (total + per_page - 1) // per_page if per_page > 0 else 1
+        next_cursor = None
+        if has_next and results:
+            last = results[-1]
+            next_cursor = (getattr(last, sort_column.key), last.id)
+
+        total_pages = None
+        if total is not None:
+            total_pages = (total + per_page - 1) // per_page if per_page > 0 else 1
 
         return {
             "items": items,
             "total": total,
-            "page": page,
+            "total_estimated": total_estimated,
+            "page": page if after is None else None,
             "per_page": per_page,
             "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_prev": page > 1
+            "has_next": has_next,
+            "has_prev": after is not None or page > 1,
+            "next_cursor": next_cursor,
         }
 
     @staticmethod
@@ -1547,81 +2178,38 @@ class PageHistoryRepository:
 
     @staticmethod
     def get_pages_history_options():
-        platforms_stmt = (
-            select(Page.platform)
-            .join(PageHistory, PageHistory.page_id == Page.uuid)
-            .distinct()
-            .order_by(Page.platform)
-        )
-        platforms = [p for p in db.session.scalars(platforms_stmt).all() if p]
-
-        brands_stmt = (
-            select(Entity.id, Entity.name)
-            .join(Page, Page.entity_id == Entity.id)
-            .join(PageHistory, PageHistory.page_id == Page.uuid)
-            .distinct()
-            .order_by(Entity.name)
-        )
-        brands_rows = db.session.execute(brands_stmt).all()
-        brands = [{"id": b.id, "name": b.name} for b in brands_rows]
-
-        dates_stmt = select(
-            db.func.min(PageHistory.recorded_at).label("min_date"),
-            db.func.max(PageHistory.recorded_at).label("max_date"),
-            db.func.count(PageHistory.id).label("total_count")
-        )
-        dates_res = db.session.execute(dates_stmt).first()
-
-        min_date = dates_res.min_date.isoformat() if dates_res and dates_res.min_date else None
-        max_date = dates_res.max_date.isoformat() if dates_res and dates_res.max_date else None
-        total_count = dates_res.total_count if dates_res else 0
-
+        options = PageHistoryStatsRepository.get_options(today=datetime.now().date())
+        min_date, max_date = options["min_date"], options["max_date"]
         return {
-            "platforms": platforms,
-            "brands": brands,
+            "platforms": options["platforms"],
+            "brands": [{"id": brand_id, "name": name} for brand_id, name in options["brands"]],
             "date_range": {
-                "min_date": min_date,
-                "max_date": max_date
+                "min_date": min_date.isoformat() if min_date else None,
+                "max_date": max_date.isoformat() if max_date else None
             },
-            "total_records": total_count
+            "total_records": options["total"]
         }
 
     @staticmethod
     def get_pages_history_summary():
-        now = datetime.now()
-        today_start = datetime.combine(now.date(), time.min)
-        seven_days_ago = now - timedelta(days=7)
-        thirty_days_ago = now - timedelta(days=30)
-
-        total = db.session.scalar(select(db.func.count(PageHistory.id))) or 0
-        records_today = db.session.scalar(
-            select(db.func.count(PageHistory.id)).where(PageHistory.recorded_at >= today_start)
-        ) or 0
-        records_7d = db.session.scalar(
-            select(db.func.count(PageHistory.id)).where(PageHistory.recorded_at >= seven_days_ago)
-        ) or 0
-        records_30d = db.session.scalar(
-            select(db.func.count(PageHistory.id)).where(PageHistory.recorded_at >= thirty_days_ago)
-        ) or 0
-
-        platform_counts_stmt = (
-            select(Page.platform, db.func.count(PageHistory.id).label("count"))
-            .join(PageHistory, PageHistory.page_id == Page.uuid)
-            .group_by(Page.platform)
+        """
+        Monitoring totals, read from the pages_history_stats daily rollup
+        for past days and from pages_history for today. The windows are
+        whole days: "last 7 days" counts from the start of the day 7 days
+        ago.
+        """
+        today = datetime.now().date()
+        stats = PageHistoryStatsRepository.get_summary(
+            today=today,
+            since_7d=today - timedelta(days=7),
+            since_30d=today - timedelta(days=30),
         )
-        platform_rows = db.session.execute(platform_counts_stmt).all()
-        by_platform = {r.platform: r.count for r in platform_rows if r.platform}
-
-        distinct_pages = db.session.scalar(
-            select(db.func.count(db.func.distinct(PageHistory.page_id)))
-        ) or 0
-
         return {
-            "total_records": total,
-            "records_today": records_today,
-            "records_last_7_days": records_7d,
-            "records_last_30_days": records_30d,
-            "by_platform": by_platform,
-            "active_pages_monitored": distinct_pages
+            "total_records": stats["total"],
+            "records_today": stats["today"],
+            "records_last_7_days": stats["last_7_days"],
+            "records_last_30_days": stats["last_30_days"],
+            "by_platform": stats["by_platform"],
+            "active_pages_monitored": stats["pages"]
         }
 
@@ -0,0 +1,234 @@
+# Data-access methods for page history stats repository.
+from datetime import date, datetime, time
+from sqlalchemy import case, func, literal, or_, select, union
+from api import db
+from api.models.entity_model import Entity
+from api.models.page_history_model import PageHistory
+from api.models.page_history_stats_model import PageHistoryStats
+from api.models.page_model import Page
+from api.utils.logging_utils import instrument_repository_class
+
+_STATS_COLUMNS = ["page_id", "day", "snapshot_count", "first_recorded_at", "last_recorded_at"]
+
+# `flask refresh-mv` recounts today and this many days before it from
+# pages_history, to take in snapshots written by the bulk loader.
+PAGES_HISTORY_STATS_RECOUNT_DAYS = 2
+
+
+@instrument_repository_class
+class PageHistoryStatsRepository:
+    """Repository for the daily pages_history snapshot counts."""
+
+    @staticmethod
+    def record_snapshot(page_id, commit: bool = False) -> None:
+        """
+        Count one snapshot of `page_id` written in the current transaction.
+
+        The snapshot's recorded_at is its server default, now(), which is the
+        transaction's timestamp; the rollup row is keyed on the same value, so
+        this never needs the inserted row back. Transactions can commit out of
+        order, so last_recorded_at only ever moves forward.
+        """
+        if page_id is None:
+            return
+        if db.engine.dialect.name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            latest = func.max
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            latest = func.greatest
+
+        now = func.now()
+        stmt = dialect_insert(PageHistoryStats).values(
+            page_id=page_id,
+            day=func.date(now),
+            snapshot_count=1,
+            first_recorded_at=now,
+            last_recorded_at=now,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["page_id", "day"],
+            set_={
+                "snapshot_count": PageHistoryStats.snapshot_count + 1,
+                "last_recorded_at": latest(PageHistoryStats.last_recorded_at, stmt.excluded.last_recorded_at),
+            },
+        )
+        db.session.execute(stmt)
+        if commit:
+            db.session.commit()
+
+    @staticmethod
+    def rebuild(since: date = None, commit: bool = True) -> int:
+        """
+        Recompute the rollup from `pages_history`: the days from `since` on,
+        or everything when `since` is None.
+
+        Runs next to live writers (`flask refresh-mv` shares the scrape's
+        cron): a PageHistoryRepository.create may upsert a (page, day) row
+        between the delete and the insert here, so the insert is an upsert too
+        and the recount wins. A snapshot committed while this statement runs
+        can be left out of its day until the next recount; the summary
+        recounts today on every read (get_summary).
+
+        Returns:
+            int: Number of rollup rows written
+        """
+        day = func.date(PageHistory.recorded_at)
+        source = (
+            select(
+                PageHistory.page_id,
+                day,
+                func.count(PageHistory.id),
+                func.min(PageHistory.recorded_at),
+                func.max(PageHistory.recorded_at),
+            )
+            .where(PageHistory.page_id.isnot(None))
+            .group_by(PageHistory.page_id, day)
+        )
+        stale = db.session.query(PageHistoryStats)
+        if since is not None:
+            source = source.where(PageHistory.recorded_at >= datetime.combine(since, time.min))
+            stale = stale.filter(PageHistoryStats.day >= since)
+
+        if db.engine.dialect.name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+        stale.delete(synchronize_session=False)
+        stmt = dialect_insert(PageHistoryStats).from_select(_STATS_COLUMNS, source)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["page_id", "day"],
+            set_={
+                "snapshot_count": stmt.excluded.snapshot_count,
+                "first_recorded_at": stmt.excluded.first_recorded_at,
+                "last_recorded_at": stmt.excluded.last_recorded_at,
+            },
+        )
+        result = db.session.execute(stmt)
+        if commit:
+            db.session.commit()
+        return result.rowcount or 0
+
+    @staticmethod
+    def _today_history(today: date):
+        """pages_history rows recorded on `today` or later: one range scan on
+        ix_pages_history_recorded_at_id."""
+        return PageHistory.recorded_at >= datetime.combine(today, time.min)
+
+    @staticmethod
+    def get_summary(today: date, since_7d: date, since_30d: date) -> dict:
+        """
+        Snapshot totals: overall, on days from `today` / `since_7d` /
+        `since_30d` on, per platform, and the number of pages with history.
+
+        Days before `today` come from the rollup; today is counted live from
+        pages_history, so snapshots the bulk loader wrote since the last
+        `flask refresh-mv` show up straight away.
+
+        Returns:
+            dict: total, today, last_7_days, last_30_days, pages,
+            by_platform ({platform: count})
+        """
+        def _since(day):
+            return func.coalesce(
+                func.sum(case((PageHistoryStats.day >= day, PageHistoryStats.snapshot_count), else_=0)), 0
+            )
+
+        before_today = PageHistoryStats.day < today
+        today_rows = PageHistoryStatsRepository._today_history(today)
+
+        totals = db.session.execute(
+            select(
+                func.coalesce(func.sum(PageHistoryStats.snapshot_count), 0).label("total"),
+                _since(since_7d).label("last_7_days"),
+                _since(since_30d).label("last_30_days"),
+            ).where(before_today)
+        ).one()
+
+        platform_rows = db.session.execute(
+            select(Page.platform, func.sum(PageHistoryStats.snapshot_count))
+            .join(Page, Page.uuid == PageHistoryStats.page_id)
+            .where(before_today)
+            .group_by(Page.platform)
+        ).all()
+        today_platform_rows = db.session.execute(
+            select(Page.platform, func.count(PageHistory.id))
+            .join(Page, Page.uuid == PageHistory.page_id)
+            .where(today_rows)
+            .group_by(Page.platform)
+        ).all()
+
+        pages = union(
+            select(PageHistoryStats.page_id).where(before_today),
+            select(PageHistory.page_id).where(today_rows, PageHistory.page_id.isnot(None)),
+        ).subquery()
+        page_count = db.session.scalar(select(func.count()).select_from(pages)) or 0
+
+        by_platform = {}
+        for platform, count in list(platform_rows) + list(today_platform_rows):
+            if platform:
+                by_platform[platform] = by_platform.get(platform, 0) + int(count or 0)
+        # Snapshots without a page are counted by neither the rollup nor the
+        # join above.
+        today_count = sum(int(count or 0) for _, count in today_platform_rows)
+
+        return {
+            "total": int(totals.total) + today_count,
+            "today": today_count,
+            "last_7_days": int(totals.last_7_days) + today_count,
+            "last_30_days": int(totals.last_30_days) + today_count,
+            "pages": page_count,
+            "by_platform": by_platform,
+        }
+
+    @staticmethod
+    def get_options(today: date) -> dict:
+        """
+        Filter options of the pages history browser: platforms and brands
+        with history, the recorded_at range and the snapshot total. As in
+        get_summary, days before `today` come from the rollup and today from
+        pages_history.
+
+        Returns:
+            dict: platforms, brands ([(id, name)]), min_date, max_date, total
+        """
+        before_today = PageHistoryStats.day < today
+        today_rows = PageHistoryStatsRepository._today_history(today)
+        has_history = or_(
+            select(literal(1)).where(PageHistoryStats.page_id == Page.uuid, before_today).exists(),
+            select(literal(1)).where(PageHistory.page_id == Page.uuid, today_rows).exists(),
+        )
+
+        platforms = db.session.scalars(
+            select(Page.platform).where(has_history).distinct().order_by(Page.platform)
+        ).all()
+        brands = db.session.execute(
+            select(Entity.id, Entity.name)
+            .join(Page, Page.entity_id == Entity.id)
+            .where(has_history)
+            .distinct()
+            .order_by(Entity.name)
+        ).all()
+        bounds = db.session.execute(
+            select(
+                func.min(PageHistoryStats.first_recorded_at).label("min_date"),
+                func.max(PageHistoryStats.last_recorded_at).label("max_date"),
+                func.coalesce(func.sum(PageHistoryStats.snapshot_count), 0).label("total"),
+            ).where(before_today)
+        ).one()
+        live = db.session.execute(
+            select(
+                func.min(PageHistory.recorded_at).label("min_date"),
+                func.max(PageHistory.recorded_at).label("max_date"),
+                func.count(PageHistory.id).label("total"),
+            ).where(today_rows, PageHistory.page_id.isnot(None))
+        ).one()
+
+        return {
+            "platforms": [p for p in platforms if p],
+            "brands": [(b.id, b.name) for b in brands],
+            "min_date": bounds.min_date or live.min_date,
+            "max_date": live.max_date or bounds.max_date,
+            "total": int(bounds.total) + int(live.total or 0),
+        }
@@ -2,9 +2,11 @@
 import logging
 from datetime import datetime, timedelta
 
-from sqlalchemy import case, select, text
+from sqlalchemy import case, literal, select, text, true, tuple_
+from sqlalchemy.orm import aliased
 
 from api.models.post_model import db, PostMV, PostHistoryMV
+from api.models.entity_model import Entity
 from api.models.page_model import Page
 from api.models.page_history_model import PageHistory
 from api.utils.logging_utils import instrument_repository_class
@@ -61,6 +63,78 @@ class PostRepository:
             q = q.filter(PostMV.platform == platform)
         return q.order_by(PostMV.created_at.desc()).all()
 
+    @staticmethod
+    def get_entity_timeline_page(
+        entity_id: int, since: datetime, before: tuple | None = None, limit: int = 50
+    ) -> list[tuple]:
+        """
+        One page of an entity's posts, newest first, created at/after `since`.
+
+        Keyset-paginated on (created_at, page_id, platform, post_id), all
+        descending: `before` is that key of the last post already returned,
+        and the page starts strictly after it.
+
+        On Postgres each of the entity's pages contributes its newest `limit`
+        posts past the cursor through a LATERAL subquery, an index range scan
+        on idx_pm_page_created (page_id, created_at DESC, ...); those are
+        merged and cut to `limit`. The cost follows the page size and the
+        entity's page count, not how many posts other entities have in the
+        window. SQLite (dev/test DB) has no LATERAL and runs the same filter
+        as one flat query.
+
+        Returns:
+            list[tuple]: up to `limit` rows of (PostMV, page_name)
+        """
+        key = (PostMV.created_at, PostMV.page_id, PostMV.platform, PostMV.post_id)
+        after_cursor = []
+        if before is not None:
+            after_cursor = [
+                tuple_(*key) < tuple_(*(literal(v, type_=c.type) for c, v in zip(key, before))),
+                # Redundant with the row comparison, but a bound on the index's
+                # created_at column once page_id is fixed.
+                PostMV.created_at <= literal(before[0], type_=PostMV.created_at.type),
+            ]
+
+        if db.engine.dialect.name == 'sqlite':
+            return (
+                db.session.query(PostMV, Page.name)
+                .join(Page, Page.uuid == PostMV.page_id)
+                .join(Entity, Entity.id == Page.entity_id)
+                .filter(
+                    Page.entity_id == entity_id,
+                    Entity.to_scrape.is_(True),
+                    PostMV.created_at >= since,
+                    *after_cursor,
+                )
+                .order_by(*(c.desc() for c in key))
+                .limit(limit)
+                .all()
+            )
+
+        entity_pages = (
+            select(Page.uuid, Page.name)
+            .join(Entity, Entity.id == Page.entity_id)
+            .where(Page.entity_id == entity_id, Entity.to_scrape.is_(True))
+            .subquery("entity_pages")
+        )
+        page_posts = (
+            select(PostMV)
+            .where(PostMV.page_id == entity_pages.c.uuid, PostMV.created_at >= since, *after_cursor)
+            .order_by(*(c.desc() for c in key))
+            .limit(limit)
+            .lateral("page_posts")
+        )
+        post = aliased(PostMV, page_posts)
+        merged_key = (post.created_at, post.page_id, post.platform, post.post_id)
+        stmt = (
+            select(post, entity_pages.c.name)
+            .select_from(entity_pages)
+            .join(page_posts, true())
+            .order_by(*(c.desc() for c in merged_key))
+            .limit(limit)
+        )
+        return db.session.execute(stmt).all()
+
     # ── History ───────────────────────────────────────────────────────────
 
     @staticmethod
@@ -76,24 +150,42 @@ class PostRepository:
     # ── Materialized view refresh ───────────────────────────────────────
 
     @staticmethod
-    def refresh_post_views():
+    def refresh_post_views(history_id: int | None = None):
         """Refresh posts_history_mv then posts_mv (posts_mv is DISTINCT ON
         posts_history_mv, so it must go second) after a post-metric
         correction writes directly to the underlying pages_history row.
 
         Best-effort: the correction itself already committed by the time
         this runs, so a refresh failure must never surface as a failed
-        request. Unlike page_posts_metrics_mv, these two views have no
-        existing scheduled refresh anywhere in this codebase (see the
-        "Run this after every scrape cycle (or on a schedule)" note in
-        api/database/posts_mv_queries.sql — that's handled externally,
-        e.g. by the DB server, not by `flask refresh-mv`, which only
-        touches page_posts_metrics_mv). So on failure here they simply
-        stay stale until that external refresh runs, or until another
-        post_metric correction succeeds. This also means it's a no-op
-        under SQLite (the dev/test DB) — REFRESH MATERIALIZED VIEW isn't
-        a concept there, which is expected.
+        request. On failure the views stay stale until the next
+        `flask refresh-mv` (which refreshes all three metrics views), or
+        until another post_metric correction succeeds. This also means it's
+        a no-op under SQLite (the dev/test DB) — REFRESH MATERIALIZED VIEW
+        isn't a concept there, which is expected.
+
+        Once the views are incrementally maintained tables (see
+        api/database/incremental_mv_tables.sql) there is nothing to REFRESH;
+        instead only the rows derived from the corrected snapshot
+        (`history_id`) are re-derived.
         """
+        from api.repositories.page_history_repository import PageHistoryRepository
+
+        try:
+            if PageHistoryRepository.metrics_views_are_tables():
+                if history_id is not None:
+                    PageHistoryRepository.resync_metrics_rows([history_id])
+                return
+        except Exception:
+            db.session.rollback()
+            logger.warning(
+                "post-metric correction committed but re-deriving the metrics "
+                "rows of pages_history #%s failed; they'll stay stale until the "
+                "next `flask refresh-mv --full`.",
+                history_id,
+                exc_info=True,
+            )
+            return
+
         try:
             db.session.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY posts_history_mv"))
             db.session.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY posts_mv"))
@@ -108,12 +200,129 @@ class PostRepository:
                 db.session.rollback()
                 logger.warning(
                     "post-metric correction committed but posts_mv/posts_history_mv "
-                    "refresh failed; these views have no other scheduled refresh, "
-                    "so they'll stay stale until the next successful post_metric "
-                    "correction or a manual REFRESH.",
+                    "refresh failed; they'll stay stale until the next "
+                    "`flask refresh-mv` or successful post_metric correction.",
                     exc_info=True,
                 )
 
+    # ── Engagement anomaly scoring (Postgres only) ───────────────────────
+    # Server-side variant of the alert engine's engagement detector, used
+    # when ALERTS_ENGAGEMENT_BACKEND=sql. The baseline is percentile_cont's
+    # interpolated median (the in-process detector takes the upper median),
+    # and the suspicious-zero rule is expressed as "a positive reading came
+    # earlier", which is equivalent for non-negative counts.
+
+    @staticmethod
+    def get_engagement_anomalies(start_from: datetime, thresholds: dict) -> list:
+        """One row per anomalous (post, metric) among snapshots recorded since
+        `start_from`, ordered by post then metric."""
+        sql = text("""
+            WITH snaps AS (
+                SELECT
+                    ph.page_id,
+                    ph.platform,
+                    ph.post_id,
+                    ph.recorded_at,
+                    m.metric,
+                    m.metric_order,
+                    m.value,
+                    ROW_NUMBER() OVER w_desc AS rn_desc,
+                    COUNT(*) OVER w_all AS n_snaps,
+                    LAG(m.value) OVER w_asc AS prev_value,
+                    COUNT(*) FILTER (WHERE m.value > 0) OVER (
+                        w_asc ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                    ) AS positives_before
+                FROM posts_history_mv ph
+                CROSS JOIN LATERAL (VALUES
+                    ('likes', 1, ph.likes::float8),
+                    ('comments', 2, ph.comments::float8),
+                    ('shares', 3, ph.shares::float8),
+                    ('views', 4, ph.views::float8)
+                ) AS m(metric, metric_order, value)
+                WHERE ph.recorded_at >= :start_from
+                WINDOW
+                    w_all AS (PARTITION BY ph.page_id, ph.platform, ph.post_id, m.metric),
+                    w_asc AS (w_all ORDER BY ph.recorded_at),
+                    w_desc AS (w_all ORDER BY ph.recorded_at DESC)
+            ),
+            per_post AS (
+                SELECT
+                    page_id,
+                    platform,
+                    post_id,
+                    metric,
+                    metric_order,
+                    MAX(recorded_at) AS latest_recorded_at,
+                    MAX(value) FILTER (WHERE rn_desc = 1) AS current_value,
+                    MAX(prev_value) FILTER (WHERE rn_desc = 1) AS prev_value,
+                    COUNT(*) FILTER (WHERE in_baseline) AS baseline_n,
+                    percentile_cont(0.5) WITHIN GROUP (ORDER BY value)
+                        FILTER (WHERE in_baseline) AS baseline
+                FROM (
+                    SELECT
+                        snaps.*,
+                        rn_desc > 1
+                            AND value IS NOT NULL
+                            AND NOT (value = 0 AND positives_before > 0) AS in_baseline
+                    FROM snaps
+                    WHERE n_snaps >= 3
+                ) flagged
+                GROUP BY page_id, platform, post_id, metric, metric_order
+            ),
+            scored AS (
+                SELECT
+                    per_post.*,
+                    current_value - baseline AS abs_change,
+                    COALESCE((current_value - baseline) / NULLIF(baseline, 0), 0) AS deviation
+                FROM per_post
+                WHERE current_value IS NOT NULL
+                  AND prev_value IS NOT NULL
+                  AND NOT (prev_value > 0 AND current_value = 0)
+                  AND baseline_n >= 3
+                  AND baseline >= :min_baseline
+                  AND ABS(current_value - baseline) >= :min_abs_change
+            )
+            SELECT
+                page_id,
+                platform,
+                post_id,
+                latest_recorded_at,
+                metric,
+                CASE WHEN deviation >= :threshold_up THEN 'increase' ELSE 'drop' END AS direction,
+                baseline,
+                current_value,
+                deviation,
+                abs_change
+            FROM scored
+            WHERE deviation >= :threshold_up
+               OR deviation <= (0 - :threshold_down)
+            ORDER BY page_id, platform, post_id, metric_order
+        """)
+        return db.session.execute(sql, {
+            "start_from": start_from,
+            "threshold_up": thresholds["threshold_up"],
+            "threshold_down": thresholds["threshold_down"],
+            "min_baseline": thresholds["min_baseline"],
+            "min_abs_change": thresholds["min_abs_change"],
+        }).mappings().all()
+
+    @staticmethod
+    def get_engagement_window_stats(start_from: datetime):
+        """Snapshot count of the window and the latest snapshot time among
+        posts with enough history to be scored (the detector's cursor)."""
+        sql = text("""
+            SELECT
+                COALESCE(SUM(n), 0) AS snapshots,
+                MAX(latest) FILTER (WHERE n >= 3) AS latest_recorded_at
+            FROM (
+                SELECT COUNT(*) AS n, MAX(recorded_at) AS latest
+                FROM posts_history_mv
+                WHERE recorded_at >= :start_from
+                GROUP BY page_id, platform, post_id
+            ) per_post
+        """)
+        return db.session.execute(sql, {"start_from": start_from}).mappings().one()
+
     # ── Data integrity ───────────────────────────────────────────────────
     # Null-rate reporting for the admin "Data Integrity" panel. Built with
     # portable SQLAlchemy case()/count() rather than Postgres FILTER: since
@@ -0,0 +1,123 @@
+# Data-access methods for ranking snapshot repository.
+from datetime import date, datetime
+import json
+
+from sqlalchemy import insert
+
+from api import db
+from api.models.ranking_snapshot_model import RankingSnapshot
+from api.utils.logging_utils import instrument_repository_class
+
+# Columns a snapshot read may be ordered by. Anything else falls back to
+# total_score rather than being interpolated into the query.
+_ORDER_COLUMNS = {
+    "total_score": RankingSnapshot.total_score,
+    "total_likes": RankingSnapshot.total_likes,
+    "total_comments": RankingSnapshot.total_comments,
+    "total_followers": RankingSnapshot.total_followers,
+    "followers_progress": RankingSnapshot.followers_progress,
+}
+
+
+def _jsonable(value):
+    # Live ranking rows carry UUID page ids (and the odd date); the JSON column
+    # needs plain types. Round-tripping through json with default=str matches
+    # what the Flask JSON provider would have sent to the client anyway.
+    return json.loads(json.dumps(value, default=str))
+
+
+@instrument_repository_class
+class RankingSnapshotRepository:
+    @staticmethod
+    def replace_snapshot(
+        ranking_kind: str,
+        period: str,
+        entity_type: str,
+        snapshot_date: date,
+        rows: list[dict],
+        commit: bool = True,
+    ) -> int:
+        """Atomically swap the stored ranking for one (kind, period, type, day)
+        key: delete whatever was there and bulk-insert `rows` in one statement.
+
+        `rows` are the live ranking dicts, in the order the live computation
+        produced them; that order is kept as `position` for tie-breaking.
+
+        Returns:
+            int: Number of rows written
+        """
+        RankingSnapshot.query.filter_by(
+            ranking_kind=ranking_kind,
+            period=period,
+            entity_type=entity_type,
+            snapshot_date=snapshot_date,
+        ).delete(synchronize_session=False)
+
+        now = datetime.utcnow()
+        values = []
+        for position, row in enumerate(rows):
+            payload = {k: v for k, v in row.items() if k != "rank"}
+            values.append({
+                "ranking_kind": ranking_kind,
+                "period": period,
+                "entity_type": entity_type,
+                "snapshot_date": snapshot_date,
+                "entity_id": row["entity_id"],
+                "position": position,
+                "total_score": float(row.get("total_score") or 0.0),
+                "total_likes": int(row.get("total_likes") or 0),
+                "total_comments": int(row.get("total_comments") or 0),
+                "total_followers": int(row.get("total_followers") or 0),
+                "followers_progress": int(row.get("followers_progress") or 0),
+                "payload": _jsonable(payload),
+                "created_at": now,
+            })
+
+        if values:
+            db.session.execute(insert(RankingSnapshot), values)
+
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+        return len(values)
+
+    @staticmethod
+    def get_snapshot(
+        ranking_kind: str,
+        period: str,
+        entity_type: str,
+        snapshot_date: date,
+        order_by: str = "total_score",
+    ) -> list[dict] | None:
+        """Stored ranking payloads for one key, best first. Returns None when
+        nothing is stored for that key (never precomputed, or precomputed
+        empty), so callers fall back to computing the ranking live."""
+        order_column = _ORDER_COLUMNS.get(order_by, RankingSnapshot.total_score)
+        rows = (
+            db.session.query(RankingSnapshot.payload)
+            .filter(
+                RankingSnapshot.ranking_kind == ranking_kind,
+                RankingSnapshot.period == period,
+                RankingSnapshot.entity_type == entity_type,
+                RankingSnapshot.snapshot_date == snapshot_date,
+            )
+            .order_by(order_column.desc(), RankingSnapshot.position.asc())
+            .all()
+        )
+        if not rows:
+            return None
+        return [dict(r.payload) for r in rows]
+
+    @staticmethod
+    def delete_before(snapshot_date: date, commit: bool = True) -> int:
+        """Drop snapshots older than `snapshot_date`; they can never be served
+        again because reads are keyed on today's date."""
+        deleted = (
+            RankingSnapshot.query
+            .filter(RankingSnapshot.snapshot_date < snapshot_date)
+            .delete(synchronize_session=False)
+        )
+        if commit:
+            db.session.commit()
+        return deleted
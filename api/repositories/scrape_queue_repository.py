@@ -0,0 +1,181 @@
+# Data-access methods for scrape queue repository.
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, case, func, or_, select, tuple_, update
+from api.models.scrape_queue_model import ScrapeQueueItem, db
+from api.utils.logging_utils import instrument_repository_class
+
+QUEUE_INSERT_CHUNK_SIZE = 1000
+
+
+@instrument_repository_class
+class ScrapeQueueRepository:
+    """Repository for the per-day comment scraping work queue."""
+
+    @staticmethod
+    def enqueue(queue_date: date, posts: list[dict], commit: bool = True) -> int:
+        """
+        Add posts to the queue for `queue_date`. Posts already queued that day
+        (whatever their status) are left alone, so re-running the fill is
+        harmless and never resurrects finished work.
+
+        Args:
+            queue_date: Day the queue belongs to
+            posts: Scraping dicts (PostMV.to_scraping_dict()), each carrying
+                page_id, platform and post_id
+            commit: Whether to commit the transaction
+
+        Returns:
+            int: Number of posts newly queued
+        """
+        if not posts:
+            return 0
+
+        if db.engine.dialect.name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+        now = datetime.utcnow()
+        queued = 0
+        for start in range(0, len(posts), QUEUE_INSERT_CHUNK_SIZE):
+            rows = [
+                {
+                    "queue_date": queue_date,
+                    "page_id": str(post["page_id"]),
+                    "platform": post["platform"],
+                    "post_id": post["post_id"],
+                    "payload": {**post, "page_id": str(post["page_id"])},
+                    "status": "pending",
+                    "attempts": 0,
+                    "created_at": now,
+                }
+                for post in posts[start:start + QUEUE_INSERT_CHUNK_SIZE]
+            ]
+            stmt = (
+                dialect_insert(ScrapeQueueItem)
+                .values(rows)
+                .on_conflict_do_nothing(
+                    index_elements=['queue_date', 'page_id', 'platform', 'post_id']
+                )
+                .returning(ScrapeQueueItem.id)
+            )
+            queued += len(db.session.execute(stmt).all())
+
+        if commit:
+            db.session.commit()
+        return queued
+
+    @staticmethod
+    def lease(
+        queue_date: date,
+        owner: str,
+        batch_size: int,
+        lease_seconds: int,
+        platform: str = None,
+        commit: bool = True,
+    ) -> tuple[list[dict], datetime]:
+        """
+        Claim up to `batch_size` pending (or lease-expired) items for `owner`.
+
+        The claim is one `UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP
+        LOCKED)`: concurrent workers never block on each other and never get
+        the same item while its lease is live.
+
+        Returns:
+            tuple: (payloads in queue order, lease expiry)
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=lease_seconds)
+
+        claimable = (
+            select(ScrapeQueueItem.id)
+            .where(
+                ScrapeQueueItem.queue_date == queue_date,
+                or_(
+                    ScrapeQueueItem.status == "pending",
+                    and_(
+                        ScrapeQueueItem.status == "leased",
+                        ScrapeQueueItem.lease_expires_at < now,
+                    ),
+                ),
+            )
+            .order_by(ScrapeQueueItem.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        if platform:
+            claimable = claimable.where(ScrapeQueueItem.platform == platform)
+
+        stmt = (
+            update(ScrapeQueueItem)
+            .where(ScrapeQueueItem.id.in_(claimable.scalar_subquery()))
+            .values(
+                status="leased",
+                lease_owner=owner,
+                lease_expires_at=expires_at,
+                attempts=ScrapeQueueItem.attempts + 1,
+            )
+            .returning(ScrapeQueueItem.id, ScrapeQueueItem.payload)
+            .execution_options(synchronize_session=False)
+        )
+        rows = sorted(db.session.execute(stmt).all())
+
+        if commit:
+            db.session.commit()
+        return [row.payload for row in rows], expires_at
+
+    @staticmethod
+    def acknowledge(keys: list[tuple], since: date, commit: bool = True) -> int:
+        """
+        Mark queued posts done. `keys` are (page_id, platform, post_id);
+        items queued on `since` or later are matched, so a batch finished
+        after midnight still closes out the previous day's lease.
+
+        Returns:
+            int: Number of queue items marked done
+        """
+        if not keys:
+            return 0
+        result = db.session.execute(
+            update(ScrapeQueueItem)
+            .where(
+                ScrapeQueueItem.queue_date >= since,
+                ScrapeQueueItem.status != "done",
+                tuple_(
+                    ScrapeQueueItem.page_id,
+                    ScrapeQueueItem.platform,
+                    ScrapeQueueItem.post_id,
+                ).in_([(str(p), pl, po) for p, pl, po in keys]),
+            )
+            .values(status="done", lease_owner=None, lease_expires_at=None, completed_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if commit:
+            db.session.commit()
+        return result.rowcount or 0
+
+    @staticmethod
+    def count_by_status(queue_date: date) -> dict:
+        """
+        Queue depth for one day. Leases that have expired are reported as
+        pending, since the next lease call will hand them out again.
+
+        Returns:
+            dict: {"pending": int, "leased": int, "done": int}
+        """
+        now = datetime.utcnow()
+        effective_status = case(
+            (
+                and_(ScrapeQueueItem.status == "leased", ScrapeQueueItem.lease_expires_at < now),
+                "pending",
+            ),
+            else_=ScrapeQueueItem.status,
+        )
+        rows = db.session.execute(
+            select(effective_status, func.count())
+            .where(ScrapeQueueItem.queue_date == queue_date)
+            .group_by(effective_status)
+        ).all()
+        counts = {"pending": 0, "leased": 0, "done": 0}
+        counts.update({status: count for status, count in rows})
+        return counts
@@ -1,5 +1,7 @@
 # Data-access methods for scraping post result repository.
+import uuid
 from datetime import datetime
+from sqlalchemy import tuple_
 from api.models.scraping_post_result_model import ScrapingPostResult, db
 from api.utils.logging_utils import instrument_repository_class
 
@@ -56,6 +58,86 @@ class ScrapingPostResultRepository:
 
         return result
 
+    @staticmethod
+    def record_many(
+        results: list[dict],
+        scraping_session_id: str = None,
+        commit: bool = True,
+    ) -> int:
+        """
+        Upsert scraping results for a whole batch of posts at once.
+
+        Same semantics as calling `record` per post, without a lookup and
+        write per post. With a session id the batch is a single
+        `INSERT ... ON CONFLICT (uq_scraping_post_result) DO UPDATE`. Without
+        one, the unique constraint cannot match (NULL never conflicts), so
+        existing session-less rows are fetched in one query and the updates
+        and inserts are flushed together.
+
+        Args:
+            results: Dicts with page_id, platform, post_id, comments_count.
+                A post listed twice keeps its last count.
+            scraping_session_id: Optional session UUID shared by the batch
+            commit: Whether to commit the transaction
+
+        Returns:
+            int: Number of posts recorded
+        """
+        now = datetime.utcnow()
+        rows = {}
+        for item in results:
+            # Canonical form, so keys match the page_id of the rows read back.
+            page_id = str(uuid.UUID(str(item["page_id"])))
+            key = (page_id, item["platform"], item["post_id"])
+            rows[key] = {
+                "page_id": page_id,
+                "platform": item["platform"],
+                "post_id": item["post_id"],
+                "comments_count": item["comments_count"],
+                "scraping_session_id": scraping_session_id,
+                "scraped_at": now,
+            }
+        recorded = len(rows)
+        if not recorded:
+            return 0
+
+        if scraping_session_id is not None:
+            if db.engine.dialect.name == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+            stmt = dialect_insert(ScrapingPostResult).values(list(rows.values()))
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['page_id', 'platform', 'post_id', 'scraping_session_id'],
+                set_={
+                    "comments_count": stmt.excluded.comments_count,
+                    "scraped_at": stmt.excluded.scraped_at,
+                },
+            )
+            db.session.execute(stmt)
+        else:
+            existing = ScrapingPostResult.query.filter(
+                ScrapingPostResult.scraping_session_id.is_(None),
+                tuple_(
+                    ScrapingPostResult.page_id,
+                    ScrapingPostResult.platform,
+                    ScrapingPostResult.post_id,
+                ).in_(list(rows)),
+            ).all()
+            for result in existing:
+                row = rows.pop((str(uuid.UUID(str(result.page_id))), result.platform, result.post_id), None)
+                if row:
+                    result.comments_count = row["comments_count"]
+                    result.scraped_at = now
+            db.session.add_all(ScrapingPostResult(**row) for row in rows.values())
+            db.session.flush()
+
+        if commit:
+            db.session.commit()
+
+        return recorded
+
     @staticmethod
     def get_by_post_and_session(
         page_id: str,
@@ -75,37 +157,3 @@ class ScrapingPostResultRepository:
             post_id=post_id,
             scraping_session_id=scraping_session_id,
         ).first()
-
-    @staticmethod
-    def get_scraped_post_keys_in_range(
-        start_dt: datetime,
-        end_dt: datetime,
-        platform: str = None,
-    ) -> set[tuple]:
-        """
-        Return a set of (page_id, platform, post_id) tuples for posts that
-        were scraped (i.e. have a ScrapingPostResult row) within the given
-        datetime range.
-
-        Args:
-            start_dt: Range start (inclusive)
-            end_dt: Range end (exclusive)
-            platform: Optional platform filter
-
-        Returns:
-            set of (str, str, str) tuples
-        """
-        query = ScrapingPostResult.query.filter(
-            ScrapingPostResult.scraped_at >= start_dt,
-            ScrapingPostResult.scraped_at < end_dt,
-        )
-        if platform:
-            query = query.filter_by(platform=platform)
-
-        rows = query.with_entities(
-            ScrapingPostResult.page_id,
-            ScrapingPostResult.platform,
-            ScrapingPostResult.post_id,
-        ).all()
-
-        return {(str(r.page_id), r.platform, r.post_id) for r in rows}
@@ -1,6 +1,8 @@
 # Data-access methods for scraping profile result repository. Mirrors
 # scraping_post_result_repository.py.
+import uuid
 from datetime import datetime
+from sqlalchemy import tuple_
 from api.models.scraping_profile_result_model import ScrapingProfileResult, db
 from api.utils.logging_utils import instrument_repository_class
 
@@ -45,6 +47,74 @@ class ScrapingProfileResultRepository:
 
         return result
 
+    @staticmethod
+    def record_many(
+        results: list[dict],
+        scraping_session_id: str = None,
+        commit: bool = True,
+    ) -> int:
+        """Upsert results for a whole batch of accounts; the set-based
+        counterpart of `record` (see ScrapingPostResultRepository.record_many).
+        `results` are dicts with page_id, platform, account_id and
+        profile_inserted. Returns the number of accounts recorded."""
+        now = datetime.utcnow()
+        rows = {}
+        for item in results:
+            # Canonical form, so keys match the page_id of the rows read back.
+            page_id = str(uuid.UUID(str(item["page_id"])))
+            key = (page_id, item["platform"])
+            rows[key] = {
+                "page_id": page_id,
+                "platform": item["platform"],
+                "account_id": item["account_id"],
+                "profile_inserted": item["profile_inserted"],
+                "scraping_session_id": scraping_session_id,
+                "scraped_at": now,
+            }
+        recorded = len(rows)
+        if not recorded:
+            return 0
+
+        if scraping_session_id is not None:
+            if db.engine.dialect.name == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+            stmt = dialect_insert(ScrapingProfileResult).values(list(rows.values()))
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['page_id', 'platform', 'scraping_session_id'],
+                set_={
+                    "account_id": stmt.excluded.account_id,
+                    "profile_inserted": stmt.excluded.profile_inserted,
+                    "scraped_at": stmt.excluded.scraped_at,
+                },
+            )
+            db.session.execute(stmt)
+        else:
+            # NULL session ids never conflict, so match existing rows here.
+            existing = ScrapingProfileResult.query.filter(
+                ScrapingProfileResult.scraping_session_id.is_(None),
+                tuple_(
+                    ScrapingProfileResult.page_id,
+                    ScrapingProfileResult.platform,
+                ).in_(list(rows)),
+            ).all()
+            for result in existing:
+                row = rows.pop((str(uuid.UUID(str(result.page_id))), result.platform), None)
+                if row:
+                    result.account_id = row["account_id"]
+                    result.profile_inserted = row["profile_inserted"]
+                    result.scraped_at = now
+            db.session.add_all(ScrapingProfileResult(**row) for row in rows.values())
+
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+
+        return recorded
+
     @staticmethod
     def get_by_page_and_session(
         page_id: str,
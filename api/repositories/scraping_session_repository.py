@@ -25,6 +25,8 @@ class ScrapingSessionRepository:
         db.session.add(session)
         if commit:
             db.session.commit()
+        else:
+            db.session.flush()
         return session
     
     @staticmethod
@@ -84,6 +86,27 @@ class ScrapingSessionRepository:
                 db.session.commit()
         return session
     
+    @staticmethod
+    def increment_posts_fetched(session_id: str, count: int, commit: bool = True) -> ScrapingSession:
+        """
+        Increment the posts_fetched counter (a queue worker's session grows
+        with every batch it leases).
+        
+        Args:
+            session_id: Session UUID
+            count: Number to increment by
+            commit: Whether to commit the transaction
+            
+        Returns:
+            ScrapingSession: The updated session
+        """
+        session = ScrapingSessionRepository.get_by_id(session_id)
+        if session:
+            session.posts_fetched += count
+            if commit:
+                db.session.commit()
+        return session
+    
     @staticmethod
     def complete_session(session_id: str, commit: bool = True) -> ScrapingSession:
         """
@@ -285,7 +308,6 @@ class ScrapingSessionRepository:
         if not session_ids:
             return 0
         
-        from sqlalchemy import cast, String
         from api.models.comment_model import Comment
         from api.models.post_model import PostMV
         
@@ -304,12 +326,11 @@ class ScrapingSessionRepository:
         posts_subquery = subquery_stmt.subquery()
         
         # Join with posts_mv to get expected comment counts
-        # Cast page_id to String to handle potential UUID vs varchar mismatch
         result = (db.session.query(func.coalesce(func.sum(PostMV.comments), 0))
                   .select_from(posts_subquery)
                   .join(PostMV, 
                         db.and_(
-                            cast(PostMV.page_id, String) == posts_subquery.c.page_id,
+                            PostMV.page_id == posts_subquery.c.page_id,
                             PostMV.platform == posts_subquery.c.platform,
                             PostMV.post_id == posts_subquery.c.post_id
                         ))
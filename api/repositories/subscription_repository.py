@@ -72,6 +72,64 @@ class SubscriptionRepository:
         db.session.commit()
         return int(updated or 0)
 
+    @staticmethod
+    def activate_due(now: datetime | None = None) -> int:
+        """Flip pending subscriptions whose window has started (and not ended) to active."""
+        now = now or datetime.now(timezone.utc)
+        updated = (
+            Subscription.query.filter(
+                Subscription.status == "pending",
+                Subscription.starts_at <= now,
+                db.or_(Subscription.ends_at.is_(None), Subscription.ends_at > now),
+            )
+            .update({"status": "active"}, synchronize_session=False)
+        )
+        db.session.commit()
+        return int(updated or 0)
+
+    @staticmethod
+    def get_user_ids_due(now: datetime | None = None) -> list[int]:
+        """Users with a subscription that `expire_due` or `activate_due` would change."""
+        now = now or datetime.now(timezone.utc)
+        rows = (
+            db.session.query(Subscription.user_id)
+            .filter(
+                db.or_(
+                    db.and_(
+                        Subscription.status == "active",
+                        Subscription.ends_at.isnot(None),
+                        Subscription.ends_at <= now,
+                    ),
+                    db.and_(
+                        Subscription.status == "pending",
+                        Subscription.starts_at <= now,
+                    ),
+                )
+            )
+            .distinct()
+            .all()
+        )
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def get_next_boundary_for_user(user_id: int, now: datetime | None = None) -> datetime | None:
+        """Earliest future starts_at/ends_at among the user's active or pending
+        subscriptions: the next moment their effective access can change."""
+        now = now or datetime.now(timezone.utc)
+        next_start, next_end = (
+            db.session.query(
+                db.func.min(db.case((Subscription.starts_at > now, Subscription.starts_at))),
+                db.func.min(db.case((Subscription.ends_at > now, Subscription.ends_at))),
+            )
+            .filter(
+                Subscription.user_id == user_id,
+                Subscription.status.in_(("active", "pending")),
+            )
+            .one()
+        )
+        boundaries = [b for b in (next_start, next_end) if b is not None]
+        return min(boundaries) if boundaries else None
+
     @staticmethod
     def revoke(subscription_id: int) -> Subscription | None:
         """Mark a subscription as revoked. Returns the updated subscription or None if not found."""
@@ -159,6 +159,7 @@ def set_user_role(user_id):
         updated = UserRepository.update_profile(user_id, role=role)
     except ValueError:
         return error_response("User not found.", 404)
+    SubscriptionService.invalidate_cached_access(user_id)
     return success_response(_serialize_user(updated))
 
 
@@ -495,6 +496,7 @@ def delete_user(user_id):
     deleted = UserRepository.delete(user_id)
     if not deleted:
         return error_response("User not found.", 404)
+    SubscriptionService.invalidate_cached_access(user_id)
 
     return success_response({"deleted_id": user_id})
 
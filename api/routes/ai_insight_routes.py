@@ -23,6 +23,10 @@ def get_insight():
 
         result = get_or_generate_insight(view_type, filters, data)
 
+        if result.get("error") == "generation_in_progress":
+            response = jsonify(result)
+            response.headers["Retry-After"] = str(result["retry_after"])
+            return response, 503
         if "error" in result:
             return jsonify(result), 502
 
@@ -346,6 +346,19 @@ def get_entity_posts_timeline():
         if not entity_id:
             return error_response("Missing required query param: 'entity_id'.", 400)
 
+        # Cursor pagination (infinite scroll): ?limit= and/or ?before=<next_cursor>.
+        if "limit" in request.args or "before" in request.args:
+            try:
+                page = EntityService.get_entity_posts_timeline_page(
+                    entity_id,
+                    date_str=date_str,
+                    before=request.args.get("before"),
+                    limit=request.args.get("limit") or None,
+                )
+            except ValueError:
+                return error_response("Invalid date, cursor or limit provided.", 400)
+            return success_response(page, 200)
+
         try:
             all_posts = EntityService.get_entity_posts_timeline(entity_id, date_str=date_str, max_posts=max_posts)
         except ValueError:
@@ -9,6 +9,7 @@ from api.utils.permissions import (
     current_user_role,
     limit_ranking_for_role,
     ranking_access_error,
+    ranking_limit_for_role,
 )
 from api.utils.posts_utils import ensure_datetime
 
@@ -41,6 +42,28 @@ def _parse_followers_sort(default="progress"):
     return value
 
 
+def _parse_ranking_page(role):
+    """Read the optional `?limit=` / `?cursor=` query params of the posts
+    rankings, clamped to how deep the caller's role may see.
+
+    `cursor` is the rank of the last row the client already has. The clamp is
+    applied before the query (not by truncating afterwards) so a free-tier
+    caller cannot page past the top N.
+    """
+    raw_limit = request.args.get("limit")
+    raw_cursor = request.args.get("cursor")
+    limit = int(raw_limit) if raw_limit not in (None, "") else None
+    cursor = int(raw_cursor) if raw_cursor not in (None, "") else 0
+    if (limit is not None and limit < 1) or cursor < 0:
+        raise ValueError("limit must be positive and cursor non-negative")
+
+    cap = ranking_limit_for_role(role)
+    if cap is not None:
+        cursor = min(cursor, cap)
+        limit = cap - cursor if limit is None else min(limit, cap - cursor)
+    return limit, cursor
+
+
 def _parse_entity_type(default=None):
     """Read and validate the optional `?type=` query param.
 
@@ -376,8 +399,15 @@ def get_posts_followers_ranking():
 
         entity_type = _parse_entity_type(default=None)
 
+        limit, cursor = _parse_ranking_page(role)
+
         data = InfluenceHistoryService.get_posts_followers_ranking(
-            period=period, start_date=start_date, end_date=end_date, entity_type=entity_type
+            period=period,
+            start_date=start_date,
+            end_date=end_date,
+            entity_type=entity_type,
+            limit=limit,
+            cursor=cursor,
         )
         if not data or (isinstance(data, list) and len(data) < 1):
             return error_response("No followers ranking data found for posts.", 404)
@@ -404,8 +434,15 @@ def get_posts_interactions_ranking():
 
         entity_type = _parse_entity_type(default=None)
 
+        limit, cursor = _parse_ranking_page(role)
+
         data = InfluenceHistoryService.get_posts_interactions_ranking(
-            period=period, start_date=start_date, end_date=end_date, entity_type=entity_type
+            period=period,
+            start_date=start_date,
+            end_date=end_date,
+            entity_type=entity_type,
+            limit=limit,
+            cursor=cursor,
         )
         if not data or (isinstance(data, list) and len(data) < 1):
             return error_response("No interactions ranking data found for posts.", 404)
@@ -432,8 +469,15 @@ def get_posts_likes_ranking():
 
         entity_type = _parse_entity_type(default=None)
 
+        limit, cursor = _parse_ranking_page(role)
+
         data = InfluenceHistoryService.get_posts_likes_ranking(
-            period=period, start_date=start_date, end_date=end_date, entity_type=entity_type
+            period=period,
+            start_date=start_date,
+            end_date=end_date,
+            entity_type=entity_type,
+            limit=limit,
+            cursor=cursor,
         )
         if not data or (isinstance(data, list) and len(data) < 1):
             return error_response("No likes ranking data found for posts.", 404)
@@ -460,8 +504,15 @@ def get_posts_comments_ranking():
 
         entity_type = _parse_entity_type(default=None)
 
+        limit, cursor = _parse_ranking_page(role)
+
         data = InfluenceHistoryService.get_posts_comments_ranking(
-            period=period, start_date=start_date, end_date=end_date, entity_type=entity_type
+            period=period,
+            start_date=start_date,
+            end_date=end_date,
+            entity_type=entity_type,
+            limit=limit,
+            cursor=cursor,
         )
         if not data or (isinstance(data, list) and len(data) < 1):
             return error_response("No comments ranking data found for posts.", 404)
@@ -516,8 +567,15 @@ def get_competitors_interaction_stats():
         else:
             start_date = None
 
+        # Optional: keep only each entity's `top_n` highest-scoring posts.
+        top_n = inputs.get("top_n")
+        if top_n is not None:
+            top_n = int(top_n)
+            if top_n < 1:
+                raise ValueError("top_n must be positive")
+
         data = InfluenceHistoryService.get_competitors_interaction_stats(
-            entity_ids, start_date=start_date
+            entity_ids, start_date=start_date, top_n=top_n
         )
 
         if not data or (isinstance(data, list) and len(data) < 1):
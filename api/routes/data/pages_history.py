@@ -12,6 +12,7 @@ from . import data_bp
 def get_pages_history():
     """
     Get paginated pages_history records with filtering by dates, brand, platform, page_id, and search keyword.
+    Pages by `page` or by keyset (`after` = the previous page's next_cursor).
     """
     try:
         start_date = request.args.get("start_date")
@@ -39,8 +40,12 @@ def get_pages_history():
         sort_by = request.args.get("sort_by", "recorded_at")
         sort_order = request.args.get("sort_order", "desc")
 
-        include_data_raw = request.args.get("include_data", "true").lower()
-        include_data = include_data_raw not in ("false", "0", "no")
+        include_data_raw = request.args.get("include_data", "false").lower()
+        include_data = include_data_raw in ("true", "1", "yes")
+
+        # Keyset pages don't recount unless asked: the first page's total holds.
+        after = request.args.get("after")
+        count = request.args.get("count") or ("none" if after else "exact")
 
         data = PageHistoryService.get_filtered_history(
             start_date=start_date,
@@ -55,10 +60,14 @@ def get_pages_history():
             sort_by=sort_by,
             sort_order=sort_order,
             include_data=include_data,
+            after=after,
+            count=count,
         )
 
         return success_response(data, status_code=200)
 
+    except ValueError as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(f"An unexpected error occurred: {str(e)}", 500)
 
@@ -15,7 +15,7 @@ ALLOWED_ENTITY_TYPES = ("company", "influencer", "small-business")
 # Unauthenticated, identical for every caller, and backed by materialized views
 # that only move when the scrape refreshes them — a 5 minute shared TTL costs
 # nothing in freshness and takes the landing-page teaser off Postgres.
-@cache_public(max_age=300, stale_while_revalidate=600)
+@cache_public(max_age=300, stale_while_revalidate=600, etag=True)
 def public_ranking():
     try:
         # Optional `?type=` narrows the public preview to a single entity kind
@@ -1,5 +1,5 @@
 # Route handlers for scraping endpoints.
-from flask import Blueprint, request
+from flask import Blueprint, Response, request, stream_with_context
 from sqlalchemy.exc import SQLAlchemyError
 
 from api.routes.main import (
@@ -13,7 +13,13 @@ from api.routes.main import (
     SEVERITY_MEDIUM,
     SEVERITY_HIGH
 )
-from api.services.scraping_service import ScrapingService
+from api.services.scraping_service import (
+    DEFAULT_LEASE_BATCH_SIZE,
+    DEFAULT_LEASE_SECONDS,
+    MAX_LEASE_BATCH_SIZE,
+    TODAY_STATUS_MAX_PAGE_SIZE,
+    ScrapingService,
+)
 from api.repositories.scraping_session_repository import ScrapingSessionRepository
 from api.utils.api_key_auth import require_api_key
 from api.utils.permissions import require_auth
@@ -268,6 +274,147 @@ def fetch_posts():
         return server_error_response(500)
 
 
+@scraping_bp.route("/queue", methods=["POST"])
+@require_api_key
+def enqueue_posts():
+    """
+    Fill today's scrape work queue. Takes the same filters as GET /posts and
+    queues the posts it would return; already-queued posts are skipped.
+    
+    Query Parameters:
+        - platform (optional): Filter by platform
+        - start_date / end_date (optional): Post creation window (ISO 8601)
+        - recorded_start_date / recorded_end_date (optional): Snapshot window (ISO 8601)
+    
+    Returns:
+        200: {
+            "success": true,
+            "data": {
+                "queue_date": str,
+                "queued": int,
+                "queue": {"pending": int, "leased": int, "done": int}
+            }
+        }
+        400: Invalid query parameters
+        401: Missing or invalid API key
+        500: Database error
+    """
+    try:
+        platform = request.args.get("platform")
+        
+        valid_platforms = ["facebook", "instagram", "x", "tiktok", "linkedin", "youtube"]
+        if platform and platform not in valid_platforms:
+            log_route_error(
+                ValueError(f"Invalid platform: {platform}"),
+                SEVERITY_LOW,
+                400,
+                "Invalid query parameters"
+            )
+            return error_response(f"Invalid platform. Must be one of: {', '.join(valid_platforms)}", 400)
+        
+        result = ScrapingService.enqueue_posts_for_scraping(
+            platform=platform,
+            start_date=request.args.get("start_date"),
+            end_date=request.args.get("end_date"),
+            recorded_start_date=request.args.get("recorded_start_date") or request.args.get("recorded_start"),
+            recorded_end_date=request.args.get("recorded_end_date") or request.args.get("recorded_end")
+        )
+        
+        return success_response(result, 200)
+    
+    except ValueError as e:
+        db.session.rollback()
+        log_route_error(e, SEVERITY_LOW, 400, "Invalid query parameters")
+        return error_response(str(e), 400)
+    
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        log_route_error(e, SEVERITY_HIGH, 500, "Database error during queue fill")
+        return db_error_response(500)
+    
+    except Exception as e:
+        db.session.rollback()
+        log_route_error(e, SEVERITY_HIGH, 500, "Unexpected error during queue fill")
+        return server_error_response(500)
+
+
+@scraping_bp.route("/queue/lease", methods=["POST"])
+@require_api_key
+def lease_posts():
+    """
+    Lease the next batch of today's queued posts to one scraper worker.
+    
+    Request Body (all optional):
+        {
+            "session_id": str,     # returned by the worker's first lease
+            "platform": str,
+            "batch_size": int,     # default 100, max 1000
+            "lease_seconds": int   # default 900
+        }
+    
+    Returns:
+        200: {
+            "success": true,
+            "data": {
+                "session_id": str,
+                "posts": list[dict],
+                "count": int,             # 0 once the queue is drained
+                "lease_expires_at": str
+            }
+        }
+        400: Invalid request body
+        401: Missing or invalid API key
+        500: Database error
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return error_response("Invalid request payload", 400)
+        
+        platform = data.get("platform")
+        valid_platforms = ["facebook", "instagram", "x", "tiktok", "linkedin", "youtube"]
+        if platform and platform not in valid_platforms:
+            log_route_error(
+                ValueError(f"Invalid platform: {platform}"),
+                SEVERITY_LOW,
+                400,
+                "Invalid request data"
+            )
+            return error_response(f"Invalid platform. Must be one of: {', '.join(valid_platforms)}", 400)
+        
+        batch_size = data.get("batch_size", DEFAULT_LEASE_BATCH_SIZE)
+        if not isinstance(batch_size, int) or isinstance(batch_size, bool) or not 0 < batch_size <= MAX_LEASE_BATCH_SIZE:
+            return error_response(f"'batch_size' must be an integer between 1 and {MAX_LEASE_BATCH_SIZE}", 400)
+        
+        lease_seconds = data.get("lease_seconds", DEFAULT_LEASE_SECONDS)
+        if not isinstance(lease_seconds, int) or isinstance(lease_seconds, bool) or lease_seconds <= 0:
+            return error_response("'lease_seconds' must be a positive integer", 400)
+        
+        result = ScrapingService.lease_posts_for_scraping(
+            session_id=data.get("session_id"),
+            platform=platform,
+            batch_size=batch_size,
+            lease_seconds=lease_seconds
+        )
+        
+        return success_response(result, 200)
+    
+    except ValueError as e:
+        db.session.rollback()
+        log_route_error(e, SEVERITY_LOW, 400, "Invalid request data")
+        return error_response(str(e), 400)
+    
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        log_route_error(e, SEVERITY_HIGH, 500, "Database error during queue lease")
+        return db_error_response(500)
+    
+    except Exception as e:
+        db.session.rollback()
+        log_route_error(e, SEVERITY_HIGH, 500, "Unexpected error during queue lease")
+        return server_error_response(500)
+
+
 @scraping_bp.route("/comments", methods=["POST"])
 @require_api_key
 def insert_comments():
@@ -854,6 +1001,11 @@ def get_today_posts_status():
         - date (optional): Date in ISO format (YYYY-MM-DD). Defaults to today.
         - platform (optional): Filter by platform (facebook, instagram, x, tiktok, linkedin, youtube)
         - start_date (optional): Filter posts created after this date (ISO 8601)
+        - counts_only (optional): "true" to return the counts without posts
+        - limit (optional): Page size; returns one page of "posts" and a "next_cursor"
+        - status (optional, with limit): "scraped" or "pending"
+        - cursor (optional, with limit): "next_cursor" of the previous page
+        - format (optional): "ndjson" to stream a counts line, then one line per post
     
     Returns:
         200: {
@@ -869,6 +1021,7 @@ def get_today_posts_status():
                 "pending_posts": list[dict]
             }
         }
+        200 (format=ndjson): application/x-ndjson stream
         400: Invalid query parameters
         401: Missing or invalid API key
         500: Database error
@@ -920,13 +1073,34 @@ def get_today_posts_status():
                 )
                 return error_response("Invalid start_date format. Use ISO 8601 format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SSZ)", 400)
         
+        if request.args.get("format") == "ndjson":
+            lines = ScrapingService.iter_today_scraping_status(
+                platform=platform,
+                target_date=target_date,
+                start_date=start_date,
+                recorded_start_date=recorded_start_date,
+                recorded_end_date=recorded_end_date
+            )
+            return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+
+        limit = request.args.get("limit")
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                return error_response(f"'limit' must be an integer between 1 and {TODAY_STATUS_MAX_PAGE_SIZE}", 400)
+
         # Fetch status
         result = ScrapingService.get_today_scraping_status(
             platform=platform,
             target_date=target_date,
             start_date=start_date,
             recorded_start_date=recorded_start_date,
-            recorded_end_date=recorded_end_date
+            recorded_end_date=recorded_end_date,
+            counts_only=request.args.get("counts_only", "false").lower() == "true",
+            status=request.args.get("status"),
+            limit=limit,
+            cursor=request.args.get("cursor")
         )
         
         return success_response(result, 200)
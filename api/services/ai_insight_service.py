@@ -1,14 +1,54 @@
 import hashlib
 import json
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
-from api.repositories.ai_insight_repository import find_by_key, upsert
-from api.services.openrouter_client import call_llm, get_primary_model_id
+from api.repositories.ai_insight_repository import find_by_key, release_claim, try_claim, upsert
+from api.services.openrouter_client import call_llm, get_primary_model_id, max_call_seconds, stub_llm
 
 
 service_logger = logging.getLogger("service_errors")
 
+INSIGHT_TTL = timedelta(hours=24)
+# Added to the longest call_llm can take (every configured model tried, each
+# up to OPENROUTER_TIMEOUT_SECONDS) to give the lease on a key being generated.
+# A lease left by a crashed worker lapses after it.
+GENERATION_LEASE_MARGIN_SECONDS = 15
+# Retry-After sent with generation_in_progress: a typical generation, not
+# the worst case the lease covers.
+GENERATION_RETRY_AFTER_SECONDS = 5
+# Concurrent LLM calls made by pregenerate_standard_insights.
+PREGENERATE_WORKERS = 4
+
+_llm_override = None
+
+
+def set_llm(llm) -> None:
+    """Replace the LLM call (signature of openrouter_client.call_llm), e.g.
+    with a stub in tests. None restores the configured default."""
+    global _llm_override
+    _llm_override = llm
+
+
+def get_llm():
+    """The LLM call in use: an override from set_llm, openrouter_client.stub_llm
+    when AI_INSIGHTS_LLM=stub (local development without an API key), else
+    call_llm."""
+    if _llm_override is not None:
+        return _llm_override
+    if (os.getenv("AI_INSIGHTS_LLM") or "").strip().lower() == "stub":
+        return stub_llm
+    return call_llm
+
+
+def _model_used() -> str:
+    llm = get_llm()
+    if llm is call_llm:
+        return get_primary_model_id() or "unconfigured"
+    return getattr(llm, "__name__", "custom")
+
 
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
@@ -262,89 +302,256 @@ SERIALIZERS = {
 }
 
 
-def get_or_generate_insight(view_type: str, filters: dict, raw_data) -> dict:
-    """
-    Return cached summary when valid; otherwise generate with LLM and cache.
-    """
-    cache_key = build_cache_key(view_type, filters or {})
-    row = find_by_key(cache_key)
-
-    now = datetime.utcnow()
-    if row and row.expires_at > now:
-        return {"summary": row.summary_text, "cached": True}
-
+def build_data_block(view_type: str, filters: dict, raw_data) -> str:
+    """Serialize raw view data into the text block sent to the LLM."""
     serializer = SERIALIZERS.get(view_type)
     if serializer is None:
         raise ValueError(f"Unknown view_type: {view_type}")
 
-    prompt = PROMPTS.get(view_type)
-    if prompt is None:
-        raise ValueError(f"Missing prompt for view_type: {view_type}")
-
     if view_type == "graph":
         graph_data = raw_data if isinstance(raw_data, dict) else {}
-        data_block = serializer(
+        return serializer(
             graph_data.get("stats", {}),
             graph_data.get("series", {}),
             filters or {},
         )
-    elif view_type == "top_brands":
+    if view_type == "top_brands":
         rows = raw_data.get("rows") if isinstance(raw_data, dict) else raw_data
         if rows is None and isinstance(raw_data, dict):
             rows = raw_data.get("data", [])
-        data_block = serializer(rows or [], filters or {})
-    elif view_type == "posts_timeline":
+        return serializer(rows or [], filters or {})
+    if view_type == "posts_timeline":
         posts = raw_data.get("posts") if isinstance(raw_data, dict) else raw_data
         if posts is None and isinstance(raw_data, dict):
             posts = raw_data.get("data", [])
-        data_block = serializer(posts or [], filters or {})
-    else:
-        sentiment_data = raw_data if isinstance(raw_data, dict) else {}
-        data_block = serializer(sentiment_data, filters or {})
+        return serializer(posts or [], filters or {})
 
-    try:
-        summary = call_llm(prompt, data_block)
-    except ValueError as validation_error:
+    sentiment_data = raw_data if isinstance(raw_data, dict) else {}
+    return serializer(sentiment_data, filters or {})
+
+
+def _generation_lease() -> timedelta:
+    return timedelta(seconds=max_call_seconds() + GENERATION_LEASE_MARGIN_SECONDS)
+
+
+def _is_fresh(row, now: datetime) -> bool:
+    return bool(row and row.summary_text and row.expires_at > now)
+
+
+def _llm_error_result(error: Exception, context: dict) -> dict:
+    """Log a failed generation and return the error payload for the client."""
+    if isinstance(error, ValueError):
         # Invalid response (safety message, too short, etc.) - don't cache
-        _log_service_error(
-            "LLM returned invalid response",
-            validation_error,
-            context={
-                "view_type": view_type,
-                "cache_key": cache_key,
-                "has_filters": bool(filters),
-                "data_block_length": len(data_block or ""),
-                "model": get_primary_model_id() or "unconfigured",
-            },
-        )
+        _log_service_error("LLM returned invalid response", error, context=context)
         return {
             "error": "resource_constraint",
             "message": "Insights are temporarily unavailable due to resource constraints. Please try again.",
         }
-    except Exception as error:
-        _log_service_error(
-            "LLM call failed",
-            error,
-            context={
-                "view_type": view_type,
-                "cache_key": cache_key,
-                "has_filters": bool(filters),
-                "data_block_length": len(data_block or ""),
-                "model": get_primary_model_id() or "unconfigured",
-            },
-        )
+    _log_service_error("LLM call failed", error, context=context)
+    return {
+        "error": "llm_failed",
+        "message": "Failed to generate insights. Please try again.",
+    }
+
+
+def _error_context(view_type: str, cache_key: str, filters: dict, data_block: str) -> dict:
+    return {
+        "view_type": view_type,
+        "cache_key": cache_key,
+        "has_filters": bool(filters),
+        "data_block_length": len(data_block or ""),
+        "model": _model_used(),
+    }
+
+
+def get_or_generate_insight(view_type: str, filters: dict, raw_data) -> dict:
+    """
+    Return cached summary when valid; otherwise generate with LLM and cache.
+
+    Generation is single-flight per cache key across workers: the caller that
+    takes the key's lease in ai_insights_cache calls the LLM; the others serve
+    the previous summary if there is one, or answer generation_in_progress
+    straight away.
+    """
+    cache_key = build_cache_key(view_type, filters or {})
+    row = find_by_key(cache_key)
+
+    now = datetime.utcnow()
+    if _is_fresh(row, now):
+        return {"summary": row.summary_text, "cached": True}
+
+    prompt = PROMPTS.get(view_type)
+    data_block = build_data_block(view_type, filters, raw_data)
+    if prompt is None:
+        raise ValueError(f"Missing prompt for view_type: {view_type}")
+
+    if not try_claim(cache_key, view_type, now + _generation_lease(), now):
+        # Another worker is generating this key; don't hold the request open
+        # waiting for it.
+        if row is not None and row.summary_text:
+            return {"summary": row.summary_text, "cached": True, "stale": True}
         return {
-            "error": "llm_failed",
-            "message": "Failed to generate insights. Please try again.",
+            "error": "generation_in_progress",
+            "message": "These insights are being generated. Please try again shortly.",
+            "retry_after": GENERATION_RETRY_AFTER_SECONDS,
         }
 
-    expires_at = now + timedelta(hours=24)
+    # The previous lease holder may have finished between our read and claim.
+    row = find_by_key(cache_key, reload=True)
+    if _is_fresh(row, now):
+        release_claim(cache_key)
+        return {"summary": row.summary_text, "cached": True}
+
+    try:
+        summary = get_llm()(prompt, data_block)
+    except Exception as error:
+        release_claim(cache_key)
+        return _llm_error_result(error, _error_context(view_type, cache_key, filters, data_block))
+
     upsert(
         cache_key=cache_key,
         view_type=view_type,
         summary_text=summary,
-        model_used=get_primary_model_id() or "unconfigured",
-        expires_at=expires_at,
+        model_used=_model_used(),
+        expires_at=now + INSIGHT_TTL,
     )
 
     return {"summary": summary, "cached": False}
+
+
+# Periods whose top_brands insight is pregenerated: the standard ranking
+# periods that `flask refresh-mv` snapshots.
+PREGENERATED_PERIODS = ("all", "yesterday", "7d", "30d", "prev_month", "90d", "1y")
+PREGENERATED_TOP_BRANDS = 20
+PREGENERATED_GRAPH_DAYS = 90
+
+
+def standard_top_brands_filters(period: str) -> dict:
+    """Filters of the standard top_brands insight for a ranking period."""
+    return {"period": period}
+
+
+def standard_graph_filters(entity_id: int) -> dict:
+    """Filters of the standard followers graph insight for one entity."""
+    return {"entity_id": entity_id, "metric": "followers"}
+
+
+def _top_brands_rows(period: str) -> list[dict]:
+    from api.services.influence_history_service import InfluenceHistoryService
+
+    ranking = InfluenceHistoryService.get_interactions_ranking(period=period)
+    rows = []
+    for row in ranking[:PREGENERATED_TOP_BRANDS]:
+        platforms = row.get("platforms") or {}
+
+        def _score(platform):
+            return (platforms.get(platform) or {}).get("score", "-")
+
+        rows.append({
+            "rank": row.get("rank"),
+            "brand": row.get("entity_name"),
+            "total": row.get("total_score"),
+            "ig": _score("instagram"),
+            "li": _score("linkedin"),
+            "tt": _score("tiktok"),
+            "x": _score("x"),
+        })
+    return rows
+
+
+def _followers_graph(entity) -> dict:
+    """stats/series of an entity's daily followers (all pages summed)."""
+    from api.services.entity_service import EntityService
+
+    totals = {}
+    for point in EntityService.get_entity_followers_history(entity.id):
+        totals[point["date"]] = totals.get(point["date"], 0) + (point["followers"] or 0)
+    points = sorted(totals.items())[-PREGENERATED_GRAPH_DAYS:]
+    if not points:
+        return {}
+
+    values = [value for _, value in points]
+
+    def _gain(end, days):
+        start = end - days
+        if start < 0:
+            return None
+        return values[end] - values[start]
+
+    last = len(values) - 1
+    last7 = _gain(last, 7)
+    prev7 = _gain(last - 7, 7)
+    change = last7 - prev7 if last7 is not None and prev7 is not None else None
+    return {
+        "stats": {entity.name: {"last7": last7, "prev7": prev7, "change": change}},
+        "series": {entity.name: points},
+    }
+
+
+def standard_insight_jobs() -> list[tuple]:
+    """(view_type, filters, raw_data) of every insight pregenerate_standard_insights warms."""
+    from api.repositories.entity_repository import EntityRepository
+
+    jobs = []
+    for period in PREGENERATED_PERIODS:
+        rows = _top_brands_rows(period)
+        if rows:
+            jobs.append(("top_brands", standard_top_brands_filters(period), {"rows": rows}))
+    for entity in EntityRepository.get_active():
+        graph = _followers_graph(entity)
+        if graph:
+            jobs.append(("graph", standard_graph_filters(entity.id), graph))
+    return jobs
+
+
+def pregenerate_standard_insights(jobs: list[tuple] | None = None, workers: int = PREGENERATE_WORKERS) -> dict:
+    """
+    Regenerate the standard insights (top_brands per ranking period, followers
+    graph per tracked entity) from fresh data, so dashboard requests for them
+    hit the cache. Meant to run right after `flask refresh-mv`.
+
+    Jobs run in batches of `workers`: each batch takes its keys' generation
+    leases, calls the LLM concurrently (HTTP only; no database work in the
+    threads), then stores the results. A key whose lease is held elsewhere is
+    skipped.
+
+    Returns:
+        dict: {"jobs": int, "generated": int, "skipped": int, "failed": int}
+    """
+    jobs = standard_insight_jobs() if jobs is None else jobs
+    llm = get_llm()
+    model_used = _model_used()
+    lease = _generation_lease()
+    stats = {"jobs": len(jobs), "generated": 0, "skipped": 0, "failed": 0}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for offset in range(0, len(jobs), max(1, workers)):
+            batch = []
+            now = datetime.utcnow()
+            for view_type, filters, raw_data in jobs[offset:offset + max(1, workers)]:
+                cache_key = build_cache_key(view_type, filters or {})
+                if not try_claim(cache_key, view_type, now + lease, now):
+                    stats["skipped"] += 1
+                    continue
+                data_block = build_data_block(view_type, filters, raw_data)
+                future = pool.submit(llm, PROMPTS[view_type], data_block)
+                batch.append((view_type, filters, cache_key, data_block, future))
+
+            for view_type, filters, cache_key, data_block, future in batch:
+                try:
+                    summary = future.result()
+                except Exception as error:
+                    release_claim(cache_key)
+                    _llm_error_result(error, _error_context(view_type, cache_key, filters, data_block))
+                    stats["failed"] += 1
+                    continue
+                upsert(
+                    cache_key=cache_key,
+                    view_type=view_type,
+                    summary_text=summary,
+                    model_used=model_used,
+                    expires_at=datetime.utcnow() + INSIGHT_TTL,
+                )
+                stats["generated"] += 1
+
+    return stats
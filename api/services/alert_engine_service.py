@@ -1,6 +1,10 @@
 from datetime import datetime, timedelta
+import json
+import os
+from uuid import UUID
 
-from sqlalchemy import String, cast, func
+import numpy as np
+from sqlalchemy import func, tuple_
 
 from api import db
 from api.models.comment_model import Comment
@@ -13,8 +17,11 @@ from api.repositories.alert_detector_checkpoint_repository import (
 )
 from api.repositories.alert_event_repository import AlertEventRepository
 from api.repositories.alert_rule_repository import AlertRuleRepository
+from api.repositories.post_repository import PostRepository
 
-from api.services.alert_service import AlertService, normalize_keyword
+from api.services.alert_keyword_matcher import KeywordMatcher
+from api.services.alert_service import normalize_keyword
+from api.utils.engagement_anomalies import ENGAGEMENT_METRICS, detect_engagement_anomalies
 from api.utils.logging_utils import instrument_service_class
 
 
@@ -31,14 +38,79 @@ DEFAULT_ENGAGEMENT_MIN_BASELINE = 20
 DEFAULT_ENGAGEMENT_PCT_UP = 0.50
 DEFAULT_ENGAGEMENT_PCT_DOWN = 0.50
 DEFAULT_ENGAGEMENT_MIN_ABS_CHANGE = 10
+DEFAULT_DETECTOR_CHUNK_SIZE = 1000
+
+
+class _AlertEventSink:
+    """
+    Collects the events a detector finds in one chunk and writes them in bulk.
+
+    Events are deduped by `dedupe_key` as they are added (the first one wins;
+    recipients from later duplicates are merged in), then `flush()` inserts all
+    of them with `AlertEventRepository.bulk_create_or_get` and all their user
+    alerts with `AlertEventRepository.bulk_fanout`, without committing. The
+    detector's checkpoint write that follows commits the chunk's events, user
+    alerts and cursor together.
+    """
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self._events: dict[str, dict] = {}
+        self._recipients: dict[str, dict] = {}
+        self._rules_by_scope: dict[tuple, list] = {}
+
+    def add(self, event_data: dict, recipients) -> None:
+        """Queue an event for (user_id, rule_id) `recipients`."""
+        key = event_data["dedupe_key"]
+        self._events.setdefault(key, event_data)
+        self._recipients.setdefault(key, {}).update(dict.fromkeys(recipients))
+
+    def add_for_matching_rules(self, event_data: dict) -> None:
+        """Queue an event for the owners of every active rule of its type that
+        covers its entity (one alert per user)."""
+        scope = (event_data["event_type"], event_data.get("entity_id"))
+        rules = self._rules_by_scope.get(scope)
+        if rules is None:
+            rules = AlertRuleRepository.list_matching_rules(*scope)
+            self._rules_by_scope[scope] = rules
+        mapping = {rule.user_id: rule.id for rule in rules}
+        self.add(event_data, mapping.items())
+
+    def flush(self) -> tuple[int, int]:
+        """Write the queued events. Returns (events_created,
+        user_alerts_created); in dry-run mode nothing is written and the
+        queued counts are returned instead."""
+        if not self._events:
+            return 0, 0
+
+        if self.dry_run:
+            counts = (
+                len(self._events),
+                sum(len(pairs) for pairs in self._recipients.values()),
+            )
+        else:
+            ids, created = AlertEventRepository.bulk_create_or_get(
+                list(self._events.values()), commit=False
+            )
+            user_alerts_created = AlertEventRepository.bulk_fanout(
+                [
+                    (ids[key], user_id, rule_id)
+                    for key, pairs in self._recipients.items()
+                    for user_id, rule_id in pairs
+                ],
+                commit=False,
+            )
+            counts = (len(created), user_alerts_created)
+
+        self._events.clear()
+        self._recipients.clear()
+        return counts
 
 
 @instrument_service_class
 class AlertEngineService:
     @staticmethod
     def _env_int(name: str, default: int) -> int:
-        import os
-
         raw = os.getenv(name)
         if raw is None:
             return default
@@ -49,8 +121,6 @@ class AlertEngineService:
 
     @staticmethod
     def _env_float(name: str, default: float) -> float:
-        import os
-
         raw = os.getenv(name)
         if raw is None:
             return default
@@ -229,98 +299,154 @@ class AlertEngineService:
     def _page_entity_map(page_ids: list[str]) -> dict[str, int]:
         if not page_ids:
             return {}
+        uuids = set()
+        for page_id in page_ids:
+            try:
+                uuids.add(UUID(str(page_id)))
+            except ValueError:
+                continue
+        if not uuids:
+            return {}
+        # Compare uuid to uuid so the lookup is a primary-key probe.
         rows = (
-            db.session.query(cast(Page.uuid, String), Page.entity_id)
-            .filter(cast(Page.uuid, String).in_(page_ids))
+            db.session.query(Page.uuid, Page.entity_id)
+            .filter(Page.uuid.in_(list(uuids)))
             .all()
         )
         return {str(pid): entity_id for pid, entity_id in rows}
 
     @staticmethod
-    def _fanout_event_to_matching_rules(event, event_type: str, entity_id: int | None, dry_run: bool = False) -> int:
-        rules = AlertRuleRepository.list_matching_rules(event_type, entity_id)
-        if not rules:
-            return 0
+    def _chunk_size() -> int:
+        return max(
+            1,
+            AlertEngineService._env_int("ALERTS_DETECTOR_CHUNK_SIZE", DEFAULT_DETECTOR_CHUNK_SIZE),
+        )
 
-        mapping = {}
-        for rule in rules:
-            mapping[rule.user_id] = rule.id
+    @staticmethod
+    def _load_keyset_cursor(detector_name: str) -> tuple[datetime | None, tuple | None]:
+        """Checkpoint of a streaming detector as (cursor_ts, keyset).
+
+        The keyset is (cursor_ts, *tie_breakers) with the tie-breakers kept as
+        a JSON list in `cursor_text`. Checkpoints written before detectors were
+        chunked only carry `cursor_ts`; those resume strictly after it.
+        """
+        row = AlertDetectorCheckpointRepository.get(detector_name)
+        if not row or not row.cursor_ts:
+            return None, None
+        if not row.cursor_text:
+            return row.cursor_ts, None
+        try:
+            tie_breakers = json.loads(row.cursor_text)
+        except ValueError:
+            return row.cursor_ts, None
+        if not isinstance(tie_breakers, list):
+            tie_breakers = [tie_breakers]
+        return row.cursor_ts, (row.cursor_ts, *tie_breakers)
+
+    @staticmethod
+    def _save_keyset_cursor(detector_name: str, key: tuple) -> None:
+        AlertDetectorCheckpointRepository.upsert(
+            detector_name,
+            cursor_ts=key[0],
+            cursor_text=json.dumps(list(key[1:])),
+        )
 
-        if dry_run:
-            return len(mapping)
+    @staticmethod
+    def _after_keyset(query, key_columns: list, after: tuple | None):
+        if after is None:
+            return query
+        # The plain bound on the leading column lets an index on it be used
+        # even where the planner can't use the row comparison directly.
+        return query.filter(
+            key_columns[0] >= after[0],
+            tuple_(*key_columns) > tuple(after),
+        )
 
-        return AlertEventRepository.fanout_to_users(event.id, mapping, commit=True)
+    @staticmethod
+    def _iter_keyset_chunks(query, key_columns: list, key_of, after: tuple | None = None):
+        """Yield the rows of `query` in lists of at most `_chunk_size()` rows,
+        ordered by `key_columns` and paged by keyset on them, starting strictly
+        after `after`.
+
+        Each chunk is its own short LIMIT query rather than one long server-side
+        cursor: detectors commit while they work through a chunk, which would
+        close a cursor held open across the whole scan. Memory stays bounded by
+        the chunk size however large the backlog is.
+        """
+        chunk_size = AlertEngineService._chunk_size()
+        ordered = query.order_by(*[c.asc() for c in key_columns])
+        while True:
+            rows = (
+                AlertEngineService._after_keyset(ordered, key_columns, after)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            after = key_of(rows[-1])
 
     @staticmethod
     def _run_negative_comment_detector(dry_run: bool = False) -> dict:
-        cursor = AlertDetectorCheckpointRepository.get_cursor_ts(DETECTOR_NEGATIVE)
+        cursor, after = AlertEngineService._load_keyset_cursor(DETECTOR_NEGATIVE)
         event_ts_expr = func.coalesce(Comment.label_updated_at, Comment.recorded_at)
         q = Comment.query.filter(Comment.label.in_([0, 1]))
-        if cursor:
+        if cursor and after is None:
             q = q.filter(event_ts_expr > cursor)
-        rows = q.order_by(event_ts_expr.asc()).all()
-
-        if not rows:
-            return {
-                "scanned": 0,
-                "events_created": 0,
-                "user_alerts_created": 0,
-                "cursor_advanced_to": cursor.isoformat() if cursor else None,
-            }
-
-        page_map = AlertEngineService._page_entity_map(list({str(r.page_id) for r in rows}))
 
+        scanned = 0
         events_created = 0
         user_alerts_created = 0
-        max_ts = cursor
-
-        for row in rows:
-            entity_id = page_map.get(str(row.page_id))
-            dedupe_key = f"neg_comment:{row.id}:{row.label}"
-            event_data = {
-                "event_type": "negative_comment",
-                "dedupe_key": dedupe_key,
-                "severity": "serious" if row.label == 0 else "warning",
-                "entity_id": entity_id,
-                "page_id": str(row.page_id),
-                "platform": row.platform,
-                "post_id": row.post_id,
-                "comment_pk": row.id,
-                "label": row.label,
-                "matched_keyword": None,
-                "payload": {
-                    "text": row.text,
-                    "author_username": row.author_username,
-                    "confidence": row.confidence,
-                },
-                "event_at": row.label_updated_at or row.recorded_at,
-            }
+        last_key = after
+        sink = _AlertEventSink(dry_run=dry_run)
+
+        chunks = AlertEngineService._iter_keyset_chunks(
+            q,
+            [event_ts_expr, Comment.id],
+            lambda r: (r.label_updated_at or r.recorded_at, r.id),
+            after,
+        )
+        for rows in chunks:
+            page_map = AlertEngineService._page_entity_map(list({str(r.page_id) for r in rows}))
 
-            if dry_run:
-                events_created += 1
-                user_alerts_created += len(
-                    AlertRuleRepository.list_matching_rules("negative_comment", entity_id)
-                )
-            else:
-                event, created = AlertEventRepository.create_or_get(event_data, commit=True)
-                if created:
-                    events_created += 1
-                user_alerts_created += AlertEngineService._fanout_event_to_matching_rules(
-                    event,
-                    "negative_comment",
-                    entity_id,
-                    dry_run=False,
-                )
+            for row in rows:
+                entity_id = page_map.get(str(row.page_id))
+                dedupe_key = f"neg_comment:{row.id}:{row.label}"
+                event_data = {
+                    "event_type": "negative_comment",
+                    "dedupe_key": dedupe_key,
+                    "severity": "serious" if row.label == 0 else "warning",
+                    "entity_id": entity_id,
+                    "page_id": str(row.page_id),
+                    "platform": row.platform,
+                    "post_id": row.post_id,
+                    "comment_pk": row.id,
+                    "label": row.label,
+                    "matched_keyword": None,
+                    "payload": {
+                        "text": row.text,
+                        "author_username": row.author_username,
+                        "confidence": row.confidence,
+                    },
+                    "event_at": row.label_updated_at or row.recorded_at,
+                }
 
-            row_event_ts = row.label_updated_at or row.recorded_at
-            if row_event_ts and (max_ts is None or row_event_ts > max_ts):
-                max_ts = row_event_ts
+                sink.add_for_matching_rules(event_data)
 
-        if max_ts and not dry_run:
-            AlertDetectorCheckpointRepository.upsert(DETECTOR_NEGATIVE, cursor_ts=max_ts)
+            created, fanned_out = sink.flush()
+            events_created += created
+            user_alerts_created += fanned_out
+            scanned += len(rows)
+            last = rows[-1]
+            last_key = (last.label_updated_at or last.recorded_at, last.id)
+            if not dry_run:
+                AlertEngineService._save_keyset_cursor(DETECTOR_NEGATIVE, last_key)
 
+        max_ts = last_key[0] if last_key else cursor
         return {
-            "scanned": len(rows),
+            "scanned": scanned,
             "events_created": events_created,
             "user_alerts_created": user_alerts_created,
             "cursor_advanced_to": max_ts.isoformat() if max_ts else None,
@@ -342,111 +468,85 @@ class AlertEngineService:
         return rows
 
     @staticmethod
-    def _rule_matches_entity(rule, entity_id: int | None) -> bool:
-        scope = rule.entity_scope or {}
-        ids = scope.get("entity_ids") if isinstance(scope, dict) else None
-        if not ids:
-            return True
-        if entity_id is None:
-            return False
-        return entity_id in ids
+    def _skip_to_latest(detector_name: str, query, key_columns: list, key_of, after, dry_run: bool) -> tuple[int, tuple | None]:
+        """With no keyword rules there is nothing to match; move the cursor
+        past the pending rows without loading them. Returns (count, last_key)."""
+        pending = AlertEngineService._after_keyset(query, key_columns, after)
+        scanned = pending.count()
+        last = pending.order_by(*[c.desc() for c in key_columns]).first()
+        if last is None:
+            return 0, after
+        last_key = key_of(last)
+        if not dry_run:
+            AlertEngineService._save_keyset_cursor(detector_name, last_key)
+        return scanned, last_key
 
     @staticmethod
     def _run_keyword_comment_detector(dry_run: bool = False) -> dict:
-        cursor = AlertDetectorCheckpointRepository.get_cursor_ts(DETECTOR_KEYWORD_COMMENT)
+        cursor, after = AlertEngineService._load_keyset_cursor(DETECTOR_KEYWORD_COMMENT)
         q = Comment.query
-        if cursor:
+        if cursor and after is None:
             q = q.filter(Comment.recorded_at > cursor)
-        rows = q.order_by(Comment.recorded_at.asc()).all()
-
-        if not rows:
-            return {
-                "scanned": 0,
-                "events_created": 0,
-                "user_alerts_created": 0,
-                "cursor_advanced_to": cursor.isoformat() if cursor else None,
-            }
-
-        rule_rows = AlertEngineService._keyword_rules_by_entity_and_mode()
-        if not rule_rows:
-            max_ts = rows[-1].recorded_at
-            if max_ts and not dry_run:
-                AlertDetectorCheckpointRepository.upsert(
-                    DETECTOR_KEYWORD_COMMENT, cursor_ts=max_ts
-                )
-            return {
-                "scanned": len(rows),
-                "events_created": 0,
-                "user_alerts_created": 0,
-                "cursor_advanced_to": max_ts.isoformat() if max_ts else None,
-            }
+        key_columns = [Comment.recorded_at, Comment.id]
 
-        page_map = AlertEngineService._page_entity_map(list({str(r.page_id) for r in rows}))
+        def key_of(r):
+            return (r.recorded_at, r.id)
 
+        scanned = 0
         events_created = 0
         user_alerts_created = 0
+        last_key = after
 
-        for row in rows:
-            entity_id = page_map.get(str(row.page_id))
-            source_text = row.text or ""
-            source_norm = normalize_keyword(source_text)
-
-            for rule, keywords in rule_rows:
-                if not AlertEngineService._rule_matches_entity(rule, entity_id):
-                    continue
-
-                for kw in keywords:
-                    if not AlertService.match_keyword(
-                        text_original=source_text,
-                        text_normalized=source_norm,
-                        keyword_original=kw.keyword,
-                        keyword_normalized=kw.keyword_normalized,
-                        match_mode=rule.match_mode,
-                        is_case_sensitive=bool(rule.is_case_sensitive),
-                    ):
-                        continue
-
-                    dedupe_key = f"kw:c:{row.id}:{kw.keyword_normalized}"
-                    event_data = {
-                        "event_type": "keyword_mention",
-                        "dedupe_key": dedupe_key,
-                        "severity": "warning",
-                        "entity_id": entity_id,
-                        "page_id": str(row.page_id),
-                        "platform": row.platform,
-                        "post_id": row.post_id,
-                        "comment_pk": row.id,
-                        "matched_keyword": kw.keyword,
-                        "payload": {
-                            "source": "comment",
-                            "text": row.text,
-                            "keyword_normalized": kw.keyword_normalized,
-                            "rule_id": rule.id,
-                        },
-                        "event_at": row.recorded_at,
-                    }
-
-                    if dry_run:
-                        events_created += 1
-                        user_alerts_created += 1
-                    else:
-                        event, created = AlertEventRepository.create_or_get(event_data)
-                        if created:
-                            events_created += 1
-                        user_alerts_created += AlertEventRepository.fanout_to_users(
-                            event.id,
-                            {rule.user_id: rule.id},
-                            commit=True,
-                        )
-
-        max_ts = rows[-1].recorded_at
-        if max_ts and not dry_run:
-            AlertDetectorCheckpointRepository.upsert(
-                DETECTOR_KEYWORD_COMMENT, cursor_ts=max_ts
+        rule_rows = AlertEngineService._keyword_rules_by_entity_and_mode()
+        if not rule_rows:
+            scanned, last_key = AlertEngineService._skip_to_latest(
+                DETECTOR_KEYWORD_COMMENT, q, key_columns, key_of, after, dry_run
             )
-
+        else:
+            matcher = KeywordMatcher(rule_rows)
+            sink = _AlertEventSink(dry_run=dry_run)
+            for rows in AlertEngineService._iter_keyset_chunks(q, key_columns, key_of, after):
+                page_map = AlertEngineService._page_entity_map(list({str(r.page_id) for r in rows}))
+
+                for row in rows:
+                    entity_id = page_map.get(str(row.page_id))
+                    source_text = row.text or ""
+                    source_norm = normalize_keyword(source_text)
+
+                    for rule, kw in matcher.match(source_text, source_norm, entity_id):
+                        dedupe_key = f"kw:c:{row.id}:{kw.keyword_normalized}"
+                        event_data = {
+                            "event_type": "keyword_mention",
+                            "dedupe_key": dedupe_key,
+                            "severity": "warning",
+                            "entity_id": entity_id,
+                            "page_id": str(row.page_id),
+                            "platform": row.platform,
+                            "post_id": row.post_id,
+                            "comment_pk": row.id,
+                            "matched_keyword": kw.keyword,
+                            "payload": {
+                                "source": "comment",
+                                "text": row.text,
+                                "keyword_normalized": kw.keyword_normalized,
+                                "rule_id": rule.id,
+                            },
+                            "event_at": row.recorded_at,
+                        }
+
+                        sink.add(event_data, [(rule.user_id, rule.id)])
+
+                created, fanned_out = sink.flush()
+                events_created += created
+                user_alerts_created += fanned_out
+                scanned += len(rows)
+                last_key = key_of(rows[-1])
+                if not dry_run:
+                    AlertEngineService._save_keyset_cursor(DETECTOR_KEYWORD_COMMENT, last_key)
+
+        max_ts = last_key[0] if last_key else cursor
         return {
-            "scanned": len(rows),
+            "scanned": scanned,
             "events_created": events_created,
             "user_alerts_created": user_alerts_created,
             "cursor_advanced_to": max_ts.isoformat() if max_ts else None,
@@ -454,292 +554,299 @@ class AlertEngineService:
 
     @staticmethod
     def _run_keyword_post_detector(dry_run: bool = False) -> dict:
-        cursor = AlertDetectorCheckpointRepository.get_cursor_ts(DETECTOR_KEYWORD_POST)
-        q = PostMV.query
-        if cursor:
+        cursor, after = AlertEngineService._load_keyset_cursor(DETECTOR_KEYWORD_POST)
+        q = PostMV.query.filter(PostMV.recorded_at.isnot(None))
+        if cursor and after is None:
             q = q.filter(PostMV.recorded_at > cursor)
-        rows = q.order_by(PostMV.recorded_at.asc()).all()
-
-        if not rows:
-            return {
-                "scanned": 0,
-                "events_created": 0,
-                "user_alerts_created": 0,
-                "cursor_advanced_to": cursor.isoformat() if cursor else None,
-            }
-
-        rule_rows = AlertEngineService._keyword_rules_by_entity_and_mode()
-        if not rule_rows:
-            max_ts = rows[-1].recorded_at
-            if max_ts and not dry_run:
-                AlertDetectorCheckpointRepository.upsert(
-                    DETECTOR_KEYWORD_POST, cursor_ts=max_ts
-                )
-            return {
-                "scanned": len(rows),
-                "events_created": 0,
-                "user_alerts_created": 0,
-                "cursor_advanced_to": max_ts.isoformat() if max_ts else None,
-            }
+        key_columns = [PostMV.recorded_at, PostMV.page_id, PostMV.platform, PostMV.post_id]
 
-        page_map = AlertEngineService._page_entity_map(list({str(r.page_id) for r in rows}))
+        def key_of(r):
+            return (r.recorded_at, str(r.page_id), r.platform, r.post_id)
 
+        scanned = 0
         events_created = 0
         user_alerts_created = 0
+        last_key = after
 
-        for row in rows:
-            source_text = row.caption or ""
-            if not source_text:
-                continue
-            source_norm = normalize_keyword(source_text)
-            entity_id = page_map.get(str(row.page_id))
-
-            for rule, keywords in rule_rows:
-                if not AlertEngineService._rule_matches_entity(rule, entity_id):
-                    continue
-
-                for kw in keywords:
-                    if not AlertService.match_keyword(
-                        text_original=source_text,
-                        text_normalized=source_norm,
-                        keyword_original=kw.keyword,
-                        keyword_normalized=kw.keyword_normalized,
-                        match_mode=rule.match_mode,
-                        is_case_sensitive=bool(rule.is_case_sensitive),
-                    ):
+        rule_rows = AlertEngineService._keyword_rules_by_entity_and_mode()
+        if not rule_rows:
+            scanned, last_key = AlertEngineService._skip_to_latest(
+                DETECTOR_KEYWORD_POST, q, key_columns, key_of, after, dry_run
+            )
+        else:
+            matcher = KeywordMatcher(rule_rows)
+            sink = _AlertEventSink(dry_run=dry_run)
+            for rows in AlertEngineService._iter_keyset_chunks(q, key_columns, key_of, after):
+                page_map = AlertEngineService._page_entity_map(list({str(r.page_id) for r in rows}))
+
+                for row in rows:
+                    source_text = row.caption or ""
+                    if not source_text:
                         continue
+                    source_norm = normalize_keyword(source_text)
+                    entity_id = page_map.get(str(row.page_id))
 
-                    dedupe_key = (
-                        f"kw:p:{row.page_id}:{row.platform}:{row.post_id}:{kw.keyword_normalized}"
-                    )
-                    event_data = {
-                        "event_type": "keyword_mention",
-                        "dedupe_key": dedupe_key,
-                        "severity": "warning",
-                        "entity_id": entity_id,
-                        "page_id": str(row.page_id),
-                        "platform": row.platform,
-                        "post_id": row.post_id,
-                        "matched_keyword": kw.keyword,
-                        "payload": {
-                            "source": "post",
-                            "text": row.caption,
-                            "keyword_normalized": kw.keyword_normalized,
-                            "rule_id": rule.id,
-                        },
-                        "event_at": row.recorded_at or row.created_at or datetime.utcnow(),
-                    }
-
-                    if dry_run:
-                        events_created += 1
-                        user_alerts_created += 1
-                    else:
-                        event, created = AlertEventRepository.create_or_get(event_data)
-                        if created:
-                            events_created += 1
-                        user_alerts_created += AlertEventRepository.fanout_to_users(
-                            event.id,
-                            {rule.user_id: rule.id},
-                            commit=True,
+                    for rule, kw in matcher.match(source_text, source_norm, entity_id):
+                        dedupe_key = (
+                            f"kw:p:{row.page_id}:{row.platform}:{row.post_id}:{kw.keyword_normalized}"
                         )
-
-        max_ts = rows[-1].recorded_at
-        if max_ts and not dry_run:
-            AlertDetectorCheckpointRepository.upsert(
-                DETECTOR_KEYWORD_POST, cursor_ts=max_ts
-            )
-
+                        event_data = {
+                            "event_type": "keyword_mention",
+                            "dedupe_key": dedupe_key,
+                            "severity": "warning",
+                            "entity_id": entity_id,
+                            "page_id": str(row.page_id),
+                            "platform": row.platform,
+                            "post_id": row.post_id,
+                            "matched_keyword": kw.keyword,
+                            "payload": {
+                                "source": "post",
+                                "text": row.caption,
+                                "keyword_normalized": kw.keyword_normalized,
+                                "rule_id": rule.id,
+                            },
+                            "event_at": row.recorded_at or row.created_at or datetime.utcnow(),
+                        }
+
+                        sink.add(event_data, [(rule.user_id, rule.id)])
+
+                created, fanned_out = sink.flush()
+                events_created += created
+                user_alerts_created += fanned_out
+                scanned += len(rows)
+                last_key = key_of(rows[-1])
+                if not dry_run:
+                    AlertEngineService._save_keyset_cursor(DETECTOR_KEYWORD_POST, last_key)
+
+        max_ts = last_key[0] if last_key else cursor
         return {
-            "scanned": len(rows),
+            "scanned": scanned,
             "events_created": events_created,
             "user_alerts_created": user_alerts_created,
             "cursor_advanced_to": max_ts.isoformat() if max_ts else None,
         }
 
     @staticmethod
-    def _metric_value(row, name: str):
-        return getattr(row, name, None)
+    def _engagement_thresholds() -> dict:
+        return {
+            "threshold_up": AlertEngineService._env_float(
+                "ALERTS_ENGAGEMENT_THRESHOLD_UP", DEFAULT_ENGAGEMENT_PCT_UP
+            ),
+            "threshold_down": AlertEngineService._env_float(
+                "ALERTS_ENGAGEMENT_THRESHOLD_DOWN", DEFAULT_ENGAGEMENT_PCT_DOWN
+            ),
+            "min_baseline": AlertEngineService._env_int(
+                "ALERTS_ENGAGEMENT_MIN_BASELINE", DEFAULT_ENGAGEMENT_MIN_BASELINE
+            ),
+            "min_abs_change": AlertEngineService._env_int(
+                "ALERTS_ENGAGEMENT_MIN_ABS_CHANGE", DEFAULT_ENGAGEMENT_MIN_ABS_CHANGE
+            ),
+        }
 
     @staticmethod
-    def _is_suspicious_zero(current_value, previous_valid_value) -> bool:
-        if current_value is None:
-            return False
-        if previous_valid_value is None:
-            return False
-        try:
-            return float(previous_valid_value) > 0 and float(current_value) == 0.0
-        except (TypeError, ValueError):
-            return False
+    def _engagement_event_data(
+        post_key: tuple,
+        latest_recorded_at: datetime,
+        entity_id: int | None,
+        metric: str,
+        direction: str,
+        baseline: float,
+        current: float,
+        deviation: float,
+        abs_change: float,
+    ) -> dict:
+        page_id, platform, post_id = post_key
+        bucket_time = latest_recorded_at.replace(minute=0, second=0, microsecond=0)
+        return {
+            "event_type": "engagement_anomaly",
+            "dedupe_key": (
+                f"eng:{page_id}:{platform}:{post_id}:{metric}:{direction}:{bucket_time.isoformat()}"
+            ),
+            "severity": "warning" if direction == "increase" else "serious",
+            "entity_id": entity_id,
+            "page_id": page_id,
+            "platform": platform,
+            "post_id": post_id,
+            "payload": {
+                "metric": metric,
+                "direction": direction,
+                "baseline": baseline,
+                "current": current,
+                "deviation": round(deviation, 4),
+                "abs_change": round(abs_change, 4),
+                "latest_recorded_at": latest_recorded_at.isoformat(),
+            },
+            "event_at": latest_recorded_at,
+        }
 
     @staticmethod
     def _run_engagement_anomaly_detector(dry_run: bool = False) -> dict:
-        cursor = AlertDetectorCheckpointRepository.get_cursor_ts(DETECTOR_ENGAGEMENT)
+        checkpoint = AlertDetectorCheckpointRepository.get(DETECTOR_ENGAGEMENT)
+        cursor = checkpoint.cursor_ts if checkpoint else None
+        resume = ((checkpoint.meta or {}) if checkpoint else {}).get("resume")
         lookback_days = AlertEngineService._env_int(
             "ALERTS_ENGAGEMENT_LOOKBACK_DAYS", DEFAULT_ENGAGEMENT_LOOKBACK_DAYS
         )
-        threshold_up = AlertEngineService._env_float(
-            "ALERTS_ENGAGEMENT_THRESHOLD_UP", DEFAULT_ENGAGEMENT_PCT_UP
-        )
-        threshold_down = AlertEngineService._env_float(
-            "ALERTS_ENGAGEMENT_THRESHOLD_DOWN", DEFAULT_ENGAGEMENT_PCT_DOWN
-        )
-        min_baseline = AlertEngineService._env_int(
-            "ALERTS_ENGAGEMENT_MIN_BASELINE", DEFAULT_ENGAGEMENT_MIN_BASELINE
-        )
-        min_abs_change = AlertEngineService._env_int(
-            "ALERTS_ENGAGEMENT_MIN_ABS_CHANGE", DEFAULT_ENGAGEMENT_MIN_ABS_CHANGE
-        )
+        thresholds = AlertEngineService._engagement_thresholds()
 
-        start_from = cursor - timedelta(days=lookback_days) if cursor else datetime.utcnow() - timedelta(days=lookback_days)
-        rows = (
-            PostHistoryMV.query
-            .filter(PostHistoryMV.recorded_at >= start_from)
-            .order_by(
-                PostHistoryMV.page_id.asc(),
-                PostHistoryMV.platform.asc(),
-                PostHistoryMV.post_id.asc(),
-                PostHistoryMV.recorded_at.asc(),
+        backend = (os.getenv("ALERTS_ENGAGEMENT_BACKEND") or "numpy").strip().lower()
+        if backend == "sql" and db.engine.dialect.name != "sqlite":
+            start_from = cursor - timedelta(days=lookback_days) if cursor else datetime.utcnow() - timedelta(days=lookback_days)
+            return AlertEngineService._run_engagement_anomaly_detector_sql(
+                cursor, start_from, thresholds, dry_run=dry_run
             )
-            .all()
-        )
-
-        if not rows:
-            return {
-                "scanned": 0,
-                "events_created": 0,
-                "user_alerts_created": 0,
-                "cursor_advanced_to": cursor.isoformat() if cursor else None,
-            }
 
-        grouped: dict[tuple, list] = {}
-        for row in rows:
-            key = (str(row.page_id), row.platform, row.post_id)
-            grouped.setdefault(key, []).append(row)
-
-        page_ids = [k[0] for k in grouped.keys()]
-        page_map = AlertEngineService._page_entity_map(page_ids)
+        post_columns = [PostHistoryMV.page_id, PostHistoryMV.platform, PostHistoryMV.post_id]
+        if resume:
+            # A previous run stopped part-way: finish its window from the last
+            # post it fully processed instead of starting over.
+            start_from = datetime.fromisoformat(resume["window_start"])
+            resume_after = tuple(resume["after_post"])
+        else:
+            start_from = cursor - timedelta(days=lookback_days) if cursor else datetime.utcnow() - timedelta(days=lookback_days)
+            resume_after = None
+
+        # Plain column tuples rather than ORM objects: the scan only needs the
+        # post key, timestamp and the four metrics.
+        q = (
+            db.session.query(
+                *post_columns,
+                PostHistoryMV.recorded_at,
+                *[getattr(PostHistoryMV, metric) for metric in ENGAGEMENT_METRICS],
+            )
+            .filter(PostHistoryMV.recorded_at >= start_from)
+        )
+        if resume_after:
+            q = q.filter(tuple_(*post_columns) > resume_after)
 
-        metrics = ["likes", "comments", "shares", "views"]
+        scanned = 0
         events_created = 0
         user_alerts_created = 0
         max_ts = cursor
+        sink = _AlertEventSink(dry_run=dry_run)
 
-        for (page_id, platform, post_id), snaps in grouped.items():
-            if len(snaps) < 3:
-                continue
-            latest = snaps[-1]
-            prev = snaps[-2]
-            entity_id = page_map.get(page_id)
-
-            for metric in metrics:
-                current = AlertEngineService._metric_value(latest, metric)
-                prev_value = AlertEngineService._metric_value(prev, metric)
-
-                if current is None or prev_value is None:
-                    continue
-
-                # Mandatory anti-noise rule: 0 after positive is considered scraper/data error.
-                if AlertEngineService._is_suspicious_zero(current, prev_value):
-                    continue
-
-                # Build baseline from previous valid points only and exclude suspicious zeros.
-                baseline_values: list[float] = []
-                previous_valid = None
-                for s in snaps[:-1]:
-                    v = AlertEngineService._metric_value(s, metric)
-                    if v is None:
-                        continue
-                    if AlertEngineService._is_suspicious_zero(v, previous_valid):
-                        continue
-                    try:
-                        fv = float(v)
-                    except (TypeError, ValueError):
-                        continue
-                    baseline_values.append(fv)
-                    previous_valid = fv
-
-                if len(baseline_values) < 3:
-                    continue
-
-                baseline_values_sorted = sorted(baseline_values)
-                baseline = baseline_values_sorted[len(baseline_values_sorted) // 2]
-                if baseline < min_baseline:
-                    continue
-
-                try:
-                    curr = float(current)
-                except (TypeError, ValueError):
-                    continue
-
-                abs_change = curr - baseline
-                if abs(abs_change) < min_abs_change:
-                    continue
-
-                deviation = abs_change / baseline if baseline else 0.0
-
-                direction = None
-                severity = None
-                if deviation >= threshold_up:
-                    direction = "increase"
-                    severity = "warning"
-                elif deviation <= -threshold_down:
-                    direction = "drop"
-                    severity = "serious"
-
-                if not direction:
-                    continue
-
-                bucket_time = latest.recorded_at.replace(minute=0, second=0, microsecond=0)
-                dedupe_key = (
-                    f"eng:{page_id}:{platform}:{post_id}:{metric}:{direction}:{bucket_time.isoformat()}"
-                )
-
-                event_data = {
-                    "event_type": "engagement_anomaly",
-                    "dedupe_key": dedupe_key,
-                    "severity": severity,
-                    "entity_id": entity_id,
-                    "page_id": page_id,
-                    "platform": platform,
-                    "post_id": post_id,
-                    "payload": {
-                        "metric": metric,
-                        "direction": direction,
-                        "baseline": baseline,
-                        "current": curr,
-                        "deviation": round(deviation, 4),
-                        "abs_change": round(abs_change, 4),
-                        "latest_recorded_at": latest.recorded_at.isoformat(),
-                    },
-                    "event_at": latest.recorded_at,
-                }
+        def process(groups: list[tuple]) -> None:
+            nonlocal events_created, user_alerts_created, max_ts
+            groups = [(key, snaps) for key, snaps in groups if len(snaps) >= 3]
+            if not groups:
+                return
 
-                if dry_run:
-                    events_created += 1
-                    user_alerts_created += len(
-                        AlertRuleRepository.list_matching_rules(
-                            "engagement_anomaly", entity_id
+            values = np.array(
+                [[getattr(s, metric) for metric in ENGAGEMENT_METRICS] for _, snaps in groups for s in snaps],
+                dtype=float,
+            )
+            anomalies = detect_engagement_anomalies(
+                [len(snaps) for _, snaps in groups], values, thresholds
+            )
+            if anomalies:
+                page_map = AlertEngineService._page_entity_map(
+                    list({groups[a[0]][0][0] for a in anomalies})
+                )
+                for post_index, *anomaly in anomalies:
+                    post_key, snaps = groups[post_index]
+                    sink.add_for_matching_rules(
+                        AlertEngineService._engagement_event_data(
+                            post_key, snaps[-1].recorded_at, page_map.get(post_key[0]), *anomaly
                         )
                     )
+
+            latest_ts = max(snaps[-1].recorded_at for _, snaps in groups)
+            if max_ts is None or latest_ts > max_ts:
+                max_ts = latest_ts
+
+            created, fanned_out = sink.flush()
+            events_created += created
+            user_alerts_created += fanned_out
+
+        # Rows arrive grouped by post; a post's snapshots can straddle a chunk
+        # boundary, so the last group of each chunk is held back until the
+        # next chunk shows whether it continues.
+        pending = None
+        chunks = AlertEngineService._iter_keyset_chunks(
+            q,
+            post_columns + [PostHistoryMV.recorded_at],
+            lambda r: (r.page_id, r.platform, r.post_id, r.recorded_at),
+        )
+        for rows in chunks:
+            scanned += len(rows)
+            groups: list[tuple] = [pending] if pending else []
+            for row in rows:
+                key = (str(row.page_id), row.platform, row.post_id)
+                if groups and groups[-1][0] == key:
+                    groups[-1][1].append(row)
                 else:
-                    event, created = AlertEventRepository.create_or_get(event_data)
-                    if created:
-                        events_created += 1
-                    user_alerts_created += AlertEngineService._fanout_event_to_matching_rules(
-                        event,
-                        "engagement_anomaly",
-                        entity_id,
-                        dry_run=False,
+                    groups.append((key, [row]))
+            pending = groups.pop()
+
+            if groups:
+                process(groups)
+                if not dry_run:
+                    AlertDetectorCheckpointRepository.upsert(
+                        DETECTOR_ENGAGEMENT,
+                        cursor_ts=max_ts,
+                        meta={
+                            "resume": {
+                                "window_start": start_from.isoformat(),
+                                "after_post": list(groups[-1][0]),
+                            }
+                        },
                     )
 
-            if latest.recorded_at and (max_ts is None or latest.recorded_at > max_ts):
-                max_ts = latest.recorded_at
+        if pending:
+            process([pending])
+
+        if not dry_run and (max_ts or resume or scanned):
+            AlertDetectorCheckpointRepository.upsert(DETECTOR_ENGAGEMENT, cursor_ts=max_ts, meta={})
+
+        return {
+            "scanned": scanned,
+            "events_created": events_created,
+            "user_alerts_created": user_alerts_created,
+            "cursor_advanced_to": max_ts.isoformat() if max_ts else None,
+        }
+
+    @staticmethod
+    def _run_engagement_anomaly_detector_sql(
+        cursor: datetime | None,
+        start_from: datetime,
+        thresholds: dict,
+        dry_run: bool = False,
+    ) -> dict:
+        """ALERTS_ENGAGEMENT_BACKEND=sql: let Postgres score the whole window
+        (`PostRepository.get_engagement_anomalies`, percentile_cont baseline)
+        and only ship the anomalies back. One statement, so there is nothing
+        to resume; a failed run is simply repeated."""
+        stats = PostRepository.get_engagement_window_stats(start_from)
+        rows = PostRepository.get_engagement_anomalies(start_from, thresholds)
+        page_map = AlertEngineService._page_entity_map(list({str(r["page_id"]) for r in rows}))
+
+        sink = _AlertEventSink(dry_run=dry_run)
+        for r in rows:
+            post_key = (str(r["page_id"]), r["platform"], r["post_id"])
+            sink.add_for_matching_rules(
+                AlertEngineService._engagement_event_data(
+                    post_key,
+                    r["latest_recorded_at"],
+                    page_map.get(post_key[0]),
+                    r["metric"],
+                    r["direction"],
+                    float(r["baseline"]),
+                    float(r["current_value"]),
+                    float(r["deviation"]),
+                    float(r["abs_change"]),
+                )
+            )
+        events_created, user_alerts_created = sink.flush()
 
+        max_ts = cursor
+        latest_ts = stats["latest_recorded_at"]
+        if latest_ts and (max_ts is None or latest_ts > max_ts):
+            max_ts = latest_ts
         if max_ts and not dry_run:
-            AlertDetectorCheckpointRepository.upsert(DETECTOR_ENGAGEMENT, cursor_ts=max_ts)
+            AlertDetectorCheckpointRepository.upsert(DETECTOR_ENGAGEMENT, cursor_ts=max_ts, meta={})
 
         return {
-            "scanned": len(rows),
+            "scanned": int(stats["snapshots"] or 0),
             "events_created": events_created,
             "user_alerts_created": user_alerts_created,
             "cursor_advanced_to": max_ts.isoformat() if max_ts else None,
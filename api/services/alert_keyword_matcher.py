@@ -0,0 +1,214 @@
+# Compiled multi-keyword matcher for the keyword alert detectors.
+from collections import deque
+from functools import lru_cache
+import re
+
+
+def _collapse_whitespace(value: str) -> str:
+    return " ".join((value or "").strip().split())
+
+
+@lru_cache(maxsize=4096)
+def compile_keyword_pattern(pattern: str, case_sensitive: bool = False):
+    """Compiled regex for a `regex` rule keyword, or None when the pattern is
+    invalid (an invalid pattern simply never matches). Cached across detector
+    runs, so a rule's pattern is compiled once per process, not per comment."""
+    flags = 0 if case_sensitive else re.IGNORECASE
+    try:
+        return re.compile(pattern, flags)
+    except re.error:
+        return None
+
+
+class _AhoCorasick:
+    """Aho-Corasick automaton: finds every added needle in one left-to-right
+    pass over the haystack, however many needles were added."""
+
+    def __init__(self):
+        self._goto: list[dict] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple] = [()]
+
+    def __bool__(self) -> bool:
+        return len(self._goto) > 1
+
+    def add(self, needle: str, value) -> None:
+        node = 0
+        for ch in needle:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        self._out[node] += (value,)
+
+    def build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] += self._out[self._fail[child]]
+
+    def search(self, text: str) -> set:
+        goto, fail, out = self._goto, self._fail, self._out
+        found: set = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+class _RegexSet:
+    """Regex keywords sharing one case mode. Patterns that can be safely
+    alternated are OR-ed into a single prefilter regex, so text that matches
+    none of them is rejected in one search; only on a prefilter hit are the
+    individual (cached) patterns tried to find out which ones matched."""
+
+    def __init__(self, case_sensitive: bool):
+        self._case_sensitive = case_sensitive
+        self._combinable: list[tuple] = []
+        self._standalone: list[tuple] = []
+        self._prefilter = None
+
+    def __bool__(self) -> bool:
+        return bool(self._combinable or self._standalone)
+
+    def add(self, pattern: str, value) -> None:
+        compiled = compile_keyword_pattern(pattern, self._case_sensitive)
+        if compiled is None:
+            return
+        # Capture groups would be renumbered inside the alternation (breaking
+        # backreferences), and inline global flags are only legal at the very
+        # start of a pattern; such patterns are searched on their own.
+        if compiled.groups == 0 and compile_keyword_pattern(f"(?:)|(?:{pattern})", self._case_sensitive):
+            self._combinable.append((value, compiled))
+        else:
+            self._standalone.append((value, compiled))
+
+    def build(self) -> None:
+        if len(self._combinable) < 2:
+            self._standalone.extend(self._combinable)
+            self._combinable = []
+            return
+        joined = "|".join(f"(?:{compiled.pattern})" for _, compiled in self._combinable)
+        flags = 0 if self._case_sensitive else re.IGNORECASE
+        try:
+            self._prefilter = re.compile(joined, flags)
+        except re.error:
+            self._standalone.extend(self._combinable)
+            self._combinable = []
+
+    def search(self, text: str) -> set:
+        found = {value for value, compiled in self._standalone if compiled.search(text)}
+        if self._combinable and self._prefilter.search(text):
+            found.update(value for value, compiled in self._combinable if compiled.search(text))
+        return found
+
+
+class KeywordMatcher:
+    """
+    All active keyword_mention rules compiled into one matcher, built once per
+    detector run from `AlertEngineService._keyword_rules_by_entity_and_mode()`.
+
+    Matching is equivalent to calling `AlertService.match_keyword` for every
+    (rule, keyword) pair, but each text is scanned once per match kind:
+    `contains` keywords go into an Aho-Corasick automaton (one over normalized
+    text, one over whitespace-collapsed text for case-sensitive rules),
+    `exact` keywords into dict lookups, and `regex` keywords into a combined
+    regex set per case mode.
+
+    Rules scoped to `entity_scope.entity_ids` are indexed by entity, so a text
+    from an entity no rule applies to is not scanned at all.
+    """
+
+    def __init__(self, rule_rows: list[tuple]):
+        self._entries: list[tuple] = []
+        self._contains_folded = _AhoCorasick()
+        self._contains_verbatim = _AhoCorasick()
+        self._exact_folded: dict[str, list[int]] = {}
+        self._exact_verbatim: dict[str, list[int]] = {}
+        self._regex = {False: _RegexSet(False), True: _RegexSet(True)}
+        self._has_unscoped = False
+        self._scoped_entities: set[int] = set()
+
+        for rule, keywords in rule_rows:
+            scope = rule.entity_scope or {}
+            ids = scope.get("entity_ids") if isinstance(scope, dict) else None
+            entity_ids = frozenset(ids) if ids else None
+            case_sensitive = bool(rule.is_case_sensitive)
+
+            for kw in keywords:
+                index = len(self._entries)
+                if rule.match_mode == "regex":
+                    self._regex[case_sensitive].add(kw.keyword, index)
+                else:
+                    needle = (
+                        _collapse_whitespace(kw.keyword) if case_sensitive else kw.keyword_normalized
+                    )
+                    if not needle:
+                        continue
+                    if rule.match_mode == "exact":
+                        exact = self._exact_verbatim if case_sensitive else self._exact_folded
+                        exact.setdefault(needle, []).append(index)
+                    else:
+                        contains = self._contains_verbatim if case_sensitive else self._contains_folded
+                        contains.add(needle, index)
+
+                self._entries.append((rule, kw, entity_ids))
+                if entity_ids is None:
+                    self._has_unscoped = True
+                else:
+                    self._scoped_entities.update(entity_ids)
+
+        self._contains_folded.build()
+        self._contains_verbatim.build()
+        for regex_set in self._regex.values():
+            regex_set.build()
+
+    def __bool__(self) -> bool:
+        return bool(self._entries)
+
+    def match(self, text_original: str, text_normalized: str, entity_id: int | None = None) -> list[tuple]:
+        """(rule, keyword) pairs matching the text, in rule order and then
+        keyword order, restricted to rules whose entity scope covers
+        `entity_id`."""
+        source = text_original or ""
+        if not source:
+            return []
+        if not self._has_unscoped and entity_id not in self._scoped_entities:
+            return []
+
+        hits: set[int] = set()
+        if text_normalized:
+            if self._contains_folded:
+                hits |= self._contains_folded.search(text_normalized)
+            hits.update(self._exact_folded.get(text_normalized, ()))
+        if self._contains_verbatim or self._exact_verbatim:
+            collapsed = _collapse_whitespace(source)
+            if collapsed:
+                if self._contains_verbatim:
+                    hits |= self._contains_verbatim.search(collapsed)
+                hits.update(self._exact_verbatim.get(collapsed, ()))
+        for regex_set in self._regex.values():
+            if regex_set:
+                hits |= regex_set.search(source)
+
+        matched = []
+        for index in sorted(hits):
+            rule, kw, entity_ids = self._entries[index]
+            if entity_ids is not None and entity_id not in entity_ids:
+                continue
+            matched.append((rule, kw))
+        return matched
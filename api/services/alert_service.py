@@ -1,8 +1,8 @@
 from datetime import datetime
-import re
 
 from api.repositories.alert_event_repository import AlertEventRepository
 from api.repositories.alert_rule_repository import AlertRuleRepository
+from api.services.alert_keyword_matcher import compile_keyword_pattern
 from api.utils.logging_utils import instrument_service_class
 
 
@@ -233,11 +233,10 @@ class AlertService:
 
     @staticmethod
     def _regex_matches(pattern: str, text: str, case_sensitive: bool = False) -> bool:
-        flags = 0 if case_sensitive else re.IGNORECASE
-        try:
-            return re.search(pattern, text, flags=flags) is not None
-        except re.error:
+        compiled = compile_keyword_pattern(pattern, case_sensitive)
+        if compiled is None:
             return False
+        return compiled.search(text) is not None
 
     @staticmethod
     def match_keyword(
@@ -5,10 +5,12 @@
 #   0 Very Negative, 1 Negative  -> negative
 #   2 Neutral                    -> neutral
 #   3 Positive,      4 Very Positive -> positive
-# This service turns the raw per-label counts produced by CommentRepository into
+# This service turns the raw per-label counts (per-entity ones come from the
+# comment_sentiment_daily rollup, per-post ones from CommentRepository) into
 # stable, frontend-friendly shapes keyed by those buckets (counts, percentages,
 # a single sentiment score, positive share, trend series, and example comments).
 from api.repositories.comment_repository import CommentRepository
+from api.repositories.comment_sentiment_daily_repository import CommentSentimentDailyRepository
 
 # Raw label (0-4) -> bucket.
 LABEL_TO_BUCKET = {0: "negative", 1: "negative", 2: "neutral", 3: "positive", 4: "positive"}
@@ -132,13 +134,13 @@ class CommentSentimentService:
     ) -> dict:
         """Full sentiment payload for one brand: summary + trend + examples."""
         summary = _shape_counts(
-            CommentRepository.get_sentiment_counts_by_entity(
+            CommentSentimentDailyRepository.get_counts_by_entity(
                 entity_id, start_date, end_date
             )
         )
         summary["entity_id"] = entity_id
         summary["trend"] = _shape_trend(
-            CommentRepository.get_sentiment_trend_by_entity(
+            CommentSentimentDailyRepository.get_trend_by_entity(
                 entity_id, start_date, end_date
             )
         )
@@ -198,7 +200,7 @@ class CommentSentimentService:
         differs sharply by network, so a platform-filtered row is a genuinely
         different ranking rather than the pooled one relabelled.
         """
-        rows = CommentRepository.get_sentiment_ranking(
+        rows = CommentSentimentDailyRepository.get_ranking(
             start_date, end_date, platform=platform
         )
         if not rows:
@@ -191,7 +191,7 @@ class CorrectionService:
         if target_type == "post_metric":
             # Best-effort, after the write already committed — see
             # PostRepository.refresh_post_views().
-            PostRepository.refresh_post_views()
+            PostRepository.refresh_post_views(history_id=row.id)
 
         return audit, row
 
@@ -1,4 +1,6 @@
 # Business workflows for entity service.
+import heapq
+import uuid
 from collections import defaultdict
 from datetime import datetime, timezone, timedelta
 
@@ -6,71 +8,42 @@ from api import db
 from api.repositories.entity_category_repository import EntityCategoryRepository
 from api.repositories.entity_repository import EntityRepository
 from api.repositories.page_history_repository import PageHistoryRepository
+from api.repositories.post_repository import PostRepository
 from api.utils.data_keys import platform_metrics
+from api.utils.gap_filling import fill_daily_series
 from api.utils.logging_utils import instrument_service_class
 from api.utils.request_parsing import parse_iso_date
 from api.utils.posts_utils import _to_number, ensure_datetime, parse_relative_time
 
 
-@instrument_service_class
-class EntityService:
-    @staticmethod
-    def refine_daily_followers(points):
-        if not points:
-            return []
+# Page size of the cursor-paginated posts timeline (default / most allowed).
+TIMELINE_PAGE_SIZE = 50
+TIMELINE_MAX_PAGE_SIZE = 200
 
-        # Build a sparse map first, then fill gaps to produce a complete daily series.
-        by_day = {}
-        for day, followers in points:
-            by_day[day] = followers
 
-        start_day = min(by_day.keys())
-        end_day = max(by_day.keys())
-        total_days = (end_day - start_day).days + 1
+def _encode_timeline_cursor(created_at, page_id, platform, post_id) -> str:
+    """Posts timeline cursor: the keyset of the last post on a page."""
+    return f"{created_at.isoformat()}|{page_id}|{platform}|{post_id}"
 
-        days = [start_day + timedelta(days=i) for i in range(total_days)]
-        values = [by_day.get(day) for day in days]
 
-        def _is_missing(value):
-            return value is None or value == 0
+def _decode_timeline_cursor(cursor):
+    """Inverse of _encode_timeline_cursor; None passes through."""
+    if not cursor:
+        return None
+    parts = cursor.split("|", 3)
+    if len(parts) != 4 or not all(parts):
+        raise ValueError("Malformed timeline cursor")
+    created_at, page_id, platform, post_id = parts
+    return datetime.fromisoformat(created_at), str(uuid.UUID(page_id)), platform, post_id
 
-        i = 0
-        n = len(values)
-        while i < n:
-            if not _is_missing(values[i]):
-                i += 1
-                continue
 
-            # Find each contiguous run of missing values and fill it using nearest neighbors.
-            run_start = i
-            while i < n and _is_missing(values[i]):
-                i += 1
-            run_end = i - 1
-
-            left_idx = run_start - 1
-            right_idx = i if i < n else None
-
-            left_val = values[left_idx] if left_idx >= 0 and not _is_missing(values[left_idx]) else None
-            right_val = values[right_idx] if right_idx is not None and not _is_missing(values[right_idx]) else None
-
-            if left_val is not None and right_val is not None:
-                # Interpolate linearly when both boundaries exist.
-                gap = right_idx - left_idx
-                for k in range(run_start, run_end + 1):
-                    ratio = (k - left_idx) / gap
-                    interpolated = left_val + (right_val - left_val) * ratio
-                    values[k] = max(0, int(round(interpolated)))
-            elif left_val is not None:
-                for k in range(run_start, run_end + 1):
-                    values[k] = left_val
-            elif right_val is not None:
-                for k in range(run_start, run_end + 1):
-                    values[k] = right_val
-            else:
-                for k in range(run_start, run_end + 1):
-                    values[k] = 0
-
-        return list(zip(days, values))
+@instrument_service_class
+class EntityService:
+    @staticmethod
+    def refine_daily_followers(points):
+        # One series of the batched filler; callers with several series
+        # should pass them to fill_daily_series together.
+        return fill_daily_series({None: points})[None]
 
     @staticmethod
     def create_entity(name, entity_type, category_id):
@@ -177,8 +150,7 @@ class EntityService:
             grouped[(row.page_id, row.platform)].append((row.recorded_at.date(), row.followers))
 
         data = []
-        for (page_id, platform), points in grouped.items():
-            refined_points = EntityService.refine_daily_followers(points)
+        for (page_id, platform), refined_points in fill_daily_series(grouped).items():
             for day, followers in refined_points:
                 data.append(
                     {
@@ -208,8 +180,7 @@ class EntityService:
                     data[row.entity_name]["entity_id"] = row.entity_id
                 grouped[(row.entity_name, row.platform)].append((row.recorded_at.date(), row.followers))
 
-        for (entity_name, platform), points in grouped.items():
-            refined_points = EntityService.refine_daily_followers(points)
+        for (entity_name, platform), refined_points in fill_daily_series(grouped).items():
             for day, followers in refined_points:
                 data[entity_name]["records"].append(
                     {
@@ -541,135 +512,135 @@ class EntityService:
 
         return all_posts
 
+    @staticmethod
+    def get_entity_posts_timeline_page(entity_id, date_str=None, before=None, limit=None):
+        """
+        Cursor-paginated variant of get_entity_posts_timeline, read from
+        posts_mv.created_at (newest first) instead of flattening and sorting
+        every snapshot's posts in Python.
+
+        `before` is the `next_cursor` of the previous page; `date_str` is the
+        same lower bound on post creation (default: the last 30 days).
+
+        Returns:
+            dict: {"posts": [...], "next_cursor": str or None}; next_cursor is
+            None on the last page
+
+        Raises:
+            ValueError: On a malformed date, cursor or limit
+        """
+        if date_str:
+            since = ensure_datetime(date_str)
+        else:
+            since = ensure_datetime(datetime.now(timezone.utc)) - timedelta(days=30)
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+
+        limit = TIMELINE_PAGE_SIZE if limit is None else int(limit)
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        limit = min(limit, TIMELINE_MAX_PAGE_SIZE)
+
+        # One extra row tells whether another page follows.
+        rows = PostRepository.get_entity_timeline_page(
+            entity_id, since, before=_decode_timeline_cursor(before), limit=limit + 1
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        posts = []
+        for post, page_name in rows:
+            raw = post.extra_data if isinstance(post.extra_data, dict) else {}
+            posts.append({
+                **raw,
+                "post_id": post.post_id,
+                "platform": post.platform,
+                "page_id": str(post.page_id),
+                "page_name": page_name,
+                "url": post.url,
+                "likes": post.likes,
+                "comments": post.comments,
+                "shares": post.shares,
+                "views": post.views,
+                "compare_date": post.created_at.replace(tzinfo=timezone.utc).isoformat(),
+            })
+
+        next_cursor = None
+        if has_more:
+            last = rows[-1][0]
+            next_cursor = _encode_timeline_cursor(last.created_at, last.page_id, last.platform, last.post_id)
+        return {"posts": posts, "next_cursor": next_cursor}
+
     @staticmethod
     def mark_entity_to_scrape(entity_id):
         return EntityRepository.change_to_scrape(entity_id, True)
 
     @staticmethod
     def get_entity_top_posts(entity_id, date_value=None, top_posts=5):
+        """
+        The entity's `top_posts` posts by weighted day-over-day gain on `date`
+        (today by default), among posts created in the 10 days before it.
+
+        Gains come per post from posts_history_mv
+        (EntityRepository.get_entity_post_day_gains); a post first seen that day
+        counts its whole value. If `date` itself wasn't scraped, the latest
+        scraped day before it is used. Rows are scored as they stream in and
+        only the best `top_posts` are kept in a bounded heap, so only those
+        are ever turned into response dicts.
+
+        Returns:
+            tuple: ({"day", "posts"} or None, posts scored, posts skipped);
+            nothing is skipped any more, malformed posts never reach
+            posts_history_mv
+        """
         date = parse_iso_date(date_value) if date_value else datetime.now(timezone.utc).date()
         date_limit = date - timedelta(days=10)
 
-        data = EntityRepository.get_entity_posts_metrics(entity_id, date_limit)
+        rows = EntityRepository.get_entity_post_day_gains(entity_id, date, date_limit)
 
-        skipped = 0
         posts_num = 0
-
-        daily_posts = {}
-        for post in data:
-            platform = post.platform if hasattr(post, "platform") else post[2]
-            posts = post.posts_metrics if hasattr(post, "posts_metrics") else post[4]
-            recorded_at = post.recorded_at if hasattr(post, "recorded_at") else post[3]
-
-            if platform not in platform_metrics:
-                continue
-            if not posts:
-                continue
-
-            if isinstance(posts, list) and len(posts) > 0 and isinstance(posts[0], list):
-                posts = sum(posts, [])
-            if not isinstance(posts, list):
-                continue
-
-            day_key = recorded_at.date().isoformat()
-            if day_key not in daily_posts:
-                daily_posts[day_key] = {}
-
-            id_key = platform_metrics[platform]["id_key"]
-            metrics = platform_metrics[platform]["metrics"]
-            date_key = platform_metrics[platform]["date"]
-
-            for p in posts:
-                posts_num += 1
-                if not isinstance(p, dict):
-                    skipped += 1
-                    continue
-
-                post_id = p.get(id_key)
-                if not post_id:
-                    skipped += 1
-                    continue
-
-                post_date = p.get(date_key)
-                if date_limit and post_date and ensure_datetime(post_date).date() < date_limit:
-                    skipped += 1
-                    continue
-
-                daily_posts[day_key][post_id] = {
-                    "post_id": post_id,
-                    "platform": platform,
-                    "create_time": post_date,
-                    **{m["name"]: p.get(m["name"], 0) for m in metrics},
-                    **p,
-                }
-
-        sorted_days = sorted(daily_posts.keys())
-        final_output = []
-
-        for i, day in enumerate(sorted_days):
-            current_day_posts = daily_posts[day] or {}
-            previous_day_posts = {}
-            j = i - 1
-            # Compare against the nearest earlier day that has actual post data.
-            while j >= 0:
-                candidate = daily_posts.get(sorted_days[j], {})
-                if candidate and candidate != {}:
-                    previous_day_posts = candidate
-                    break
-                j -= 1
-
-            day_output = {"day": day, "posts": []}
-
-            for post_id, post_data in current_day_posts.items():
-                platform = post_data.get("platform")
-                metrics = platform_metrics.get(platform, {}).get("metrics", [])
-
-                previous_post = previous_day_posts.get(post_id, {})
-
-                gains = {}
-                if previous_post and previous_post != {}:
-                    # Post has previous snapshot - compute gains
-                    for m in metrics:
-                        name = m["name"]
-                        cur_val = _to_number(post_data.get(name, 0))
-                        prev_val = _to_number(previous_post.get(name, 0))
-
-                        gains[f"gained_{name}"] = cur_val - prev_val
-                else:
-                    # New post (first appearance) - treat current values as gains (baseline = 0)
-                    for m in metrics:
-                        name = m["name"]
-                        cur_val = _to_number(post_data.get(name, 0))
-                        gains[f"gained_{name}"] = cur_val
-
-                day_output["posts"].append({**post_data, **gains})
-
-            final_output.append(day_output)
-
-        target_key = str(date)
-        day_gains = next((item for item in final_output if item["day"] == target_key), None)
-        if day_gains is None:
-            # The exact target day wasn't scraped (a missed day, or "today"
-            # before that day's scrape has run). Fall back to the most recent
-            # scraped day on or before the target so a single gap doesn't yield
-            # an empty "no results" response. final_output is in ascending day
-            # order, so the last qualifying entry is the closest prior day.
-            prior_days = [item for item in final_output if item["day"] <= target_key]
-            day_gains = prior_days[-1] if prior_days else None
-        if day_gains:
-            # Weighted score drives ordering for "top posts" of the target day.
-            for post in day_gains["posts"]:
-                score = sum(
-                    post.get(f"gained_{m['name']}", 0) * m.get("weight", 1)
-                    for m in platform_metrics.get(post.get("platform"), {}).get("metrics", [])
-                )
-                post["total_score"] = score
-
-            day_gains["posts"].sort(key=lambda x: x["total_score"], reverse=True)
-
-            for rank, post in enumerate(day_gains["posts"], start=1):
-                post["rank"] = rank
-
-            day_gains["posts"] = day_gains["posts"][:top_posts]
-
-        return day_gains, posts_num, skipped
+        day = None
+        # Min-heap of the best `top_posts` entries so far. `-seq` breaks score
+        # ties in query order and keeps rows from ever being compared.
+        heap = []
+        for seq, row in enumerate(rows):
+            posts_num += 1
+            day = row.day
+            metrics = platform_metrics[row.platform]["metrics"]
+            gains = {
+                m["name"]: _to_number(getattr(row, m["column"]))
+                - _to_number(getattr(row, f"prev_{m['column']}"))
+                for m in metrics
+            }
+            score = sum(gains[m["name"]] * m.get("score", 1) for m in metrics)
+            entry = (score, -seq, row, gains)
+            if len(heap) < top_posts:
+                heapq.heappush(heap, entry)
+            elif heap and entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+        if day is None:
+            return None, 0, 0
+        top = sorted(heap, reverse=True)
+
+        posts = []
+        for rank, (score, _seq, row, gains) in enumerate(top, start=1):
+            metrics = platform_metrics[row.platform]["metrics"]
+            created_at = row.created_at
+            posts.append({
+                "post_id": row.post_id,
+                "platform": row.platform,
+                "page_id": str(row.page_id),
+                "create_time": created_at.isoformat() if hasattr(created_at, "isoformat") else created_at,
+                "url": row.url,
+                "caption": row.caption,
+                "content_type": row.content_type,
+                "image_url": row.image_url,
+                "video_url": row.video_url,
+                **{m["name"]: getattr(row, m["column"]) or 0 for m in metrics},
+                **{f"gained_{name}": gain for name, gain in gains.items()},
+                "total_score": score,
+                "rank": rank,
+            })
+
+        day_key = day.isoformat() if hasattr(day, "isoformat") else str(day)
+        return {"day": day_key, "posts": posts}, posts_num, 0
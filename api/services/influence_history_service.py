@@ -1,9 +1,12 @@
 # Business workflows for influence history service.
-from collections import defaultdict
 from datetime import datetime, date, timedelta, timezone
 
+import numpy as np
+
 from api.repositories.page_history_repository import PageHistoryRepository
+from api.repositories.ranking_snapshot_repository import RankingSnapshotRepository
 from api.utils.data_keys import platform_metrics
+from api.utils.interaction_stats import distribute_daily_gains
 from api.utils.logging_utils import instrument_service_class
 from api.utils.request_parsing import parse_iso_date
 from api.utils.posts_utils import _to_number, ensure_datetime
@@ -25,6 +28,26 @@ class InfluenceHistoryService:
         "shares": ("shares", "share_count", "reposts", "num_shares"),
         "views": ("views", "playcount", "view_count", "video_view_count"),
     }
+    # Canonical keys for the ranking periods precomputed by `flask refresh-mv`
+    # (see rebuild_ranking_snapshots). Every alias resolve_period_dates accepts
+    # maps onto one of these, so "last_30d" and "30d" share a snapshot.
+    # "default" is the no-params request (last 30 days, open-ended).
+    _SNAPSHOT_PERIOD_ALIASES = {
+        "all": "all", "all_time": "all", "max": "all",
+        "yesterday": "yesterday",
+        "7d": "7d", "last_7d": "7d", "prev_7d": "7d", "previous_7_days": "7d", "previous_7d": "7d",
+        "30d": "30d", "last_30d": "30d", "last_month": "30d",
+        "prev_month": "prev_month", "previous_month": "prev_month", "prev_30d": "prev_month", "previous_30d": "prev_month",
+        "90d": "90d", "last_90d": "90d",
+        "1y": "1y", "last_year": "1y", "365d": "1y",
+    }
+    _SNAPSHOT_PERIODS = ("default", "all", "yesterday", "7d", "30d", "prev_month", "90d", "1y")
+    # Entity kinds a ranking can be restricted to (mirrors entities.type).
+    _RANKING_ENTITY_TYPES = ("company", "influencer", "small-business")
+    _SNAPSHOT_ALL_TYPES = "all"
+    _SNAPSHOT_KIND_INTERACTIONS = "interactions"
+    _SNAPSHOT_KIND_FOLLOWERS = "followers_progress"
+
     _METRIC_TOTAL_GROUPS = {
         "likes": {"likes", "likes_count", "favorites_count"},
         "comments": {"comments", "comments_count", "commentcount", "replies", "num_comments"},
@@ -108,8 +131,53 @@ class InfluenceHistoryService:
         # Legacy alias kept for compatibility.
         return InfluenceHistoryService.get_followers_ranking()
 
+    @staticmethod
+    def _snapshot_period_key(period=None, start_date=None, end_date=None):
+        """Snapshot key for a ranking request, or None when the window is a
+        custom one that was never precomputed (explicit start/end dates, or
+        an unknown period that the live path should reject)."""
+        if period:
+            return InfluenceHistoryService._SNAPSHOT_PERIOD_ALIASES.get(period.strip().lower())
+        if start_date or end_date:
+            return None
+        return "default"
+
+    @staticmethod
+    def _rank_rows(ranking):
+        for idx, row in enumerate(ranking, start=1):
+            row["rank"] = idx
+        return ranking
+
     @staticmethod
     def get_followers_progress_ranking(period=None, start_date=None, end_date=None, entity_type=None, sort_by="progress"):
+        # The caller decides which followers metric this ranking *is*, because
+        # rank has to be assigned here rather than in the client: free/anonymous
+        # users get the list truncated to the top N by limit_ranking_for_role,
+        # so a client that re-sorted afterwards would be re-ordering the wrong
+        # ten rows and presenting them as a complete ranking.
+        sort_key = "total_followers" if sort_by == "followers" else "followers_progress"
+
+        period_key = InfluenceHistoryService._snapshot_period_key(period, start_date, end_date)
+        if period_key:
+            cached = RankingSnapshotRepository.get_snapshot(
+                InfluenceHistoryService._SNAPSHOT_KIND_FOLLOWERS,
+                period_key,
+                entity_type.lower() if entity_type else InfluenceHistoryService._SNAPSHOT_ALL_TYPES,
+                date.today(),
+                order_by=sort_key,
+            )
+            if cached is not None:
+                return InfluenceHistoryService._rank_rows(cached)
+
+        ranking = InfluenceHistoryService._build_followers_progress_ranking(
+            period=period, start_date=start_date, end_date=end_date, entity_type=entity_type
+        )
+        ranking.sort(key=lambda x: x.get(sort_key, 0), reverse=True)
+        return InfluenceHistoryService._rank_rows(ranking)
+
+    @staticmethod
+    def _build_followers_progress_ranking(period=None, start_date=None, end_date=None, entity_type=None):
+        """Unsorted, unranked followers-progress rows for one window."""
         date_limit, end_dt = resolve_period_dates(period=period, start_date=start_date, end_date=end_date)
         rows = PageHistoryRepository.get_followers_progress_snapshot(date_limit=date_limit, end_date=end_dt, entity_type=entity_type)
         if not rows:
@@ -187,18 +255,7 @@ class InfluenceHistoryService:
                     existing["previous_followers"] += prev_followers
                     existing["followers_progress"] += progress
 
-        ranking = list(entities.values())
-        # The caller decides which followers metric this ranking *is*, because
-        # rank has to be assigned here rather than in the client: free/anonymous
-        # users get the list truncated to the top N by limit_ranking_for_role,
-        # so a client that re-sorted afterwards would be re-ordering the wrong
-        # ten rows and presenting them as a complete ranking.
-        sort_key = "total_followers" if sort_by == "followers" else "followers_progress"
-        ranking.sort(key=lambda x: x.get(sort_key, 0), reverse=True)
-        for idx, row in enumerate(ranking, start=1):
-            row["rank"] = idx
-
-        return ranking
+        return list(entities.values())
 
     @staticmethod
     def get_interactions_ranking(period=None, start_date=None, end_date=None, entity_type="company"):
@@ -213,47 +270,76 @@ class InfluenceHistoryService:
         return InfluenceHistoryService._get_companies_ranking(period=period, start_date=start_date, end_date=end_date, order_by_key="total_comments", entity_type=entity_type)
 
     @staticmethod
-    def get_posts_followers_ranking(period=None, start_date=None, end_date=None, entity_type=None):
+    def get_posts_followers_ranking(period=None, start_date=None, end_date=None, entity_type=None, limit=None, cursor=None):
         return InfluenceHistoryService._get_posts_ranking(
             period=period,
             start_date=start_date,
             end_date=end_date,
             order_by_key="total_followers",
             entity_type=entity_type,
+            limit=limit,
+            cursor=cursor,
         )
 
     @staticmethod
-    def get_posts_interactions_ranking(period=None, start_date=None, end_date=None, entity_type=None):
+    def get_posts_interactions_ranking(period=None, start_date=None, end_date=None, entity_type=None, limit=None, cursor=None):
         return InfluenceHistoryService._get_posts_ranking(
             period=period,
             start_date=start_date,
             end_date=end_date,
             order_by_key="total_score",
             entity_type=entity_type,
+            limit=limit,
+            cursor=cursor,
         )
 
     @staticmethod
-    def get_posts_likes_ranking(period=None, start_date=None, end_date=None, entity_type=None):
+    def get_posts_likes_ranking(period=None, start_date=None, end_date=None, entity_type=None, limit=None, cursor=None):
         return InfluenceHistoryService._get_posts_ranking(
             period=period,
             start_date=start_date,
             end_date=end_date,
             order_by_key="total_likes",
             entity_type=entity_type,
+            limit=limit,
+            cursor=cursor,
         )
 
     @staticmethod
-    def get_posts_comments_ranking(period=None, start_date=None, end_date=None, entity_type=None):
+    def get_posts_comments_ranking(period=None, start_date=None, end_date=None, entity_type=None, limit=None, cursor=None):
         return InfluenceHistoryService._get_posts_ranking(
             period=period,
             start_date=start_date,
             end_date=end_date,
             order_by_key="total_comments",
             entity_type=entity_type,
+            limit=limit,
+            cursor=cursor,
         )
 
     @staticmethod
     def _get_companies_ranking(period=None, start_date=None, end_date=None, order_by_key="total_score", entity_type="company"):
+        period_key = InfluenceHistoryService._snapshot_period_key(period, start_date, end_date)
+        if period_key:
+            cached = RankingSnapshotRepository.get_snapshot(
+                InfluenceHistoryService._SNAPSHOT_KIND_INTERACTIONS,
+                period_key,
+                (entity_type or "company").lower(),
+                date.today(),
+                order_by=order_by_key,
+            )
+            if cached is not None:
+                return InfluenceHistoryService._rank_rows(cached)
+
+        ranking = InfluenceHistoryService._build_companies_ranking(
+            period=period, start_date=start_date, end_date=end_date, entity_type=entity_type
+        )
+        ranking.sort(key=lambda x: x.get(order_by_key, 0), reverse=True)
+        return InfluenceHistoryService._rank_rows(ranking)
+
+    @staticmethod
+    def _build_companies_ranking(period=None, start_date=None, end_date=None, entity_type="company"):
+        """Unsorted, unranked interactions rows (scores already rounded) for one window."""
         date_limit, end_dt = resolve_period_dates(period=period, start_date=start_date, end_date=end_date)
         rows = PageHistoryRepository.get_companies_interactions_summary(date_limit=date_limit, end_date=end_dt, entity_type=entity_type)
 
@@ -354,209 +440,88 @@ class InfluenceHistoryService:
         for row in ranking:
             row["total_score"] = round(row["total_score"], 4)
 
-        ranking.sort(key=lambda x: x.get(order_by_key, 0), reverse=True)
-        for idx, row in enumerate(ranking, start=1):
-            row["rank"] = idx
-
         return ranking
 
     @staticmethod
-    def _get_posts_ranking(period=None, start_date=None, end_date=None, order_by_key="gained_score", entity_type=None):
-        """
-        Calculate posts ranking based on metric growth (difference between snapshots).
-        
-        Posts are tracked across multiple snapshots within the date window.
-        Growth is calculated as: latest_snapshot_value - earliest_snapshot_value.
-        This matches the behavior of company/entity interaction rankings.
+    def rebuild_ranking_snapshots(snapshot_date=None):
+        """Precompute the standard entity rankings into `ranking_snapshots`.
+
+        Run right after the materialized views are refreshed (`flask
+        refresh-mv` does this), so every dashboard request for a standard
+        period reads a stored ranking instead of re-running the DISTINCT ON
+        scans and re-scoring every row. Custom start/end windows are still
+        computed live. Snapshots from earlier days are dropped, since reads
+        only ever look at today's.
+
+        Returns:
+            dict: {"snapshot_date": str, "rankings": int, "rows": int}
         """
-        date_limit, end_dt = resolve_period_dates(period=period, start_date=start_date, end_date=end_date)
-        rows = PageHistoryRepository.get_all_entities_posts(date_limit=date_limit, entity_type=entity_type)
-
-        if not rows:
-            return []
-
-        # Track post snapshots across time: {post_key: {snapshot_data}}
-        post_snapshots = defaultdict(list)
-        
-        # Metadata for each post (entity info, page info, etc.)
-        post_metadata = {}
-
-        # Latest page-level profile picture / followers, keyed by page_id.
-        # The profile image is a page attribute (not a post attribute) and its
-        # CDN URL is signed + short-lived, so we must always serve the freshest
-        # one from the most recent scrape — even for older posts that are no
-        # longer being re-scraped (whose own snapshots hold expired URLs).
-        page_latest_profile = {}
-        page_latest_followers = {}
-
-        sorted_rows = sorted(
-            rows,
-            key=lambda row: InfluenceHistoryService._row_value(row, "recorded_at", datetime.min),
-        )  # Sort ascending to process oldest first
-
-        for row in sorted_rows:
-            platform = InfluenceHistoryService._row_value(row, "platform", None)
-            if platform not in platform_metrics:
-                continue
-
-            page_id = InfluenceHistoryService._row_value(row, "page_id", None)
-            page_name = InfluenceHistoryService._row_value(row, "page_name", None)
-            page_url = InfluenceHistoryService._row_value(row, "page_url", None)
-            profile_image_url = InfluenceHistoryService._row_value(row, "profile_url", None)
-            page_followers = _to_number(InfluenceHistoryService._row_value(row, "raw_followers", 0))
-            recorded_at = InfluenceHistoryService._row_value(row, "recorded_at", None)
-
-            # Rows are ascending, so the last non-empty value wins = latest scrape.
-            if page_id is not None and profile_image_url:
-                page_latest_profile[page_id] = profile_image_url
-            if page_id is not None and page_followers:
-                page_latest_followers[page_id] = page_followers
-
-            posts = InfluenceHistoryService._row_value(row, "posts_metrics", None)
-            if not posts:
-                continue
-
-            if isinstance(posts, list) and len(posts) > 0 and isinstance(posts[0], list):
-                posts = sum(posts, [])
-            if not isinstance(posts, list):
-                continue
-
-            entity_id = InfluenceHistoryService._row_value(row, "entity_id", None)
-            entity_name = InfluenceHistoryService._row_value(row, "entity_name", None)
-            category = InfluenceHistoryService._row_value(row, "category", None)
-            root_category = InfluenceHistoryService._row_value(row, "root_category", None)
-            if root_category is None and category is not None:
-                root_category = category
-
-            metrics = platform_metrics.get(platform, {}).get("metrics", [])
-            id_key = platform_metrics[platform]["id_key"]
-            date_key = platform_metrics[platform]["date"]
-
-            for post in posts:
-                if not isinstance(post, dict):
-                    continue
-
-                post_id = post.get(id_key)
-                if not post_id:
-                    continue
-
-                post_date = post.get(date_key) or recorded_at
-                if not post_date:
-                    continue
-
-                post_dt = ensure_datetime(post_date)
-                if post_dt.date() < date_limit:
-                    continue
-                if end_dt and post_dt.date() > end_dt:
-                    continue
+        snapshot_date = snapshot_date or date.today()
+        rankings = 0
+        rows_written = 0
+
+        for period_key in InfluenceHistoryService._SNAPSHOT_PERIODS:
+            period = None if period_key == "default" else period_key
+
+            for entity_type in InfluenceHistoryService._RANKING_ENTITY_TYPES:
+                rows = InfluenceHistoryService._build_companies_ranking(period=period, entity_type=entity_type)
+                rows_written += RankingSnapshotRepository.replace_snapshot(
+                    InfluenceHistoryService._SNAPSHOT_KIND_INTERACTIONS,
+                    period_key,
+                    entity_type,
+                    snapshot_date,
+                    rows,
+                )
+                rankings += 1
+
+            for entity_type in (None,) + InfluenceHistoryService._RANKING_ENTITY_TYPES:
+                rows = InfluenceHistoryService._build_followers_progress_ranking(period=period, entity_type=entity_type)
+                rows_written += RankingSnapshotRepository.replace_snapshot(
+                    InfluenceHistoryService._SNAPSHOT_KIND_FOLLOWERS,
+                    period_key,
+                    entity_type or InfluenceHistoryService._SNAPSHOT_ALL_TYPES,
+                    snapshot_date,
+                    rows,
+                )
+                rankings += 1
 
-                post_key = (page_id, platform, str(post_id))
+        RankingSnapshotRepository.delete_before(snapshot_date)
 
-                # Rows are processed oldest -> newest, so overwriting keeps the
-                # LATEST snapshot's metadata. This matters for profile_image_url
-                # (a signed, short-lived CDN URL) and page_followers, which must
-                # reflect the most recent scrape rather than the oldest one in
-                # the window.
-                post_metadata[post_key] = {
-                    "entity_id": entity_id,
-                    "entity_name": entity_name,
-                    "category": category,
-                    "root_category": root_category,
-                    "page_id": page_id,
-                    "page_name": page_name,
-                    "page_url": page_url,
-                    "profile_image_url": profile_image_url,
-                    "platform": platform,
-                    "post_id": post_id,
-                    "caption": post.get("caption"),
-                    "post_url": post.get("url") or post.get("link"),
-                    "created_at": post_dt.isoformat(),
-                    "page_followers": page_followers,
-                }
+        return {
+            "snapshot_date": snapshot_date.isoformat(),
+            "rankings": rankings,
+            "rows": rows_written,
+        }
 
-                # Extract metric values for this snapshot
-                likes = InfluenceHistoryService._post_metric_value(post, "likes")
-                comments = InfluenceHistoryService._post_metric_value(post, "comments")
-                shares = InfluenceHistoryService._post_metric_value(post, "shares")
-                views = InfluenceHistoryService._post_metric_value(post, "views")
-                
-                # Calculate platform-specific score for this snapshot
-                snapshot_score = 0.0
-                for metric in metrics:
-                    metric_name = metric["name"]
-                    metric_weight = metric.get("score", 1.0)
-                    snapshot_score += _to_number(post.get(metric_name, 0)) * metric_weight
-
-                post_snapshots[post_key].append({
-                    "recorded_at": recorded_at,
-                    "likes": likes,
-                    "comments": comments,
-                    "shares": shares,
-                    "views": views,
-                    "score": snapshot_score,
-                })
-
-        # Calculate growth for each post
-        ranked_posts = {}
-        window_end = end_dt.isoformat() if end_dt else datetime.now(timezone.utc).date().isoformat()
-        
-        for post_key, snapshots in post_snapshots.items():
-            if len(snapshots) < 1:
-                continue
+    @staticmethod
+    def _post_score_weights():
+        """platform_metrics weights re-keyed onto the posts_history_mv metric
+        columns (likes/comments/shares/views), per rankable platform. The
+        column is each metric's `column` in platform_metrics, the same one
+        _post_score_sql scores competitor posts on."""
+        weights = {}
+        for platform, config in platform_metrics.items():
+            columns = {}
+            for metric in config.get("metrics", []):
+                column = metric["column"]
+                columns[column] = columns.get(column, 0.0) + metric.get("score", 1.0)
+            weights[platform] = columns
+        return weights
 
-            metadata = post_metadata[post_key]
+    @staticmethod
+    def _get_posts_ranking(period=None, start_date=None, end_date=None, order_by_key="gained_score", entity_type=None, limit=None, cursor=None):
+        """
+        Calculate posts ranking based on metric growth (difference between snapshots).
 
-            # Prefer the page's freshest profile picture / followers over this
-            # post's (possibly stale) snapshot value, so image URLs don't expire.
-            profile_image_url = page_latest_profile.get(
-                metadata["page_id"], metadata["profile_image_url"]
-            )
-            page_followers = page_latest_followers.get(
-                metadata["page_id"], metadata["page_followers"]
-            )
+        Posts are tracked across multiple snapshots within the date window.
+        Growth is calculated as: latest_snapshot_value - earliest_snapshot_value.
+        This matches the behavior of company/entity interaction rankings.
 
-            # Sort snapshots by recorded_at to get earliest and latest
-            snapshots.sort(key=lambda x: x["recorded_at"] or datetime.min)
-            
-            earliest = snapshots[0]
-            latest = snapshots[-1]
-            
-            # Calculate gains (growth) between earliest and latest snapshot
-            gained_likes = latest["likes"] - earliest["likes"]
-            gained_comments = latest["comments"] - earliest["comments"]
-            gained_shares = latest["shares"] - earliest["shares"]
-            gained_views = latest["views"] - earliest["views"]
-            gained_score = latest["score"] - earliest["score"]
-
-            ranked_posts[post_key] = {
-                # Entity & Page info
-                "entity_id": metadata["entity_id"],
-                "entity_name": metadata["entity_name"],
-                "category": metadata["category"],
-                "root_category": metadata["root_category"],
-                "page_id": metadata["page_id"],
-                "page_name": metadata["page_name"],
-                "page_url": metadata["page_url"],
-                "profile_image_url": profile_image_url,
-                # Post info
-                "platform": metadata["platform"],
-                "post_id": metadata["post_id"],
-                "caption": metadata["caption"],
-                "post_url": metadata["post_url"],
-                "created_at": metadata["created_at"],
-                # Window info
-                "window_start": date_limit.isoformat(),
-                "window_end": window_end,
-                "snapshots_count": len(snapshots),
-                # Growth metrics (used for ranking)
-                "gained_likes": gained_likes,
-                "gained_comments": gained_comments,
-                "gained_shares": gained_shares,
-                "gained_views": gained_views,
-                "gained_score": round(gained_score, 4),
-                # Page followers
-                "page_followers": page_followers,
-            }
+        The growth, ordering and slicing all happen in SQL over
+        posts_history_mv, so only `limit` rows come back. `cursor` is the rank
+        of the last row the caller already has (0/None = start from the top).
+        """
+        date_limit, end_dt = resolve_period_dates(period=period, start_date=start_date, end_date=end_date)
 
         # Map order_by_key to growth-based keys
         order_key_mapping = {
@@ -568,12 +533,62 @@ class InfluenceHistoryService:
             "total_followers": "page_followers",
         }
         sort_key = order_key_mapping.get(order_by_key, order_by_key)
+        offset = max(0, int(cursor or 0))
 
-        ranking = list(ranked_posts.values())
-        ranking.sort(key=lambda x: x.get(sort_key, 0), reverse=True)
+        rows = PageHistoryRepository.get_posts_growth_ranking(
+            date_limit=date_limit,
+            end_date=end_dt,
+            entity_type=entity_type,
+            score_weights=InfluenceHistoryService._post_score_weights(),
+            order_by=sort_key,
+            limit=limit,
+            offset=offset,
+        )
+        if not rows:
+            return []
 
-        for idx, row in enumerate(ranking, start=1):
-            row["rank"] = idx
+        window_start = date_limit.isoformat()
+        window_end = end_dt.isoformat() if end_dt else datetime.now(timezone.utc).date().isoformat()
+
+        row_value = InfluenceHistoryService._row_value
+        ranking = []
+        for idx, row in enumerate(rows, start=offset + 1):
+            created_at = row_value(row, "created_at", None)
+            page_id = row_value(row, "page_id", None)
+            root_category = row_value(row, "root_category", None)
+            if root_category is None:
+                root_category = row_value(row, "category", None)
+
+            ranking.append({
+                # Entity & Page info
+                "entity_id": row_value(row, "entity_id", None),
+                "entity_name": row_value(row, "entity_name", None),
+                "category": row_value(row, "category", None),
+                "root_category": root_category,
+                "page_id": str(page_id) if page_id is not None else None,
+                "page_name": row_value(row, "page_name", None),
+                "page_url": row_value(row, "page_url", None),
+                "profile_image_url": row_value(row, "profile_image_url", None),
+                # Post info
+                "platform": row_value(row, "platform", None),
+                "post_id": row_value(row, "post_id", None),
+                "caption": row_value(row, "caption", None),
+                "post_url": row_value(row, "url", None),
+                "created_at": ensure_datetime(created_at).isoformat() if created_at else None,
+                # Window info
+                "window_start": window_start,
+                "window_end": window_end,
+                "snapshots_count": int(row_value(row, "snapshots_count", 0) or 0),
+                # Growth metrics (used for ranking)
+                "gained_likes": _to_number(row_value(row, "gained_likes", 0)),
+                "gained_comments": _to_number(row_value(row, "gained_comments", 0)),
+                "gained_shares": _to_number(row_value(row, "gained_shares", 0)),
+                "gained_views": _to_number(row_value(row, "gained_views", 0)),
+                "gained_score": round(float(row_value(row, "gained_score", 0) or 0), 4),
+                # Page followers
+                "page_followers": _to_number(row_value(row, "page_followers", 0)),
+                "rank": idx,
+            })
 
         return ranking
 
@@ -639,41 +654,37 @@ class InfluenceHistoryService:
         last_day = ensure_datetime(sorted_days[-1]).date()
         all_days = [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
 
-        distributed_gains = defaultdict(lambda: defaultdict(lambda: defaultdict(float)))
-        post_series = defaultdict(list)
+        # One snapshot matrix per platform (their metric sets differ): a row per
+        # (post, day) sample, tagged with the post's series index and day offset.
+        samples = {}
         for day_key, posts_map in daily_posts.items():
-            day_date = ensure_datetime(day_key).date()
+            day_offset = (ensure_datetime(day_key).date() - first_day).days
             for post_id, post_data in (posts_map or {}).items():
                 platform = post_data.get("platform")
-                post_series[(platform, post_id)].append((day_date, post_data))
-
-        for (platform, _post_id), samples in post_series.items():
-            metric_defs = platform_metrics.get(platform, {}).get("metrics", [])
-            if not metric_defs:
-                continue
-
-            samples.sort(key=lambda x: x[0])
-
-            for idx in range(1, len(samples)):
-                prev_day, prev_data = samples[idx - 1]
-                cur_day, cur_data = samples[idx]
-
-                span_days = (cur_day - prev_day).days
-                if span_days <= 0:
+                metric_defs = platform_metrics.get(platform, {}).get("metrics", [])
+                if not metric_defs:
                     continue
+                entry = samples.setdefault(platform, {"series": {}, "rows": []})
+                series = entry["series"].setdefault(post_id, len(entry["series"]))
+                entry["rows"].append(
+                    (series, day_offset, [_to_number(post_data.get(m["name"], 0)) for m in metric_defs])
+                )
 
-                for metric in metric_defs:
-                    metric_name = metric["name"]
-                    prev_val = _to_number(prev_data.get(metric_name, 0))
-                    cur_val = _to_number(cur_data.get(metric_name, 0))
-                    step_gain = (cur_val - prev_val) / span_days
-
-                    for step in range(1, span_days + 1):
-                        day = prev_day + timedelta(days=step)
-                        distributed_gains[day][platform][metric_name] += step_gain
+        platform_gains = {}
+        for platform, entry in samples.items():
+            metric_defs = platform_metrics[platform]["metrics"]
+            series_index, day_index, values = zip(*entry["rows"])
+            gains, covered = distribute_daily_gains(series_index, day_index, values, len(all_days))
+            weights = np.array([m.get("score", 1.0) for m in metric_defs], dtype=np.float64)
+            platform_gains[platform] = (
+                [m["name"] for m in metric_defs],
+                gains.tolist(),
+                (gains @ weights).tolist(),
+                covered.tolist(),
+            )
 
         summary = []
-        for day in all_days:
+        for idx, day in enumerate(all_days):
             if start_day and day < start_day:
                 continue
 
@@ -681,21 +692,12 @@ class InfluenceHistoryService:
             day_gains = {}
             day_total_score = 0.0
 
-            platforms_data = distributed_gains.get(day, {})
-            for platform, metrics_map in platforms_data.items():
-                metric_defs = platform_metrics.get(platform, {}).get("metrics", [])
-                metric_weights = {m["name"]: m.get("score", 1.0) for m in metric_defs}
-
-                platform_score = 0.0
-                day_gains[platform] = {}
-
-                for metric_name, metric_value in metrics_map.items():
-                    value = float(metric_value)
-                    day_gains[platform][metric_name] = value
-                    platform_score += value * metric_weights.get(metric_name, 1.0)
-
-                day_platform_scores[platform] = platform_score
-                day_total_score += platform_score
+            for platform, (metric_names, gains, scores, covered) in platform_gains.items():
+                if not covered[idx]:
+                    continue
+                day_gains[platform] = dict(zip(metric_names, gains[idx]))
+                day_platform_scores[platform] = scores[idx]
+                day_total_score += scores[idx]
 
             summary.append({
                 "date": day.isoformat(),
@@ -707,69 +709,36 @@ class InfluenceHistoryService:
         return summary
 
     @staticmethod
-    def get_competitors_interaction_stats(entity_ids, start_date=None):
+    def get_competitors_interaction_stats(entity_ids, start_date=None, top_n=None):
+        """
+        Scored posts of several entities for the competitor comparison, the
+        `top_n` best per entity when given. Scoring and the per-entity cut
+        happen in one posts_mv query
+        (PageHistoryRepository.get_competitors_scored_posts); each row carries
+        the platform's own metric keys from platform_metrics.
+        """
         normalized_start = ensure_datetime(start_date) if start_date else None
         date_limit = normalized_start.date() if normalized_start else date.today() - timedelta(days=30)
 
-        data = []
-        for entity_id in entity_ids:
-            data.extend(
-                PageHistoryRepository().get_entity_posts_new(
-                    entity_id=entity_id,
-                    date_limit=date_limit,
-                    max_posts=10000,
-                )
-            )
-
-        if not data:
-            return []
+        rows = PageHistoryRepository.get_competitors_scored_posts(
+            entity_ids,
+            date_limit=date_limit,
+            start_date=normalized_start.replace(tzinfo=None) if normalized_start else None,
+            top_n=top_n,
+        )
 
         post_scores = []
-
-        for row in data:
-            platform = row.platform if hasattr(row, "platform") else row[2]
-            page_id = row.page_id if hasattr(row, "page_id") else row[0]
-            entity_id = row.entity_id if hasattr(row, "entity_id") else row[5]
-
-            if platform not in platform_metrics:
-                continue
-
-            posts = row.posts_metrics if hasattr(row, "posts_metrics") else row[4]
-            if not posts:
-                continue
-            if isinstance(posts, list) and len(posts) > 0 and isinstance(posts[0], list):
-                posts = sum(posts, [])
-            if not isinstance(posts, list):
-                continue
-
-            id_key = platform_metrics[platform]["id_key"]
-            metrics = platform_metrics[platform]["metrics"]
-
-            for post in posts:
-                if not isinstance(post, dict):
-                    continue
-
-                post_sc = 0
-
-                post_date = post.get(platform_metrics[platform]["date"])
-                if normalized_start and post_date and normalized_start > ensure_datetime(post_date):
-                    continue
-
-                for metric in metrics:
-                    metric_name = metric["name"]
-                    metric_score = metric["score"]
-
-                    value = _to_number(post.get(metric_name, 0))
-                    post_sc += value * metric_score
-
-                post_scores.append({
-                    "post_id": post.get(id_key),
-                    **{m["name"]: post.get(m["name"], 0) for m in metrics},
-                    "score": post_sc,
-                    "platform": platform,
-                    "create_time": post.get(platform_metrics[platform]["date"]),
-                    "page_id": page_id,
-                    "entity_id": entity_id,
-                })
+        for row in rows:
+            metrics = platform_metrics[row["platform"]]["metrics"]
+            created_at = row["created_at"]
+            post_scores.append({
+                "post_id": row["post_id"],
+                **{m["name"]: row[m["column"]] or 0 for m in metrics},
+                "score": float(row["score"] or 0),
+                "platform": row["platform"],
+                "create_time": created_at.isoformat() if hasattr(created_at, "isoformat") else created_at,
+                "page_id": str(row["page_id"]),
+                "entity_id": row["entity_id"],
+            })
 
         return post_scores
@@ -1,12 +1,44 @@
 import json
 import logging
 import os
+import threading
 from datetime import datetime, timezone
 
 import requests
+from requests.adapters import HTTPAdapter
 
 
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+# Keep-alive connections held per process: one per concurrent call (request
+# threads plus the insight pre-generation pool) without a new TLS handshake each.
+OPENROUTER_POOL_SIZE = 8
+OPENROUTER_TIMEOUT_SECONDS = 30
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide pooled HTTP session for OpenRouter calls."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.mount(
+                    "https://",
+                    HTTPAdapter(pool_connections=1, pool_maxsize=OPENROUTER_POOL_SIZE),
+                )
+                _session = session
+    return _session
+
+
+def set_session(session) -> None:
+    """Replace the HTTP layer (anything with a requests-style `post`), e.g.
+    with a local stub in tests. None restores the default pooled session."""
+    global _session
+    with _session_lock:
+        _session = session
 
 
 def _configured_models() -> list[str]:
@@ -29,6 +61,12 @@ def get_primary_model_id() -> str:
     models = _configured_models()
     return models[0] if models else ""
 
+
+def max_call_seconds() -> int:
+    """Longest call_llm can run: each configured model may be tried in turn,
+    with OPENROUTER_TIMEOUT_SECONDS per attempt."""
+    return max(len(_configured_models()), 1) * OPENROUTER_TIMEOUT_SECONDS
+
 service_logger = logging.getLogger("service_errors")
 
 
@@ -107,7 +145,7 @@ def call_llm(system_prompt: str, data_block: str) -> str:
     for model_id in models:
         response = None
         try:
-            response = requests.post(
+            response = get_session().post(
                 OPENROUTER_URL,
                 headers={
                     "Authorization": f"Bearer {api_key}",
@@ -120,7 +158,7 @@ def call_llm(system_prompt: str, data_block: str) -> str:
                         {"role": "user", "content": data_block},
                     ],
                 },
-                timeout=30,
+                timeout=OPENROUTER_TIMEOUT_SECONDS,
             )
             response.raise_for_status()
 
@@ -168,3 +206,17 @@ def call_llm(system_prompt: str, data_block: str) -> str:
         "No available OpenRouter endpoint for configured models: "
         f"{', '.join(models)}"
     ) from last_error
+
+
+def stub_llm(system_prompt: str, data_block: str) -> str:
+    """
+    Local stand-in for call_llm: no network, no API key, same contract.
+    Echoes the size of what it was given so tests can tell calls apart.
+    Selected with AI_INSIGHTS_LLM=stub (see ai_insight_service.get_llm).
+    """
+    first_line = (data_block or "").strip().splitlines()[0:1]
+    return (
+        "**1. Headline:** Stub insight generated locally without calling a model.\n"
+        f"- Prompt length: {len(system_prompt or '')}, data length: {len(data_block or '')}\n"
+        f"- First data line: {first_line[0] if first_line else '-'}"
+    )
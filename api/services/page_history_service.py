@@ -1,10 +1,38 @@
 # Business workflows for page history monitoring service.
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 from api.repositories.page_history_repository import PageHistoryRepository
 from api.utils.logging_utils import instrument_service_class
 from api.utils.request_parsing import parse_iso_date
 
 
+PAGES_HISTORY_COUNT_MODES = ("exact", "estimate", "none")
+
+
+def _encode_history_cursor(sort_value, history_id) -> str:
+    """Pages history cursor: the (sort column, id) keyset of a page's last row."""
+    if isinstance(sort_value, datetime):
+        # UTC with a "Z" suffix: no "+" for a query string to turn into a space.
+        if sort_value.tzinfo is not None:
+            sort_value = sort_value.astimezone(timezone.utc).replace(tzinfo=None)
+            return f"{sort_value.isoformat()}Z|{history_id}"
+        return f"{sort_value.isoformat()}|{history_id}"
+    return str(history_id)
+
+
+def _decode_history_cursor(cursor, sort_by: str):
+    """Inverse of _encode_history_cursor for `sort_by`; None passes through."""
+    if not cursor:
+        return None
+    try:
+        if sort_by == "id":
+            history_id = int(cursor)
+            return history_id, history_id
+        recorded_at, history_id = cursor.rsplit("|", 1)
+        return datetime.fromisoformat(recorded_at), int(history_id)
+    except ValueError:
+        raise ValueError("Malformed pages history cursor") from None
+
+
 @instrument_service_class
 class PageHistoryService:
     @staticmethod
@@ -20,8 +48,18 @@ class PageHistoryService:
         per_page: int = 20,
         sort_by: str = "recorded_at",
         sort_order: str = "desc",
-        include_data: bool = True,
+        include_data: bool = False,
+        after: str | None = None,
+        count: str = "exact",
     ):
+        """
+        Filtered pages_history rows, by page number or by keyset cursor
+        (`after` = the previous page's next_cursor); see
+        PageHistoryRepository.get_pages_history_filtered.
+
+        Raises:
+            ValueError: On a malformed cursor or an unknown count mode
+        """
         parsed_start = parse_iso_date(start_date) if start_date else None
         parsed_end = parse_iso_date(end_date) if end_date else None
 
@@ -49,8 +87,11 @@ class PageHistoryService:
             sort_by = "recorded_at"
         if sort_order.lower() not in ("asc", "desc"):
             sort_order = "desc"
+        if count not in PAGES_HISTORY_COUNT_MODES:
+            raise ValueError(f"count must be one of: {', '.join(PAGES_HISTORY_COUNT_MODES)}")
+        keyset = _decode_history_cursor(after, sort_by)
 
-        return PageHistoryRepository.get_pages_history_filtered(
+        result = PageHistoryRepository.get_pages_history_filtered(
             start_date=parsed_start,
             end_date=parsed_end,
             brand_id=brand_id,
@@ -63,7 +104,12 @@ class PageHistoryService:
             sort_by=sort_by,
             sort_order=sort_order,
             include_data=include_data,
+            after=keyset,
+            count=count,
         )
+        if result["next_cursor"] is not None:
+            result["next_cursor"] = _encode_history_cursor(*result["next_cursor"])
+        return result
 
     @staticmethod
     def get_history_by_id(history_id: int):
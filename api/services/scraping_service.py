@@ -1,7 +1,8 @@
 # Business workflows for scraping service.
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from api.repositories.comment_repository import CommentRepository
+from api.repositories.scrape_queue_repository import ScrapeQueueRepository
 from api.repositories.scraping_session_repository import ScrapingSessionRepository
 from api.repositories.post_repository import PostRepository
 from api.repositories.scraping_post_result_repository import ScrapingPostResultRepository
@@ -18,6 +19,20 @@ from api.utils.logging_utils import instrument_service_class
 # without this being updated to match.
 PROFILE_SUPPORTED_PLATFORMS = ("instagram",)
 
+# Work queue (see api/docs/scraping.md, "Scrape work queue"): batch and lease
+# defaults for POST /api/scraping/queue/lease, and how many posts the fill
+# streams from posts_mv per insert.
+DEFAULT_LEASE_BATCH_SIZE = 100
+MAX_LEASE_BATCH_SIZE = 1000
+DEFAULT_LEASE_SECONDS = 900
+QUEUE_FILL_CHUNK_SIZE = 1000
+
+# Today-status (see api/docs/scraping.md, "Get Today's Posts Status"): page
+# size cap for ?limit=, and how many rows the full and NDJSON modes read from
+# posts_mv per fetch.
+TODAY_STATUS_MAX_PAGE_SIZE = 5000
+TODAY_STATUS_CHUNK_SIZE = 1000
+
 
 @instrument_service_class
 class ScrapingService:
@@ -79,8 +94,12 @@ class ScrapingService:
         # Step 1: Get failed page IDs from yesterday 10pm until now
         failed_pages = PageHistoryRepository.get_failed_pages_for_today()
         
-        # Step 2: Extract page IDs
-        page_ids = [failed_page["page_id"] for failed_page in failed_pages]
+        # Step 2: Index by page ID (first failing snapshot wins, as the
+        # snapshots come back oldest first)
+        failed_by_page = {}
+        for failed_page in failed_pages:
+            failed_by_page.setdefault(failed_page["page_id"], failed_page)
+        page_ids = list(failed_by_page)
         
         # Step 3: Handle empty case
         if not page_ids:
@@ -109,10 +128,7 @@ class ScrapingService:
             profiles.append(profile)
             
             # Collect unique scraping issues
-            failed_page_info = next(
-                (fp for fp in failed_pages if fp["page_id"] == page.uuid),
-                None
-            )
+            failed_page_info = failed_by_page.get(page.uuid)
             if failed_page_info:
                 for key in failed_page_info["missing_keys"]:
                     scraping_issues.add(key)
@@ -153,10 +169,46 @@ class ScrapingService:
                 "total_available": int
             }
         """
-        from datetime import timedelta, timezone
+        candidates, to_scrape = ScrapingService._posts_to_scrape_queries(
+            platform, start_date, end_date, recorded_start_date, recorded_end_date
+        )
+
+        # Get total count before applying the scraped-today filter
+        total_available = candidates.count()
+        
+        # Fetch posts
+        posts = to_scrape.all()
+        posts_data = [post.to_scraping_dict() for post in posts]
+        
+        # Create scraping session
+        session = ScrapingSessionRepository.create(posts_fetched=len(posts_data))
+        
+        return {
+            "session_id": session.session_id,
+            "posts": posts_data,
+            "count": len(posts_data),
+            "total_available": total_available
+        }
+
+    @staticmethod
+    def _posts_to_scrape_queries(platform: str = None,
+                                 start_date: str = None,
+                                 end_date: str = None,
+                                 recorded_start_date: str = None,
+                                 recorded_end_date: str = None) -> tuple:
+        """
+        Build the post selection shared by `fetch_posts_for_scraping` and the
+        work queue.
+
+        Returns:
+            tuple: (candidates, to_scrape) — posts matching the filters, and
+            the same posts minus those already scraped today.
+        """
+        from datetime import timezone
+        from sqlalchemy import exists, and_
         from api.models.post_model import PostMV
         from api.models.comment_model import Comment
-        from api import db
+        from api.models.scraping_post_result_model import ScrapingPostResult
 
         today = datetime.utcnow().date()
 
@@ -187,22 +239,18 @@ class ScrapingService:
         if recorded_end_date:
             query = query.filter(PostMV.recorded_at <= parse_iso_utc(recorded_end_date))
         
-        # Get total count before applying the scraped-today filter
-        total_available = query.count()
-        
         # Filter out posts that already have comments inserted today
         # A post is considered "scraped today" if it has at least one comment
         # with recorded_at within today's date range, or a ScrapingPostResult row today.
         today_start = datetime.combine(today, datetime.min.time())
         today_end = datetime.combine(today + timedelta(days=1), datetime.min.time())
         
-        # Exclude posts that are already done for today.
-        from sqlalchemy import exists, and_, cast, String
-        from api.models.scraping_post_result_model import ScrapingPostResult
-
+        # Exclude posts that are already done for today. All three page_id
+        # columns are uuids, so the (page_id, platform, post_id) indexes on
+        # comments and scraping_post_results serve the anti-joins directly.
         comment_exists = exists().where(
             and_(
-                cast(Comment.page_id, String) == cast(PostMV.page_id, String),
+                Comment.page_id == PostMV.page_id,
                 Comment.platform == PostMV.platform,
                 Comment.post_id == PostMV.post_id,
                 Comment.recorded_at >= today_start,
@@ -212,7 +260,7 @@ class ScrapingService:
 
         result_exists = exists().where(
             and_(
-                cast(ScrapingPostResult.page_id, String) == cast(PostMV.page_id, String),
+                ScrapingPostResult.page_id == PostMV.page_id,
                 ScrapingPostResult.platform == PostMV.platform,
                 ScrapingPostResult.post_id == PostMV.post_id,
                 ScrapingPostResult.scraped_at >= today_start,
@@ -220,20 +268,94 @@ class ScrapingService:
             )
         )
 
-        query = query.filter(~comment_exists, ~result_exists)
-        
-        # Fetch posts
-        posts = query.all()
-        posts_data = [post.to_scraping_dict() for post in posts]
-        
-        # Create scraping session
-        session = ScrapingSessionRepository.create(posts_fetched=len(posts_data))
-        
+        return query, query.filter(~comment_exists, ~result_exists)
+
+    @staticmethod
+    def enqueue_posts_for_scraping(platform: str = None,
+                                   start_date: str = None,
+                                   end_date: str = None,
+                                   recorded_start_date: str = None,
+                                   recorded_end_date: str = None) -> dict:
+        """
+        Fill today's scrape queue with the posts `fetch_posts_for_scraping`
+        would return for the same filters. Posts are streamed from the
+        database in chunks rather than loaded at once, and posts already in
+        today's queue are skipped, so the call can be repeated (e.g. with
+        different platform filters) without duplicating work.
+
+        Returns:
+            dict: {
+                "queue_date": str,
+                "queued": int,          # newly added by this call
+                "queue": dict           # {"pending", "leased", "done"} counts
+            }
+        """
+        from api import db
+
+        queue_date = datetime.utcnow().date()
+        _, to_scrape = ScrapingService._posts_to_scrape_queries(
+            platform, start_date, end_date, recorded_start_date, recorded_end_date
+        )
+
+        queued = 0
+        chunk = []
+        for post in to_scrape.yield_per(QUEUE_FILL_CHUNK_SIZE):
+            chunk.append(post.to_scraping_dict())
+            if len(chunk) >= QUEUE_FILL_CHUNK_SIZE:
+                queued += ScrapeQueueRepository.enqueue(queue_date, chunk, commit=False)
+                chunk = []
+        queued += ScrapeQueueRepository.enqueue(queue_date, chunk, commit=False)
+        db.session.commit()
+
         return {
-            "session_id": session.session_id,
-            "posts": posts_data,
-            "count": len(posts_data),
-            "total_available": total_available
+            "queue_date": queue_date.isoformat(),
+            "queued": queued,
+            "queue": ScrapeQueueRepository.count_by_status(queue_date),
+        }
+
+    @staticmethod
+    def lease_posts_for_scraping(session_id: str = None,
+                                 platform: str = None,
+                                 batch_size: int = DEFAULT_LEASE_BATCH_SIZE,
+                                 lease_seconds: int = DEFAULT_LEASE_SECONDS) -> dict:
+        """
+        Lease the next batch of today's queued posts to one scraper worker.
+
+        Each call hands out posts no other live lease holds, so any number of
+        workers can pull from the queue at once. Posts not acknowledged
+        through `insert_comment_batch` within `lease_seconds` are handed out
+        again. Without a `session_id` a new session is created; a worker
+        should pass it back on its following calls.
+
+        Returns:
+            dict: {
+                "session_id": str,
+                "posts": list[dict],
+                "count": int,           # 0 once the queue is drained
+                "lease_expires_at": str
+            }
+        """
+        if session_id:
+            if not ScrapingSessionRepository.get_by_id(session_id):
+                raise ValueError("Session not found")
+        else:
+            session_id = ScrapingSessionRepository.create(posts_fetched=0, commit=False).session_id
+
+        posts, expires_at = ScrapeQueueRepository.lease(
+            datetime.utcnow().date(),
+            owner=session_id,
+            batch_size=batch_size,
+            lease_seconds=lease_seconds,
+            platform=platform,
+            commit=False,
+        )
+        ScrapingSessionRepository.increment_posts_fetched(session_id, len(posts), commit=True)
+
+        return {
+            "session_id": session_id,
+            "posts": posts,
+            "count": len(posts),
+            "lease_expires_at": iso_utc(expires_at),
         }
     
     @staticmethod
@@ -328,15 +450,26 @@ class ScrapingService:
                     post_comment_counts[key] = 0
 
         # Write / update a ScrapingPostResult row for every processed post
-        for (page_id, platform, post_id), count in post_comment_counts.items():
-            ScrapingPostResultRepository.record(
-                page_id=page_id,
-                platform=platform,
-                post_id=post_id,
-                comments_count=count,
-                scraping_session_id=session_id,
-                commit=False,
-            )
+        ScrapingPostResultRepository.record_many(
+            [
+                {
+                    "page_id": page_id,
+                    "platform": platform,
+                    "post_id": post_id,
+                    "comments_count": count,
+                }
+                for (page_id, platform, post_id), count in post_comment_counts.items()
+            ],
+            scraping_session_id=session_id,
+            commit=False,
+        )
+
+        # Close out any work-queue leases for these posts
+        ScrapeQueueRepository.acknowledge(
+            list(post_comment_counts),
+            since=datetime.utcnow().date() - timedelta(days=1),
+            commit=False,
+        )
 
         # Commit everything in one transaction
         from api.models.comment_model import db
@@ -542,15 +675,143 @@ class ScrapingService:
         return result
 
     @staticmethod
-    def get_today_scraping_status(platform: str = None, 
-                                  target_date: str = None, 
+    def _today_status_query(platform: str = None,
+                            target_date: str = None,
+                            start_date: str = None,
+                            recorded_start_date: str = None,
+                            recorded_end_date: str = None) -> tuple:
+        """
+        Build the post selection behind `get_today_scraping_status`: posts_mv
+        rows matching the filters, each with its scraped flag and the number
+        of comments recorded for it on the target date, both worked out by
+        the database (EXISTS / correlated COUNT on the (page_id, platform,
+        post_id) indexes) instead of loading every key and count in Python.
+
+        Returns:
+            tuple: (parsed_date, query, scraped) — query rows are (PostMV
+            columns..., scraped, scraped_comments_count), unordered; `scraped`
+            is the flag's expression, for filtering on it.
+        """
+        from datetime import date as date_type, timezone
+        from sqlalchemy import and_, exists, func, select
+        from api import db
+        from api.models.post_model import PostMV
+        from api.models.comment_model import Comment
+        from api.models.scraping_post_result_model import ScrapingPostResult
+
+        def parse_iso_utc(date_str: str) -> datetime:
+            dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+            if dt.tzinfo is not None:
+                dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+            return dt
+
+        # Parse date or default to today (UTC, to match stored timestamps)
+        if target_date:
+            parsed_date = date_type.fromisoformat(target_date)
+        else:
+            parsed_date = datetime.utcnow().date()
+
+        # Target date's range (when scraping happened)
+        target_date_start = datetime.combine(parsed_date, datetime.min.time())
+        target_date_end = datetime.combine(parsed_date + timedelta(days=1), datetime.min.time())
+
+        # A post is done when a ScrapingPostResult row exists for the target
+        # date, even if it got 0 comments (scraped, but had none).
+        scraped = exists().where(
+            and_(
+                ScrapingPostResult.page_id == PostMV.page_id,
+                ScrapingPostResult.platform == PostMV.platform,
+                ScrapingPostResult.post_id == PostMV.post_id,
+                ScrapingPostResult.scraped_at >= target_date_start,
+                ScrapingPostResult.scraped_at < target_date_end
+            )
+        )
+        comments_got = (
+            select(func.count(Comment.id))
+            .where(
+                Comment.page_id == PostMV.page_id,
+                Comment.platform == PostMV.platform,
+                Comment.post_id == PostMV.post_id,
+                Comment.recorded_at >= target_date_start,
+                Comment.recorded_at < target_date_end
+            )
+            .scalar_subquery()
+        )
+
+        query = db.session.query(
+            PostMV.page_id,
+            PostMV.platform,
+            PostMV.post_id,
+            PostMV.url,
+            PostMV.comments,
+            PostMV.recorded_at,
+            PostMV.created_at,
+            scraped.label("scraped"),
+            comments_got.label("scraped_comments_count"),
+        )
+        if platform:
+            query = query.filter(PostMV.platform == platform)
+
+        if start_date:
+            query = query.filter(PostMV.created_at >= parse_iso_utc(start_date))
+
+        if recorded_start_date:
+            query = query.filter(PostMV.recorded_at >= parse_iso_utc(recorded_start_date))
+
+        if recorded_end_date:
+            query = query.filter(PostMV.recorded_at <= parse_iso_utc(recorded_end_date))
+
+        return parsed_date, query, scraped
+
+    @staticmethod
+    def _today_status_post(row) -> dict:
+        return {
+            "page_id": row.page_id,
+            "platform": row.platform,
+            "post_id": row.post_id,
+            "url": row.url,
+            "expected_comments": row.comments,
+            "scraped_comments_count": row.scraped_comments_count or 0,
+            "recorded_at": row.recorded_at.isoformat() if row.recorded_at else None,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "status": "scraped" if row.scraped else "pending",
+        }
+
+    @staticmethod
+    def _today_status_counts(query) -> dict:
+        """Scraped / pending / total counts of a `_today_status_query`, in one aggregate."""
+        from sqlalchemy import case, func
+
+        sub = query.subquery()
+        total, scraped = query.session.query(
+            func.count(),
+            func.coalesce(func.sum(case((sub.c.scraped, 1), else_=0)), 0),
+        ).select_from(sub).one()
+        return {
+            "scraped_count": int(scraped),
+            "pending_count": int(total - scraped),
+            "total_count": int(total),
+        }
+
+    @staticmethod
+    def get_today_scraping_status(platform: str = None,
+                                  target_date: str = None,
                                   start_date: str = None,
                                   recorded_start_date: str = None,
-                                  recorded_end_date: str = None) -> dict:
+                                  recorded_end_date: str = None,
+                                  counts_only: bool = False,
+                                  status: str = None,
+                                  limit: int = None,
+                                  cursor: str = None) -> dict:
         """
         Get the scraping status of posts scheduled for a specific date.
         Categorizes posts into scraped (already scraped on target date)
         and pending (not yet scraped on target date).
+
+        The counts are computed in SQL. By default both post lists are
+        returned in full; `counts_only` drops them, and `limit` switches to
+        a single page of posts (each tagged with its `status`, optionally
+        only one `status`), keyset-paginated on (page_id, platform, post_id).
         
         Args:
             platform: Optional platform filter
@@ -558,6 +819,10 @@ class ScrapingService:
             start_date: Optional start date (ISO format) to filter post creation date.
             recorded_start_date: Optional recorded_at start date (ISO format).
             recorded_end_date: Optional recorded_at end date (ISO format).
+            counts_only: Return the counts without any posts.
+            status: With `limit`, only "scraped" or only "pending" posts.
+            limit: Page size (1..TODAY_STATUS_MAX_PAGE_SIZE) for paginated mode.
+            cursor: `next_cursor` of the previous page.
             
         Returns:
             dict: {
@@ -567,119 +832,109 @@ class ScrapingService:
                 "scraped_count": int,
                 "pending_count": int,
                 "total_count": int,
-                "scraped_posts": list[dict],
-                "pending_posts": list[dict]
+                "scraped_posts": list[dict],    # full mode only
+                "pending_posts": list[dict],    # full mode only
+                "posts": list[dict],            # paginated mode only
+                "next_cursor": str | None       # paginated mode only
             }
+
+        Raises:
+            ValueError: On an invalid date, status, limit or cursor.
         """
-        from datetime import date as date_type, timedelta, timezone
+        from uuid import UUID
+        from sqlalchemy import literal, tuple_
         from api.models.post_model import PostMV
-        from api.models.comment_model import Comment
-        from api import db
-        from sqlalchemy import func
 
-        def parse_iso_utc(date_str: str) -> datetime:
-            dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-            if dt.tzinfo is not None:
-                dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
-            return dt
-        
-        # Parse date or default to today (UTC, to match stored timestamps)
-        if target_date:
-            parsed_date = date_type.fromisoformat(target_date)
-        else:
-            parsed_date = datetime.utcnow().date()
-        
-        # Target date's range (when scraping happened)
-        target_date_start = datetime.combine(parsed_date, datetime.min.time())
-        target_date_end = datetime.combine(parsed_date + timedelta(days=1), datetime.min.time())
-        
-        # Query active posts
-        posts_query = PostMV.query
-        if platform:
-            posts_query = posts_query.filter_by(platform=platform)
+        if status not in (None, "scraped", "pending"):
+            raise ValueError("status must be 'scraped' or 'pending'")
+        if limit is not None and not 0 < limit <= TODAY_STATUS_MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be an integer between 1 and {TODAY_STATUS_MAX_PAGE_SIZE}")
 
-        if start_date:
-            posts_query = posts_query.filter(PostMV.created_at >= parse_iso_utc(start_date))
+        parsed_date, query, scraped = ScrapingService._today_status_query(
+            platform, target_date, start_date, recorded_start_date, recorded_end_date
+        )
+        result = {
+            "date": parsed_date.isoformat(),
+            "platform_filter": platform,
+            "start_date_filter": start_date,
+            **ScrapingService._today_status_counts(query),
+        }
+        if counts_only:
+            return result
+
+        if limit is None:
+            scraped_posts = []
+            pending_posts = []
+            for row in query.yield_per(TODAY_STATUS_CHUNK_SIZE):
+                post_info = ScrapingService._today_status_post(row)
+                del post_info["status"]
+                (scraped_posts if row.scraped else pending_posts).append(post_info)
+            result["scraped_posts"] = scraped_posts
+            result["pending_posts"] = pending_posts
+            return result
+
+        key = (PostMV.page_id, PostMV.platform, PostMV.post_id)
+        if cursor:
+            parts = cursor.split("|", 2)
+            if len(parts) != 3:
+                raise ValueError("Invalid cursor")
+            UUID(parts[0])
+            query = query.filter(
+                tuple_(*key) > tuple_(*(literal(v, type_=c.type) for c, v in zip(key, parts)))
+            )
+        if status:
+            query = query.filter(scraped if status == "scraped" else ~scraped)
+
+        # One extra row tells whether another page follows.
+        rows = query.order_by(*key).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = f"{last.page_id}|{last.platform}|{last.post_id}"
+        result["posts"] = [ScrapingService._today_status_post(row) for row in rows]
+        result["next_cursor"] = next_cursor
+        return result
 
-        if recorded_start_date:
-            posts_query = posts_query.filter(PostMV.recorded_at >= parse_iso_utc(recorded_start_date))
+    @staticmethod
+    def iter_today_scraping_status(platform: str = None,
+                                   target_date: str = None,
+                                   start_date: str = None,
+                                   recorded_start_date: str = None,
+                                   recorded_end_date: str = None):
+        """
+        Stream `get_today_scraping_status` as NDJSON lines: a header object
+        with the date, filters and counts, then one object per post (tagged
+        with its `status`), read from the database in chunks.
 
-        if recorded_end_date:
-            posts_query = posts_query.filter(PostMV.recorded_at <= parse_iso_utc(recorded_end_date))
+        The filters are parsed and the counts run before this returns, so
+        invalid input raises here rather than after the response has started.
 
-        posts = posts_query.all()
+        Returns:
+            Iterator[str]: one JSON document per line, newline-terminated
 
-        # Look up which posts already have a ScrapingPostResult row recorded
-        # on the target date — these are considered "done" regardless of whether
-        # they had 0 or more comments.
-        scraped_keys = ScrapingPostResultRepository.get_scraped_post_keys_in_range(
-            start_dt=target_date_start,
-            end_dt=target_date_end,
-            platform=platform,
-        )
+        Raises:
+            ValueError: On an invalid date or filter
+        """
+        import json
 
-        # Also fetch actual comment counts for posts that were scraped, so we
-        # can report accurate scraped_comments_count in the response.
-        comment_counts_query = db.session.query(
-            Comment.page_id,
-            Comment.platform,
-            Comment.post_id,
-            func.count(Comment.id).label('count')
-        ).filter(
-            Comment.recorded_at >= target_date_start,
-            Comment.recorded_at < target_date_end
+        parsed_date, query, _ = ScrapingService._today_status_query(
+            platform, target_date, start_date, recorded_start_date, recorded_end_date
         )
-        if platform:
-            comment_counts_query = comment_counts_query.filter(Comment.platform == platform)
-
-        comment_counts = comment_counts_query.group_by(
-            Comment.page_id,
-            Comment.platform,
-            Comment.post_id
-        ).all()
-
-        counts_lookup = {}
-        for page_id, platform_val, post_id, count in comment_counts:
-            counts_lookup[(str(page_id), platform_val, post_id)] = count
-
-        scraped_posts = []
-        pending_posts = []
-
-        for post in posts:
-            key = (str(post.page_id), post.platform, post.post_id)
-            comments_got = counts_lookup.get(key, 0)
-
-            post_info = {
-                "page_id": post.page_id,
-                "platform": post.platform,
-                "post_id": post.post_id,
-                "url": post.url,
-                # "caption": post.caption,
-                "expected_comments": post.comments,
-                "scraped_comments_count": comments_got,
-                "recorded_at": post.recorded_at.isoformat() if post.recorded_at else None,
-                "created_at": post.created_at.isoformat() if post.created_at else None
-            }
-
-            # A post is done when a ScrapingPostResult row exists for today,
-            # even if comments_got == 0 (post was scraped but had no comments).
-            # A post with no ScrapingPostResult row is still pending.
-            if key in scraped_keys:
-                scraped_posts.append(post_info)
-            else:
-                pending_posts.append(post_info)
-
-        return {
+        header = {
             "date": parsed_date.isoformat(),
             "platform_filter": platform,
             "start_date_filter": start_date,
-            "scraped_count": len(scraped_posts),
-            "pending_count": len(pending_posts),
-            "total_count": len(posts),
-            "scraped_posts": scraped_posts,
-            "pending_posts": pending_posts
+            **ScrapingService._today_status_counts(query),
         }
 
+        def _lines():
+            yield json.dumps(header) + "\n"
+            for row in query.yield_per(TODAY_STATUS_CHUNK_SIZE):
+                yield json.dumps(ScrapingService._today_status_post(row)) + "\n"
+
+        return _lines()
+
     # ── Profile-info flow ──────────────────────────────────────────────
     # Counterpart to fetch_posts_for_scraping/insert_comment_batch above,
     # for the own-scraper's *profile* pass (core/profile_api_flow.py on the
@@ -857,18 +1112,19 @@ class ScrapingService:
             processed_keys.add((str(page_id_raw), platform))
 
         if profile_results:
-            for pr in profile_results:
-                page_id = pr["page_id"]
-                platform = pr["platform"]
-                account_id = pr.get("account_id") or page_id
-                ScrapingProfileResultRepository.record(
-                    page_id=page_id,
-                    platform=platform,
-                    account_id=account_id,
-                    profile_inserted=(str(page_id), platform) in processed_keys,
-                    scraping_session_id=session_id,
-                    commit=False,
-                )
+            ScrapingProfileResultRepository.record_many(
+                [
+                    {
+                        "page_id": pr["page_id"],
+                        "platform": pr["platform"],
+                        "account_id": pr.get("account_id") or pr["page_id"],
+                        "profile_inserted": (str(pr["page_id"]), pr["platform"]) in processed_keys,
+                    }
+                    for pr in profile_results
+                ],
+                scraping_session_id=session_id,
+                commit=False,
+            )
 
         from api.models.comment_model import db
         db.session.commit()
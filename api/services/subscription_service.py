@@ -1,12 +1,19 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from api import db
 from api.models.subscription_model import Subscription
 from api.repositories.preapproved_mail_repository import PreapprovedMailRepository
 from api.repositories.subscription_repository import SubscriptionRepository
 from api.repositories.user_repository import UserRepository
+from api.utils.entitlement_cache import EntitlementCache
 from api.utils.logging_utils import instrument_service_class
 
+# Resolved (role, access_rights) per user, cached per process so require_auth
+# does not hit the subscriptions table on every request. An entry lives at most
+# this long, and never past the user's next starts_at/ends_at boundary.
+ENTITLEMENT_CACHE_TTL = timedelta(seconds=60)
+_ACCESS_CACHE = EntitlementCache()
+
 
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
@@ -127,7 +134,9 @@ class SubscriptionService:
         rows = (
             Subscription.query.filter(
                 Subscription.user_id == user_id,
-                Subscription.status == "active",
+                # A pending subscription counts from its starts_at on, before
+                # the expiry sweep has flipped it to active.
+                Subscription.status.in_(("active", "pending")),
                 Subscription.starts_at <= now,
                 db.or_(Subscription.ends_at.is_(None), Subscription.ends_at > now),
             )
@@ -153,8 +162,8 @@ class SubscriptionService:
         if not user:
             raise ValueError("User not found")
 
-        # Keep the subscriptions table clean by expiring old active rows first.
-        SubscriptionRepository.expire_due()
+        # Rows past their window are ignored here by their dates; flipping
+        # their status is left to the scheduled `expire_due_subscriptions`.
         active = SubscriptionService._select_effective_active_subscription(user.id)
 
         if user.role == "admin":
@@ -164,6 +173,7 @@ class SubscriptionService:
         desired_role = "subscribed" if (active and SubscriptionService._is_paid_pack(active_pack)) else "registered"
         if user.role != desired_role:
             user = UserRepository.update_profile(user.id, role=desired_role)
+            _ACCESS_CACHE.invalidate(user.id)
 
         return user, active
 
@@ -203,6 +213,7 @@ class SubscriptionService:
         )
 
         user, active = SubscriptionService._sync_user_role_from_subscriptions(user_id)
+        _ACCESS_CACHE.invalidate(user_id)
         return created, user, active
 
     @staticmethod
@@ -317,5 +328,62 @@ class SubscriptionService:
 
         # Sync the user's role based on remaining active subscriptions
         user, active = SubscriptionService._sync_user_role_from_subscriptions(sub.user_id)
+        _ACCESS_CACHE.invalidate(sub.user_id)
 
         return revoked, user, active
+
+    @staticmethod
+    def get_cached_access(user_id: int):
+        """Role and access rights of a user, as `get_effective_access` resolves
+        them, served from the per-process entitlement cache.
+
+        On a miss the access is resolved and cached until the sooner of
+        ENTITLEMENT_CACHE_TTL and the user's next subscription boundary.
+
+        Returns:
+            tuple: (role, access_rights); role is None if the user does not exist
+        """
+        cached = _ACCESS_CACHE.get(user_id)
+        if cached is not None:
+            return cached
+
+        now = _now_utc()
+        user, _, rights = SubscriptionService.get_effective_access(user_id)
+        value = (user.role if user else None, rights)
+
+        ttl = ENTITLEMENT_CACHE_TTL
+        boundary = SubscriptionRepository.get_next_boundary_for_user(user_id, now)
+        if boundary is not None:
+            if boundary.tzinfo is None:
+                boundary = boundary.replace(tzinfo=timezone.utc)
+            ttl = min(ttl, boundary - now)
+        _ACCESS_CACHE.set(user_id, value, ttl.total_seconds())
+        return value
+
+    @staticmethod
+    def invalidate_cached_access(user_id: int | None = None):
+        """Drop a user's cached access (everyone's when user_id is None) in this process."""
+        _ACCESS_CACHE.invalidate(user_id)
+
+    @staticmethod
+    def expire_due_subscriptions():
+        """Scheduled sweep (`flask expire-subscriptions`): expire subscriptions
+        past ends_at, activate pending ones whose starts_at has come, and
+        re-sync the roles of the users concerned.
+
+        Returns:
+            dict: {"expired": int, "activated": int, "users_synced": int}
+        """
+        now = _now_utc()
+        user_ids = SubscriptionRepository.get_user_ids_due(now)
+        expired = SubscriptionRepository.expire_due(now)
+        activated = SubscriptionRepository.activate_due(now)
+
+        for user_id in user_ids:
+            try:
+                SubscriptionService._sync_user_role_from_subscriptions(user_id)
+            except ValueError:
+                pass  # user deleted since
+            _ACCESS_CACHE.invalidate(user_id)
+
+        return {"expired": expired, "activated": activated, "users_synced": len(user_ids)}
@@ -67,6 +67,29 @@ def test_get_pages_history_success(client, monkeypatch):
     assert response_alias.status_code == 200
 
 
+def test_get_pages_history_keyset_params_and_bad_cursor(client, monkeypatch):
+    headers = _make_auth_header("registered")
+    captured = {}
+
+    def _fake(**kwargs):
+        captured.update(kwargs)
+        if kwargs["after"] == "bad":
+            raise ValueError("Malformed pages history cursor")
+        return {"items": [], "total": None, "next_cursor": None}
+
+    monkeypatch.setattr("api.routes.data.pages_history.PageHistoryService.get_filtered_history", _fake)
+
+    response = client.get("/api/data/pages_history?after=2026-03-04T00:00:00|7", headers=headers)
+    assert response.status_code == 200
+    assert captured["after"] == "2026-03-04T00:00:00|7"
+    assert captured["count"] == "none"
+    assert captured["include_data"] is False
+
+    response = client.get("/api/data/pages_history?after=bad", headers=headers)
+    assert response.status_code == 400
+    assert "Malformed" in response.get_json()["error"]
+
+
 def test_get_pages_history_by_id_success(client, monkeypatch):
     headers = _make_auth_header("registered")
     mock_item = {
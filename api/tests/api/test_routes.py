@@ -115,6 +115,23 @@ def test_public_ranking_formats_top_global(client, monkeypatch):
     assert "top_by_category" not in payload
 
 
+def test_public_ranking_revalidates_with_etag(client, monkeypatch):
+    ranking = [{"entity_id": 1, "type": "company", "rank": 1}]
+    monkeypatch.setattr(
+        "api.routes.public_routes.PageHistoryRepository.get_public_ranking",
+        lambda: ranking,
+    )
+
+    first = client.get("/api/public/ranking")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    second = client.get("/api/public/ranking", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.data == b""
+    assert second.headers["Cache-Control"].startswith("public")
+
+
 def test_public_ranking_empty_returns_404(client, monkeypatch):
     monkeypatch.setattr(
         "api.routes.public_routes.PageHistoryRepository.get_public_ranking", lambda: []
@@ -614,9 +631,10 @@ def test_data_get_entity_history_invalid_date_and_success(client, monkeypatch):
 def test_data_get_competitors_interaction_stats_parsing_and_404(client, monkeypatch):
     captured = {}
 
-    def _service(entity_ids, start_date=None):
+    def _service(entity_ids, start_date=None, top_n=None):
         captured["entity_ids"] = entity_ids
         captured["start_date"] = start_date
+        captured["top_n"] = top_n
         return []
 
     monkeypatch.setattr(
@@ -626,12 +644,19 @@ def test_data_get_competitors_interaction_stats_parsing_and_404(client, monkeypa
 
     response = client.post(
         "/api/data/get_competitors_interaction_stats",
-        json={"entity_ids": [1, 2], "start_date": "2026-01-01T00:00:00Z"},
+        json={"entity_ids": [1, 2], "start_date": "2026-01-01T00:00:00Z", "top_n": "5"},
     )
 
     assert response.status_code == 404
     assert captured["entity_ids"] == [1, 2]
     assert captured["start_date"] is not None
+    assert captured["top_n"] == 5
+
+    response = client.post(
+        "/api/data/get_competitors_interaction_stats",
+        json={"entity_ids": [1, 2], "top_n": 0},
+    )
+    assert response.status_code == 400
 
 
 def test_data_get_interactions_ranking_not_found_and_success(client, monkeypatch):
@@ -922,6 +947,35 @@ def test_data_get_posts_comments_ranking_not_found_and_success(client, monkeypat
     assert response.get_json()["data"][0]["total_comments"] == 65
 
 
+def test_data_get_posts_ranking_limit_and_cursor_clamped_to_role(client, monkeypatch):
+    captured = {}
+
+    def _service(**kwargs):
+        captured.update(kwargs)
+        return [{"post_id": "post_1", "rank": kwargs["cursor"] + 1}]
+
+    monkeypatch.setattr(
+        "api.routes.data.influence_history.InfluenceHistoryService.get_posts_likes_ranking",
+        _service,
+    )
+
+    # Anonymous callers are capped at the free top 10, cursor included.
+    response = client.get("/api/data/get_posts_likes_ranking?limit=50&cursor=4")
+    assert response.status_code == 200
+    assert captured["limit"] == 6
+    assert captured["cursor"] == 4
+    assert response.get_json()["data"][0]["rank"] == 5
+
+    response = client.get("/api/data/get_posts_likes_ranking")
+    assert captured["limit"] == 10
+    assert captured["cursor"] == 0
+
+    response = client.get("/api/data/get_posts_likes_ranking?cursor=abc")
+    assert response.status_code == 400
+    response = client.get("/api/data/get_posts_likes_ranking?limit=0")
+    assert response.status_code == 400
+
+
 def test_data_get_competitors_interaction_stats_invalid_payload_returns_400(client):
     response = client.post(
         "/api/data/get_competitors_interaction_stats",
@@ -1187,3 +1241,28 @@ def test_data_all_ranking_endpoints_accept_period_and_end_date(client, monkeypat
         assert response.status_code == 200
         assert captured["period"] == "prev_7d"
         assert captured["end_date"] == "2026-06-01"
+
+
+def test_data_get_entity_posts_timeline_paginated_mode(client, monkeypatch):
+    monkeypatch.setattr(
+        "api.utils.permissions.extract_and_validate_token",
+        lambda: ({"user_id": 1, "role": "registered"}, None),
+    )
+    captured = {}
+
+    def _page(entity_id, date_str=None, before=None, limit=None):
+        captured.update(entity_id=entity_id, before=before, limit=limit)
+        if before == "bad":
+            raise ValueError("bad cursor")
+        return {"posts": [{"post_id": "p1"}], "next_cursor": None}
+
+    monkeypatch.setattr(
+        "api.routes.data.entity.EntityService.get_entity_posts_timeline_page", _page
+    )
+    response = client.get("/api/data/get_entity_posts_timeline?entity_id=3&limit=20")
+    assert response.status_code == 200
+    assert captured == {"entity_id": 3, "before": None, "limit": "20"}
+    assert response.get_json()["data"]["posts"][0]["post_id"] == "p1"
+
+    response = client.get("/api/data/get_entity_posts_timeline?entity_id=3&before=bad")
+    assert response.status_code == 400
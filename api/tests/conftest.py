@@ -22,6 +22,7 @@ import api.models.data_correction_model
 import api.models.scrape_attempt_model
 import api.models.scraping_profile_result_model
 import api.models.scraping_post_result_model
+import api.models.ranking_snapshot_model
 
 
 @pytest.fixture(scope="session")
@@ -85,6 +86,15 @@ def db_session(db, app):
         connection.close()
 
 
+@pytest.fixture(autouse=True)
+def _clear_entitlement_cache():
+    """Tests write users and subscriptions straight to the DB; start each one uncached."""
+    from api.services.subscription_service import SubscriptionService
+
+    SubscriptionService.invalidate_cached_access()
+    yield
+
+
 @pytest.fixture()
 def client(app):
     """Flask test client for API tests."""
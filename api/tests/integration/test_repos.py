@@ -430,4 +430,689 @@ def test_page_history_repository_followers_progress_snapshot_query_executes_with
     assert "WITH latest AS" in str(stmt)
     assert "prev AS" in str(stmt)
     assert "LEFT JOIN prev" in str(stmt)
-    assert ":end_date IS NULL" in str(stmt)
\ No newline at end of file
+    assert ":end_date IS NULL" in str(stmt)
+
+def test_ranking_snapshot_repository_replace_and_read_round_trip():
+    from uuid import uuid4
+
+    from api.repositories.ranking_snapshot_repository import RankingSnapshotRepository
+
+    day = date(2026, 5, 1)
+    page_id = uuid4()
+    rows = [
+        {"entity_id": 1, "entity_name": "A", "total_score": 5.0, "total_likes": 1, "platforms": {"x": {"page_id": page_id}}},
+        {"entity_id": 2, "entity_name": "B", "total_score": 5.0, "total_likes": 9, "rank": 99},
+    ]
+    try:
+        assert RankingSnapshotRepository.replace_snapshot("interactions", "7d", "company", day, rows) == 2
+        # Replacing the same key swaps the rows rather than accumulating them.
+        assert RankingSnapshotRepository.replace_snapshot("interactions", "7d", "company", day, rows) == 2
+
+        by_score = RankingSnapshotRepository.get_snapshot("interactions", "7d", "company", day)
+        assert [r["entity_id"] for r in by_score] == [1, 2]  # tie keeps build order
+        assert by_score[0]["platforms"]["x"]["page_id"] == str(page_id)
+        assert "rank" not in by_score[1]
+
+        by_likes = RankingSnapshotRepository.get_snapshot("interactions", "7d", "company", day, order_by="total_likes")
+        assert [r["entity_id"] for r in by_likes] == [2, 1]
+
+        assert RankingSnapshotRepository.get_snapshot("interactions", "30d", "company", day) is None
+    finally:
+        RankingSnapshotRepository.delete_before(date(2100, 1, 1))
+
+
+def test_page_history_repository_posts_growth_ranking_query_executes_with_expected_params(monkeypatch):
+    calls = []
+
+    class _Result:
+        @staticmethod
+        def mappings():
+            return SimpleNamespace(all=lambda: ["ok"])
+
+    fake_session = SimpleNamespace(
+        execute=lambda stmt, params: calls.append((stmt, params)) or _Result(),
+    )
+    monkeypatch.setattr("api.repositories.page_history_repository.db", SimpleNamespace(session=fake_session))
+
+    with pytest.raises(ValueError):
+        PageHistoryRepository.get_posts_growth_ranking(date(2026, 3, 1), order_by="entity_id; DROP TABLE pages")
+    assert PageHistoryRepository.get_posts_growth_ranking(date(2026, 3, 1), score_weights={}) == []
+    assert calls == []
+
+    result = PageHistoryRepository.get_posts_growth_ranking(
+        date(2026, 3, 1),
+        end_date=date(2026, 3, 7),
+        entity_type="Company",
+        score_weights={"x": {"likes": 1, "shares": 2}},
+        order_by="gained_likes",
+        limit=20,
+        offset=40,
+    )
+
+    assert result == ["ok"]
+    stmt, params = calls[0]
+    assert params == {
+        "date_limit": date(2026, 3, 1),
+        "offset": 40,
+        "platform_0": "x",
+        "w_0_likes": 1.0,
+        "w_0_shares": 2.0,
+        "end_date": date(2026, 3, 7),
+        "entity_type": "company",
+        "limit": 20,
+    }
+    sql = str(stmt)
+    assert "FROM posts_history_mv h" in sql
+    assert "FIRST_VALUE(likes)" in sql
+    assert "ORDER BY gained_likes DESC" in sql
+    assert "LIMIT :limit" in sql
+    # followers are only looked up for the returned slice unless they are the sort key
+    assert sql.index("AS page_followers") > sql.index("r.*,")
+
+
+def test_comment_repository_bulk_create_skips_existing_and_in_batch_duplicates():
+    from api import db
+    from api.models.comment_model import Comment
+    from api.repositories.comment_repository import CommentRepository
+
+    page_id = "11111111-2222-3333-4444-555555555555"
+    rows = [
+        {
+            "page_id": page_id,
+            "platform": "instagram",
+            "post_id": "bulk-post",
+            "comment_id": f"c{i % 3}",
+            "text": f"comment {i}",
+            "comment_timestamp": datetime(2026, 1, 1, 12, i),
+        }
+        for i in range(5)
+    ]
+    rows[0]["likes_count"] = 7
+    try:
+        # c0..c2 are new; the repeats of c0/c1 later in the batch are skipped.
+        assert CommentRepository.bulk_create(rows, chunk_size=2) == (3, 2)
+        assert CommentRepository.bulk_create(rows) == (0, 5)
+        assert CommentRepository.bulk_create([]) == (0, 0)
+
+        stored = {c.comment_id: c for c in Comment.query.filter_by(post_id="bulk-post").all()}
+        assert sorted(stored) == ["c0", "c1", "c2"]
+        assert stored["c0"].likes_count == 7
+        assert stored["c1"].likes_count == 0
+        assert stored["c1"].recorded_at is not None
+    finally:
+        Comment.query.filter_by(post_id="bulk-post").delete()
+        db.session.commit()
+
+
+def test_comment_sentiment_daily_rebuild_joins_pages_on_native_uuid():
+    import uuid
+    from api import db
+    from api.models.comment_model import Comment
+    from api.models.entity_model import Entity
+    from api.models.page_model import Page
+    from api.repositories.comment_sentiment_daily_repository import CommentSentimentDailyRepository
+
+    entity = Entity(name="Sentiment Join Brand", type="company", to_scrape=True)
+    db.session.add(entity)
+    db.session.flush()
+    page = Page(uuid=uuid.uuid4(), name="sj", link="https://instagram.com/sentiment-join", platform="instagram", entity_id=entity.id)
+    db.session.add(page)
+    db.session.add_all([
+        Comment(
+            page_id=str(page.uuid), platform="instagram", post_id="sj-post", comment_id=f"sj{i}",
+            text="t", comment_timestamp=datetime(2026, 5, 1, 12, i), label=label, confidence=0.5,
+        )
+        for i, label in enumerate([4, 4, 0, None])
+    ])
+    db.session.commit()
+    try:
+        CommentSentimentDailyRepository.rebuild()
+        counts = CommentSentimentDailyRepository.get_counts_by_entity(entity.id)
+        assert [(label, count) for label, count, _ in counts] == [(0, 1), (4, 2)]
+        ranking = CommentSentimentDailyRepository.get_ranking(platform="instagram")
+        assert sorted((row[0], row[3], row[4]) for row in ranking if row[0] == entity.id) == [
+            (entity.id, 0, 1),
+            (entity.id, 4, 2),
+        ]
+    finally:
+        Comment.query.filter_by(post_id="sj-post").delete()
+        Page.query.filter_by(uuid=page.uuid).delete()
+        Entity.query.filter_by(id=entity.id).delete()
+        CommentSentimentDailyRepository.rebuild()
+
+
+def test_comment_label_writes_keep_sentiment_daily_in_step_with_rebuild():
+    import uuid
+    from api import db
+    from api.models.comment_model import Comment
+    from api.models.comment_sentiment_daily_model import CommentSentimentDaily
+    from api.models.entity_model import Entity
+    from api.models.page_model import Page
+    from api.repositories.comment_repository import CommentRepository
+    from api.repositories.comment_sentiment_daily_repository import CommentSentimentDailyRepository
+
+    def _snapshot():
+        return sorted(
+            (r.page_id, r.day, r.label, r.comment_count, round(r.confidence_sum, 6), r.confidence_count)
+            for r in CommentSentimentDaily.query.filter_by(entity_id=entity.id)
+            if r.comment_count
+        )
+
+    entity = Entity(name="Sentiment Rollup Brand", type="company", to_scrape=True)
+    db.session.add(entity)
+    db.session.flush()
+    page = Page(uuid=uuid.uuid4(), name="sr", link="https://instagram.com/sentiment-rollup", platform="instagram", entity_id=entity.id)
+    db.session.add(page)
+    comments = [
+        Comment(
+            page_id=str(page.uuid), platform="instagram", post_id="sr-post", comment_id=f"sr{i}",
+            text="t", comment_timestamp=datetime(2026, 5, 1 + i % 2, 9, i),
+        )
+        for i in range(4)
+    ]
+    db.session.add_all(comments)
+    db.session.commit()
+    ids = [c.id for c in comments]
+    try:
+        CommentSentimentDailyRepository.rebuild()
+        CommentRepository.bulk_update_labels([
+            {"comment_id": ids[0], "label": 4, "confidence": 0.9},
+            {"comment_id": ids[1], "label": 0, "confidence": 0.8},
+            {"comment_id": ids[2], "label": 4},
+            {"comment_id": ids[3], "label": 9},  # invalid: skipped
+        ])
+        # Relabel, including twice within one batch.
+        CommentRepository.bulk_update_labels([
+            {"comment_id": ids[0], "label": 2, "confidence": 0.6},
+            {"comment_id": ids[0], "label": 3, "confidence": 0.7},
+        ])
+        CommentRepository.update_label(ids[1], 1)
+
+        incremental = _snapshot()
+        counts = CommentSentimentDailyRepository.get_counts_by_entity(entity.id)
+        assert [(label, count) for label, count, _ in counts] == [(1, 1), (3, 1), (4, 1)]
+        assert dict((label, avg) for label, _, avg in counts)[1] == pytest.approx(0.8)
+        trend = CommentSentimentDailyRepository.get_trend_by_entity(
+            entity.id, start_date=date(2026, 5, 2), end_date=date(2026, 5, 2)
+        )
+        assert [(day, label, count) for day, label, count in trend] == [(date(2026, 5, 2), 1, 1)]
+
+        CommentSentimentDailyRepository.rebuild()
+        assert _snapshot() == incremental
+    finally:
+        Comment.query.filter_by(post_id="sr-post").delete()
+        Page.query.filter_by(uuid=page.uuid).delete()
+        Entity.query.filter_by(id=entity.id).delete()
+        CommentSentimentDailyRepository.rebuild()
+
+
+def _fake_metrics_session(monkeypatch, scalars, rowcounts):
+    calls = []
+    scalars, rowcounts = list(scalars), list(rowcounts)
+
+    def _execute(stmt, params=None):
+        sql = str(stmt)
+        calls.append((sql, params))
+        if sql.lstrip().startswith("INSERT"):
+            return SimpleNamespace(rowcount=rowcounts.pop(0))
+        return SimpleNamespace(scalar=lambda: scalars.pop(0) if scalars else None, rowcount=0)
+
+    fake_session = SimpleNamespace(
+        execute=_execute,
+        commit=lambda: calls.append(("COMMIT", None)),
+        rollback=lambda: calls.append(("ROLLBACK", None)),
+    )
+    monkeypatch.setattr(
+        "api.repositories.page_history_repository.db",
+        SimpleNamespace(session=fake_session, engine=SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))),
+    )
+    return calls
+
+
+def test_page_history_repository_refresh_metrics_incremental_folds_rows_past_watermark(monkeypatch):
+    # MAX(pages_history.id) -> 120
+    calls = _fake_metrics_session(monkeypatch, scalars=[120], rowcounts=[5, 40, 12])
+    monkeypatch.setattr("api.repositories.page_history_repository.MV_INCREMENTAL_LOOKBACK_IDS", 30)
+    monkeypatch.setattr(PageHistoryRepository, "metrics_views_are_tables", staticmethod(lambda: True))
+    upserts = []
+    monkeypatch.setattr(
+        "api.repositories.alert_detector_checkpoint_repository.AlertDetectorCheckpointRepository.get",
+        lambda name: SimpleNamespace(cursor_text="100"),
+    )
+    monkeypatch.setattr(
+        "api.repositories.alert_detector_checkpoint_repository.AlertDetectorCheckpointRepository.upsert",
+        lambda name, **kwargs: upserts.append((name, kwargs)),
+    )
+
+    stats = PageHistoryRepository.refresh_metrics_mv()
+
+    assert [(s["view"], s["mode"], s["rows"]) for s in stats] == [
+        ("page_posts_metrics_mv", "incremental", 5),
+        ("posts_history_mv", "incremental", 40),
+        ("posts_mv", "incremental", 12),
+    ]
+    inserts = [(sql, params) for sql, params in calls if sql.lstrip().startswith("INSERT")]
+    # The lookback below the watermark is re-folded too.
+    assert all(params == {"low": 70, "high": 120} for _, params in inserts)
+    assert "FROM page_posts_metrics_src" in inserts[0][0]
+    assert "FROM posts_history_src" in inserts[1][0]
+    assert "WHERE posts_mv.recorded_at <= EXCLUDED.recorded_at" in inserts[2][0]
+    assert not any(sql.lstrip().startswith("DELETE") for sql, _ in calls)
+    assert upserts[0][0] == "mv_incremental"
+    assert upserts[0][1]["cursor_text"] == "120"
+    assert upserts[0][1]["commit"] is False
+    assert calls[-1] == ("COMMIT", None)
+
+
+def test_page_history_repository_refresh_metrics_incremental_nothing_new_and_full_rebuild(monkeypatch):
+    upserts = []
+    monkeypatch.setattr(PageHistoryRepository, "metrics_views_are_tables", staticmethod(lambda: True))
+    monkeypatch.setattr(
+        "api.repositories.alert_detector_checkpoint_repository.AlertDetectorCheckpointRepository.get",
+        lambda name: SimpleNamespace(cursor_text="120"),
+    )
+    monkeypatch.setattr(
+        "api.repositories.alert_detector_checkpoint_repository.AlertDetectorCheckpointRepository.upsert",
+        lambda name, **kwargs: upserts.append(kwargs),
+    )
+
+    # Nothing past the watermark: only the lookback is re-read, and rows
+    # already folded insert nothing.
+    calls = _fake_metrics_session(monkeypatch, scalars=[120], rowcounts=[0, 0, 0])
+    stats = PageHistoryRepository.refresh_metrics_mv()
+    assert [s["rows"] for s in stats] == [0, 0, 0]
+    assert [p for sql, p in calls if sql.lstrip().startswith("INSERT")][0] == {"low": 0, "high": 120}
+    assert upserts[-1]["cursor_text"] == "120"
+
+    calls = _fake_metrics_session(monkeypatch, scalars=[120], rowcounts=[9, 9, 9])
+    stats = PageHistoryRepository.refresh_metrics_mv(full=True)
+    assert {s["mode"] for s in stats} == {"rebuild"}
+    deletes = [sql.strip() for sql, _ in calls if sql.lstrip().startswith("DELETE")]
+    assert deletes == ["DELETE FROM posts_mv", "DELETE FROM posts_history_mv", "DELETE FROM page_posts_metrics_mv"]
+    assert [p for sql, p in calls if sql.lstrip().startswith("INSERT")][0] == {"low": 0, "high": 120}
+
+
+def test_page_history_repository_refresh_metrics_mv_reports_each_view(monkeypatch):
+    # three reltuples estimates, one per view
+    calls = _fake_metrics_session(monkeypatch, scalars=[1000, -1, 300], rowcounts=[])
+    monkeypatch.setattr(PageHistoryRepository, "metrics_views_are_tables", staticmethod(lambda: False))
+
+    stats = PageHistoryRepository.refresh_metrics_mv()
+
+    assert [(s["view"], s["mode"], s["rows"]) for s in stats] == [
+        ("page_posts_metrics_mv", "refresh", 1000),
+        ("posts_history_mv", "refresh", None),
+        ("posts_mv", "refresh", 300),
+    ]
+    assert "REFRESH MATERIALIZED VIEW CONCURRENTLY page_posts_metrics_mv" in calls[0][0]
+
+
+def test_alert_event_repository_bulk_create_or_get_and_fanout_skip_existing():
+    from api import db
+    from api.models.alert_event_model import AlertEvent
+    from api.models.user_alert_model import UserAlert
+    from api.repositories.alert_event_repository import AlertEventRepository
+
+    def _event(key, text):
+        return {
+            "event_type": "keyword_mention",
+            "dedupe_key": key,
+            "severity": "warning",
+            "page_id": "bulk-events",
+            "matched_keyword": "promo",
+            "payload": {"text": text},
+            "event_at": datetime(2026, 3, 1, 9, 0),
+        }
+
+    try:
+        ids, created = AlertEventRepository.bulk_create_or_get(
+            [_event("bulk:a", "first"), _event("bulk:b", "b"), _event("bulk:a", "dup")], chunk_size=1
+        )
+        assert created == {"bulk:a", "bulk:b"}
+
+        again, created_again = AlertEventRepository.bulk_create_or_get(
+            [_event("bulk:b", "b"), _event("bulk:c", "c")]
+        )
+        assert created_again == {"bulk:c"}
+        assert again["bulk:b"] == ids["bulk:b"]
+        assert AlertEvent.query.filter_by(dedupe_key="bulk:a").one().payload == {"text": "first"}
+
+        triples = [(ids["bulk:a"], 1, 10), (ids["bulk:a"], 2, 20), (ids["bulk:a"], 1, 10)]
+        assert AlertEventRepository.bulk_fanout(triples) == 2
+        assert AlertEventRepository.bulk_fanout(triples + [(ids["bulk:b"], 1, 10)]) == 1
+        assert AlertEventRepository.fanout_to_users(ids["bulk:b"], {1: 10, 3: 30}) == 1
+        assert UserAlert.query.filter_by(user_id=1).count() == 2
+    finally:
+        event_ids = [e.id for e in AlertEvent.query.filter_by(page_id="bulk-events")]
+        UserAlert.query.filter(UserAlert.event_id.in_(event_ids)).delete()
+        AlertEvent.query.filter(AlertEvent.id.in_(event_ids)).delete()
+        db.session.commit()
+
+
+def test_page_history_repository_competitors_scored_posts_scores_and_keeps_top_n():
+    import uuid
+    from api import db
+    from api.models.entity_model import Entity
+    from api.models.page_model import Page
+    from api.models.post_model import PostMV
+
+    entities = [Entity(name=f"Competitor {i}", type="company", to_scrape=True) for i in range(2)]
+    db.session.add_all(entities)
+    db.session.flush()
+    pages = [
+        Page(uuid=uuid.uuid4(), name="c0", link="https://instagram.com/competitor-0", platform="instagram", entity_id=entities[0].id),
+        Page(uuid=uuid.uuid4(), name="c1", link="https://tiktok.com/@competitor-1", platform="tiktok", entity_id=entities[1].id),
+    ]
+    db.session.add_all(pages)
+    seen = datetime(2026, 3, 10, 8, 0)
+    posts = [
+        # (page, post_id, created_at, likes, comments, shares)
+        (pages[0], "ig-a", datetime(2026, 3, 1), 10, 5, None),   # 15
+        (pages[0], "ig-b", datetime(2026, 3, 2), 100, 1, None),  # 101
+        (pages[0], "ig-c", datetime(2026, 3, 3), 20, 20, None),  # 40
+        (pages[0], "ig-old", datetime(2026, 1, 1), 999, 0, None),  # before start_date
+        (pages[1], "tt-a", datetime(2026, 3, 4), 1000, 2, 3),   # comments + shares = 5
+    ]
+    db.session.add_all([
+        PostMV(page_id=str(page.uuid), platform=page.platform, post_id=post_id, created_at=created,
+               recorded_at=seen, likes=likes, comments=comments, shares=shares)
+        for page, post_id, created, likes, comments, shares in posts
+    ])
+    db.session.commit()
+    try:
+        rows = PageHistoryRepository.get_competitors_scored_posts(
+            [e.id for e in entities], date_limit=date(2026, 3, 10), start_date=datetime(2026, 2, 1), top_n=2,
+        )
+        assert [(r["entity_id"], r["post_id"], float(r["score"])) for r in rows] == [
+            (entities[0].id, "ig-b", 101.0),
+            (entities[0].id, "ig-c", 40.0),
+            (entities[1].id, "tt-a", 5.0),
+        ]
+        assert PageHistoryRepository.get_competitors_scored_posts(
+            [entities[0].id], date_limit=date(2026, 3, 11),
+        ) == []
+    finally:
+        PostMV.query.filter(PostMV.page_id.in_([str(p.uuid) for p in pages])).delete()
+        Page.query.filter(Page.uuid.in_([p.uuid for p in pages])).delete()
+        Entity.query.filter(Entity.id.in_([e.id for e in entities])).delete()
+        db.session.commit()
+
+
+def test_entity_posts_timeline_reads_each_page_through_lateral_on_postgres(monkeypatch):
+    from sqlalchemy.dialects import postgresql
+    from api.repositories.post_repository import PostRepository
+
+    statements = []
+
+    class _Result:
+        @staticmethod
+        def all():
+            return []
+
+    fake_db = SimpleNamespace(
+        engine=SimpleNamespace(dialect=SimpleNamespace(name="postgresql")),
+        session=SimpleNamespace(execute=lambda stmt: statements.append(stmt) or _Result()),
+    )
+    monkeypatch.setattr("api.repositories.post_repository.db", fake_db)
+
+    before = (datetime(2026, 3, 4), "00000000-0000-0000-0000-000000000001", "instagram", "p1")
+    assert PostRepository.get_entity_timeline_page(3, datetime(2026, 3, 1), before=before, limit=3) == []
+
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    lateral = sql[sql.index("JOIN LATERAL"):sql.index(") AS page_posts")]
+    # Keyset and limit apply per page, inside the LATERAL, so each page is
+    # one idx_pm_page_created range scan.
+    assert "posts_mv.page_id = entity_pages.uuid" in lateral
+    assert "posts_mv.created_at <= " in lateral and "LIMIT" in lateral
+    assert sql.count("LIMIT") == 2  # per page, then on the merged rows
+
+
+def test_entity_posts_timeline_pages_walk_posts_mv_by_keyset():
+    import uuid
+    from api import db
+    from api.models.entity_model import Entity
+    from api.models.page_model import Page
+    from api.models.post_model import PostMV
+    from api.services.entity_service import EntityService
+
+    entity = Entity(name="Timeline Brand", type="company", to_scrape=True)
+    db.session.add(entity)
+    db.session.flush()
+    pages = [
+        Page(uuid=uuid.uuid4(), name="tl-ig", link="https://instagram.com/timeline", platform="instagram", entity_id=entity.id),
+        Page(uuid=uuid.uuid4(), name="tl-tt", link="https://tiktok.com/@timeline", platform="tiktok", entity_id=entity.id),
+    ]
+    db.session.add_all(pages)
+    # Two posts share a timestamp, so the page boundary must fall inside a tie.
+    created = [datetime(2026, 3, 5), datetime(2026, 3, 4), datetime(2026, 3, 4), datetime(2026, 3, 2), datetime(2026, 2, 1)]
+    db.session.add_all([
+        PostMV(page_id=str(pages[i % 2].uuid), platform=pages[i % 2].platform, post_id=f"tl{i}",
+               created_at=ts, recorded_at=datetime(2026, 3, 6), likes=i, extra_data={"caption_raw": f"raw {i}"})
+        for i, ts in enumerate(created)
+    ])
+    db.session.commit()
+    try:
+        seen, cursor, pages_walked = [], None, 0
+        while True:
+            page = EntityService.get_entity_posts_timeline_page(entity.id, date_str="2026-03-01", before=cursor, limit=2)
+            seen.extend(page["posts"])
+            pages_walked += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert pages_walked == 2
+        assert [p["compare_date"][:10] for p in seen] == ["2026-03-05", "2026-03-04", "2026-03-04", "2026-03-02"]
+        assert len({p["post_id"] for p in seen}) == 4  # no post repeated or skipped at the tie
+        assert seen[0]["page_name"] == "tl-ig" and seen[0]["caption_raw"] == "raw 0"
+
+        with pytest.raises(ValueError):
+            EntityService.get_entity_posts_timeline_page(entity.id, before="not-a-cursor")
+    finally:
+        PostMV.query.filter(PostMV.page_id.in_([str(p.uuid) for p in pages])).delete()
+        Page.query.filter(Page.uuid.in_([p.uuid for p in pages])).delete()
+        Entity.query.filter_by(id=entity.id).delete()
+        db.session.commit()
+
+
+def test_pages_history_browser_walks_by_keyset_with_data_summaries():
+    import uuid
+    from api import db
+    from api.models import PageHistory
+    from api.models.entity_model import Entity
+    from api.models.page_model import Page
+    from api.services.page_history_service import PageHistoryService
+
+    entity = Entity(name="History Browser Brand", type="company", to_scrape=True)
+    db.session.add(entity)
+    db.session.flush()
+    page = Page(uuid=uuid.uuid4(), name="hb-ig", link="https://instagram.com/historybrowser",
+                platform="instagram", entity_id=entity.id)
+    db.session.add(page)
+    # Two snapshots share a timestamp, so a page boundary falls inside a tie.
+    stamps = [datetime(2026, 3, 5), datetime(2026, 3, 4), datetime(2026, 3, 4), datetime(2026, 3, 2), datetime(2026, 3, 1)]
+    rows = [PageHistory(page_id=page.uuid, recorded_at=ts, data={"followers": i, "posts": [1, 2]})
+            for i, ts in enumerate(stamps)]
+    db.session.add_all(rows)
+    db.session.commit()
+    try:
+        first = PageHistoryService.get_filtered_history(brand_id=entity.id, per_page=2)
+        assert first["total"] == 5 and first["has_next"] is True
+        assert "data" not in first["items"][0]
+        assert first["items"][0]["data_summary"]["keys"] == ["followers", "posts"]
+        assert first["items"][0]["data_summary"]["size_bytes"] > 0
+
+        seen, cursor = list(first["items"]), first["next_cursor"]
+        while cursor:
+            page_result = PageHistoryService.get_filtered_history(
+                brand_id=entity.id, per_page=2, after=cursor, count="none",
+            )
+            assert page_result["total"] is None
+            seen.extend(page_result["items"])
+            cursor = page_result["next_cursor"]
+        assert [item["id"] for item in seen] == [r.id for r in sorted(rows, key=lambda r: (r.recorded_at, r.id), reverse=True)]
+
+        # Offset pages agree with the keyset walk; the raw blob only on request.
+        second = PageHistoryService.get_filtered_history(brand_id=entity.id, per_page=2, page=2, include_data=True)
+        assert [item["id"] for item in second["items"]] == [item["id"] for item in seen[2:4]]
+        assert second["items"][0]["data"]["posts"] == [1, 2]
+
+        with pytest.raises(ValueError):
+            PageHistoryService.get_filtered_history(after="not-a-cursor")
+    finally:
+        PageHistory.query.filter(PageHistory.page_id == page.uuid).delete()
+        Page.query.filter_by(uuid=page.uuid).delete()
+        Entity.query.filter_by(id=entity.id).delete()
+        db.session.commit()
+
+
+def test_pages_history_stats_follow_create_and_match_rebuild():
+    import uuid
+    from api import db
+    from api.models import PageHistory, PageHistoryStats
+    from api.models.entity_model import Entity
+    from api.models.page_model import Page
+    from api.repositories.page_history_repository import PageHistoryRepository
+    from api.repositories.page_history_stats_repository import PageHistoryStatsRepository
+
+    entity = Entity(name="History Stats Brand", type="company", to_scrape=True)
+    db.session.add(entity)
+    db.session.flush()
+    pages = [
+        Page(uuid=uuid.uuid4(), name="hs-ig", link="https://instagram.com/historystats", platform="instagram", entity_id=entity.id),
+        Page(uuid=uuid.uuid4(), name="hs-x", link="https://x.com/historystats", platform="x", entity_id=entity.id),
+    ]
+    db.session.add_all(pages)
+    db.session.commit()
+    try:
+        PageHistoryRepository.create(pages[0].uuid, {"followers": 1})
+        PageHistoryRepository.create(pages[0].uuid, {"followers": 2})
+        PageHistoryRepository.create(pages[1].uuid, {"followers": 3})
+        # Written around create(), like the bulk loader. Today's rows are
+        # counted live; older days wait for a recount.
+        db.session.add(PageHistory(page_id=pages[1].uuid, recorded_at=datetime(2020, 1, 1), data={}))
+        db.session.add(PageHistory(page_id=pages[1].uuid, data={}))
+        db.session.commit()
+
+        summary = PageHistoryRepository.get_pages_history_summary()
+        assert summary["total_records"] == 4 and summary["records_today"] == 4
+        assert summary["by_platform"] == {"instagram": 2, "x": 2}
+        assert summary["active_pages_monitored"] == 2
+        assert PageHistoryStats.query.filter_by(page_id=pages[0].uuid).one().snapshot_count == 2
+
+        # The recount overwrites rows create() already wrote.
+        PageHistoryStatsRepository.rebuild()
+        assert PageHistoryStats.query.filter_by(page_id=pages[1].uuid).count() == 2
+        summary = PageHistoryRepository.get_pages_history_summary()
+        assert summary["total_records"] == 5 and summary["records_last_30_days"] == 4
+        options = PageHistoryRepository.get_pages_history_options()
+        assert options["platforms"] == ["instagram", "x"]
+        assert options["brands"] == [{"id": entity.id, "name": "History Stats Brand"}]
+        assert options["total_records"] == 5
+        assert options["date_range"]["min_date"].startswith("2020-01-01")
+    finally:
+        PageHistory.query.filter(PageHistory.page_id.in_([p.uuid for p in pages])).delete()
+        PageHistoryStats.query.delete()
+        Page.query.filter(Page.uuid.in_([p.uuid for p in pages])).delete()
+        Entity.query.filter_by(id=entity.id).delete()
+        db.session.commit()
+
+
+def test_entitlement_cache_hits_invalidation_and_expiry_sweep(monkeypatch):
+    from api import db
+    from api.models.subscription_model import Subscription
+    from api.models.user_model import User
+    from api.repositories.subscription_repository import SubscriptionRepository
+    from api.services.subscription_service import SubscriptionService
+
+    user = User(first_name="Cache", last_name="Test", email="entitlement-cache@example.com", role="registered")
+    user.set_password("password123")
+    db.session.add(user)
+    db.session.commit()
+    try:
+        role, rights = SubscriptionService.get_cached_access(user.id)
+        assert role == "registered" and rights["ranking_limit"] == 10
+
+        # A hit does not resolve again.
+        def _no_db(_user_id):
+            raise AssertionError("cache miss")
+
+        with monkeypatch.context() as m:
+            m.setattr(SubscriptionService, "get_effective_access", staticmethod(_no_db))
+            assert SubscriptionService.get_cached_access(user.id)[0] == "registered"
+
+        ends = datetime.now(timezone.utc) + _timedelta(hours=1)
+        SubscriptionService.grant_subscription(
+            user_id=user.id, pack_code="advanced", starts_at=None, ends_at=ends,
+        )
+        assert SubscriptionService.get_cached_access(user.id)[0] == "subscribed"
+        boundary = SubscriptionRepository.get_next_boundary_for_user(user.id)
+        assert abs(boundary.replace(tzinfo=timezone.utc) - ends) < _timedelta(seconds=1)
+
+        # Past its window the subscription stops counting; the sweep flips its
+        # status and the user's role.
+        Subscription.query.filter_by(user_id=user.id).update(
+            {"ends_at": datetime.now(timezone.utc) - _timedelta(minutes=1)}
+        )
+        db.session.commit()
+        SubscriptionService.invalidate_cached_access(user.id)
+        result = SubscriptionService.expire_due_subscriptions()
+        assert result["expired"] == 1 and result["users_synced"] == 1
+        assert Subscription.query.filter_by(user_id=user.id).one().status == "expired"
+        assert SubscriptionService.get_cached_access(user.id)[0] == "registered"
+    finally:
+        Subscription.query.filter_by(user_id=user.id).delete()
+        User.query.filter_by(id=user.id).delete()
+        db.session.commit()
+
+
+def test_ai_insight_generation_is_single_flight_and_pregenerated():
+    from api import db
+    from api.models.ai_insight_cache import AiInsightCache
+    from api.repositories import ai_insight_repository
+    from api.services import ai_insight_service
+
+    calls = []
+
+    def _llm(system_prompt, data_block):
+        calls.append(data_block)
+        return f"## Summary\nGenerated insight number {len(calls)} for the requested view."
+
+    ai_insight_service.set_llm(_llm)
+    filters = {"period": "7d"}
+    rows = [{"rank": 1, "brand": "Acme", "total": 10, "ig": 4, "li": 3, "tt": 2, "x": 1}]
+    key = ai_insight_service.build_cache_key("top_brands", filters)
+    try:
+        first = ai_insight_service.get_or_generate_insight("top_brands", filters, {"rows": rows})
+        assert first["cached"] is False and len(calls) == 1
+        second = ai_insight_service.get_or_generate_insight("top_brands", filters, {"rows": rows})
+        assert second == {"summary": first["summary"], "cached": True}
+
+        # Expired while another worker holds the lease: serve the old summary
+        # instead of calling the LLM again.
+        AiInsightCache.query.filter_by(cache_key=key).update({"expires_at": datetime(2000, 1, 1)})
+        db.session.commit()
+        now = datetime.utcnow()
+        assert ai_insight_repository.try_claim(key, "top_brands", now + _timedelta(minutes=1), now)
+        assert not ai_insight_repository.try_claim(key, "top_brands", now + _timedelta(minutes=1), now)
+        stale = ai_insight_service.get_or_generate_insight("top_brands", filters, {"rows": rows})
+        assert stale == {"summary": first["summary"], "cached": True, "stale": True}
+
+        # Never generated and locked elsewhere: nothing to serve yet.
+        other = ai_insight_service.build_cache_key("top_brands", {"period": "30d"})
+        assert ai_insight_repository.try_claim(other, "top_brands", now + _timedelta(minutes=1), now)
+        pending = ai_insight_service.get_or_generate_insight("top_brands", {"period": "30d"}, {"rows": rows})
+        assert pending["error"] == "generation_in_progress" and len(calls) == 1
+        assert pending["retry_after"] == ai_insight_service.GENERATION_RETRY_AFTER_SECONDS
+
+        # The warm job skips leased keys and generates the rest concurrently.
+        ai_insight_repository.release_claim(key)
+        jobs = [("top_brands", {"period": p}, {"rows": rows}) for p in ("7d", "30d", "90d", "1y")]
+        stats = ai_insight_service.pregenerate_standard_insights(jobs=jobs, workers=2)
+        assert stats == {"jobs": 4, "generated": 3, "skipped": 1, "failed": 0}
+        assert len(calls) == 4
+        warmed = ai_insight_service.get_or_generate_insight("top_brands", {"period": "90d"}, {"rows": rows})
+        assert warmed["cached"] is True and len(calls) == 4
+    finally:
+        ai_insight_service.set_llm(None)
+        AiInsightCache.query.delete()
+        db.session.commit()
@@ -404,6 +404,77 @@ class TestFetchPosts:
             assert session.status == "pending"
 
 
+class TestScrapeQueue:
+    """Tests for POST /api/scraping/queue and /api/scraping/queue/lease."""
+
+    @pytest.fixture(autouse=True)
+    def _clean_queue(self, app):
+        yield
+        from api.models.scrape_queue_model import ScrapeQueueItem
+        with app.app_context():
+            ScrapeQueueItem.query.delete()
+            ScrapingPostResult.query.delete()
+            db.session.commit()
+
+    def test_queue_requires_auth(self, client):
+        assert client.post("/api/scraping/queue").status_code == 401
+        assert client.post("/api/scraping/queue/lease", json={}).status_code == 401
+
+    def test_workers_lease_disjoint_batches_and_ack_through_comments(self, client, auth_headers, sample_posts, app):
+        from api.models.scrape_queue_model import ScrapeQueueItem
+
+        filled = client.post("/api/scraping/queue", headers=auth_headers).get_json()["data"]
+        assert filled["queued"] == 3
+        assert filled["queue"] == {"pending": 3, "leased": 0, "done": 0}
+        # Refilling is a no-op.
+        again = client.post("/api/scraping/queue", headers=auth_headers).get_json()["data"]
+        assert again["queued"] == 0
+
+        first = client.post("/api/scraping/queue/lease", headers=auth_headers, json={"batch_size": 2}).get_json()["data"]
+        second = client.post("/api/scraping/queue/lease", headers=auth_headers, json={"batch_size": 2}).get_json()["data"]
+        assert first["count"] == 2 and second["count"] == 1
+        assert first["session_id"] != second["session_id"]
+        leased = [p["post_id"] for p in first["posts"] + second["posts"]]
+        assert sorted(leased) == sorted(p.post_id for p in sample_posts)
+        drained = client.post(
+            "/api/scraping/queue/lease", headers=auth_headers, json={"session_id": first["session_id"]}
+        ).get_json()["data"]
+        assert drained["count"] == 0
+
+        # Posting the worker's results acknowledges its posts.
+        done_post = second["posts"][0]
+        response = client.post(
+            "/api/scraping/comments",
+            headers=auth_headers,
+            json={
+                "session_id": second["session_id"],
+                "comments": [],
+                "post_results": [{k: done_post[k] for k in ("page_id", "platform", "post_id")}],
+            },
+        )
+        assert response.status_code == 200
+
+        # The first worker died: once its lease expires the posts go back out.
+        with app.app_context():
+            ScrapeQueueItem.query.filter_by(lease_owner=first["session_id"]).update(
+                {"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}
+            )
+            db.session.commit()
+        retried = client.post("/api/scraping/queue/lease", headers=auth_headers, json={}).get_json()["data"]
+        assert sorted(p["post_id"] for p in retried["posts"]) == sorted(p["post_id"] for p in first["posts"])
+
+        with app.app_context():
+            items = {item.post_id: item for item in ScrapeQueueItem.query.all()}
+            assert items[done_post["post_id"]].status == "done"
+            assert all(items[p["post_id"]].attempts == 2 for p in first["posts"])
+            session = ScrapingSession.query.filter_by(session_id=first["session_id"]).first()
+            assert session.posts_fetched == 2
+
+    def test_lease_rejects_bad_batch_size(self, client, auth_headers):
+        response = client.post("/api/scraping/queue/lease", headers=auth_headers, json={"batch_size": 0})
+        assert response.status_code == 400
+
+
 class TestInsertComments:
     """Tests for POST /api/scraping/comments endpoint."""
     
@@ -571,6 +642,43 @@ class TestInsertComments:
             session = ScrapingSession.query.filter_by(session_id=session_id).first()
             assert session.comments_inserted == 1
 
+    def test_insert_comments_records_post_results_once_per_session(self, client, auth_headers, sample_posts, app):
+        """Re-sending a batch in the same session updates its post results in place."""
+        with app.app_context():
+            from api.repositories.scraping_session_repository import ScrapingSessionRepository
+            session_id = ScrapingSessionRepository.create(posts_fetched=2).session_id
+
+        page_id = "123e4567-e89b-12d3-a456-426614174000"
+        payload = {
+            "session_id": session_id,
+            "comments": [
+                {
+                    "page_id": page_id,
+                    "platform": "instagram",
+                    "post_id": "C12345678",
+                    "id": f"post_result_{i}",
+                    "text": "Test comment",
+                    "username": "user1",
+                    "timestamp": 1783787046,
+                }
+                for i in range(2)
+            ],
+            "post_results": [
+                {"page_id": page_id, "platform": "instagram", "post_id": "C_no_comments"}
+            ],
+        }
+
+        for _ in range(2):
+            response = client.post("/api/scraping/comments", json=payload, headers=auth_headers)
+            assert response.status_code == 200
+
+        with app.app_context():
+            rows = ScrapingPostResult.query.filter_by(scraping_session_id=session_id).all()
+            counts = {r.post_id: r.comments_count for r in rows}
+            assert counts == {"C12345678": 2, "C_no_comments": 0}
+            ScrapingPostResult.query.filter_by(scraping_session_id=session_id).delete()
+            db.session.commit()
+
 
 class TestGetSessionDetails:
     """Tests for GET /api/scraping/sessions/{session_id} endpoint."""
@@ -1056,6 +1164,68 @@ class TestGetTodayPostsStatus:
                 db.session.commit()
 
 
+    def test_get_today_status_counts_only_pages_and_ndjson(self, client, admin_jwt_headers, app):
+        """Counts-only, keyset pages and the NDJSON stream agree with each other."""
+        import json
+
+        page_id = "999e4567-e89b-12d3-a456-426614174999"
+        platform = "linkedin"
+        post_ids = ["LI_STATUS_A", "LI_STATUS_B", "LI_STATUS_C"]
+
+        with app.app_context():
+            for post_id in post_ids:
+                db.session.add(PostMV(
+                    page_id=page_id, platform=platform, post_id=post_id,
+                    url=f"https://linkedin.com/{post_id}", comments=5,
+                    created_at=datetime.utcnow() - timedelta(days=2),
+                    recorded_at=datetime.utcnow() - timedelta(days=1),
+                ))
+            db.session.add(ScrapingPostResult(
+                page_id=page_id, platform=platform, post_id="LI_STATUS_B",
+                comments_count=0, scraped_at=datetime.utcnow(),
+            ))
+            db.session.commit()
+
+        url = "/api/scraping/posts/today-status?platform=linkedin"
+        try:
+            data = client.get(url + "&counts_only=true", headers=admin_jwt_headers).get_json()["data"]
+            assert (data["scraped_count"], data["pending_count"], data["total_count"]) == (1, 2, 3)
+            assert "scraped_posts" not in data and "pending_posts" not in data
+
+            seen, cursor = [], None
+            while True:
+                query = url + "&limit=2" + (f"&cursor={cursor}" if cursor else "")
+                data = client.get(query, headers=admin_jwt_headers).get_json()["data"]
+                seen += [(p["post_id"], p["status"]) for p in data["posts"]]
+                cursor = data["next_cursor"]
+                if not cursor:
+                    break
+            assert seen == [
+                ("LI_STATUS_A", "pending"), ("LI_STATUS_B", "scraped"), ("LI_STATUS_C", "pending"),
+            ]
+
+            data = client.get(url + "&limit=10&status=pending", headers=admin_jwt_headers).get_json()["data"]
+            assert [p["post_id"] for p in data["posts"]] == ["LI_STATUS_A", "LI_STATUS_C"]
+
+            response = client.get(url + "&format=ndjson", headers=admin_jwt_headers)
+            assert response.mimetype == "application/x-ndjson"
+            lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+            assert lines[0]["total_count"] == 3
+            assert sorted(line["post_id"] for line in lines[1:]) == post_ids
+
+            assert client.get(url + "&limit=0", headers=admin_jwt_headers).status_code == 400
+            assert client.get(url + "&limit=2&cursor=bad", headers=admin_jwt_headers).status_code == 400
+            # Bad filters are rejected before the stream starts.
+            response = client.get(url + "&format=ndjson&recorded_start_date=garbage", headers=admin_jwt_headers)
+            assert response.status_code == 400
+            assert response.get_json()["success"] is False
+        finally:
+            with app.app_context():
+                ScrapingPostResult.query.filter_by(post_id="LI_STATUS_B").delete()
+                PostMV.query.filter(PostMV.post_id.in_(post_ids)).delete()
+                db.session.commit()
+
+
 class TestProfileFlow:
     """Integration tests for GET /api/scraping/own_scraper/profiles and
     POST /api/scraping/profile-info — the profile-info counterpart to
@@ -143,3 +143,45 @@ def test_insert_profile_batch_records_unscrapeable_accounts_without_inserting(db
     )
     assert stored is not None
     assert stored.profile_inserted is False
+
+
+def test_profile_result_record_many_updates_in_place_with_and_without_session(db_session):
+    from api.models.scraping_profile_result_model import ScrapingProfileResult
+    from api.repositories.scraping_profile_result_repository import ScrapingProfileResultRepository
+    from api.repositories.scraping_session_repository import ScrapingSessionRepository
+
+    page_a, page_b = _make_page(db_session), _make_page(db_session)
+    session_id = ScrapingSessionRepository.create(posts_fetched=0, commit=False).session_id
+    db_session.flush()
+
+    def _batch(inserted):
+        return [
+            {"page_id": str(p.uuid), "platform": "instagram", "account_id": str(p.uuid), "profile_inserted": inserted}
+            for p in (page_a, page_b)
+        ]
+
+    for sid in (None, session_id):
+        assert ScrapingProfileResultRepository.record_many(_batch(False), scraping_session_id=sid, commit=False) == 2
+        assert ScrapingProfileResultRepository.record_many(_batch(True), scraping_session_id=sid, commit=False) == 2
+        db_session.expire_all()
+
+        rows = ScrapingProfileResult.query.filter(
+            ScrapingProfileResult.page_id.in_([str(page_a.uuid), str(page_b.uuid)]),
+            ScrapingProfileResult.scraping_session_id.is_(sid) if sid is None
+            else ScrapingProfileResult.scraping_session_id == sid,
+        ).all()
+        assert len(rows) == 2
+        assert all(r.profile_inserted for r in rows)
+
+    # Session-less rows are matched on the canonical page id, however it is spelled.
+    shouted = [dict(item, page_id=item["page_id"].upper(), profile_inserted=False) for item in _batch(True)]
+    assert ScrapingProfileResultRepository.record_many(shouted, commit=False) == 2
+    db_session.expire_all()
+    rows = ScrapingProfileResult.query.filter(
+        ScrapingProfileResult.page_id.in_([str(page_a.uuid), str(page_b.uuid)]),
+        ScrapingProfileResult.scraping_session_id.is_(None),
+    ).all()
+    assert len(rows) == 2
+    assert not any(r.profile_inserted for r in rows)
+
+    assert ScrapingProfileResultRepository.record_many([], commit=False) == 0
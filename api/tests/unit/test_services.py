@@ -1,14 +1,17 @@
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from types import SimpleNamespace
 import uuid
 
 import pytest
 
+from api.services.alert_keyword_matcher import KeywordMatcher
+from api.services.alert_service import AlertService, normalize_keyword
 from api.services.auth_service import AuthService
 from api.services.entity_service import EntityService
 from api.services.influence_history_service import InfluenceHistoryService
 from api.services.page_service import PageService
 from api.services.post_service import PostService
+from api.services.scraping_service import ScrapingService
 from api.utils.data_keys import platform_metrics
 
 
@@ -833,46 +836,53 @@ def test_entity_timeline_skips_unsupported_platform_and_bad_youtube_relative_tim
 
 
 def test_entity_top_posts_computes_gains_ranks_and_counters(monkeypatch):
+    def _row(post_id, platform, **metrics):
+        values = {
+            column: metrics.get(column)
+            for name in ("likes", "comments", "shares", "views")
+            for column in (name, f"prev_{name}")
+        }
+        return SimpleNamespace(
+            page_id="pg1", platform=platform, post_id=post_id, day=date(2026, 1, 20),
+            created_at=datetime(2026, 1, 18), url=None, caption=None, content_type=None,
+            image_url=None, video_url=None, **values,
+        )
+
     rows = [
-        SimpleNamespace(
-            platform="instagram",
-            recorded_at=datetime(2026, 1, 19, tzinfo=timezone.utc),
-            posts_metrics=[[{"id": "a", "datetime": "2026-01-19T00:00:00Z", "comments": 2, "likes": 5}]],
-        ),
-        SimpleNamespace(
-            platform="instagram",
-            recorded_at=datetime(2026, 1, 20, tzinfo=timezone.utc),
-            posts_metrics=[[{"id": "a", "datetime": "2026-01-20T00:00:00Z", "comments": 6, "likes": 9}, {"oops": 1}]],
-        ),
+        _row("a", "instagram", comments=6, likes=9, prev_comments=2, prev_likes=5),  # 8
+        _row("b", "tiktok", comments=10, shares=5, likes=999),                      # 15 (likes unscored)
+        _row("c", "instagram", comments=1, likes=1, prev_comments=1, prev_likes=1),  # 0
+        _row("d", "x", shares=2, likes=6, prev_shares=0, prev_likes=0),             # 8, after "a"
     ]
-    monkeypatch.setattr("api.services.entity_service.EntityRepository.get_entity_posts_metrics", lambda entity_id, date_limit: rows)
+    captured = {}
+    monkeypatch.setattr(
+        "api.services.entity_service.EntityRepository.get_entity_post_day_gains",
+        lambda entity_id, target_date, date_limit: captured.update(
+            {"target_date": target_date, "date_limit": date_limit}
+        ) or iter(rows),
+    )
 
-    day_gains, posts_num, skipped = EntityService.get_entity_top_posts(1, date_value="2026-01-20", top_posts=5)
+    day_gains, posts_num, skipped = EntityService.get_entity_top_posts(1, date_value="2026-01-20", top_posts=3)
+    assert captured == {"target_date": date(2026, 1, 20), "date_limit": date(2026, 1, 10)}
     assert day_gains["day"] == "2026-01-20"
-    assert day_gains["posts"][0]["gained_comments"] == 4
-    assert day_gains["posts"][0]["rank"] == 1
-    assert posts_num == 3
-    assert skipped == 1
+    assert [(p["post_id"], p["total_score"], p["rank"]) for p in day_gains["posts"]] == [
+        ("b", 15, 1), ("a", 8, 2), ("d", 8, 3),
+    ]
+    assert day_gains["posts"][1]["gained_comments"] == 4
+    assert day_gains["posts"][0]["gained_share_count"] == 5
+    assert day_gains["posts"][2]["reposts"] == 2
+    assert posts_num == 4
+    assert skipped == 0
+
+    monkeypatch.setattr(
+        "api.services.entity_service.EntityRepository.get_entity_post_day_gains",
+        lambda entity_id, target_date, date_limit: iter([]),
+    )
+    assert EntityService.get_entity_top_posts(1, date_value="2026-01-20") == (None, 0, 0)
 
 
 def test_influence_service_ranking_and_interaction_summary(monkeypatch):
-    ranking_rows = [
-        SimpleNamespace(
-            entity_id=1,
-            entity_name="Entity A",
-            category="cat",
-            root_category=None,
-            platform="instagram",
-            recorded_at=datetime(2026, 1, 20, 10, tzinfo=timezone.utc),
-            page_id="pg1",
-            page_name="Page A",
-            page_url="https://example.com",
-            profile_url="https://img",
-            posts_metrics=[{"comments": 10, "likes": 20}],
-        )
-    ]
     followers_rows = [SimpleNamespace(page_id="pg1", current_followers=500, prev_followers=450)]
-    monkeypatch.setattr("api.services.influence_history_service.PageHistoryRepository.get_all_entities_posts", lambda date_limit: ranking_rows)
     monkeypatch.setattr("api.services.influence_history_service.PageHistoryRepository.get_entities_followers_snapshot", lambda date_limit: followers_rows)
 
     mock_ranking = [
@@ -936,86 +946,77 @@ def test_influence_service_delegates_and_competitors_stats(monkeypatch):
     }
     assert InfluenceHistoryService.get_entities_ranking() == ["ranked"]
 
-    class _Row:
-        def __init__(self, page_id, platform, entity_id, posts_metrics):
-            self.page_id = page_id
-            self.platform = platform
-            self.entity_id = entity_id
-            self.posts_metrics = posts_metrics
-
     rows = [
-        _Row(
-            "pg1",
-            "instagram",
-            10,
-            [[{"id": "p1", "datetime": "2026-01-20T00:00:00Z", "comments": 6, "likes": 4}]],
-        )
+        {
+            "entity_id": 10,
+            "page_id": "pg1",
+            "platform": "instagram",
+            "post_id": "p1",
+            "created_at": datetime(2026, 1, 20),
+            "likes": 4,
+            "comments": 6,
+            "shares": None,
+            "score": 10.0,
+        }
     ]
 
     captured = {}
 
-    monkeypatch.setattr(
-        "api.services.influence_history_service.PageHistoryRepository.get_entity_posts_new",
-        lambda self, entity_id, date_limit, max_posts: captured.update(
-            {"entity_id": entity_id, "date_limit": date_limit, "max_posts": max_posts}
+    def _scored_posts(entity_ids, date_limit, start_date=None, top_n=None):
+        captured.update(
+            {"entity_ids": entity_ids, "date_limit": date_limit, "start_date": start_date, "top_n": top_n}
         )
-        or rows,
+        return rows
+
+    monkeypatch.setattr(
+        "api.services.influence_history_service.PageHistoryRepository.get_competitors_scored_posts",
+        _scored_posts,
     )
 
     stats = InfluenceHistoryService.get_competitors_interaction_stats([10], start_date=datetime(2026, 1, 1, tzinfo=timezone.utc))
-    assert captured["entity_id"] == 10
+    assert captured["entity_ids"] == [10]
     assert captured["date_limit"].isoformat() == "2026-01-01"
-    assert captured["max_posts"] == 10000
-    assert len(stats) == 1
-    assert stats[0]["platform"] == "instagram"
-    assert stats[0]["entity_id"] == 10
-
-
-def test_influence_competitors_stats_skips_invalid_rows_and_respects_start_date(monkeypatch):
+    assert captured["start_date"] == datetime(2026, 1, 1)
+    assert captured["top_n"] is None
+    assert stats == [{
+        "post_id": "p1",
+        "comments": 6,
+        "likes": 4,
+        "score": 10.0,
+        "platform": "instagram",
+        "create_time": "2026-01-20T00:00:00",
+        "page_id": "pg1",
+        "entity_id": 10,
+    }]
+
+
+def test_influence_competitors_stats_maps_columns_to_platform_metric_keys(monkeypatch):
     rows = [
-        SimpleNamespace(
-            page_id="pg1",
-            platform="instagram",
-            entity_id=10,
-            posts_metrics=[[{"id": "old", "datetime": "2025-12-31T00:00:00Z", "comments": 1, "likes": 1}]],
-        ),
-        SimpleNamespace(
-            page_id="pg1",
-            platform="instagram",
-            entity_id=10,
-            posts_metrics=[[{"id": "ok", "datetime": "2026-01-02T00:00:00Z", "comments": "6", "likes": "4"}, "bad-item"]],
-        ),
-        SimpleNamespace(
-            page_id="pg2",
-            platform="unsupported",
-            entity_id=10,
-            posts_metrics=[[{"id": "x", "datetime": "2026-01-03T00:00:00Z"}]],
-        ),
-        SimpleNamespace(
-            page_id="pg3",
-            platform="instagram",
-            entity_id=10,
-            posts_metrics="not-a-list",
-        ),
+        {
+            "entity_id": 10, "page_id": "pg1", "platform": "tiktok", "post_id": "v1",
+            "created_at": datetime(2026, 1, 2), "likes": 50, "comments": 3, "shares": None, "score": 3,
+        },
+        {
+            "entity_id": 11, "page_id": "pg2", "platform": "x", "post_id": "t1",
+            "created_at": datetime(2026, 1, 3), "likes": 7, "comments": 1, "shares": 2, "score": 9,
+        },
     ]
-
     captured = {}
     monkeypatch.setattr(
-        "api.services.influence_history_service.PageHistoryRepository.get_entity_posts_new",
-        lambda self, entity_id, date_limit, max_posts: captured.update(
-            {"entity_id": entity_id, "date_limit": date_limit, "max_posts": max_posts}
-        )
-        or rows,
+        "api.services.influence_history_service.PageHistoryRepository.get_competitors_scored_posts",
+        lambda entity_ids, date_limit, start_date=None, top_n=None: captured.update(
+            {"date_limit": date_limit, "top_n": top_n}
+        ) or rows,
     )
 
-    stats = InfluenceHistoryService.get_competitors_interaction_stats(
-        [10],
-        start_date=datetime(2026, 1, 1, tzinfo=timezone.utc),
-    )
+    stats = InfluenceHistoryService.get_competitors_interaction_stats([10, 11], top_n=5)
 
-    assert captured["max_posts"] == 10000
-    assert captured["date_limit"].isoformat() == "2026-01-01"
-    assert [s["post_id"] for s in stats] == ["ok"]
+    assert captured["top_n"] == 5
+    assert captured["date_limit"] == date.today() - timedelta(days=30)
+    assert {k: stats[0][k] for k in ("commentcount", "share_count", "score")} == {
+        "commentcount": 3, "share_count": 0, "score": 3.0,
+    }
+    assert {k: stats[1][k] for k in ("reposts", "likes")} == {"reposts": 2, "likes": 7}
 
 
 def test_influence_interactions_ranking_default_window_and_weighted_scores(monkeypatch):
@@ -1368,4 +1369,423 @@ def test_influence_interactions_ranking_with_custom_period(monkeypatch):
     assert ranking == []
 
 
-    
\ No newline at end of file
+    
+
+def test_influence_interactions_ranking_served_from_snapshot_when_precomputed(monkeypatch):
+    stored = [
+        {"entity_id": 1, "entity_name": "A Corp", "total_score": 50.0, "total_likes": 10},
+        {"entity_id": 2, "entity_name": "B Corp", "total_score": 20.0, "total_likes": 40},
+    ]
+    captured = {}
+
+    def _snapshot(kind, period, entity_type, snapshot_date, order_by="total_score"):
+        captured.update(kind=kind, period=period, entity_type=entity_type, order_by=order_by)
+        rows = [dict(r) for r in stored]
+        return sorted(rows, key=lambda r: r[order_by], reverse=True)
+
+    def _live(**_kwargs):
+        pytest.fail("live summary should not run on a snapshot hit")
+
+    monkeypatch.setattr("api.services.influence_history_service.RankingSnapshotRepository.get_snapshot", _snapshot)
+    monkeypatch.setattr("api.services.influence_history_service.PageHistoryRepository.get_companies_interactions_summary", _live)
+
+    ranking = InfluenceHistoryService.get_likes_ranking(period="last_30d", entity_type="influencer")
+
+    assert captured == {"kind": "interactions", "period": "30d", "entity_type": "influencer", "order_by": "total_likes"}
+    assert [(r["entity_name"], r["rank"]) for r in ranking] == [("B Corp", 1), ("A Corp", 2)]
+
+
+def test_influence_ranking_custom_window_skips_snapshot_and_miss_falls_back(monkeypatch):
+    lookups = []
+    monkeypatch.setattr(
+        "api.services.influence_history_service.RankingSnapshotRepository.get_snapshot",
+        lambda *args, **kwargs: lookups.append(args) or None,
+    )
+    monkeypatch.setattr(
+        "api.services.influence_history_service.PageHistoryRepository.get_followers_progress_snapshot",
+        lambda **kwargs: [
+            {"entity_id": 1, "entity_name": "A", "platform": "instagram", "current_followers": 10, "prev_followers": 5},
+            {"entity_id": 2, "entity_name": "B", "platform": "instagram", "current_followers": 90, "prev_followers": 89},
+        ],
+    )
+
+    custom = InfluenceHistoryService.get_followers_progress_ranking(start_date="2026-01-01")
+    assert lookups == []
+    assert [r["entity_id"] for r in custom] == [1, 2]
+
+    missed = InfluenceHistoryService.get_followers_progress_ranking(sort_by="followers")
+    assert lookups[0][:3] == ("followers_progress", "default", "all")
+    assert [r["entity_id"] for r in missed] == [2, 1]
+    assert missed[0]["rank"] == 1
+
+
+def test_influence_rebuild_ranking_snapshots_writes_every_standard_key(monkeypatch):
+    written = []
+    monkeypatch.setattr(
+        "api.services.influence_history_service.InfluenceHistoryService._build_companies_ranking",
+        lambda period=None, entity_type=None, **_: [{"entity_id": 1, "total_score": 1.0}],
+    )
+    monkeypatch.setattr(
+        "api.services.influence_history_service.InfluenceHistoryService._build_followers_progress_ranking",
+        lambda period=None, entity_type=None, **_: [],
+    )
+    monkeypatch.setattr(
+        "api.services.influence_history_service.RankingSnapshotRepository.replace_snapshot",
+        lambda kind, period, entity_type, snapshot_date, rows: written.append((kind, period, entity_type)) or len(rows),
+    )
+    pruned = {}
+    monkeypatch.setattr(
+        "api.services.influence_history_service.RankingSnapshotRepository.delete_before",
+        lambda snapshot_date: pruned.setdefault("before", snapshot_date),
+    )
+
+    summary = InfluenceHistoryService.rebuild_ranking_snapshots(snapshot_date=datetime(2026, 5, 1).date())
+
+    periods = InfluenceHistoryService._SNAPSHOT_PERIODS
+    assert summary == {"snapshot_date": "2026-05-01", "rankings": len(periods) * 7, "rows": len(periods) * 3}
+    assert ("interactions", "default", "company") in written
+    assert ("followers_progress", "7d", "all") in written
+    assert pruned["before"].isoformat() == "2026-05-01"
+
+
+def test_influence_posts_ranking_runs_sql_side_and_offsets_rank_by_cursor(monkeypatch):
+    captured = {}
+
+    def _growth(**kwargs):
+        captured.update(kwargs)
+        return [
+            {
+                "entity_id": 3,
+                "entity_name": "Entity C",
+                "category": "cat",
+                "root_category": None,
+                "page_id": "pg3",
+                "page_name": "Page C",
+                "page_url": "https://example.com/c",
+                "profile_image_url": "https://img/c",
+                "platform": "x",
+                "post_id": "p9",
+                "caption": "hello",
+                "url": "https://x.com/p9",
+                "created_at": datetime(2026, 1, 18, 8, 0),
+                "snapshots_count": 3,
+                "gained_likes": 12,
+                "gained_comments": 0,
+                "gained_shares": 4,
+                "gained_views": None,
+                "gained_score": 16.00004,
+                "page_followers": 900,
+            }
+        ]
+
+    monkeypatch.setattr("api.services.influence_history_service.PageHistoryRepository.get_posts_growth_ranking", _growth)
+
+    ranking = InfluenceHistoryService.get_posts_likes_ranking(period="7d", entity_type="company", limit=5, cursor=10)
+
+    assert captured["order_by"] == "gained_likes"
+    assert captured["limit"] == 5
+    assert captured["offset"] == 10
+    assert captured["entity_type"] == "company"
+    # platform_metrics weights re-keyed onto posts_history_mv columns
+    assert captured["score_weights"]["x"] == {"shares": 1.0, "likes": 1.0}
+    assert captured["score_weights"]["tiktok"] == {"comments": 1.0, "shares": 1.0}
+    assert "youtube" not in captured["score_weights"]
+    # Same columns as the competitor score (_post_score_sql): one mapping.
+    from api.utils.data_keys import platform_metrics
+    for platform, spec in platform_metrics.items():
+        assert set(captured["score_weights"][platform]) == {m["column"] for m in spec["metrics"]}
+
+    assert len(ranking) == 1
+    row = ranking[0]
+    assert row["rank"] == 11
+    assert row["root_category"] == "cat"
+    assert row["post_url"] == "https://x.com/p9"
+    assert row["created_at"] == "2026-01-18T08:00:00+00:00"
+    assert row["gained_views"] == 0
+    assert row["gained_score"] == 16.0
+
+
+def test_influence_posts_ranking_empty_result(monkeypatch):
+    monkeypatch.setattr(
+        "api.services.influence_history_service.PageHistoryRepository.get_posts_growth_ranking",
+        lambda **kwargs: [],
+    )
+    assert InfluenceHistoryService.get_posts_interactions_ranking() == []
+
+
+def test_keyword_matcher_agrees_with_match_keyword_for_every_rule_kind():
+    def _rule(rule_id, mode, case_sensitive=False, entity_ids=None):
+        scope = {"entity_ids": entity_ids} if entity_ids else None
+        return SimpleNamespace(id=rule_id, match_mode=mode, is_case_sensitive=case_sensitive, entity_scope=scope)
+
+    def _kw(keyword):
+        return SimpleNamespace(keyword=keyword, keyword_normalized=normalize_keyword(keyword))
+
+    rule_rows = [
+        (_rule(1, "contains"), [_kw("Refund"), _kw("late  delivery")]),
+        (_rule(2, "contains", case_sensitive=True), [_kw("ACME")]),
+        (_rule(3, "exact"), [_kw("scam")]),
+        (_rule(4, "regex"), [_kw(r"\border(ed)?\b"), _kw(r"(\w)\1{3}"), _kw("[broken")]),
+        (_rule(5, "regex", case_sensitive=True), [_kw(r"^VIP"), _kw(r"\d{3}-\d{4}")]),
+        (_rule(6, "contains", entity_ids=[7]), [_kw("refund")]),
+    ]
+    texts = [
+        "I want a REFUND after this late   delivery",
+        "acme never answered, ACME please",
+        "  Scam ",
+        "scam alert",
+        "Ordered twice, call 555-1234",
+        "vip lounge aaaa",
+        "VIP only",
+        "",
+    ]
+
+    matcher = KeywordMatcher(rule_rows)
+    for entity_id in (None, 7, 8):
+        for text in texts:
+            norm = normalize_keyword(text)
+            expected = [
+                (rule.id, kw.keyword)
+                for rule, keywords in rule_rows
+                if not (rule.entity_scope and entity_id not in rule.entity_scope["entity_ids"])
+                for kw in keywords
+                if AlertService.match_keyword(
+                    text_original=text,
+                    text_normalized=norm,
+                    keyword_original=kw.keyword,
+                    keyword_normalized=kw.keyword_normalized,
+                    match_mode=rule.match_mode,
+                    is_case_sensitive=rule.is_case_sensitive,
+                )
+            ]
+            got = [(rule.id, kw.keyword) for rule, kw in matcher.match(text, norm, entity_id)]
+            assert got == expected, (text, entity_id)
+
+    assert [(r.id, k.keyword) for r, k in matcher.match("refund", "refund", 7)] == [(1, "Refund"), (6, "refund")]
+
+
+def test_keyword_matcher_skips_entities_outside_every_scope():
+    rule = SimpleNamespace(id=1, match_mode="contains", is_case_sensitive=False, entity_scope={"entity_ids": [3]})
+    kw = SimpleNamespace(keyword="promo", keyword_normalized="promo")
+    matcher = KeywordMatcher([(rule, [kw])])
+
+    assert matcher.match("big promo", "big promo", 3) == [(rule, kw)]
+    assert matcher.match("big promo", "big promo", 4) == []
+    assert matcher.match("big promo", "big promo", None) == []
+
+
+def test_negative_comment_detector_streams_chunks_and_resumes_after_crash(monkeypatch):
+    from api import db
+    from api.models.alert_detector_checkpoint_model import AlertDetectorCheckpoint
+    from api.models.alert_event_model import AlertEvent
+    from api.models.comment_model import Comment
+    from api.models.user_alert_model import UserAlert
+    from api.repositories.alert_event_repository import AlertEventRepository
+    from api.services.alert_engine_service import AlertEngineService
+
+    monkeypatch.setenv("ALERTS_DETECTOR_CHUNK_SIZE", "2")
+    rule_lookups = []
+
+    def _matching_rules(event_type, entity_id):
+        rule_lookups.append((event_type, entity_id))
+        return [SimpleNamespace(id=7, user_id=70), SimpleNamespace(id=8, user_id=80)]
+
+    monkeypatch.setattr(
+        "api.services.alert_engine_service.AlertRuleRepository.list_matching_rules", _matching_rules
+    )
+    flushed = []
+    crash_on = {}
+    bulk_create_or_get = AlertEventRepository.bulk_create_or_get
+
+    def _bulk_create_or_get(events, commit=True):
+        pks = [e["comment_pk"] for e in events]
+        if crash_on.get("pk") in pks:
+            raise RuntimeError("worker died")
+        flushed.append(pks)
+        return bulk_create_or_get(events, commit=commit)
+
+    monkeypatch.setattr(
+        "api.services.alert_engine_service.AlertEventRepository.bulk_create_or_get",
+        _bulk_create_or_get,
+    )
+
+    # Two comments share a timestamp so a chunk boundary falls inside a tie.
+    stamps = [datetime(2026, 3, 1, 10, m) for m in (0, 1, 1, 2, 3)]
+    comments = [
+        Comment(
+            page_id="99999999-0000-0000-0000-000000000001",
+            platform="instagram",
+            post_id="stream-post",
+            comment_id=f"s{i}",
+            text=f"bad {i}",
+            comment_timestamp=ts,
+            recorded_at=ts,
+            label=0,
+        )
+        for i, ts in enumerate(stamps)
+    ]
+    try:
+        db.session.add_all(comments)
+        db.session.commit()
+        ids = [c.id for c in comments]
+
+        crash_on["pk"] = ids[3]
+        with pytest.raises(RuntimeError):
+            AlertEngineService._run_negative_comment_detector()
+        db.session.rollback()
+        assert flushed == [ids[:2]]
+        # The first full chunk was written and checkpointed before the crash.
+        checkpoint = AlertDetectorCheckpoint.query.filter_by(detector_name="negative_comment").first()
+        assert (checkpoint.cursor_ts, checkpoint.cursor_text) == (stamps[1], f"[{ids[1]}]")
+
+        crash_on.clear()
+        result = AlertEngineService._run_negative_comment_detector()
+        assert flushed == [ids[:2], ids[2:4], ids[4:]]
+        assert result["scanned"] == 3
+        assert result["events_created"] == 3
+        assert result["user_alerts_created"] == 6
+        assert result["cursor_advanced_to"] == stamps[4].isoformat()
+        # Matching rules are looked up once per entity, not once per event.
+        assert rule_lookups.count(("negative_comment", None)) == 2
+
+        events = AlertEvent.query.filter(AlertEvent.comment_pk.in_(ids)).all()
+        assert sorted(e.comment_pk for e in events) == ids
+        assert UserAlert.query.filter(UserAlert.event_id.in_([e.id for e in events])).count() == 10
+
+        assert AlertEngineService._run_negative_comment_detector()["scanned"] == 0
+    finally:
+        event_ids = [e.id for e in AlertEvent.query.filter(AlertEvent.page_id == "99999999-0000-0000-0000-000000000001")]
+        UserAlert.query.filter(UserAlert.event_id.in_(event_ids)).delete()
+        AlertEvent.query.filter(AlertEvent.id.in_(event_ids)).delete()
+        Comment.query.filter_by(post_id="stream-post").delete()
+        AlertDetectorCheckpoint.query.filter_by(detector_name="negative_comment").delete()
+        db.session.commit()
+
+
+def test_engagement_detector_is_independent_of_chunk_size(monkeypatch):
+    from api import db
+    from api.models.post_model import PostHistoryMV
+    from api.services.alert_engine_service import AlertEngineService
+
+    monkeypatch.setattr(
+        "api.services.alert_engine_service.AlertRuleRepository.list_matching_rules",
+        lambda *_args: [SimpleNamespace(id=1, user_id=1), SimpleNamespace(id=2, user_id=2)],
+    )
+    now = datetime.utcnow().replace(microsecond=0)
+    page_id = str(uuid.uuid4())
+    series = {
+        "spike": [100, 100, 0, 100, 400],
+        "drop": [80, 90, 100, 30],
+        "flat": [100, 100, 100, 100],
+        "short": [5, 500],
+    }
+    try:
+        for post_id, likes in series.items():
+            for i, value in enumerate(likes):
+                db.session.add(PostHistoryMV(
+                    page_id=page_id,
+                    platform="facebook",
+                    post_id=post_id,
+                    recorded_at=now - timedelta(hours=len(likes) - i),
+                    likes=value,
+                    comments=None,
+                ))
+        db.session.commit()
+
+        results = {}
+        for chunk_size in ("1000", "1", "3"):
+            monkeypatch.setenv("ALERTS_DETECTOR_CHUNK_SIZE", chunk_size)
+            results[chunk_size] = AlertEngineService._run_engagement_anomaly_detector(dry_run=True)
+
+        assert results["1"] == results["3"] == results["1000"]
+        assert results["1000"]["scanned"] == 15
+        assert results["1000"]["events_created"] == 2
+        assert results["1000"]["user_alerts_created"] == 4
+    finally:
+        PostHistoryMV.query.filter_by(page_id=page_id).delete()
+        db.session.commit()
+
+
+def test_engagement_detector_sql_backend_builds_events_from_repository_rows(monkeypatch):
+    from api.services.alert_engine_service import AlertEngineService
+
+    recorded_at = datetime(2026, 3, 2, 14, 37)
+    upserts = []
+    monkeypatch.setenv("ALERTS_ENGAGEMENT_BACKEND", "sql")
+    monkeypatch.setattr(
+        "api.services.alert_engine_service.db",
+        SimpleNamespace(engine=SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))),
+    )
+    monkeypatch.setattr(
+        "api.services.alert_engine_service.AlertDetectorCheckpointRepository.get", lambda _name: None
+    )
+    monkeypatch.setattr(
+        "api.services.alert_engine_service.AlertDetectorCheckpointRepository.upsert",
+        lambda name, **kwargs: upserts.append((name, kwargs)),
+    )
+    monkeypatch.setattr(
+        "api.services.alert_engine_service.PostRepository.get_engagement_window_stats",
+        lambda _start: {"snapshots": 42, "latest_recorded_at": recorded_at},
+    )
+    monkeypatch.setattr(
+        "api.services.alert_engine_service.PostRepository.get_engagement_anomalies",
+        lambda _start, _thresholds: [{
+            "page_id": "p1",
+            "platform": "instagram",
+            "post_id": "x1",
+            "latest_recorded_at": recorded_at,
+            "metric": "views",
+            "direction": "drop",
+            "baseline": 1000.0,
+            "current_value": 100.0,
+            "deviation": -0.9,
+            "abs_change": -900.0,
+        }],
+    )
+    monkeypatch.setattr(AlertEngineService, "_page_entity_map", staticmethod(lambda _ids: {"p1": 5}))
+    queued = []
+    monkeypatch.setattr(
+        "api.services.alert_engine_service.AlertRuleRepository.list_matching_rules",
+        lambda event_type, entity_id: queued.append((event_type, entity_id)) or [SimpleNamespace(id=3, user_id=9)],
+    )
+
+    result = AlertEngineService._run_engagement_anomaly_detector(dry_run=True)
+
+    assert result == {
+        "scanned": 42,
+        "events_created": 1,
+        "user_alerts_created": 1,
+        "cursor_advanced_to": recorded_at.isoformat(),
+    }
+    assert queued == [("engagement_anomaly", 5)]
+    assert upserts == []
+
+
+def test_failed_profiles_join_failed_snapshots_by_page_id(monkeypatch):
+    first, second = uuid.uuid4(), uuid.uuid4()
+    failed_pages = [
+        {"page_id": first, "platform": "instagram", "missing_keys": ["likes"], "recorded_at": None},
+        {"page_id": second, "platform": "tiktok", "missing_keys": ["top_videos"], "recorded_at": None},
+        {"page_id": first, "platform": "instagram", "missing_keys": ["posts"], "recorded_at": None},
+    ]
+    requested = {}
+
+    def fake_get_pages_by_ids(page_ids, platform=None):
+        requested["page_ids"] = page_ids
+        return [
+            SimpleNamespace(uuid=page_id, name=f"p{i}", link=f"https://x/{i}", platform="instagram", entity_id=i, entity=None)
+            for i, page_id in enumerate(page_ids)
+        ]
+
+    monkeypatch.setattr(
+        "api.services.scraping_service.PageHistoryRepository.get_failed_pages_for_today",
+        lambda: failed_pages,
+    )
+    monkeypatch.setattr("api.services.scraping_service.PageRepository.get_pages_by_ids", fake_get_pages_by_ids)
+
+    result = ScrapingService.get_failed_profiles_for_scraping()
+
+    # Each page is fetched once, and its first failing snapshot reports the issues.
+    assert requested["page_ids"] == [first, second]
+    assert result["count"] == 2
+    assert result["scraping_issues"] == ["likes", "top_videos"]
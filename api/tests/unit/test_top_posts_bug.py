@@ -2,38 +2,60 @@
 Tests to verify correct behavior of get_entity_top_posts.
 These tests ensure that first-time posts are included with their current metrics as gains.
 """
-from datetime import datetime, timezone, timedelta
-from types import SimpleNamespace
+from datetime import datetime
+import uuid
 
 import pytest
 
 from api.services.entity_service import EntityService
 
 
+@pytest.fixture
+def snapshots():
+    """Seed posts_history_mv for one instagram page; yields an add(day, post_id, comments, likes) helper."""
+    from api import db
+    from api.models.entity_model import Entity
+    from api.models.page_model import Page
+    from api.models.post_model import PostHistoryMV
+
+    entity = Entity(name="Top Posts Brand", type="company", to_scrape=True)
+    db.session.add(entity)
+    db.session.flush()
+    page = Page(uuid=uuid.uuid4(), name="tp", link="https://instagram.com/top-posts", platform="instagram", entity_id=entity.id)
+    db.session.add(page)
+    db.session.commit()
+
+    def _add(day, post_id, comments, likes, hour=12):
+        db.session.add(PostHistoryMV(
+            page_id=str(page.uuid), platform="instagram", post_id=post_id,
+            recorded_at=datetime(2026, 1, day, hour), created_at=datetime(2026, 1, 15),
+            comments=comments, likes=likes,
+        ))
+        db.session.commit()
+
+    _add.entity_id = entity.id
+    yield _add
+
+    PostHistoryMV.query.filter_by(page_id=str(page.uuid)).delete()
+    Page.query.filter_by(uuid=page.uuid).delete()
+    Entity.query.filter_by(id=entity.id).delete()
+    db.session.commit()
+
+
 class TestTopPostsFirstTimePosts:
     """
     Tests for first-time posts appearing on the target date.
     These posts should be included with their current metric values as gains (baseline = 0).
     """
 
-    def test_first_time_post_on_target_date_is_included(self, monkeypatch):
+    def test_first_time_post_on_target_date_is_included(self, snapshots):
         """
         A post that appears for the first time on the target date should be included.
         Its current metrics are treated as gains (as if baseline was 0).
         """
-        rows = [
-            SimpleNamespace(
-                platform="instagram",
-                recorded_at=datetime(2026, 1, 20, tzinfo=timezone.utc),
-                posts_metrics=[[{"id": "new_post", "datetime": "2026-01-20T00:00:00Z", "comments": 10, "likes": 50}]],
-            ),
-        ]
-        monkeypatch.setattr(
-            "api.services.entity_service.EntityRepository.get_entity_posts_metrics",
-            lambda entity_id, date_limit: rows,
-        )
+        snapshots(20, "new_post", comments=10, likes=50)
 
-        day_gains, posts_num, skipped = EntityService.get_entity_top_posts(1, date_value="2026-01-20", top_posts=5)
+        day_gains, posts_num, skipped = EntityService.get_entity_top_posts(snapshots.entity_id, date_value="2026-01-20", top_posts=5)
 
         assert posts_num == 1, "Post should have been processed"
         assert day_gains is not None, "Should return data for the target date"
@@ -45,66 +67,36 @@ class TestTopPostsFirstTimePosts:
         assert day_gains["posts"][0]["gained_likes"] == 50
         assert day_gains["posts"][0]["post_id"] == "new_post"
 
-    def test_post_with_previous_day_computes_gains(self, monkeypatch):
+    def test_post_with_previous_day_computes_gains(self, snapshots):
         """
         Posts with a previous snapshot should compute gains as the difference.
         """
-        rows = [
-            SimpleNamespace(
-                platform="instagram",
-                recorded_at=datetime(2026, 1, 19, tzinfo=timezone.utc),
-                posts_metrics=[[{"id": "existing_post", "datetime": "2026-01-19T00:00:00Z", "comments": 5, "likes": 20}]],
-            ),
-            SimpleNamespace(
-                platform="instagram",
-                recorded_at=datetime(2026, 1, 20, tzinfo=timezone.utc),
-                posts_metrics=[[{"id": "existing_post", "datetime": "2026-01-20T00:00:00Z", "comments": 10, "likes": 50}]],
-            ),
-        ]
-        monkeypatch.setattr(
-            "api.services.entity_service.EntityRepository.get_entity_posts_metrics",
-            lambda entity_id, date_limit: rows,
-        )
-
-        day_gains, posts_num, skipped = EntityService.get_entity_top_posts(1, date_value="2026-01-20", top_posts=5)
+        snapshots(19, "existing_post", comments=5, likes=20)
+        snapshots(20, "existing_post", comments=10, likes=50)
+
+        day_gains, posts_num, skipped = EntityService.get_entity_top_posts(snapshots.entity_id, date_value="2026-01-20", top_posts=5)
 
         assert day_gains is not None
         assert len(day_gains["posts"]) == 1
         assert day_gains["posts"][0]["gained_comments"] == 5
         assert day_gains["posts"][0]["gained_likes"] == 30
 
-    def test_mixed_posts_first_time_and_existing(self, monkeypatch):
+    def test_mixed_posts_first_time_and_existing(self, snapshots):
         """
         Test with mixed scenario: some posts are new, some have previous data.
         Both should be included with correct gains.
         """
-        rows = [
-            # Day 1 - only post_a exists
-            SimpleNamespace(
-                platform="instagram",
-                recorded_at=datetime(2026, 1, 19, tzinfo=timezone.utc),
-                posts_metrics=[[{"id": "post_a", "datetime": "2026-01-19T00:00:00Z", "comments": 5, "likes": 10}]],
-            ),
-            # Day 2 - post_a has more metrics, post_b is NEW
-            SimpleNamespace(
-                platform="instagram",
-                recorded_at=datetime(2026, 1, 20, tzinfo=timezone.utc),
-                posts_metrics=[[
-                    {"id": "post_a", "datetime": "2026-01-20T00:00:00Z", "comments": 10, "likes": 20},
-                    {"id": "post_b", "datetime": "2026-01-20T00:00:00Z", "comments": 100, "likes": 200},  # NEW post!
-                ]],
-            ),
-        ]
-        monkeypatch.setattr(
-            "api.services.entity_service.EntityRepository.get_entity_posts_metrics",
-            lambda entity_id, date_limit: rows,
-        )
-
-        day_gains, posts_num, skipped = EntityService.get_entity_top_posts(1, date_value="2026-01-20", top_posts=5)
+        # Day 1 - only post_a exists
+        snapshots(19, "post_a", comments=5, likes=10)
+        # Day 2 - post_a has more metrics, post_b is NEW
+        snapshots(20, "post_a", comments=10, likes=20)
+        snapshots(20, "post_b", comments=100, likes=200)
+
+        day_gains, posts_num, skipped = EntityService.get_entity_top_posts(snapshots.entity_id, date_value="2026-01-20", top_posts=5)
 
         assert day_gains is not None
-        # posts_num counts all posts processed across all days (1 from day 1 + 2 from day 2 = 3)
-        assert posts_num == 3, "All posts should be processed"
+        # posts_num counts the posts scored on the target day
+        assert posts_num == 2, "All posts should be processed"
         
         # Both posts should be included
         assert len(day_gains["posts"]) == 2, "Both posts should be in results"
@@ -127,24 +119,14 @@ class TestTopPostsFirstDayOfData:
     Tests for the edge case when the target date is the first day of data.
     """
 
-    def test_target_date_is_first_day_of_data_returns_posts(self, monkeypatch):
+    def test_target_date_is_first_day_of_data_returns_posts(self, snapshots):
         """
         When requesting data for the first day available, posts should be returned
         with their current metrics as gains.
         """
-        rows = [
-            SimpleNamespace(
-                platform="instagram",
-                recorded_at=datetime(2026, 1, 20, tzinfo=timezone.utc),
-                posts_metrics=[[{"id": "post_1", "datetime": "2026-01-20T00:00:00Z", "comments": 50, "likes": 100}]],
-            ),
-        ]
-        monkeypatch.setattr(
-            "api.services.entity_service.EntityRepository.get_entity_posts_metrics",
-            lambda entity_id, date_limit: rows,
-        )
+        snapshots(20, "post_1", comments=50, likes=100)
 
-        day_gains, posts_num, skipped = EntityService.get_entity_top_posts(1, date_value="2026-01-20", top_posts=5)
+        day_gains, posts_num, skipped = EntityService.get_entity_top_posts(snapshots.entity_id, date_value="2026-01-20", top_posts=5)
 
         assert day_gains is not None, "Should return data for target date"
         assert day_gains["day"] == "2026-01-20"
@@ -154,64 +136,62 @@ class TestTopPostsFirstDayOfData:
         assert day_gains["posts"][0]["gained_comments"] == 50
         assert day_gains["posts"][0]["gained_likes"] == 100
 
+    def test_missing_target_day_falls_back_to_latest_prior_day(self, snapshots):
+        """
+        When the target day wasn't scraped, the closest earlier scraped day is used.
+        """
+        snapshots(17, "post_1", comments=1, likes=1)
+        snapshots(18, "post_1", comments=4, likes=9)
+
+        day_gains, _, _ = EntityService.get_entity_top_posts(snapshots.entity_id, date_value="2026-01-20", top_posts=5)
+
+        assert day_gains["day"] == "2026-01-18"
+        assert day_gains["posts"][0]["gained_likes"] == 8
+
 
 class TestTopPostsGainsComputation:
     """
     Tests to verify gains are computed correctly for posts.
     """
 
-    def test_negative_gains_are_included(self, monkeypatch):
+    def test_negative_gains_are_included(self, snapshots):
         """
         Posts with decreased metrics (negative gains) should still be included.
         """
-        rows = [
-            SimpleNamespace(
-                platform="instagram",
-                recorded_at=datetime(2026, 1, 19, tzinfo=timezone.utc),
-                posts_metrics=[[{"id": "post_1", "datetime": "2026-01-19T00:00:00Z", "comments": 50, "likes": 100}]],
-            ),
-            SimpleNamespace(
-                platform="instagram",
-                recorded_at=datetime(2026, 1, 20, tzinfo=timezone.utc),
-                posts_metrics=[[{"id": "post_1", "datetime": "2026-01-20T00:00:00Z", "comments": 30, "likes": 80}]],  # Decreased!
-            ),
-        ]
-        monkeypatch.setattr(
-            "api.services.entity_service.EntityRepository.get_entity_posts_metrics",
-            lambda entity_id, date_limit: rows,
-        )
-
-        day_gains, _, _ = EntityService.get_entity_top_posts(1, date_value="2026-01-20", top_posts=5)
+        snapshots(19, "post_1", comments=50, likes=100)
+        snapshots(20, "post_1", comments=30, likes=80)  # Decreased!
+
+        day_gains, _, _ = EntityService.get_entity_top_posts(snapshots.entity_id, date_value="2026-01-20", top_posts=5)
 
         assert day_gains is not None
         assert len(day_gains["posts"]) == 1
         assert day_gains["posts"][0]["gained_comments"] == -20
         assert day_gains["posts"][0]["gained_likes"] == -20
 
-    def test_zero_gains_are_included(self, monkeypatch):
+    def test_zero_gains_are_included(self, snapshots):
         """
         Posts with no change in metrics should still be included.
         """
-        rows = [
-            SimpleNamespace(
-                platform="instagram",
-                recorded_at=datetime(2026, 1, 19, tzinfo=timezone.utc),
-                posts_metrics=[[{"id": "post_1", "datetime": "2026-01-19T00:00:00Z", "comments": 50, "likes": 100}]],
-            ),
-            SimpleNamespace(
-                platform="instagram",
-                recorded_at=datetime(2026, 1, 20, tzinfo=timezone.utc),
-                posts_metrics=[[{"id": "post_1", "datetime": "2026-01-20T00:00:00Z", "comments": 50, "likes": 100}]],  # No change
-            ),
-        ]
-        monkeypatch.setattr(
-            "api.services.entity_service.EntityRepository.get_entity_posts_metrics",
-            lambda entity_id, date_limit: rows,
-        )
-
-        day_gains, _, _ = EntityService.get_entity_top_posts(1, date_value="2026-01-20", top_posts=5)
+        snapshots(19, "post_1", comments=50, likes=100)
+        snapshots(20, "post_1", comments=50, likes=100)  # No change
+
+        day_gains, _, _ = EntityService.get_entity_top_posts(snapshots.entity_id, date_value="2026-01-20", top_posts=5)
 
         assert day_gains is not None
         assert len(day_gains["posts"]) == 1
         assert day_gains["posts"][0]["gained_comments"] == 0
         assert day_gains["posts"][0]["gained_likes"] == 0
+
+    def test_latest_snapshot_of_each_day_is_compared(self, snapshots):
+        """
+        Several scrapes on one day count as one day: the day's last reading is used.
+        """
+        snapshots(19, "post_1", comments=1, likes=10, hour=6)
+        snapshots(19, "post_1", comments=3, likes=30, hour=18)
+        snapshots(20, "post_1", comments=5, likes=35, hour=6)
+        snapshots(20, "post_1", comments=7, likes=40, hour=18)
+
+        day_gains, _, _ = EntityService.get_entity_top_posts(snapshots.entity_id, date_value="2026-01-20", top_posts=5)
+
+        assert day_gains["posts"][0]["gained_comments"] == 4
+        assert day_gains["posts"][0]["gained_likes"] == 10
@@ -7,11 +7,14 @@ from flask import Flask
 
 from api.utils.auth import _extract_token, is_valid_phone, validate_email as auth_validate_email
 from api.utils.data_keys import compute_score
-from api.utils.interaction_stats import interpolate_series
+from api.utils.engagement_anomalies import detect_engagement_anomalies
+from api.utils.gap_filling import fill_daily_series
+from api.utils.interaction_stats import distribute_daily_gains, interpolate_series
 from api.utils.login_codes_utils import consume_login_code, store_login_code
 from api.utils.page_uuid import create_page_uuid, normalize_page_link
 from api.utils.posts_utils import _to_number, ensure_datetime, parse_relative_time
 from api.utils.request_parsing import normalize_to_utc_datetime, parse_iso_date, today_date
+from api.utils.shared_file_cache import SharedFileCache
 from api.utils.validators import (
     validate_email,
     validate_enum,
@@ -90,6 +93,37 @@ def test_interpolate_series_fills_gaps_with_neighbors_or_previous():
     assert interpolate_series([5, None, None]) == [5, 5, 5]
     assert interpolate_series([0, None, 10]) == [0, 10, 10]
     assert interpolate_series([0, None, 0]) == [0, 0, 0]
+    # Each missing value halves the distance to the next known one.
+    assert interpolate_series([10, 0, None, 40, None]) == [10, 25.0, 32.5, 40, 40]
+
+
+def test_fill_daily_series_fills_many_series_independently():
+    d = lambda day: date(2026, 1, day)
+    filled = fill_daily_series({
+        "a": [(d(1), 100), (d(4), 130)],
+        "b": [(d(3), None), (d(2), 7), (d(3), 9), (d(5), 0)],  # last point of a day wins
+        "c": [(d(1), 0)],
+        "d": [],
+    })
+    assert filled["a"] == [(d(1), 100), (d(2), 110), (d(3), 120), (d(4), 130)]
+    assert filled["b"] == [(d(2), 7), (d(3), 9), (d(4), 9), (d(5), 9)]
+    assert filled["c"] == [(d(1), 0)]
+    assert filled["d"] == []
+    assert all(type(v) is int for _, v in filled["a"])
+
+
+def test_distribute_daily_gains_spreads_each_gap_over_its_days():
+    # Post 0: day 0 -> day 3 (+30 likes, +3 comments); post 1: day 2 -> day 3
+    # (+5 likes). Samples arrive unordered.
+    gains, covered = distribute_daily_gains(
+        series_index=[1, 0, 0, 1],
+        day_index=[3, 3, 0, 2],
+        values=[[15, 0], [40, 4], [10, 1], [10, 0]],
+        n_days=5,
+    )
+    assert covered.tolist() == [False, True, True, True, False]
+    assert gains[:, 0].tolist() == pytest.approx([0, 10, 10, 15, 0])
+    assert gains[:, 1].tolist() == pytest.approx([0, 1, 1, 1, 0])
 
 
 def test_page_uuid_normalization_and_uuid_generation_are_stable():
@@ -219,3 +253,63 @@ def test_resolve_period_dates():
     # Test error
     with pytest.raises(ValueError, match="Invalid period value"):
         resolve_period_dates(period="invalid_period")
+
+
+def test_detect_engagement_anomalies_scores_posts_and_skips_suspicious_zeros():
+    nan = float("nan")
+    thresholds = {"threshold_up": 0.5, "threshold_down": 0.5, "min_baseline": 20, "min_abs_change": 10}
+    posts = [
+        # likes jump against a baseline of 100; the zero (scraper glitch) and
+        # the missing reading stay out of the baseline.
+        [[100, 5, nan, 0], [0, 5, nan, 0], [nan, 5, nan, 0], [100, 5, nan, 0], [120, 5, nan, 0], [200, 5, nan, 0]],
+        # Drops to zero are never flagged.
+        [[50, 1, 1, 1], [50, 1, 1, 1], [50, 1, 1, 1], [0, 1, 1, 1]],
+        # Too short to score.
+        [[10, 10, 10, 10], [900, 900, 900, 900]],
+        # comments fall to a third of the (upper) median of 60/90/30/30 -> 60.
+        [[0, 60, 0, 0], [0, 90, 0, 0], [0, 30, 0, 0], [0, 30, 0, 0], [0, 20, 0, 0]],
+    ]
+    lengths = [len(p) for p in posts]
+    values = [row for p in posts for row in p]
+
+    anomalies = detect_engagement_anomalies(lengths, values, thresholds)
+
+    assert [(a[0], a[1], a[2], a[3], a[4]) for a in anomalies] == [
+        (0, "likes", "increase", 100.0, 200.0),
+        (3, "comments", "drop", 60.0, 20.0),
+    ]
+    assert anomalies[1][5] == pytest.approx(-2 / 3)
+    assert anomalies[1][6] == -40.0
+    assert detect_engagement_anomalies([], [], thresholds) == []
+
+
+def test_shared_file_cache_computes_once_and_rereads_on_change(tmp_path):
+    path = str(tmp_path / "ranking_cache.json")
+    cache = SharedFileCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"month": "2026-04", "data": [{"entity_id": 1}]}
+
+    def is_fresh(payload):
+        return payload.get("month") == "2026-04"
+
+    first = cache.get_or_compute(path, is_fresh, compute)
+    second = cache.get_or_compute(path, is_fresh, compute)
+    assert first == second == {"month": "2026-04", "data": [{"entity_id": 1}]}
+    assert len(calls) == 1
+    assert cache.get_or_compute(path, is_fresh, compute) is second  # served from memory, not re-parsed
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+    # Another worker replaces the file: the new content is picked up.
+    other = SharedFileCache()
+    other.write(path, {"month": "2026-04", "data": [{"entity_id": 2}, {"entity_id": 3}]})
+    assert cache.read(path)["data"] == [{"entity_id": 2}, {"entity_id": 3}]
+
+    # Stale content is recomputed and written back.
+    other.write(path, {"month": "2026-03", "data": []})
+    assert cache.get_or_compute(path, is_fresh, compute)["data"] == [{"entity_id": 1}]
+    assert len(calls) == 2
+    with open(path) as f:
+        assert json.load(f)["month"] == "2026-04"
@@ -13,7 +13,7 @@ is only correct for endpoints whose body is identical for every caller.
 
 from functools import wraps
 
-from flask import make_response
+from flask import make_response, request
 
 # Applies to everything that doesn't opt in. `no-store` (rather than
 # `private, no-cache`) also keeps the auth responses that carry `Set-Cookie`
@@ -21,7 +21,7 @@ from flask import make_response
 PRIVATE_CACHE_CONTROL = "no-store"
 
 
-def cache_public(max_age, stale_while_revalidate=None):
+def cache_public(max_age, stale_while_revalidate=None, etag=False):
     """Allow shared caches to serve this view's response for `max_age` seconds.
 
     Only for endpoints that read no session, no JWT, and no per-user state — the
@@ -31,6 +31,10 @@ def cache_public(max_age, stale_while_revalidate=None):
 
     Non-2xx/3xx responses are left alone and fall through to `no-store`: a cached
     404 from a transient empty-data window would outlive the window itself.
+
+    With `etag=True` a 2xx body also gets a strong ETag, and a request whose
+    `If-None-Match` matches it is answered `304 Not Modified` with no body —
+    revalidation after `max-age` then costs a hash instead of the payload.
     """
 
     def decorator(view):
@@ -50,6 +54,9 @@ def cache_public(max_age, stale_while_revalidate=None):
                 directives.append(f"stale-while-revalidate={stale_while_revalidate}")
 
             response.headers["Cache-Control"] = ", ".join(directives)
+            if etag and response.status_code < 300:
+                response.add_etag()
+                response = response.make_conditional(request)
             return response
 
         return wrapper
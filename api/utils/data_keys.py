@@ -1,12 +1,14 @@
 # Shared helper functions for data keys.
+# Per platform: the raw post keys scraped into pages_history, and for each
+# scored metric the normalized posts_mv column it lands in (`column`).
 platform_metrics = {
     "instagram": {
         "id_key": "id",
         "date": "datetime",
         "weight": 1,
         "metrics": [
-            {"name": "comments", "score": 1},
-            {"name": "likes", "score": 1},
+            {"name": "comments", "score": 1, "column": "comments"},
+            {"name": "likes", "score": 1, "column": "likes"},
         ]
     },
     "linkedin": {
@@ -14,8 +16,8 @@ platform_metrics = {
         "date": "date",
         "weight": 1,
         "metrics": [
-            {"name": "comments_count", "score": 1},
-            {"name": "likes_count", "score": 1},
+            {"name": "comments_count", "score": 1, "column": "comments"},
+            {"name": "likes_count", "score": 1, "column": "likes"},
         ]
     },
     "x": {
@@ -23,8 +25,8 @@ platform_metrics = {
         "date": "date_posted",
         "weight": 1,
         "metrics": [
-            {"name": "reposts", "score": 1},
-            {"name": "likes", "score": 1},
+            {"name": "reposts", "score": 1, "column": "shares"},
+            {"name": "likes", "score": 1, "column": "likes"},
             # {"name": "replies", "score": 1},
         ]
     },
@@ -33,8 +35,8 @@ platform_metrics = {
         "date": "create_date",
         "weight": 1,
         "metrics": [
-            {"name": "commentcount", "score": 1},
-            {"name": "share_count", "score": 1},
+            {"name": "commentcount", "score": 1, "column": "comments"},
+            {"name": "share_count", "score": 1, "column": "shares"},
             # {"name": "favorites_count", "score": 1},
             # {"name": "playcount", "score": 1},
         ]
@@ -44,8 +46,8 @@ platform_metrics = {
         "date": "date_posted",
         "weight": 1,
         "metrics": [
-            {"name": "num_comments", "score": 1},
-            {"name": "likes", "score": 1},
+            {"name": "num_comments", "score": 1, "column": "comments"},
+            {"name": "likes", "score": 1, "column": "likes"},
             # {"name": "num_shares", "score": 1},
         ]
     }
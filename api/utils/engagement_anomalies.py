@@ -0,0 +1,110 @@
+# Vectorized engagement-anomaly scoring for the alert engine.
+import numpy as np
+
+ENGAGEMENT_METRICS = ("likes", "comments", "shares", "views")
+
+
+def detect_engagement_anomalies(lengths, values, thresholds: dict) -> list[tuple]:
+    """
+    Score every (post, metric) of a batch of posts in one pass.
+
+    Args:
+        lengths: Snapshot count per post; the posts' snapshots are stored
+            back to back, oldest first, in `values`.
+        values: float array of shape (sum(lengths), len(ENGAGEMENT_METRICS)),
+            NaN where a metric was not scraped.
+        thresholds: `threshold_up`, `threshold_down`, `min_baseline` and
+            `min_abs_change`, as read from the ALERTS_ENGAGEMENT_* settings.
+
+    A post's latest snapshot is compared with the median of its earlier valid
+    snapshots (the upper median for an even count). A zero reading that
+    follows a positive one is treated as a scraper error: it is left out of
+    the baseline, and a latest reading that drops to zero is never flagged.
+    Posts need three snapshots and three baseline points.
+
+    Returns:
+        list: (post_index, metric, direction, baseline, current, deviation,
+        abs_change) per anomaly, ordered by post then metric.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64).reshape(-1, len(ENGAGEMENT_METRICS))
+    n_posts = len(lengths)
+    if n_posts == 0:
+        return []
+
+    n_rows = len(values)
+    starts = np.cumsum(lengths) - lengths
+    lasts = starts + lengths - 1
+    post_of_row = np.repeat(np.arange(n_posts), lengths)
+    row_index = np.arange(n_rows)
+    is_last = np.zeros(n_rows, dtype=bool)
+    is_last[lasts[lengths > 0]] = True
+    eligible = lengths >= 3
+    safe_lasts = np.maximum(lasts, 0)
+    safe_prevs = np.maximum(lasts - 1, 0)
+
+    anomalies = []
+    for m, metric in enumerate(ENGAGEMENT_METRICS):
+        v = values[:, m]
+        valid = ~np.isnan(v)
+
+        # Index of the latest non-zero reading strictly before each row, within
+        # the same post. A zero is suspicious when that reading is positive
+        # (zeros after a positive one are never accepted, so this is the same
+        # as comparing against the previous accepted baseline point).
+        nonzero_at = np.where(valid & (v != 0), row_index, -1)
+        prev_nonzero = np.empty(n_rows, dtype=np.int64)
+        if n_rows:
+            prev_nonzero[0] = -1
+            prev_nonzero[1:] = np.maximum.accumulate(nonzero_at)[:-1]
+        has_prev = prev_nonzero >= starts[post_of_row]
+        prev_positive = has_prev & (v[np.maximum(prev_nonzero, 0)] > 0)
+        suspicious = valid & (v == 0) & prev_positive
+
+        accepted = valid & ~suspicious & ~is_last
+        accepted_posts = post_of_row[accepted]
+        accepted_values = v[accepted]
+        baseline_n = np.bincount(accepted_posts, minlength=n_posts)
+
+        order = np.lexsort((accepted_values, accepted_posts))
+        sorted_values = accepted_values[order]
+        accepted_starts = np.cumsum(baseline_n) - baseline_n
+        has_baseline = baseline_n >= 3
+        median_at = np.where(has_baseline, accepted_starts + baseline_n // 2, 0)
+        baseline = np.where(
+            has_baseline,
+            sorted_values[median_at] if len(sorted_values) else 0.0,
+            np.nan,
+        )
+
+        current = v[safe_lasts]
+        previous = v[safe_prevs]
+        ok = (
+            eligible
+            & has_baseline
+            & ~np.isnan(current)
+            & ~np.isnan(previous)
+            & ~((previous > 0) & (current == 0))
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ok &= baseline >= thresholds["min_baseline"]
+            abs_change = current - baseline
+            ok &= np.abs(abs_change) >= thresholds["min_abs_change"]
+            deviation = np.where(baseline != 0, abs_change / baseline, 0.0)
+        up = ok & (deviation >= thresholds["threshold_up"])
+        down = ok & ~up & (deviation <= -thresholds["threshold_down"])
+
+        for post_index in np.flatnonzero(up | down):
+            anomalies.append((
+                int(post_index),
+                metric,
+                "increase" if up[post_index] else "drop",
+                float(baseline[post_index]),
+                float(current[post_index]),
+                float(deviation[post_index]),
+                float(abs_change[post_index]),
+            ))
+
+    metric_order = {metric: i for i, metric in enumerate(ENGAGEMENT_METRICS)}
+    anomalies.sort(key=lambda a: (a[0], metric_order[a[1]]))
+    return anomalies
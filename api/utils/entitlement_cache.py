@@ -0,0 +1,51 @@
+# Per-process cache of resolved user entitlements (role + access rights).
+import threading
+import time
+
+
+class EntitlementCache:
+    """Resolved (role, access_rights) per user_id, each with its own expiry.
+
+    Lives in one process (one per gunicorn worker). Entries are dropped on
+    `invalidate` by the code paths that change a user's entitlements in this
+    process; other workers converge once their entry expires, so callers
+    should keep the TTL short.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self._max_entries = max_entries
+        self._entries: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """Cached (role, rights) for `user_id`, or None on a miss or expiry."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            return entry[1]
+
+    def set(self, user_id, value, ttl_seconds: float) -> None:
+        if ttl_seconds <= 0:
+            return
+        expires = time.monotonic() + ttl_seconds
+        with self._lock:
+            if len(self._entries) >= self._max_entries and user_id not in self._entries:
+                # Make room: drop what has expired, else the oldest insert.
+                now = time.monotonic()
+                for key in [k for k, (exp, _) in self._entries.items() if exp <= now]:
+                    del self._entries[key]
+                if len(self._entries) >= self._max_entries:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[user_id] = (expires, value)
+
+    def invalidate(self, user_id=None) -> None:
+        """Forget one user, or everyone when `user_id` is None."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
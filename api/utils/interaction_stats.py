@@ -1,39 +1,64 @@
 # Shared helper functions for interaction stats.
+import numpy as np
+
+from api.utils.gap_filling import fill_midpoint_gaps
+
 
 def interpolate_series(values):
     """
     values: list of numbers (0 or None = missing)
-    returns: list with gaps filled
+    returns: list with gaps filled (see gap_filling.fill_midpoint_gaps)
+    """
+    return fill_midpoint_gaps(values)
+
+
+def distribute_daily_gains(series_index, day_index, values, n_days):
+    """
+    Spread each post's metric growth evenly over the days between snapshots.
+
+    Args:
+        series_index: int array (n_samples,), the post each snapshot belongs to.
+        day_index: int array (n_samples,), the snapshot's day as an offset from
+            the first day; at most one snapshot per post and day.
+        values: float array (n_samples, n_metrics) of metric readings.
+        n_days: Number of days in the range.
+
+    Between two consecutive snapshots of a post taken `span` days apart, the
+    difference `(cur - prev) / span` is credited to each day after the earlier
+    snapshot up to and including the later one. Every gap adds a constant over
+    a day range, so the gaps are written into a difference array and summed in
+    one cumulative pass: O(snapshots + days) instead of a Python add per post,
+    day and metric.
+
+    Returns:
+        tuple: (gains, covered) where `gains` is a float array (n_days,
+        n_metrics) of summed gains per day and `covered` a bool array (n_days,)
+        marking days that fall inside at least one gap.
     """
-    n = len(values)
-    result = values[:]
-
-    for i in range(n):
-        if i == 0:
-            continue  # first row stays as-is
-
-        if result[i] is None or result[i] == 0:
-            # find previous non-zero
-            prev = None
-            for j in range(i - 1, -1, -1):
-                if result[j] not in (0, None):
-                    prev = result[j]
-                    break
-
-            # find next non-zero
-            nxt = None
-            for j in range(i + 1, n):
-                if values[j] not in (0, None):
-                    nxt = values[j]
-                    break
-
-            if prev is not None and nxt is not None:
-                result[i] = (prev + nxt) / 2
-            elif prev is not None:
-                result[i] = prev
-            elif nxt is not None:
-                result[i] = nxt
-            else:
-                result[i] = 0
-
-    return result
+    series_index = np.asarray(series_index, dtype=np.int64)
+    day_index = np.asarray(day_index, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    n_metrics = values.shape[1]
+
+    order = np.lexsort((day_index, series_index))
+    series_index, day_index, values = series_index[order], day_index[order], values[order]
+
+    pair = series_index[1:] == series_index[:-1]
+    prev_day = day_index[:-1][pair]
+    cur_day = day_index[1:][pair]
+    span = cur_day - prev_day
+    keep = span > 0
+    prev_day, cur_day, span = prev_day[keep], cur_day[keep], span[keep]
+    step = (values[1:][pair][keep] - values[:-1][pair][keep]) / span[:, None]
+
+    diff = np.zeros((n_days + 1, n_metrics))
+    np.add.at(diff, prev_day + 1, step)
+    np.add.at(diff, cur_day + 1, -step)
+    gains = np.cumsum(diff, axis=0)[:n_days]
+
+    open_gaps = np.zeros(n_days + 1, dtype=np.int64)
+    np.add.at(open_gaps, prev_day + 1, 1)
+    np.add.at(open_gaps, cur_day + 1, -1)
+    covered = np.cumsum(open_gaps)[:n_days] > 0
+
+    return gains, covered
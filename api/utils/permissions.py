@@ -344,9 +344,10 @@ def _resolve_effective_role_and_rights(payload):
     try:
         from api.services.subscription_service import SubscriptionService
 
-        user, active, active_rights = SubscriptionService.get_effective_access(user_id)
-        role = user.role if user else role
-        rights = active_rights
+        # Cached per user (see SubscriptionService.get_cached_access), so most
+        # requests resolve entitlements without touching the database.
+        cached_role, rights = SubscriptionService.get_cached_access(user_id)
+        role = cached_role or role
     except Exception:
         # Best-effort: never fail auth metadata enrichment.
         pass
@@ -402,17 +403,27 @@ def ranking_access_error(role, period=None, start_date=None, end_date=None):
     return None
 
 
-def limit_ranking_for_role(role, data):
-    """Cap ranking rows based on role and optional pack-level rights."""
+def ranking_limit_for_role(role):
+    """Deepest ranking position the role may see, or None when unlimited.
+
+    Lets SQL-side rankings apply the cap as a LIMIT instead of fetching the
+    full ranking and truncating it afterwards.
+    """
     if is_premium_role(role):
         if role == UserRole.SUBSCRIBED.value:
             rights = current_subscription_access_rights() or {}
             custom_limit = rights.get("ranking_limit")
-            if isinstance(custom_limit, int) and custom_limit > 0 and isinstance(data, list):
-                return data[:custom_limit]
-        return data
-    if isinstance(data, list):
-        return data[:FREE_RANKING_LIMIT]
+            if isinstance(custom_limit, int) and custom_limit > 0:
+                return custom_limit
+        return None
+    return FREE_RANKING_LIMIT
+
+
+def limit_ranking_for_role(role, data):
+    """Cap ranking rows based on role and optional pack-level rights."""
+    limit = ranking_limit_for_role(role)
+    if limit is not None and isinstance(data, list):
+        return data[:limit]
     return data
 
 
@@ -0,0 +1,120 @@
+# Shared helper for JSON cache files read by every gunicorn worker.
+from collections import OrderedDict
+from contextlib import contextmanager
+import json
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: fall back to in-process locking only
+    fcntl = None
+
+
+class SharedFileCache:
+    """JSON cache files shared by all gunicorn workers, fronted by a per-process LRU.
+
+    A file is parsed once per process and re-read only when its (inode, mtime,
+    size) signature changes, so a hit costs one `stat()` rather than a full
+    `json.load`. Writers go through a temp file plus `os.replace`, so a reader
+    never sees half a file. Recomputation is single-flight: a thread lock inside
+    the process and an `flock` on `<path>.lock` across processes, so on a cold
+    key one worker computes and the others wait, then read its result.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self._max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight_locks: dict[str, threading.Lock] = {}
+
+    @staticmethod
+    def _signature(st) -> tuple:
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _remember(self, path: str, signature: tuple, payload) -> None:
+        with self._lock:
+            self._entries[path] = (signature, payload)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def read(self, path: str):
+        """Parsed contents of `path`, or None when it is missing or unreadable."""
+        try:
+            signature = self._signature(os.stat(path))
+        except OSError:
+            with self._lock:
+                self._entries.pop(path, None)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == signature:
+                self._entries.move_to_end(path)
+                return entry[1]
+
+        try:
+            with open(path, "rb") as f:
+                # Pair the content with the signature of the file actually
+                # opened, in case it was replaced between stat() and open().
+                signature = self._signature(os.fstat(f.fileno()))
+                payload = json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+        self._remember(path, signature, payload)
+        return payload
+
+    def write(self, path: str, payload, encoder=None) -> None:
+        """Atomically replace `path` with `payload` serialized as JSON."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(payload, f, cls=encoder)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @contextmanager
+    def single_flight(self, path: str):
+        """Hold the recompute lock for `path` in this process and, where
+        `flock` exists, across processes."""
+        with self._lock:
+            flight_lock = self._flight_locks.setdefault(path, threading.Lock())
+
+        with flight_lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(f"{path}.lock", "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def get_or_compute(self, path: str, is_fresh, compute, encoder=None):
+        """Return the cached payload at `path` when `is_fresh(payload)`;
+        otherwise compute it once (single-flight), store it and return it."""
+        payload = self.read(path)
+        if payload is not None and is_fresh(payload):
+            return payload
+
+        with self.single_flight(path):
+            # Another worker may have filled the file while we waited.
+            payload = self.read(path)
+            if payload is not None and is_fresh(payload):
+                return payload
+
+            payload = compute()
+            self.write(path, payload, encoder=encoder)
+            return payload
@@ -0,0 +1,52 @@
+"""add ranking snapshots table
+
+Revision ID: i1j2k3l4m5n6
+Revises: h9i0j1k2l3m4, d3f9a7c1e4b5
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'i1j2k3l4m5n6'
+down_revision = ('h9i0j1k2l3m4', 'd3f9a7c1e4b5')
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ranking_snapshots',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('ranking_kind', sa.String(length=40), nullable=False),
+        sa.Column('period', sa.String(length=20), nullable=False),
+        sa.Column('entity_type', sa.String(length=20), nullable=False),
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('total_score', sa.Float(), nullable=False),
+        sa.Column('total_likes', sa.BigInteger(), nullable=False),
+        sa.Column('total_comments', sa.BigInteger(), nullable=False),
+        sa.Column('total_followers', sa.BigInteger(), nullable=False),
+        sa.Column('followers_progress', sa.BigInteger(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'ranking_kind', 'period', 'entity_type', 'snapshot_date', 'entity_id',
+            name='uq_ranking_snapshot_entity',
+        ),
+    )
+    op.create_index(
+        'ix_ranking_snapshot_lookup',
+        'ranking_snapshots',
+        ['ranking_kind', 'period', 'entity_type', 'snapshot_date'],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_ranking_snapshot_lookup', table_name='ranking_snapshots')
+    op.drop_table('ranking_snapshots')
@@ -0,0 +1,33 @@
+"""add alert detector keyset indexes
+
+Revision ID: j2k3l4m5n6o7
+Revises: i1j2k3l4m5n6
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'j2k3l4m5n6o7'
+down_revision = 'i1j2k3l4m5n6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The alert detectors page through comments by keyset on these orders.
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.create_index('ix_comment_recorded_at_id', ['recorded_at', 'id'], unique=False)
+        batch_op.create_index(
+            'ix_comment_label_event_ts',
+            [sa.text('COALESCE(label_updated_at, recorded_at)'), 'id'],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_index('ix_comment_label_event_ts')
+        batch_op.drop_index('ix_comment_recorded_at_id')
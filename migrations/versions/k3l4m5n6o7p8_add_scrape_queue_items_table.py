@@ -0,0 +1,48 @@
+"""add scrape queue items table
+
+Revision ID: k3l4m5n6o7p8
+Revises: j2k3l4m5n6o7
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'k3l4m5n6o7p8'
+down_revision = 'j2k3l4m5n6o7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'scrape_queue_items',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('queue_date', sa.Date(), nullable=False),
+        sa.Column('page_id', sa.String(length=36), nullable=False),
+        sa.Column('platform', sa.String(length=20), nullable=False),
+        sa.Column('post_id', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('lease_owner', sa.String(length=36), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.CheckConstraint("status IN ('pending', 'leased', 'done')", name='ck_scrape_queue_status'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('queue_date', 'page_id', 'platform', 'post_id', name='uq_scrape_queue_post'),
+    )
+    op.create_index(
+        'ix_scrape_queue_lease',
+        'scrape_queue_items',
+        ['queue_date', 'status', 'id'],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_scrape_queue_lease', table_name='scrape_queue_items')
+    op.drop_table('scrape_queue_items')
@@ -0,0 +1,58 @@
+"""convert comment and scraping page ids to uuid
+
+Revision ID: l4m5n6o7p8q9
+Revises: k3l4m5n6o7p8
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'l4m5n6o7p8q9'
+down_revision = 'k3l4m5n6o7p8'
+branch_labels = None
+depends_on = None
+
+# page_id columns that were varchar(36) while pages.uuid (and posts_mv's
+# page_id) are native uuid, forcing cast-to-text joins that no index serves.
+# Their existing (page_id, ...) indexes and unique constraints are rebuilt
+# in the new type by the ALTER itself.
+_PAGE_ID_TABLES = ('comments', 'scraping_post_results', 'scrape_queue_items')
+
+
+def upgrade():
+    for table in _PAGE_ID_TABLES:
+        op.alter_column(
+            table,
+            'page_id',
+            existing_type=sa.String(length=36),
+            type_=postgresql.UUID(as_uuid=False),
+            existing_nullable=False,
+            postgresql_using='page_id::uuid',
+        )
+
+    # Sentiment by entity: pages (entity_id) -> comments by page over a
+    # comment_timestamp window.
+    op.create_index(
+        'ix_comment_page_timestamp',
+        'comments',
+        ['page_id', 'comment_timestamp'],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_comment_page_timestamp', table_name='comments')
+
+    for table in reversed(_PAGE_ID_TABLES):
+        op.alter_column(
+            table,
+            'page_id',
+            existing_type=postgresql.UUID(as_uuid=False),
+            type_=sa.String(length=36),
+            existing_nullable=False,
+            postgresql_using='page_id::text',
+        )
@@ -0,0 +1,58 @@
+"""add comment sentiment daily rollup
+
+Revision ID: m5n6o7p8q9r0
+Revises: l4m5n6o7p8q9
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'm5n6o7p8q9r0'
+down_revision = 'l4m5n6o7p8q9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'comment_sentiment_daily',
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('page_id', postgresql.UUID(as_uuid=False), nullable=False),
+        sa.Column('platform', sa.String(length=20), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('label', sa.Integer(), nullable=False),
+        sa.Column('comment_count', sa.BigInteger(), nullable=False),
+        sa.Column('confidence_sum', sa.Float(), nullable=False),
+        sa.Column('confidence_count', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('entity_id', 'page_id', 'platform', 'day', 'label'),
+    )
+    op.create_index(
+        'ix_comment_sentiment_daily_day',
+        'comment_sentiment_daily',
+        ['day', 'entity_id'],
+        unique=False,
+    )
+    # Backfill from the labels already stored; from here on the label writers
+    # keep the rollup current.
+    op.execute(
+        """
+        INSERT INTO comment_sentiment_daily
+            (entity_id, page_id, platform, day, label,
+             comment_count, confidence_sum, confidence_count)
+        SELECT p.entity_id, c.page_id, c.platform, c.comment_timestamp::date, c.label,
+               COUNT(*), COALESCE(SUM(c.confidence), 0), COUNT(c.confidence)
+        FROM comments c
+        JOIN pages p ON p.uuid = c.page_id
+        WHERE c.label IS NOT NULL
+        GROUP BY p.entity_id, c.page_id, c.platform, c.comment_timestamp::date, c.label
+        """
+    )
+
+
+def downgrade():
+    op.drop_index('ix_comment_sentiment_daily_day', table_name='comment_sentiment_daily')
+    op.drop_table('comment_sentiment_daily')
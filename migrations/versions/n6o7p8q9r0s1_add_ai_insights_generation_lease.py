@@ -0,0 +1,26 @@
+"""add ai insights generation lease
+
+Revision ID: n6o7p8q9r0s1
+Revises: m5n6o7p8q9r0
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'n6o7p8q9r0s1'
+down_revision = 'm5n6o7p8q9r0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Set while one worker generates the summary for a cache_key, so concurrent
+    # requests for the same key wait for it instead of each calling the LLM.
+    op.add_column('ai_insights_cache', sa.Column('generating_until', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('ai_insights_cache', 'generating_until')
@@ -0,0 +1,44 @@
+"""add pages history browser indexes
+
+Revision ID: o7p8q9r0s1t2
+Revises: n6o7p8q9r0s1
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'o7p8q9r0s1t2'
+down_revision = 'n6o7p8q9r0s1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The pages history browser pages by keyset on (recorded_at, id).
+    op.create_index('ix_pages_history_recorded_at_id', 'pages_history', ['recorded_at', 'id'], unique=False)
+
+    # Its brand / search filters are ILIKE '%term%' on these columns, which
+    # only trigram indexes can serve.
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_entities_name_trgm', 'entities', ['name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_pages_name_trgm', 'pages', ['name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_pages_link_trgm', 'pages', ['link'], unique=False,
+        postgresql_using='gin', postgresql_ops={'link': 'gin_trgm_ops'},
+    )
+
+
+def downgrade():
+    op.drop_index('ix_pages_link_trgm', table_name='pages')
+    op.drop_index('ix_pages_name_trgm', table_name='pages')
+    op.drop_index('ix_entities_name_trgm', table_name='entities')
+    op.drop_index('ix_pages_history_recorded_at_id', table_name='pages_history')
@@ -0,0 +1,48 @@
+"""add pages history stats rollup
+
+Revision ID: p8q9r0s1t2u3
+Revises: o7p8q9r0s1t2
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'p8q9r0s1t2u3'
+down_revision = 'o7p8q9r0s1t2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'pages_history_stats',
+        sa.Column('page_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('snapshot_count', sa.BigInteger(), nullable=False),
+        sa.Column('first_recorded_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_recorded_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['page_id'], ['pages.uuid'], ondelete='CASCADE', onupdate='CASCADE'),
+        sa.PrimaryKeyConstraint('page_id', 'day'),
+    )
+    op.create_index('ix_pages_history_stats_day', 'pages_history_stats', ['day'], unique=False)
+    # Backfill from the history already stored; from here on
+    # PageHistoryRepository.create and `flask refresh-mv` keep it current.
+    op.execute(
+        """
+        INSERT INTO pages_history_stats
+            (page_id, day, snapshot_count, first_recorded_at, last_recorded_at)
+        SELECT page_id, DATE(recorded_at), COUNT(*), MIN(recorded_at), MAX(recorded_at)
+        FROM pages_history
+        WHERE page_id IS NOT NULL
+        GROUP BY page_id, DATE(recorded_at)
+        """
+    )
+
+
+def downgrade():
+    op.drop_index('ix_pages_history_stats_day', table_name='pages_history_stats')
+    op.drop_table('pages_history_stats')
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for api/utils/gap_filling.py.
+
+Compares the vectorized fillers with the pure-Python loops they replaced
+(kept below as `legacy_*`) on synthetic multi-year daily series, and checks
+that both produce the same output.
+
+- fill_daily_series vs. EntityService.refine_daily_followers called per series
+- fill_midpoint_gaps vs. interaction_stats.interpolate_series (O(n^2) rescans)
+
+Usage:
+    python scripts/bench_gap_filling.py [--series 40] [--years 3]
+        [--missing 0.3] [--repeat 3] [--seed 7]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from api.utils.gap_filling import fill_daily_series, fill_midpoint_gaps
+
+
+def legacy_refine_daily_followers(points):
+    """EntityService.refine_daily_followers before gap_filling."""
+    if not points:
+        return []
+
+    by_day = {}
+    for day, followers in points:
+        by_day[day] = followers
+
+    start_day = min(by_day.keys())
+    end_day = max(by_day.keys())
+    total_days = (end_day - start_day).days + 1
+
+    days = [start_day + timedelta(days=i) for i in range(total_days)]
+    values = [by_day.get(day) for day in days]
+
+    def _is_missing(value):
+        return value is None or value == 0
+
+    i = 0
+    n = len(values)
+    while i < n:
+        if not _is_missing(values[i]):
+            i += 1
+            continue
+
+        run_start = i
+        while i < n and _is_missing(values[i]):
+            i += 1
+        run_end = i - 1
+
+        left_idx = run_start - 1
+        right_idx = i if i < n else None
+
+        left_val = values[left_idx] if left_idx >= 0 and not _is_missing(values[left_idx]) else None
+        right_val = values[right_idx] if right_idx is not None and not _is_missing(values[right_idx]) else None
+
+        if left_val is not None and right_val is not None:
+            gap = right_idx - left_idx
+            for k in range(run_start, run_end + 1):
+                ratio = (k - left_idx) / gap
+                interpolated = left_val + (right_val - left_val) * ratio
+                values[k] = max(0, int(round(interpolated)))
+        elif left_val is not None:
+            for k in range(run_start, run_end + 1):
+                values[k] = left_val
+        elif right_val is not None:
+            for k in range(run_start, run_end + 1):
+                values[k] = right_val
+        else:
+            for k in range(run_start, run_end + 1):
+                values[k] = 0
+
+    return list(zip(days, values))
+
+
+def legacy_interpolate_series(values):
+    """interaction_stats.interpolate_series before gap_filling."""
+    n = len(values)
+    result = values[:]
+
+    for i in range(n):
+        if i == 0:
+            continue
+
+        if result[i] is None or result[i] == 0:
+            prev = None
+            for j in range(i - 1, -1, -1):
+                if result[j] not in (0, None):
+                    prev = result[j]
+                    break
+
+            nxt = None
+            for j in range(i + 1, n):
+                if values[j] not in (0, None):
+                    nxt = values[j]
+                    break
+
+            if prev is not None and nxt is not None:
+                result[i] = (prev + nxt) / 2
+            elif prev is not None:
+                result[i] = prev
+            elif nxt is not None:
+                result[i] = nxt
+            else:
+                result[i] = 0
+
+    return result
+
+
+def _make_series(n_series: int, n_days: int, missing: float, rng: random.Random) -> dict:
+    """Follower-like series: a noisy upward walk with some days absent or 0."""
+    start = date(2023, 1, 1)
+    series = {}
+    for s in range(n_series):
+        followers = rng.randint(1_000, 1_000_000)
+        points = []
+        for d in range(n_days):
+            followers += rng.randint(-50, 200)
+            roll = rng.random()
+            if roll < missing / 2:
+                continue  # day not scraped
+            value = 0 if roll < missing else followers  # scrape returned nothing
+            points.append((start + timedelta(days=d), value))
+        series[("page", s)] = points
+    return series
+
+
+def _best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--series", type=int, default=40, help="series per run (entities x pages)")
+    parser.add_argument("--years", type=float, default=3, help="length of each series in years")
+    parser.add_argument("--missing", type=float, default=0.3, help="share of days absent or 0")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing (best is kept)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    n_days = int(args.years * 365)
+    series = _make_series(args.series, n_days, args.missing, rng)
+    print(f"{args.series} series x {n_days} days, {args.missing:.0%} missing")
+
+    legacy = {key: legacy_refine_daily_followers(points) for key, points in series.items()}
+    assert fill_daily_series(series) == legacy, "fill_daily_series differs from the legacy output"
+    t_legacy = _best_of(args.repeat, lambda: [legacy_refine_daily_followers(p) for p in series.values()])
+    t_new = _best_of(args.repeat, lambda: fill_daily_series(series))
+    print(f"refine_daily_followers  legacy {t_legacy * 1000:9.1f} ms   "
+          f"fill_daily_series  {t_new * 1000:9.1f} ms   x{t_legacy / t_new:.1f}")
+
+    # interpolate_series takes one dense series; rescanning makes the legacy
+    # version quadratic, so long gaps are what it is slow on.
+    dense = [value for _, value in next(iter(series.values()))]
+    dense[len(dense) // 3: 2 * len(dense) // 3] = [None] * (len(dense) // 3)
+    expected = legacy_interpolate_series(dense)
+    got = fill_midpoint_gaps(dense)
+    assert all(abs(a - b) <= 1e-6 * max(1.0, abs(a)) for a, b in zip(expected, got)), \
+        "fill_midpoint_gaps differs from the legacy output"
+    t_legacy = _best_of(args.repeat, lambda: legacy_interpolate_series(dense))
+    t_new = _best_of(args.repeat, lambda: fill_midpoint_gaps(dense))
+    print(f"interpolate_series      legacy {t_legacy * 1000:9.1f} ms   "
+          f"fill_midpoint_gaps {t_new * 1000:9.1f} ms   x{t_legacy / t_new:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())